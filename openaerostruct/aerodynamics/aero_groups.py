@@ -1,9 +1,29 @@
+import numpy as np
+
 import openmdao.api as om
+from openaerostruct.aerodynamics.aic_cache import AICCache
+from openaerostruct.aerodynamics.batched_viscous_wave_drag import BatchedViscousWaveDrag
 from openaerostruct.aerodynamics.compressible_states import CompressibleVLMStates
 from openaerostruct.aerodynamics.geometry import VLMGeometry
+from openaerostruct.aerodynamics.horseshoe_circulations import HorseshoeCirculations
+from openaerostruct.aerodynamics.panel_forces import PanelForces
+from openaerostruct.aerodynamics.panel_forces_surf import PanelForcesSurf
 from openaerostruct.aerodynamics.states import VLMStates
 from openaerostruct.aerodynamics.functionals import VLMFunctionals
+from openaerostruct.aerodynamics.free_wake import NUM_WAKE_PANELS, WAKE_LENGTH
+from openaerostruct.aerodynamics.stability_circulations import StabilityCirculations
+from openaerostruct.aerodynamics.stability_coefficients import StabilityCoefficients
+from openaerostruct.aerodynamics.stability_eval_velocities import StabilityEvalVelocities
+from openaerostruct.aerodynamics.stability_freestream_velocities import StabilityFreestreamVelocities
+from openaerostruct.aerodynamics.stability_panel_forces import StabilityPanelForces
+from openaerostruct.aerodynamics.stability_wave_drag import StabilityWaveDrag
+from openaerostruct.aerodynamics.trailing_alpha_velocities import TrailingAlphaVelocities
+from openaerostruct.aerodynamics.total_drag import TotalDrag
+from openaerostruct.aerodynamics.tree_code import THETA
+from openaerostruct.functionals.moment_coefficient import MomentCoefficient
+from openaerostruct.functionals.sum_areas import SumAreas
 from openaerostruct.functionals.total_aero_performance import TotalAeroPerformance
+from openaerostruct.functionals.total_lift_drag import TotalLiftDrag
 
 
 class AeroPoint(om.Group):
@@ -25,10 +45,126 @@ class AeroPoint(om.Group):
             default=False,
             desc="Turns on compressibility correction for moderate Mach number flows. Defaults to False.",
         )
+        self.options.declare(
+            "fused_aic",
+            False,
+            types=bool,
+            desc="Set to True to compute the AIC matrices directly from the vortex mesh and the evaluation points "
+            "with VortexInfluence instead of going through the GetVectors intermediate.",
+        )
+        self.options.declare(
+            "aic_solver",
+            "direct",
+            values=["direct", "gmres"],
+            desc="Solve the AIC linear system with a dense LU factorization or iteratively with GMRES, "
+            "warm-started from the previous circulations.",
+        )
+        self.options.declare(
+            "aic_preconditioner",
+            "strip",
+            values=["surface", "strip"],
+            desc="Blocks of the block-diagonal preconditioner used by the GMRES AIC solver, either one per "
+            "lifting surface or one per chordwise strip of panels.",
+        )
+        self.options.declare(
+            "aic_precision",
+            "double",
+            values=["double", "mixed"],
+            desc='Precision of the AIC linear system. With "mixed", the AIC matrices are assembled with float32 '
+            "Biot-Savart kernels and the direct AIC solver factors the matrix in float32, refining the solution "
+            "in float64. The circulations then solve the assembled system to double precision, and CL and CDi "
+            "typically agree with the double precision analysis to about 1e-6 relative.",
+        )
+        self.options.declare(
+            "aic_matrix_free",
+            False,
+            types=bool,
+            desc="Set to True to apply the derivatives of the AIC matrix, the AIC linear system and the velocities at "
+            "the force points matrix-free instead of declaring their dense partials. This cannot be used under a "
+            "linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "aic_cache",
+            None,
+            types=AICCache,
+            allow_none=True,
+            recordable=False,
+            desc="Persistent on-disk cache for the AIC matrices and their LU factorizations. Repeated analyses "
+            "with exactly the same geometry and angles, e.g. across optimization restarts, then read them back "
+            "instead of assembling and factoring them again.",
+        )
+        self.options.declare(
+            "aic_blocks",
+            False,
+            types=bool,
+            desc="Set to True to compute and factor the AIC matrix as one block per pair of lifting surfaces, so "
+            "that a change to the last surface does not recompute the blocks of the others. Only available for "
+            "incompressible analyses.",
+        )
+        self.options.declare(
+            "tree_code",
+            False,
+            types=bool,
+            desc="Set to True to evaluate the velocities at the force points with the Barnes-Hut tree code "
+            "instead of the dense AIC matrices. Only available for incompressible analyses.",
+        )
+        self.options.declare(
+            "tree_code_solve",
+            False,
+            types=bool,
+            desc="Set to True to solve for the circulations iteratively with GMRES, applying the AIC matrix "
+            "with the Barnes-Hut tree code. Only available for incompressible analyses.",
+        )
+        self.options.declare(
+            "tree_code_theta",
+            THETA,
+            types=(int, float),
+            lower=0.0,
+            desc="Opening angle of the tree code. Smaller values are more accurate, and 0 recovers the dense result.",
+        )
+        self.options.declare(
+            "free_wake",
+            False,
+            types=bool,
+            desc="Set to True to relax the wake to follow the local velocity instead of using straight trailing legs. "
+            "Only available for incompressible analyses.",
+        )
+        self.options.declare(
+            "free_wake_panels",
+            NUM_WAKE_PANELS,
+            types=int,
+            lower=1,
+            desc="Number of straight filaments along each wake line of the free wake.",
+        )
+        self.options.declare(
+            "free_wake_length",
+            WAKE_LENGTH,
+            types=(int, float),
+            lower=0.0,
+            desc="Length of the relaxed part of the free wake, in multiples of the largest chord.",
+        )
+        self.options.declare(
+            "vec_size",
+            1,
+            types=int,
+            lower=1,
+            desc="Number of flight conditions to analyze at once, for example to compute a polar. When greater "
+            "than 1, alpha and beta are arrays of this size, the AIC matrix is factored once per distinct alpha, "
+            "and CL, CD, and CM are arrays with one entry per flight condition. With ground effect, height_agl "
+            "is also an array of this size, so that the performance can be computed versus the height above "
+            "the ground in a single analysis. With rotational velocities, omega has one angular velocity per "
+            "flight condition, and the flight conditions that only differ by omega or beta share the same "
+            "factorization. Only the AIC matrices, the solve, the velocities at the force points, and the viscous "
+            "and wave drag are batched over the flight conditions. The forces, the lift, and the moments are "
+            "computed in one AeroPolarPoint subgroup per flight condition. A single flight condition keeps one "
+            "ViscousDrag and one WaveDrag per surface. Only available for incompressible analyses without the "
+            "tree code or GMRES.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
         rotational = self.options["rotational"]
+        vec_size = self.options["vec_size"]
 
         # Check for multi-section surfaces and create suitable surface dictionaries for them
         for i, surface in enumerate(surfaces):
@@ -67,6 +203,12 @@ class AeroPoint(om.Group):
 
             self.connect(name + ".normals", "aero_states." + name + "_normals")
 
+            if vec_size > 1:
+                # The performance of each flight condition is computed in its
+                # own point, which is connected below
+                self.add_subsystem(name, VLMGeometry(surface=surface))
+                continue
+
             # Connect the results from 'aero_states' to the performance groups
             self.connect("aero_states." + name + "_sec_forces", name + "_perf" + ".sec_forces")
 
@@ -101,11 +243,50 @@ class AeroPoint(om.Group):
                 ground_effect = True
 
         if self.options["compressible"] is True:
-            aero_states = CompressibleVLMStates(surfaces=surfaces, rotational=rotational)
+            if self.options["tree_code"] or self.options["tree_code_solve"]:
+                raise ValueError("The tree code is not available for compressible analyses.")
+            if self.options["free_wake"]:
+                raise ValueError("The free wake is not available for compressible analyses.")
+            if self.options["aic_blocks"]:
+                raise ValueError("The block AIC matrix is not available for compressible analyses.")
+            if vec_size > 1:
+                raise ValueError(
+                    "Analyzing several flight conditions at once is not available for compressible analyses."
+                )
+            aero_states = CompressibleVLMStates(
+                surfaces=surfaces,
+                rotational=rotational,
+                fused_aic=self.options["fused_aic"],
+                aic_solver=self.options["aic_solver"],
+                aic_preconditioner=self.options["aic_preconditioner"],
+                aic_matrix_free=self.options["aic_matrix_free"],
+                aic_precision=self.options["aic_precision"],
+                aic_cache=self.options["aic_cache"],
+            )
             prom_in = ["v", "alpha", "beta", "rho", "Mach_number"]
         else:
-            aero_states = VLMStates(surfaces=surfaces, rotational=rotational)
+            aero_states = VLMStates(
+                surfaces=surfaces,
+                rotational=rotational,
+                fused_aic=self.options["fused_aic"],
+                aic_solver=self.options["aic_solver"],
+                aic_preconditioner=self.options["aic_preconditioner"],
+                aic_matrix_free=self.options["aic_matrix_free"],
+                aic_precision=self.options["aic_precision"],
+                aic_cache=self.options["aic_cache"],
+                aic_blocks=self.options["aic_blocks"],
+                tree_code=self.options["tree_code"],
+                tree_code_solve=self.options["tree_code_solve"],
+                tree_code_theta=self.options["tree_code_theta"],
+                free_wake=self.options["free_wake"],
+                free_wake_panels=self.options["free_wake_panels"],
+                free_wake_length=self.options["free_wake_length"],
+                vec_size=vec_size,
+            )
             prom_in = ["v", "alpha", "beta", "rho"]
+            if vec_size > 1:
+                # The forces are computed in the points instead
+                prom_in.remove("rho")
         if ground_effect:
             prom_in.append("height_agl")
 
@@ -116,6 +297,97 @@ class AeroPoint(om.Group):
 
         self.add_subsystem("aero_states", aero_states, promotes_inputs=prom_in, promotes_outputs=["circulations"])
 
+        if vec_size > 1:
+            # Compute the forces, the lift, and the moments of each flight
+            # condition from its slice of the circulations and the velocities.
+            # These are not batched, so there is one subgroup per condition
+            mux = om.MuxComp(vec_size=vec_size)
+            mux.add_var("CM", shape=(3,), axis=0)
+            for surface in surfaces:
+                mux.add_var(surface["name"] + "_CL", shape=(), axis=0)
+                mux.add_var(surface["name"] + "_CDi", shape=(), axis=0)
+
+            if not self.options["user_specified_Sref"]:
+                self.add_subsystem("sum_areas", SumAreas(surfaces=surfaces), promotes_outputs=["S_ref_total"])
+                for surface in surfaces:
+                    self.connect(surface["name"] + ".S_ref", "sum_areas." + surface["name"] + "_S_ref")
+
+            for i in range(vec_size):
+                point_name = "point_{}".format(i)
+
+                self.add_subsystem(
+                    point_name,
+                    AeroPolarPoint(surfaces=surfaces),
+                    promotes_inputs=["v", "rho", "cg", "S_ref_total"],
+                )
+                self.promotes(point_name, inputs=["alpha", "beta"], src_indices=[i], src_shape=(vec_size,))
+
+                self.connect("circulations", point_name + ".circulations", src_indices=om.slicer[i, :])
+                self.connect(
+                    "aero_states.force_pts_velocities",
+                    point_name + ".force_pts_velocities",
+                    src_indices=om.slicer[i, :, :],
+                )
+                self.connect("aero_states.bound_vecs", point_name + ".bound_vecs")
+
+                for surface in surfaces:
+                    name = surface["name"]
+                    for var in ["S_ref", "widths", "chords", "b_pts"]:
+                        self.connect(name + "." + var, point_name + "." + name + "_" + var)
+
+                    self.connect(point_name + "." + name + "_perf.CL", "mux.{}_CL_{}".format(name, i))
+                    self.connect(point_name + "." + name + "_perf.CDi", "mux.{}_CDi_{}".format(name, i))
+
+                self.connect(point_name + ".CM", "mux.CM_{}".format(i))
+
+            self.add_subsystem("mux", mux, promotes_outputs=["CM"])
+
+            # Compute the viscous and wave drag of all surfaces and flight
+            # conditions at once, then the total drag
+            self.add_subsystem(
+                "viscous_wave_drag",
+                BatchedViscousWaveDrag(surfaces=surfaces, vec_size=vec_size),
+                promotes_inputs=[surface["name"] + "_t_over_c" for surface in surfaces],
+            )
+            self.promotes(
+                "viscous_wave_drag",
+                inputs=["Mach_number", "re"],
+                src_indices=np.zeros(vec_size, int),
+                src_shape=(1,),
+            )
+
+            for surface in surfaces:
+                name = surface["name"]
+
+                for var in ["S_ref", "widths", "lengths_spanwise", "lengths", "chords"]:
+                    self.connect(name + "." + var, "viscous_wave_drag." + name + "_" + var)
+                self.connect("mux." + name + "_CL", "viscous_wave_drag." + name + "_CL")
+
+                self.add_subsystem(name + "_total_drag", TotalDrag(surface=surface, vec_size=vec_size))
+                self.connect("mux." + name + "_CDi", name + "_total_drag.CDi")
+                self.connect("viscous_wave_drag." + name + "_CDv", name + "_total_drag.CDv")
+                self.connect("viscous_wave_drag." + name + "_CDw", name + "_total_drag.CDw")
+
+            self.add_subsystem(
+                "total_perf",
+                TotalLiftDrag(surfaces=surfaces, vec_size=vec_size),
+                promotes_inputs=["v", "rho", "S_ref_total"],
+                promotes_outputs=["CL", "CD"],
+            )
+            for surface in surfaces:
+                name = surface["name"]
+                self.connect(name + ".S_ref", "total_perf." + name + "_S_ref")
+                self.connect("mux." + name + "_CL", "total_perf." + name + "_CL")
+                self.connect(name + "_total_drag.CD", "total_perf." + name + "_CD")
+
+            self.set_input_defaults("alpha", val=np.zeros(vec_size), units="deg")
+            self.set_input_defaults("beta", val=np.zeros(vec_size), units="deg")
+            if ground_effect:
+                self.set_input_defaults("height_agl", val=8000.0 * np.ones(vec_size), units="m")
+            if rotational:
+                self.set_input_defaults("omega", val=np.zeros((vec_size, 3)), units="rad/s")
+            return
+
         # Explicitly connect parameters from each surface's group and the common
         # 'aero_states' group.
         # This is necessary because the VLMStates component requires information
@@ -139,3 +411,202 @@ class AeroPoint(om.Group):
 
         # Need to set the default value/unit for beta since it is often unused (unconnected)
         self.set_input_defaults("beta", val=0.0, units="deg")
+
+
+class AeroPolarPoint(om.Group):
+    """
+    Group that computes the forces, the lift, and the moments of one flight
+    condition of an `AeroPoint` that analyzes several flight conditions at
+    once, from the circulations and the velocities at the force points of
+    that flight condition. The drag of all flight conditions is computed
+    afterwards by the `AeroPoint`, since the wave drag depends on the lift.
+
+    These components are not vectorized over the flight conditions. The
+    `AeroPoint` adds one of these subgroups per flight condition, so only
+    the AIC matrices, the circulations, the velocities at the force points,
+    and the viscous and wave drag are computed for all flight conditions
+    at once, and the cost of the forces grows with the number of flight
+    conditions as with separate analyses.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+
+        # Convert ring circs to horseshoe circs
+        self.add_subsystem(
+            "horseshoe_circulations",
+            HorseshoeCirculations(surfaces=surfaces),
+            promotes_inputs=["*"],
+            promotes_outputs=["*"],
+        )
+
+        # Get sectional panel forces
+        self.add_subsystem(
+            "panel_forces", PanelForces(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"]
+        )
+
+        # Get panel forces for each lifting surface individually
+        self.add_subsystem(
+            "panel_forces_surf", PanelForcesSurf(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"]
+        )
+
+        for surface in surfaces:
+            name = surface["name"]
+
+            self.add_subsystem(
+                name + "_perf",
+                VLMFunctionals(surface=surface, batched_drag=True),
+                promotes_inputs=["v", "alpha", "beta", "rho"]
+                + [(var, name + "_" + var) for var in ["S_ref", "widths", "chords", "sec_forces"]],
+            )
+
+        self.add_subsystem(
+            "moment", MomentCoefficient(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["CM"]
+        )
+
+
+class StabilityDerivatives(om.Group):
+    """
+    Group that computes the performance of a single flight condition together
+    with its stability derivatives with respect to alpha, beta, and the roll,
+    pitch, and yaw rates p, q, and r, e.g. CL_alpha, CM_alpha, or the roll
+    damping Cl_p in CM_p[0].
+
+    The stability derivatives are analytic. Differentiating the AIC linear
+    system of the `aero_point` with respect to each flight state gives one
+    more right-hand side per state, which StabilityCirculations solves with
+    the LU factorization that the SolveMatrix component of the `aero_point`
+    already computed for the circulations. Beta and the rates only change the
+    freestream velocities, while alpha also rotates the trailing legs, whose
+    contribution TrailingAlphaVelocities adds to the right-hand side. The
+    derivatives of the circulations are then carried through the velocities,
+    the panel forces, and the lift, drag, and moment coefficients. Their own
+    derivatives with respect to the design variables are second derivatives
+    of the performance, which follow from the partials of these components.
+
+    The meshes are connected to the `aero_point` subsystem, as for an
+    `AeroPoint` with rotational velocities.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("user_specified_Sref", types=bool, default=False)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+
+        if any(surface.get("groundplane", False) for surface in surfaces):
+            raise ValueError("The stability derivatives are not available with ground effect.")
+
+        prom_in = ["v", "alpha", "beta", "omega", "Mach_number", "re", "rho", "cg"]
+        if self.options["user_specified_Sref"]:
+            prom_in.append("S_ref_total")
+
+        self.add_subsystem(
+            "aero_point",
+            AeroPoint(surfaces=surfaces, user_specified_Sref=self.options["user_specified_Sref"], rotational=True),
+            promotes_inputs=prom_in,
+            promotes_outputs=["CL", "CD", "CM"],
+        )
+        for surface in surfaces:
+            name = surface["name"]
+            self.promotes("aero_point", inputs=[(name + "_perf.t_over_c", name + "_t_over_c")])
+
+        # Derivatives of the freestream velocities and of the AIC matrix
+        # times the circulations, which only changes with alpha
+        self.add_subsystem(
+            "freestream_velocity_derivs",
+            StabilityFreestreamVelocities(surfaces=surfaces),
+            promotes_inputs=["alpha", "beta", "v", "cg"],
+            promotes_outputs=["freestream_velocity_derivs"],
+        )
+        self.add_subsystem(
+            "alpha_velocities",
+            TrailingAlphaVelocities(surfaces=surfaces),
+            promotes_inputs=["alpha"],
+            promotes_outputs=["coll_pts_alpha_velocities", "force_pts_alpha_velocities"],
+        )
+
+        # Back-solve for the derivatives of the circulations with the LU
+        # factorization of the aero_point, set in configure
+        self.add_subsystem(
+            "circulation_derivs",
+            StabilityCirculations(surfaces=surfaces),
+            promotes_inputs=["freestream_velocity_derivs", "coll_pts_alpha_velocities"],
+            promotes_outputs=["circulation_derivs"],
+        )
+
+        self.add_subsystem(
+            "velocity_derivs",
+            StabilityEvalVelocities(surfaces=surfaces),
+            promotes_inputs=["freestream_velocity_derivs", "circulation_derivs", "force_pts_alpha_velocities"],
+            promotes_outputs=["force_pts_velocity_derivs"],
+        )
+        self.add_subsystem(
+            "panel_force_derivs",
+            StabilityPanelForces(surfaces=surfaces),
+            promotes_inputs=["rho", "circulation_derivs", "force_pts_velocity_derivs"],
+            promotes_outputs=["panel_force_derivs"],
+        )
+
+        # The wave drag changes with the CL of each surface
+        for surface in surfaces:
+            if surface["with_wave"]:
+                name = surface["name"]
+                self.add_subsystem(
+                    name + "_wave_drag",
+                    StabilityWaveDrag(surface=surface),
+                    promotes_inputs=["Mach_number", ("t_over_c", name + "_t_over_c")],
+                )
+
+        coeffs_in = ["panel_force_derivs", "alpha", "beta", "v", "rho", "cg"]
+        if self.options["user_specified_Sref"]:
+            coeffs_in.append("S_ref_total")
+        else:
+            self.connect("aero_point.total_perf.S_ref_total", "stability_derivs.S_ref_total")
+
+        self.add_subsystem(
+            "stability_derivs",
+            StabilityCoefficients(surfaces=surfaces),
+            promotes_inputs=coeffs_in,
+            promotes_outputs=["*"],
+        )
+
+        states = "aero_point.aero_states."
+        self.connect(states + "coll_pts", ["freestream_velocity_derivs.coll_pts", "alpha_velocities.coll_pts"])
+        self.connect(states + "force_pts", "alpha_velocities.force_pts")
+        self.connect("aero_point.circulations", ["alpha_velocities.circulations", "panel_force_derivs.circulations"])
+        self.connect(states + "mtx", "circulation_derivs.mtx")
+        self.connect(states + "force_pts_velocities", "panel_force_derivs.force_pts_velocities")
+        self.connect(states + "bound_vecs", "panel_force_derivs.bound_vecs")
+        self.connect(states + "panel_forces", "stability_derivs.panel_forces")
+
+        for surface in surfaces:
+            name = surface["name"]
+
+            self.connect(states + name + "_vortex_mesh", "alpha_velocities." + name + "_vortex_mesh")
+            self.connect("aero_point." + name + ".normals", "circulation_derivs." + name + "_normals")
+            self.connect(states + name + "_force_pts_vel_mtx", "velocity_derivs." + name + "_force_pts_vel_mtx")
+            self.connect("aero_point." + name + ".b_pts", "stability_derivs." + name + "_b_pts")
+
+            if surface["with_wave"]:
+                for var in ["widths", "lengths_spanwise", "chords"]:
+                    self.connect("aero_point." + name + "." + var, name + "_wave_drag." + var)
+                self.connect("aero_point." + name + "_perf.CL", name + "_wave_drag.CL")
+                self.connect(name + "_wave_drag.CDw_CL", "stability_derivs." + name + "_CDw_CL")
+
+        # Only the first lifting surface sets the MAC that normalizes CM
+        name = surfaces[0]["name"]
+        for var in ["widths", "chords", "S_ref"]:
+            self.connect("aero_point." + name + "." + var, "stability_derivs." + name + "_" + var)
+
+        self.set_input_defaults("alpha", val=0.0, units="deg")
+        self.set_input_defaults("beta", val=0.0, units="deg")
+        self.set_input_defaults("omega", val=np.zeros(3), units="rad/s")
+
+    def configure(self):
+        # Share the factorization of the AIC matrix of the aero_point
+        self.circulation_derivs.options["solve_matrix"] = self.aero_point.aero_states.solve_matrix
@@ -0,0 +1,224 @@
+import numpy as np
+import scipy.sparse
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    compute_vel_mtx,
+    compute_vel_mtx_partials,
+    get_surface_options,
+    get_vel_mtx_jac_pattern,
+)
+
+
+class AICBlock(om.ExplicitComponent):
+    """
+    Compute the block of the AIC matrix that gives the normal velocities at
+    the collocation points of one lifting surface, the target, induced by
+    the vortex rings of another or the same lifting surface, the source.
+
+    Each block only depends on the vortex mesh of its source, and on the
+    collocation points and normals of its target, so it is assembled and
+    linearized again only when those inputs change. For example, when only
+    the incidence of the tail changes, the wing-on-wing block is neither
+    computed nor differentiated again. The inputs of the last evaluation are
+    kept to detect this, along with the block and its partials, which are
+    restored instead of computed again.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+        Only those of the target surface are used.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The vortex mesh of the source surface.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel of the target surface.
+
+    Returns
+    -------
+    aic[num_target, num_source] : numpy array
+        The block of the AIC matrix with the rows of the target panels and the
+        columns of the source panels.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("source", types=str, desc="Name of the surface that induces the velocities.")
+        self.options.declare("target", types=str, desc="Name of the surface the velocities are evaluated on.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        source = self.options["source"]
+        target = self.options["target"]
+
+        system_size = 0
+        for surface in surfaces:
+            nx, ny = surface["mesh"].shape[:2]
+            if surface["name"] == target:
+                target_slice = slice(system_size, system_size + (nx - 1) * (ny - 1))
+                target_shape = (nx - 1, ny - 1, 3)
+            if surface["name"] == source:
+                source_surface = surface
+            system_size += (nx - 1) * (ny - 1)
+
+        self.target_slice = target_slice
+        self.source_surface = source_surface
+
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(source_surface)
+        nx_actual = 2 * nx if ground_effect else nx
+        ny_actual = 2 * ny - 1 if symmetry else ny
+        num_source = (nx - 1) * (ny - 1)
+        num_target = target_slice.stop - target_slice.start
+
+        self.vortex_mesh_name = "{}_vortex_mesh".format(source)
+        self.normals_name = "{}_normals".format(target)
+        self.aic_name = "{}_{}_aic".format(target, source)
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        self.add_input("coll_pts", val=np.zeros((system_size, 3)), units="m")
+        self.add_input(self.vortex_mesh_name, val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+        self.add_input(self.normals_name, shape=target_shape)
+        self.add_output(self.aic_name, shape=(num_target, num_source), units="1/m")
+
+        aic_indices = np.arange(num_target * num_source).reshape((num_target, num_source))
+        target_indices = np.arange(num_target)
+
+        # The vel_mtx pattern of a single evaluation point has one entry per
+        # velocity component, which are summed with the normals, so each
+        # entry of the block gets the unique ring and vertex pairs
+        vel_rows, vel_cols = get_vel_mtx_jac_pattern(nx, ny, symmetry, ground_effect, right_wing)
+        keys, inverse = np.unique(vel_rows // 3 * nx_actual * ny_actual * 3 + vel_cols, return_inverse=True)
+        self.normals_sum = scipy.sparse.csr_matrix(
+            (np.ones(len(vel_rows)), (np.arange(len(vel_rows)), inverse.flatten())),
+            shape=(len(vel_rows), len(keys)),
+        )
+
+        rings = keys // (nx_actual * ny_actual * 3)
+        vertices = keys % (nx_actual * ny_actual * 3)
+        self.declare_partials(
+            self.aic_name,
+            self.vortex_mesh_name,
+            rows=aic_indices[:, rings].flatten(),
+            cols=np.tile(vertices, num_target),
+        )
+
+        # Each entry depends on the three coordinates of its own collocation
+        # point and normal
+        coll_pts_indices = 3 * (target_slice.start + target_indices)
+        self.declare_partials(
+            self.aic_name,
+            "coll_pts",
+            rows=np.repeat(aic_indices, 3, axis=1).flatten(),
+            cols=np.broadcast_to(
+                coll_pts_indices[:, np.newaxis, np.newaxis] + np.arange(3), (num_target, num_source, 3)
+            ).flatten(),
+        )
+        self.declare_partials(
+            self.aic_name,
+            self.normals_name,
+            rows=np.repeat(aic_indices, 3, axis=1).flatten(),
+            cols=np.broadcast_to(
+                3 * target_indices[:, np.newaxis, np.newaxis] + np.arange(3), (num_target, num_source, 3)
+            ).flatten(),
+        )
+
+        self.declare_partials(self.aic_name, "alpha", rows=aic_indices.flatten(), cols=np.zeros(aic_indices.size, int))
+
+        self.compute_inputs = None
+        self.partials_inputs = None
+
+    def _get_block_inputs(self, inputs):
+        """
+        Gather the inputs that this block actually depends on.
+        """
+        return np.concatenate(
+            [
+                inputs["alpha"],
+                inputs["coll_pts"][self.target_slice].flatten(),
+                inputs[self.vortex_mesh_name].flatten(),
+                inputs[self.normals_name].flatten(),
+            ]
+        )
+
+    def _compute_vel_mtx(self, inputs):
+        """
+        Compute the velocities induced at the target collocation points by
+        each source ring with a unit circulation.
+        """
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(self.source_surface)
+        vel_mtx = compute_vel_mtx(
+            inputs[self.vortex_mesh_name],
+            inputs["coll_pts"][self.target_slice],
+            inputs["alpha"][0],
+            symmetry,
+            ground_effect,
+            right_wing,
+            self.options["mem_budget"],
+        )
+        return vel_mtx.reshape((vel_mtx.shape[0], -1, 3))
+
+    def compute(self, inputs, outputs):
+        if not self.under_complex_step:
+            block_inputs = self._get_block_inputs(inputs)
+            if self.compute_inputs is not None and np.array_equal(block_inputs, self.compute_inputs):
+                outputs[self.aic_name] = self.aic
+                return
+
+        normals = inputs[self.normals_name].reshape((-1, 3))
+        outputs[self.aic_name] = np.einsum("ijk,ik->ij", self._compute_vel_mtx(inputs), normals)
+
+        if not self.under_complex_step:
+            self.compute_inputs = block_inputs
+            self.aic = outputs[self.aic_name].copy()
+
+    def compute_partials(self, inputs, partials):
+        block_inputs = self._get_block_inputs(inputs)
+        if self.partials_inputs is not None and np.array_equal(block_inputs, self.partials_inputs):
+            for wrt_name, data in self.partials_data.items():
+                partials[self.aic_name, wrt_name] = data
+            return
+
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(self.source_surface)
+        num_eval_points = self.target_slice.stop - self.target_slice.start
+        normals = inputs[self.normals_name].reshape((-1, 3))
+
+        # The velocity components are summed with the normals
+        compute_vel_mtx_partials(
+            inputs[self.vortex_mesh_name],
+            inputs["coll_pts"][self.target_slice],
+            inputs["alpha"][0],
+            partials[self.aic_name, self.vortex_mesh_name].reshape((num_eval_points, -1)),
+            partials[self.aic_name, "coll_pts"].reshape((num_eval_points, nx - 1, ny - 1, 3)),
+            symmetry,
+            ground_effect,
+            right_wing,
+            self.options["mem_budget"],
+            normals=normals,
+            normals_sum=self.normals_sum,
+        )
+
+        partials[self.aic_name, self.normals_name] = self._compute_vel_mtx(inputs).flatten()
+
+        # Alpha only sets the direction of the trailing legs, so we complex
+        # step the block with respect to it
+        step = 1e-40
+        alpha_inputs = {name: inputs[name] for name in ["coll_pts", self.vortex_mesh_name]}
+        alpha_inputs["alpha"] = inputs["alpha"] + step * 1j
+        vel_mtx = self._compute_vel_mtx(alpha_inputs)
+        partials[self.aic_name, "alpha"] = np.einsum("ijk,ik->ij", vel_mtx.imag / step, normals).flatten()
+
+        self.partials_inputs = block_inputs
+        self.partials_data = {
+            wrt_name: partials[self.aic_name, wrt_name].copy()
+            for wrt_name in ["alpha", "coll_pts", self.vortex_mesh_name, self.normals_name]
+        }
@@ -0,0 +1,166 @@
+"""
+Persistent on-disk cache for the AIC matrices and their factorizations.
+
+The AIC matrices only depend on the geometry of the vortex mesh, the
+evaluation points and the direction of the trailing legs, so optimization
+restarts and repeated analyses of the same baseline mesh assemble and factor
+the exact same matrices again. With an AICCache passed to the AIC components,
+the arrays they compute are stored in a directory, one subdirectory per
+entry with one .npy file per array, under a key that hashes the exact values
+of the inputs they were computed from. Later analyses with bitwise identical
+inputs, in this or any other process that shares the directory, read the
+arrays back as memory maps instead of computing them.
+
+The total size of the entries is bounded by `max_bytes`. Entries are evicted
+in least recently used order, where using an entry updates the modification
+time of its subdirectory.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+
+# Default bound on the total size of the cached arrays
+CACHE_MAX_BYTES = 2**30
+
+
+class AICCache(object):
+    """
+    Directory-backed cache of arrays, keyed on the exact values of the
+    arrays they were computed from.
+
+    Parameters
+    ----------
+    directory : str
+        Directory that holds the cache entries. It is created if it does not
+        exist, and can be shared between processes.
+    max_bytes : int
+        Bound on the total size of the cached arrays in bytes. The least
+        recently used entries are evicted once it is exceeded.
+    """
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, tags, arrays):
+        """
+        Hash the exact values of the arrays, along with their shapes and data
+        types, and the tags that identify what is computed from them.
+
+        Parameters
+        ----------
+        tags : tuple
+            Options of the computation that are not held in the arrays. This
+            must have a deterministic repr.
+        arrays : list of numpy arrays
+            Arrays the cached values are computed from.
+
+        Returns
+        -------
+        key : str
+            Hexadecimal digest that identifies the cache entry.
+        """
+        sha = hashlib.sha256(repr(tags).encode())
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            sha.update(repr((array.shape, array.dtype.str)).encode())
+            sha.update(array.data)
+        return sha.hexdigest()
+
+    def load(self, key):
+        """
+        Read the arrays of an entry as read-only memory maps.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, from get_key.
+
+        Returns
+        -------
+        arrays : dict or None
+            The cached arrays by name, or None if there is no such entry.
+        """
+        path = os.path.join(self.directory, key)
+
+        try:
+            arrays = {
+                file_name[:-4]: np.load(os.path.join(path, file_name), mmap_mode="r")
+                for file_name in os.listdir(path)
+                if file_name.endswith(".npy")
+            }
+            os.utime(path)
+        except (OSError, ValueError):
+            # The entry does not exist, or was evicted while we read it
+            return None
+
+        return arrays
+
+    def save(self, key, arrays):
+        """
+        Store the arrays of an entry, then evict the least recently used
+        entries until the cache fits in max_bytes.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, from get_key.
+        arrays : dict
+            The arrays to cache by name.
+        """
+        if sum(array.nbytes for array in arrays.values()) > self.max_bytes:
+            return
+
+        path = os.path.join(self.directory, key)
+
+        # Write the entry under a temporary name so that other processes
+        # never see it half-written
+        tmp_path = tempfile.mkdtemp(dir=self.directory, prefix=".tmp")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, name + ".npy"), array)
+
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self._evict()
+
+    def _evict(self):
+        """
+        Remove the least recently used entries until the cache fits in
+        max_bytes.
+        """
+        entries = []
+        total_bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                num_bytes = sum(file_entry.stat().st_size for file_entry in os.scandir(entry.path))
+                entries.append((entry.stat().st_mtime, num_bytes, entry.path))
+            except OSError:
+                continue
+            total_bytes += num_bytes
+
+        for _, num_bytes, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= num_bytes
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        for entry in os.scandir(self.directory):
+            if entry.is_dir():
+                shutil.rmtree(entry.path, ignore_errors=True)
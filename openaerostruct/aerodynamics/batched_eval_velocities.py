@@ -0,0 +1,221 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.batched_solve_matrix import (
+    compute_grouped_vel_mtx,
+    get_condition_vortex_meshes,
+    group_flight_conditions,
+)
+from openaerostruct.aerodynamics.biot_savart import TILE_MEM_BUDGET, apply_system_vel_mtx_deriv
+from openaerostruct.aerodynamics.tree_code import compute_trailing_alpha_deriv
+
+
+class BatchedEvalVelocities(om.ExplicitComponent):
+    """
+    Compute the total velocities at each of the evaluation points for several
+    flight conditions at once, like EvalVelocities. This replaces the
+    combination of GetVectors, EvalVelMtx, and EvalVelocities when analyzing
+    a polar.
+
+    The AIC matrix is computed once per distinct value of alpha, which sets
+    the direction of the trailing legs, and applied to the circulations of
+    every flight condition that shares it. With ground effect, it is
+    computed once per distinct pair of alpha and ground plane images, as in
+    BatchedSolveMatrix. The derivatives are computed matrix-free, so this
+    component cannot be used under a linear solver that assembles the
+    Jacobian.
+
+    Parameters
+    ----------
+    alpha[vec_size] : numpy array
+        The angle of attack for the aircraft (all lifting surfaces) in degrees,
+        for each flight condition.
+    eval_name[num_eval_points, 3] : numpy array
+        These are the evaluation points, either collocation or force points.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+        With ground effect, there is one per flight condition along a leading
+        dimension of size vec_size.
+    freestream_velocities[vec_size, system_size, 3] : numpy array
+        The rotated freestream velocities at each evaluation point for all
+        lifting surfaces, for each flight condition.
+    circulations[vec_size, system_size] : numpy array
+        The vortex ring circulations obtained from solving the AIC linear
+        system for each flight condition.
+
+    Returns
+    -------
+    velocities[vec_size, num_eval_points, 3] : numpy array
+        The actual velocities experienced at the evaluation points for each
+        lifting surface in the system, for each flight condition. This is the
+        summation of the freestream velocities and the induced velocities
+        caused by the circulations.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("eval_name", types=str)
+        self.options.declare("num_eval_points", types=int)
+        self.options.declare("vec_size", types=int, lower=1, desc="Number of flight conditions.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+        vec_size = self.options["vec_size"]
+
+        system_size = 0
+        self.ground_effect = False
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+                self.ground_effect = True
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            shape = (nx_actual, ny_actual, 3)
+            if surface.get("groundplane", False) and vec_size > 1:
+                shape = (vec_size,) + shape
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros(shape), units="m")
+
+        self.system_size = system_size
+
+        self.add_input("alpha", val=1.0, shape=vec_size, units="deg", tags=["mphys_input"])
+        self.add_input(eval_name, val=np.zeros((num_eval_points, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(vec_size, system_size, 3), units="m/s")
+        self.add_input("circulations", shape=(vec_size, system_size), units="m**2/s")
+
+        self.add_output("{}_velocities".format(eval_name), shape=(vec_size, num_eval_points, 3), units="m/s")
+
+    def _get_vortex_meshes(self, inputs):
+        """
+        Get the vortex meshes, or their seeds, with a leading dimension for
+        the flight conditions for the surfaces with ground effect.
+        """
+        vec_size = self.options["vec_size"]
+
+        vortex_meshes = []
+        for surface in self.options["surfaces"]:
+            vortex_mesh_name = "{}_vortex_mesh".format(surface["name"])
+            if vortex_mesh_name not in inputs:
+                vortex_meshes.append(None)
+            elif surface.get("groundplane", False):
+                vortex_mesh = inputs[vortex_mesh_name]
+                vortex_meshes.append(vortex_mesh.reshape((vec_size, -1, vortex_mesh.shape[-2], 3)))
+            else:
+                vortex_meshes.append(inputs[vortex_mesh_name])
+        return vortex_meshes
+
+    def compute(self, inputs, outputs):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+
+        # Group the flight conditions by their wake direction and ground plane
+        self.groups = group_flight_conditions(surfaces, vortex_meshes, inputs["alpha"])
+        self.vel_mtx = compute_grouped_vel_mtx(
+            surfaces, vortex_meshes, inputs[eval_name], inputs["alpha"], self.groups, self.options["mem_budget"]
+        )
+        self.dvel_dalpha = None
+
+        velocities = outputs["{}_velocities".format(eval_name)]
+        velocities[:] = inputs["freestream_velocities"]
+
+        for vel_mtx, group in zip(self.vel_mtx, self.groups):
+            velocities[group] += np.einsum("ijk,pj->pik", vel_mtx, inputs["circulations"][group])
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        velocities_name = "{}_velocities".format(eval_name)
+
+        if velocities_name not in d_outputs:
+            return
+
+        d_velocities = d_outputs[velocities_name]
+        alpha = inputs["alpha"]
+        circulations = inputs["circulations"]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+
+        if "alpha" in d_inputs and self.dvel_dalpha is None:
+            self.dvel_dalpha = np.zeros(d_velocities.shape)
+            for group in self.groups:
+                self.dvel_dalpha[group] = compute_trailing_alpha_deriv(
+                    surfaces,
+                    get_condition_vortex_meshes(surfaces, vortex_meshes, group[0]),
+                    inputs[eval_name],
+                    alpha[group[0]],
+                    circulations[group],
+                )
+
+        if mode == "fwd":
+            if "freestream_velocities" in d_inputs:
+                d_velocities += d_inputs["freestream_velocities"]
+            if "circulations" in d_inputs:
+                for vel_mtx, group in zip(self.vel_mtx, self.groups):
+                    d_velocities[group] += np.einsum("ijk,pj->pik", vel_mtx, d_inputs["circulations"][group])
+            if "alpha" in d_inputs:
+                d_velocities += self.dvel_dalpha * d_inputs["alpha"][:, np.newaxis, np.newaxis]
+        else:
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_velocities
+            if "circulations" in d_inputs:
+                for vel_mtx, group in zip(self.vel_mtx, self.groups):
+                    d_inputs["circulations"][group] += np.einsum("ijk,pik->pj", vel_mtx, d_velocities[group])
+            if "alpha" in d_inputs:
+                d_inputs["alpha"] += np.einsum("pij,pij->p", self.dvel_dalpha, d_velocities)
+
+        d_eval_points = d_inputs[eval_name] if eval_name in d_inputs else None
+        d_vortex_meshes = self._get_vortex_meshes(d_inputs)
+
+        if d_eval_points is None and all(d_vortex_mesh is None for d_vortex_mesh in d_vortex_meshes):
+            return
+
+        # The flight conditions that share the same wake direction also share
+        # the derivatives of the Biot-Savart kernels, unless they have their
+        # own ground plane images and therefore their own seeds
+        if self.ground_effect:
+            deriv_groups = [[index] for index in range(len(alpha))]
+        else:
+            deriv_groups = self.groups
+
+        for group in deriv_groups:
+            d_velocities_group = d_velocities[group]
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                get_condition_vortex_meshes(surfaces, vortex_meshes, group[0]),
+                inputs[eval_name],
+                alpha[group[0]],
+                circulations[group],
+                get_condition_vortex_meshes(surfaces, d_vortex_meshes, group[0]),
+                d_eval_points,
+                d_velocities_group,
+                mode,
+                self.options["mem_budget"],
+            )
+            if mode == "fwd":
+                d_velocities[group] = d_velocities_group
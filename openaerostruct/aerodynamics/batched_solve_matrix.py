@@ -0,0 +1,379 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    apply_system_vel_mtx_deriv,
+    compute_batched_system_vel_mtx,
+)
+from openaerostruct.aerodynamics.tree_code import compute_trailing_alpha_deriv
+
+
+def group_flight_conditions(surfaces, vortex_meshes, alpha):
+    """
+    Group the flight conditions that share the same AIC matrix, which are
+    those with the same alpha and, with ground effect, the same ground plane
+    images.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, with one per flight
+        condition along a leading dimension for the surfaces with ground
+        effect.
+    alpha[vec_size] : numpy array
+        The angle of attack of each flight condition.
+
+    Returns
+    -------
+    groups : list of numpy arrays
+        The indices of the flight conditions in each group.
+    """
+    keys = [alpha[:, np.newaxis]]
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        if surface.get("groundplane", False):
+            keys.append(vortex_mesh.reshape((len(alpha), -1)))
+
+    _, groups = np.unique(np.hstack(keys), axis=0, return_inverse=True)
+    groups = groups.flatten()
+    return [np.where(groups == index)[0] for index in range(np.max(groups) + 1)]
+
+
+def get_condition_vortex_meshes(surfaces, vortex_meshes, conditions):
+    """
+    Get the vortex meshes of the given flight conditions, which only differ
+    for the surfaces with ground effect. Any of the vortex meshes may be None.
+    """
+    return [
+        vortex_mesh[conditions] if vortex_mesh is not None and surface.get("groundplane", False) else vortex_mesh
+        for surface, vortex_mesh in zip(surfaces, vortex_meshes)
+    ]
+
+
+def compute_grouped_vel_mtx(surfaces, vortex_meshes, eval_points, alpha, groups, mem_budget):
+    """
+    Compute the AIC matrix of each group of flight conditions. The groups
+    with the same alpha only differ by their ground plane images, so they
+    are computed together with `compute_batched_system_vel_mtx`.
+
+    Returns
+    -------
+    vel_mtxs : list of numpy arrays
+        The AIC matrix of each group, with shape [num_eval_points, system_size, 3].
+    """
+    conditions = np.array([group[0] for group in groups])
+    vel_mtxs = [None] * len(groups)
+
+    for value in np.unique(alpha[conditions]):
+        indices = np.where(alpha[conditions] == value)[0]
+        batch = compute_batched_system_vel_mtx(
+            surfaces,
+            get_condition_vortex_meshes(surfaces, vortex_meshes, conditions[indices]),
+            eval_points,
+            value,
+            mem_budget,
+        )
+        for index, vel_mtx in zip(indices, batch):
+            vel_mtxs[index] = vel_mtx
+
+    return vel_mtxs
+
+
+class BatchedSolveMatrix(om.ImplicitComponent):
+    """
+    Solve the AIC linear system to obtain the vortex ring circulations for
+    several flight conditions at once. This replaces the combination of
+    GetVectors, EvalVelMtx, VLMMtxRHSComp, and SolveMatrix for the
+    collocation points when analyzing a polar.
+
+    The AIC matrix only depends on the flight condition through the
+    direction of the trailing legs, which follows alpha. The matrix is
+    therefore assembled and factored once per distinct value of alpha, and
+    the right-hand sides of all flight conditions that share it, such as a
+    sweep in sideslip, are solved in a single LAPACK call.
+
+    With ground effect, the ground plane images also depend on alpha and on
+    the height above the ground of each flight condition, so the matrix is
+    factored once per distinct pair of them. The influence of the surfaces
+    themselves is still computed once per alpha, and that of the images of
+    all heights in a single batched call to the Biot-Savart kernels.
+
+    The derivatives are computed matrix-free, so this component cannot be
+    used under a linear solver that assembles the Jacobian.
+
+    Parameters
+    ----------
+    alpha[vec_size] : numpy array
+        The angle of attack for the aircraft (all lifting surfaces) in degrees,
+        for each flight condition.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+        With ground effect, there is one per flight condition along a leading
+        dimension of size vec_size.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel, computed as the cross of the two
+        diagonals from the mesh points.
+    freestream_velocities[vec_size, system_size, 3] : numpy array
+        The rotated freestream velocities at each collocation point for all
+        lifting surfaces, for each flight condition.
+
+    Returns
+    -------
+    circulations[vec_size, system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system
+        for each flight condition.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("vec_size", types=int, lower=1, desc="Number of flight conditions.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of collocation points.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
+
+        system_size = 0
+        self.ground_effect = False
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+                self.ground_effect = True
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            shape = (nx_actual, ny_actual, 3)
+            if surface.get("groundplane", False) and vec_size > 1:
+                shape = (vec_size,) + shape
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros(shape), units="m")
+            self.add_input("{}_normals".format(name), shape=(nx - 1, ny - 1, 3))
+
+        self.system_size = system_size
+
+        self.add_input("alpha", val=1.0, shape=vec_size, units="deg", tags=["mphys_input"])
+        self.add_input("coll_pts", val=np.zeros((system_size, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(vec_size, system_size, 3), units="m/s")
+        self.add_output("circulations", shape=(vec_size, system_size), units="m**2/s")
+
+        self.mtx_inputs = None
+
+    def _get_vortex_meshes(self, inputs):
+        """
+        Get the vortex meshes, or their seeds, with a leading dimension for
+        the flight conditions for the surfaces with ground effect.
+        """
+        vec_size = self.options["vec_size"]
+
+        vortex_meshes = []
+        for surface in self.options["surfaces"]:
+            vortex_mesh_name = "{}_vortex_mesh".format(surface["name"])
+            if vortex_mesh_name not in inputs:
+                vortex_meshes.append(None)
+            elif surface.get("groundplane", False):
+                vortex_mesh = inputs[vortex_mesh_name]
+                vortex_meshes.append(vortex_mesh.reshape((vec_size, -1, vortex_mesh.shape[-2], 3)))
+            else:
+                vortex_meshes.append(inputs[vortex_mesh_name])
+        return vortex_meshes
+
+    def _update_mtx(self, inputs):
+        """
+        Assemble and factor the AIC matrix for each group of flight
+        conditions, unless the geometry and the angles have not changed since
+        the last time.
+        """
+        surfaces = self.options["surfaces"]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        normals = np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in surfaces]
+        )
+
+        mtx_inputs = np.concatenate(
+            [inputs["alpha"], inputs["coll_pts"].flatten(), normals.flatten()]
+            + [vortex_mesh.flatten() for vortex_mesh in vortex_meshes]
+        )
+        if self.mtx_inputs is not None and np.array_equal(mtx_inputs, self.mtx_inputs):
+            return
+        self.mtx_inputs = mtx_inputs
+
+        self.normals = normals
+
+        # Group the flight conditions by their wake direction and ground plane
+        self.groups = group_flight_conditions(surfaces, vortex_meshes, inputs["alpha"])
+        vel_mtxs = compute_grouped_vel_mtx(
+            surfaces, vortex_meshes, inputs["coll_pts"], inputs["alpha"], self.groups, self.options["mem_budget"]
+        )
+
+        self.mtx = []
+        self.lu = []
+        for vel_mtx in vel_mtxs:
+            mtx = np.einsum("ijk,ik->ij", vel_mtx, normals)
+            self.mtx.append(mtx)
+            self.lu.append(lu_factor(mtx))
+
+        self.velocities = None
+        self.dvel_dalpha = None
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        self._update_mtx(inputs)
+
+        normal_velocities = np.einsum("pij,ij->pi", inputs["freestream_velocities"], self.normals)
+        for mtx, group in zip(self.mtx, self.groups):
+            residuals["circulations"][group] = outputs["circulations"][group].dot(mtx.T) + normal_velocities[group]
+
+    def solve_nonlinear(self, inputs, outputs):
+        self._update_mtx(inputs)
+
+        rhs = -np.einsum("pij,ij->pi", inputs["freestream_velocities"], self.normals)
+        for lu, group in zip(self.lu, self.groups):
+            outputs["circulations"][group] = lu_solve(lu, rhs[group].T).T
+
+        self.velocities = None
+        self.dvel_dalpha = None
+
+    def linearize(self, inputs, outputs, partials):
+        self._update_mtx(inputs)
+
+        # These depend on the circulations, so they are computed again when needed
+        self.velocities = None
+        self.dvel_dalpha = None
+
+    def apply_linear(self, inputs, outputs, d_inputs, d_outputs, d_residuals, mode):
+        surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
+
+        if "circulations" not in d_residuals:
+            return
+
+        self._update_mtx(inputs)
+
+        d_circ_residuals = d_residuals["circulations"]
+        circulations = outputs["circulations"]
+        alpha = inputs["alpha"]
+        normals = self.normals
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+
+        if "alpha" in d_inputs and self.dvel_dalpha is None:
+            self.dvel_dalpha = np.zeros((vec_size, self.system_size, 3))
+            for group in self.groups:
+                self.dvel_dalpha[group] = compute_trailing_alpha_deriv(
+                    surfaces,
+                    get_condition_vortex_meshes(surfaces, vortex_meshes, group[0]),
+                    inputs["coll_pts"],
+                    alpha[group[0]],
+                    circulations[group],
+                )
+
+        if any("{}_normals".format(surface["name"]) in d_inputs for surface in surfaces) and self.velocities is None:
+            # The velocities themselves, not just their normal components
+            self.velocities = inputs["freestream_velocities"].copy()
+            vel_mtxs = compute_grouped_vel_mtx(
+                surfaces, vortex_meshes, inputs["coll_pts"], alpha, self.groups, self.options["mem_budget"]
+            )
+            for vel_mtx, group in zip(vel_mtxs, self.groups):
+                self.velocities[group] += np.einsum("ijk,pj->pik", vel_mtx, circulations[group])
+
+        if mode == "fwd":
+            d_velocities = np.zeros((vec_size, self.system_size, 3))
+            if "circulations" in d_outputs:
+                for mtx, group in zip(self.mtx, self.groups):
+                    d_circ_residuals[group] += d_outputs["circulations"][group].dot(mtx.T)
+            if "freestream_velocities" in d_inputs:
+                d_velocities += d_inputs["freestream_velocities"]
+            if "alpha" in d_inputs:
+                d_velocities += self.dvel_dalpha * d_inputs["alpha"][:, np.newaxis, np.newaxis]
+        else:
+            d_velocities = d_circ_residuals[:, :, np.newaxis] * normals
+            if "circulations" in d_outputs:
+                for mtx, group in zip(self.mtx, self.groups):
+                    d_outputs["circulations"][group] += d_circ_residuals[group].dot(mtx)
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_velocities
+            if "alpha" in d_inputs:
+                d_inputs["alpha"] += np.einsum("pij,pij->p", self.dvel_dalpha, d_velocities)
+
+        d_coll_pts = d_inputs["coll_pts"] if "coll_pts" in d_inputs else None
+        d_vortex_meshes = self._get_vortex_meshes(d_inputs)
+
+        # The flight conditions that share the same wake direction also share
+        # the derivatives of the Biot-Savart kernels, unless they have their
+        # own ground plane images and therefore their own seeds
+        if self.ground_effect:
+            deriv_groups = [[index] for index in range(vec_size)]
+        else:
+            deriv_groups = self.groups
+
+        for group in deriv_groups:
+            d_velocities_group = d_velocities[group]
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                get_condition_vortex_meshes(surfaces, vortex_meshes, group[0]),
+                inputs["coll_pts"],
+                alpha[group[0]],
+                circulations[group],
+                get_condition_vortex_meshes(surfaces, d_vortex_meshes, group[0]),
+                d_coll_pts,
+                d_velocities_group,
+                mode,
+                self.options["mem_budget"],
+            )
+            if mode == "fwd":
+                d_velocities[group] = d_velocities_group
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            normals_name = "{}_normals".format(surface["name"])
+
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            if normals_name in d_inputs:
+                if mode == "fwd":
+                    d_circ_residuals[:, ind_1:ind_2] += np.einsum(
+                        "ij,pij->pi", d_inputs[normals_name].reshape((-1, 3)), self.velocities[:, ind_1:ind_2]
+                    )
+                else:
+                    d_inputs[normals_name] += np.einsum(
+                        "pij,pi->ij", self.velocities[:, ind_1:ind_2], d_circ_residuals[:, ind_1:ind_2]
+                    ).reshape((nx - 1, ny - 1, 3))
+
+            ind_1 = ind_2
+
+        if mode == "fwd":
+            d_circ_residuals += np.einsum("pij,ij->pi", d_velocities, normals)
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        for lu, group in zip(self.lu, self.groups):
+            if mode == "fwd":
+                d_outputs["circulations"][group] = lu_solve(lu, d_residuals["circulations"][group].T, trans=0).T
+            else:
+                d_residuals["circulations"][group] = lu_solve(lu, d_outputs["circulations"][group].T, trans=1).T
@@ -0,0 +1,401 @@
+import numpy as np
+import scipy.sparse
+
+import openmdao.api as om
+
+
+def _stack_surfaces(surfaces):
+    """
+    Gather the layout of the panels of several lifting surfaces stacked into
+    single arrays, with the spanwise panels of each surface after those of
+    the previous one.
+
+    Returns
+    -------
+    stack : dict
+        The start index of the panels of each surface, the slices of the
+        panels and of the spanwise mesh slices of each surface, the sparse
+        matrix that averages the two mesh slices of each panel, the symmetry
+        factor of each surface, and the airfoil properties of each panel.
+    """
+    panel_slices = []
+    node_slices = []
+    num_panels = 0
+    num_nodes = 0
+    for surface in surfaces:
+        ny = surface["mesh"].shape[1]
+        panel_slices.append(slice(num_panels, num_panels + ny - 1))
+        node_slices.append(slice(num_nodes, num_nodes + ny))
+        num_panels += ny - 1
+        num_nodes += ny
+
+    panel_indices = np.arange(num_panels)
+    left_nodes = np.concatenate([np.arange(s.start, s.stop - 1) for s in node_slices]).astype(int)
+    mid_mtx = scipy.sparse.csr_matrix(
+        (0.5 * np.ones(2 * num_panels), (np.tile(panel_indices, 2), np.concatenate([left_nodes, left_nodes + 1]))),
+        shape=(num_panels, num_nodes),
+    )
+
+    counts = [s.stop - s.start for s in panel_slices]
+
+    return {
+        "starts": np.array([s.start for s in panel_slices], int),
+        "counts": np.array(counts, int),
+        "panel_slices": panel_slices,
+        "node_slices": node_slices,
+        "mid_mtx": mid_mtx,
+        "sym": np.array([2.0 if surface["symmetry"] else 1.0 for surface in surfaces]),
+        "k_lam": np.repeat([surface.get("k_lam", 0.0) for surface in surfaces], counts),
+        "c_max_t": np.repeat([surface.get("c_max_t", 1.0) for surface in surfaces], counts),
+    }
+
+
+class BatchedViscousWaveDrag(om.ExplicitComponent):
+    """
+    Compute the skin friction and wave drag of all lifting surfaces for
+    several flight conditions at once. This computes the same CDv as
+    ViscousDrag and the same CDw as WaveDrag, but the spanwise panels of all
+    surfaces are stacked into single arrays that are evaluated for all flight
+    conditions in one vectorized pass, instead of with one component per
+    surface and flight condition. The drag of the surfaces without
+    with_viscous or with_wave is 0.
+
+    This is only used by an `AeroPoint` with several flight conditions. The
+    single-condition `AeroPoint` and the aerostructural groups keep one
+    ViscousDrag and one WaveDrag per surface in `VLMFunctionals`, whose
+    promoted inputs, such as `<surface>_perf.t_over_c`, are connected by
+    the user.
+
+    Parameters
+    ----------
+    re[vec_size] : numpy array
+        Dimensionalized (1/length) Reynolds number of each flight condition.
+    Mach_number[vec_size] : numpy array
+        Mach number of each flight condition.
+    S_ref : float
+        The reference area of the lifting surface.
+    widths[ny-1] : numpy array
+        The spanwise width of each panel.
+    lengths_spanwise[ny-1] : numpy array
+        The spanwise length of each panel at 1/4 chord, rotated by the sweep
+        angle.
+    lengths[ny] : numpy array
+        The sum of the lengths of each line segment along a chord section.
+    chords[ny] : numpy array
+        The chord length of each mesh slice.
+    t_over_c[ny-1] : numpy array
+        The streamwise thickness-to-chord ratio of each VLM panel.
+    CL[vec_size] : numpy array
+        The CL of the lifting surface in each flight condition, used for the
+        wave drag estimation.
+
+    Returns
+    -------
+    CDv[vec_size] : numpy array
+        Viscous drag coefficient of the lifting surface in each flight
+        condition.
+    CDw[vec_size] : numpy array
+        Wave drag coefficient of the lifting surface in each flight condition.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("vec_size", 1, types=int, lower=1, desc="Number of flight conditions.")
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
+
+        self.viscous_surfaces = [surface for surface in surfaces if surface["with_viscous"]]
+        self.wave_surfaces = [surface for surface in surfaces if surface["with_wave"]]
+        self.viscous_stack = _stack_surfaces(self.viscous_surfaces) if self.viscous_surfaces else None
+        self.wave_stack = _stack_surfaces(self.wave_surfaces) if self.wave_surfaces else None
+
+        # Airfoil technology level (for NASA SC airfoil)
+        self.ka = 0.95
+
+        self.add_input("re", val=5.0e6 * np.ones(vec_size), units="1/m")
+        self.add_input("Mach_number", val=1.6 * np.ones(vec_size))
+
+        for surface in surfaces:
+            name = surface["name"]
+            ny = surface["mesh"].shape[1]
+
+            self.add_input(name + "_S_ref", val=1.0, units="m**2")
+            self.add_input(name + "_widths", val=np.ones(ny - 1) * 0.2, units="m")
+            self.add_input(name + "_lengths_spanwise", val=np.arange(ny - 1) + 1.0, units="m")
+            self.add_input(name + "_lengths", val=np.ones(ny), units="m")
+            self.add_input(name + "_chords", val=np.ones(ny), units="m")
+            self.add_input(name + "_t_over_c", val=np.arange(ny - 1))
+            self.add_input(name + "_CL", val=0.33 * np.ones(vec_size))
+
+            self.add_output(name + "_CDv", val=np.zeros(vec_size))
+            self.add_output(name + "_CDw", val=np.zeros(vec_size))
+
+        # Each flight condition depends on its own Mach number, Reynolds
+        # number, and CL, and on all of the geometry of the surface
+        conditions = np.arange(vec_size)
+        for out_name, drag_surfaces, wrt_names in [
+            ("CDv", self.viscous_surfaces, ["widths", "lengths_spanwise", "lengths", "t_over_c"]),
+            ("CDw", self.wave_surfaces, ["widths", "lengths_spanwise", "chords", "t_over_c"]),
+        ]:
+            for surface in drag_surfaces:
+                name = surface["name"]
+                ny = surface["mesh"].shape[1]
+
+                self.declare_partials(name + "_" + out_name, "Mach_number", rows=conditions, cols=conditions)
+                if out_name == "CDv":
+                    self.declare_partials(name + "_CDv", "re", rows=conditions, cols=conditions)
+                    self.declare_partials(name + "_CDv", name + "_S_ref", rows=conditions, cols=np.zeros(vec_size, int))
+                else:
+                    self.declare_partials(name + "_CDw", name + "_CL", rows=conditions, cols=conditions)
+
+                for wrt_name in wrt_names:
+                    size = ny if wrt_name in ["lengths", "chords"] else ny - 1
+                    self.declare_partials(
+                        name + "_" + out_name,
+                        name + "_" + wrt_name,
+                        rows=np.repeat(conditions, size),
+                        cols=np.tile(np.arange(size), vec_size),
+                    )
+
+        self.set_check_partial_options(wrt="*", method="cs", step=1e-50)
+
+    def _get_stacked(self, inputs, surfaces, var):
+        return np.concatenate([inputs[surface["name"] + "_" + var] for surface in surfaces])
+
+    def _compute_viscous(self, inputs):
+        """
+        Compute the skin friction drag of each panel of the viscous surfaces
+        in each flight condition, with the intermediate values needed for its
+        derivatives.
+        """
+        stack = self.viscous_stack
+        k_lam = stack["k_lam"]
+
+        re = inputs["re"][:, np.newaxis]
+        M = inputs["Mach_number"][:, np.newaxis]
+        widths = self._get_stacked(inputs, self.viscous_surfaces, "widths")
+        cos_sweep = widths / self._get_stacked(inputs, self.viscous_surfaces, "lengths_spanwise")
+        t_over_c = self._get_stacked(inputs, self.viscous_surfaces, "t_over_c")
+
+        # Take panel chord length to be average of its edge lengths
+        chords = stack["mid_mtx"].dot(self._get_stacked(inputs, self.viscous_surfaces, "lengths"))
+        Re_c = re * chords
+
+        # The laminar and turbulent parts of the skin friction that apply for
+        # the fraction of chord with laminar flow of each panel, see
+        # eq. 12.27 of Raymer for turbulent Cf
+        k_lam_safe = np.where(k_lam > 0.0, k_lam, 1.0)
+        B = (1.0 + 0.144 * M**2) ** 0.65
+        cdturb_total = (k_lam < 1.0) * 0.455 / np.log10(Re_c) ** 2.58 / B
+        cdlam_tr = (k_lam > 0.0) * 1.328 / np.sqrt(Re_c * k_lam_safe)
+        cdturb_tr = ((k_lam > 0.0) & (k_lam < 1.0)) * 0.455 / np.log10(Re_c * k_lam_safe) ** 2.58 / B
+
+        cd = (cdlam_tr - cdturb_tr) * k_lam + cdturb_total
+
+        # Multiply by section width to get total normalized drag for section
+        d_over_q = 2 * cd * chords
+
+        # Calculate form factor (Raymer Eq. 12.30)
+        k_FF = 1.34 * M**0.18 * (1.0 + 0.6 * t_over_c / stack["c_max_t"] + 100 * t_over_c**4)
+        FF = k_FF * cos_sweep**0.28
+
+        return {
+            "re": re,
+            "M": M,
+            "widths": widths,
+            "cos_sweep": cos_sweep,
+            "t_over_c": t_over_c,
+            "chords": chords,
+            "Re_c": Re_c,
+            "k_lam_safe": k_lam_safe,
+            "cdturb_total": cdturb_total,
+            "cdlam_tr": cdlam_tr,
+            "cdturb_tr": cdturb_tr,
+            "cd": cd,
+            "d_over_q": d_over_q,
+            "k_FF": k_FF,
+            "FF": FF,
+        }
+
+    def _compute_wave(self, inputs):
+        """
+        Compute the critical Mach number of each wave drag surface in each
+        flight condition, with the intermediate values needed for its
+        derivatives.
+        """
+        stack = self.wave_stack
+        starts = stack["starts"]
+
+        widths = self._get_stacked(inputs, self.wave_surfaces, "widths")
+        cos_sweep = widths / self._get_stacked(inputs, self.wave_surfaces, "lengths_spanwise")
+        t_over_c = self._get_stacked(inputs, self.wave_surfaces, "t_over_c")
+        CL = np.stack([inputs[surface["name"] + "_CL"] for surface in self.wave_surfaces], axis=1)
+
+        panel_mid_chords = stack["mid_mtx"].dot(self._get_stacked(inputs, self.wave_surfaces, "chords"))
+        panel_areas = panel_mid_chords * widths
+        sum_panel_areas = np.add.reduceat(panel_areas, starts)
+
+        # Weighted averages of 1/4 chord sweep and streamwise t/c
+        avg_cos_sweep = np.add.reduceat(cos_sweep * panel_areas, starts) / sum_panel_areas
+        avg_t_over_c = np.add.reduceat(t_over_c * panel_areas, starts) / sum_panel_areas
+
+        MDD = self.ka / avg_cos_sweep - avg_t_over_c / avg_cos_sweep**2 - CL / (10 * avg_cos_sweep**3)
+        Mcrit = MDD - (0.1 / 80.0) ** (1.0 / 3.0)
+        delta_M = inputs["Mach_number"][:, np.newaxis] - Mcrit
+        active = np.real(delta_M) > 0.0
+
+        return {
+            "widths": widths,
+            "cos_sweep": cos_sweep,
+            "t_over_c": t_over_c,
+            "CL": CL,
+            "panel_mid_chords": panel_mid_chords,
+            "panel_areas": panel_areas,
+            "sum_panel_areas": sum_panel_areas,
+            "avg_cos_sweep": avg_cos_sweep,
+            "avg_t_over_c": avg_t_over_c,
+            "delta_M": delta_M,
+            "active": active,
+        }
+
+    def compute(self, inputs, outputs):
+        for surface in self.options["surfaces"]:
+            outputs[surface["name"] + "_CDv"] = 0.0
+            outputs[surface["name"] + "_CDw"] = 0.0
+
+        if self.viscous_surfaces:
+            stack = self.viscous_stack
+            v = self._compute_viscous(inputs)
+
+            # Sum individual panel drags to get total drag of each surface
+            D_over_q = np.add.reduceat(v["d_over_q"] * v["widths"] * v["FF"], stack["starts"], axis=1)
+            for ind, surface in enumerate(self.viscous_surfaces):
+                name = surface["name"]
+                outputs[name + "_CDv"] = D_over_q[:, ind] / inputs[name + "_S_ref"] * stack["sym"][ind]
+
+        if self.wave_surfaces:
+            w = self._compute_wave(inputs)
+
+            CDw = np.where(w["active"], 20 * w["delta_M"] ** 4, 0.0) * self.wave_stack["sym"]
+            for ind, surface in enumerate(self.wave_surfaces):
+                outputs[surface["name"] + "_CDw"] = CDw[:, ind]
+
+    def compute_partials(self, inputs, partials):
+        if self.viscous_surfaces:
+            self._compute_viscous_partials(inputs, partials)
+        if self.wave_surfaces:
+            self._compute_wave_partials(inputs, partials)
+
+    def _compute_viscous_partials(self, inputs, partials):
+        stack = self.viscous_stack
+        v = self._compute_viscous(inputs)
+        k_lam = stack["k_lam"]
+        M = v["M"]
+        re = v["re"]
+        chords = v["chords"]
+        Re_c = v["Re_c"]
+        widths = v["widths"]
+        cos_sweep = v["cos_sweep"]
+        d_over_q = v["d_over_q"]
+        FF = v["FF"]
+
+        S_ref = np.array([inputs[surface["name"] + "_S_ref"][0] for surface in self.viscous_surfaces])
+        scale = np.repeat(stack["sym"] / S_ref, stack["counts"])
+
+        # Derivatives of the skin friction coefficient of each panel with
+        # respect to its Reynolds number and the Mach number
+        dcd__dRe_c = k_lam * (
+            -0.5 * v["cdlam_tr"] / Re_c + 2.58 * v["cdturb_tr"] / (Re_c * np.log(Re_c * v["k_lam_safe"]))
+        ) - 2.58 * v["cdturb_total"] / (Re_c * np.log(Re_c))
+        dcd__dM = -0.65 * 2 * 0.144 * M / (1 + 0.144 * M**2) * (v["cdturb_total"] - k_lam * v["cdturb_tr"])
+
+        dD__dchords = widths * FF * 2 * (v["cd"] + chords * dcd__dRe_c * re) * scale
+        dD__dre = widths * FF * 2 * chords**2 * dcd__dRe_c * scale
+        dD__dM = widths * (2 * chords * dcd__dM * FF + d_over_q * 0.18 / M * FF) * scale
+
+        derivs = {
+            "widths": d_over_q * 1.28 * FF * scale,
+            "lengths_spanwise": d_over_q * -0.28 * v["k_FF"] * cos_sweep**1.28 * scale,
+            "t_over_c": d_over_q
+            * widths
+            * 1.34
+            * M**0.18
+            * (0.6 / stack["c_max_t"] + 400 * v["t_over_c"] ** 3)
+            * cos_sweep**0.28
+            * scale,
+            "lengths": stack["mid_mtx"].T.dot(dD__dchords.T).T,
+        }
+
+        CDv = np.add.reduceat(d_over_q * widths * FF, stack["starts"], axis=1) * stack["sym"] / S_ref
+        dCDv__dre = np.add.reduceat(dD__dre, stack["starts"], axis=1)
+        dCDv__dM = np.add.reduceat(dD__dM, stack["starts"], axis=1)
+
+        for ind, surface in enumerate(self.viscous_surfaces):
+            name = surface["name"]
+            of_name = name + "_CDv"
+
+            partials[of_name, "re"] = dCDv__dre[:, ind]
+            partials[of_name, "Mach_number"] = dCDv__dM[:, ind]
+            partials[of_name, name + "_S_ref"] = -CDv[:, ind] / S_ref[ind]
+
+            for wrt_name, deriv in derivs.items():
+                if wrt_name == "lengths":
+                    partials[of_name, name + "_lengths"] = deriv[:, stack["node_slices"][ind]].flatten()
+                else:
+                    partials[of_name, name + "_" + wrt_name] = deriv[:, stack["panel_slices"][ind]].flatten()
+
+    def _compute_wave_partials(self, inputs, partials):
+        stack = self.wave_stack
+        counts = stack["counts"]
+        w = self._compute_wave(inputs)
+        avg_cos_sweep = w["avg_cos_sweep"]
+        avg_t_over_c = w["avg_t_over_c"]
+        widths = w["widths"]
+        cos_sweep = w["cos_sweep"]
+        t_over_c = w["t_over_c"]
+        panel_mid_chords = w["panel_mid_chords"]
+
+        dCDw__dMcrit = np.where(w["active"], -80 * w["delta_M"] ** 3, 0.0) * stack["sym"]
+        dMcrit__dCL = -1.0 / (10 * avg_cos_sweep**3)
+        dMcrit__dcos = (
+            -self.ka / avg_cos_sweep**2 + 2 * avg_t_over_c / avg_cos_sweep**3 + 3 * w["CL"] / (10 * avg_cos_sweep**4)
+        )
+        dMcrit__dtoc = -1.0 / avg_cos_sweep**2
+
+        # Derivatives of the weighted averages of each surface with respect
+        # to the geometry of each of its panels
+        sum_panel_areas = np.repeat(w["sum_panel_areas"], counts)
+        panel_avg_cos = np.repeat(avg_cos_sweep, counts)
+        panel_avg_toc = np.repeat(avg_t_over_c, counts)
+
+        dcos__dwidths = panel_mid_chords * (2 * cos_sweep - panel_avg_cos) / sum_panel_areas
+        dcos__dlengths_spanwise = -(cos_sweep**2) * panel_mid_chords / sum_panel_areas
+        dcos__dmid_chords = widths * (cos_sweep - panel_avg_cos) / sum_panel_areas
+        dtoc__dwidths = panel_mid_chords * (t_over_c - panel_avg_toc) / sum_panel_areas
+        dtoc__dmid_chords = widths * (t_over_c - panel_avg_toc) / sum_panel_areas
+        dtoc__dt_over_c = w["panel_areas"] / sum_panel_areas
+
+        dCDw__dcos = np.repeat(dCDw__dMcrit * dMcrit__dcos, counts, axis=1)
+        dCDw__dtoc = np.repeat(dCDw__dMcrit * dMcrit__dtoc, counts, axis=1)
+
+        derivs = {
+            "widths": dCDw__dcos * dcos__dwidths + dCDw__dtoc * dtoc__dwidths,
+            "lengths_spanwise": dCDw__dcos * dcos__dlengths_spanwise,
+            "t_over_c": dCDw__dtoc * dtoc__dt_over_c,
+            "chords": stack["mid_mtx"].T.dot((dCDw__dcos * dcos__dmid_chords + dCDw__dtoc * dtoc__dmid_chords).T).T,
+        }
+
+        for ind, surface in enumerate(self.wave_surfaces):
+            name = surface["name"]
+            of_name = name + "_CDw"
+
+            partials[of_name, "Mach_number"] = -dCDw__dMcrit[:, ind]
+            partials[of_name, name + "_CL"] = dCDw__dMcrit[:, ind] * dMcrit__dCL[ind]
+
+            for wrt_name, deriv in derivs.items():
+                if wrt_name == "chords":
+                    partials[of_name, name + "_chords"] = deriv[:, stack["node_slices"][ind]].flatten()
+                else:
+                    partials[of_name, name + "_" + wrt_name] = deriv[:, stack["panel_slices"][ind]].flatten()
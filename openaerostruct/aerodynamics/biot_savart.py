@@ -0,0 +1,1082 @@
+"""
+Fused Biot-Savart kernels used to assemble the aerodynamic influence
+coefficient (AIC) matrices.
+
+The original formulation in `EvalVelMtx` computes the influence of each of
+the four filaments of every vortex ring separately, with each filament call
+allocating several arrays the size of the full `vectors` array. Here we
+exploit the fact that neighboring rings share their filaments, so each
+spanwise and chordwise filament is evaluated exactly once, and the vertex
+norms are computed once and reused by every filament that touches that
+vertex. We also process the evaluation points in tiles so that the peak
+memory is bounded by the tile size rather than by the total number of
+evaluation points times the number of mesh vertices.
+"""
+
+import numpy as np
+
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+tol = 1e-10
+
+# Default memory budget, in bytes, for the temporaries of a single tile of
+# evaluation points. This is intentionally small enough to stay in cache for
+# coarse meshes while keeping the Python overhead per tile negligible.
+TILE_MEM_BUDGET = 2**23
+
+# Approximate number of arrays the size of a `vectors` tile that are live at
+# the same time inside the kernels below. The derivative kernels carry 3x3
+# blocks for each of the four ring vertices, hence the larger factor.
+_TILE_MEM_FACTOR = 6
+_TILE_MEM_FACTOR_DERIV = 40
+
+
+def get_tile_size(num_eval_points, num_vertices, itemsize=8, mem_budget=TILE_MEM_BUDGET, deriv=False):
+    """
+    Compute the number of evaluation points to process at once.
+
+    Parameters
+    ----------
+    num_eval_points : int
+        Total number of evaluation points.
+    num_vertices : int
+        Number of vortex mesh vertices (including any mirrored ones) seen
+        by each evaluation point.
+    itemsize : int
+        Size in bytes of one array entry (8 for float64, 16 for complex128).
+    mem_budget : float
+        Memory budget in bytes for a single tile.
+    deriv : bool
+        Whether the tile is used for the derivative kernels.
+
+    Returns
+    -------
+    tile_size : int
+        Number of evaluation points per tile; always at least one.
+    """
+    factor = _TILE_MEM_FACTOR_DERIV if deriv else _TILE_MEM_FACTOR
+    bytes_per_point = num_vertices * 3 * itemsize * factor
+    tile_size = int(mem_budget // bytes_per_point)
+    return max(1, min(num_eval_points, tile_size))
+
+
+def _compute_filaments(r1, r1_norm, r2, r2_norm):
+    """
+    Compute the velocity induced by a set of finite vortex filaments going
+    from the points at r1 to the points at r2, given the precomputed norms.
+    The result is scaled in place to avoid extra temporaries.
+    """
+    result = np.cross(r1, r2)
+    den = r1_norm * r2_norm + np.einsum("...i,...i->...", r1, r2)
+
+    scale = np.zeros_like(den)
+    np.divide(r1_norm + r2_norm, r1_norm * r2_norm * den * 4 * np.pi, out=scale, where=np.abs(den) > tol)
+
+    result *= scale[..., np.newaxis]
+    return result
+
+
+def _compute_semi_infinite_filaments(u, r, r_norm):
+    """
+    Compute the velocity induced by semi-infinite vortex filaments starting
+    at the points r and extending along the direction u. Evaluation points
+    that lie on a filament, or on its extension, get no velocity from it.
+    """
+    result = np.cross(u, r)
+    den = r_norm * (r_norm - np.einsum("i,...i->...", u, r)) * 4 * np.pi
+
+    scale = np.zeros_like(den)
+    np.divide(1.0, den, out=scale, where=np.abs(den) > tol)
+
+    result *= scale[..., np.newaxis]
+    return result
+
+
+def _compute_skew(array):
+    """
+    Compute the skew-symmetric cross product matrices of an array of
+    vectors, such that _compute_skew(a) @ b = a x b.
+    """
+    skew = np.zeros(array.shape + (3,), dtype=array.dtype)
+    skew[..., 0, 1] = -array[..., 2]
+    skew[..., 0, 2] = array[..., 1]
+    skew[..., 1, 0] = array[..., 2]
+    skew[..., 1, 2] = -array[..., 0]
+    skew[..., 2, 0] = -array[..., 1]
+    skew[..., 2, 1] = array[..., 0]
+    return skew
+
+
+def _compute_filaments_deriv(r1, r1_norm, r2, r2_norm):
+    """
+    Compute the derivatives of the velocity induced by a set of finite vortex
+    filaments with respect to both of the filament end point vectors.
+    The last two axes of the results are the velocity and vector components.
+    """
+    r1_x_r2 = np.cross(r1, r2)
+    den = r1_norm * r2_norm + np.einsum("...i,...i->...", r1, r2)
+
+    # Replace the degenerate entries with harmless values; their scale is
+    # zero, so they do not contribute to the result.
+    mask = np.abs(den) > tol
+    r1_norm = np.where(mask, r1_norm, 1.0)
+    r2_norm = np.where(mask, r2_norm, 1.0)
+    den = np.where(mask, den, 1.0)
+
+    scale = np.where(mask, (r1_norm + r2_norm) / (r1_norm * r2_norm * den * 4 * np.pi), 0.0)
+
+    # Gradients of the logarithm of the scale factor
+    coeff_1 = (1.0 / (r1_norm + r2_norm) - 1.0 / r1_norm - r2_norm / den) / r1_norm
+    coeff_2 = (1.0 / (r1_norm + r2_norm) - 1.0 / r2_norm - r1_norm / den) / r2_norm
+    grad_1 = coeff_1[..., np.newaxis] * r1 - r2 / den[..., np.newaxis]
+    grad_2 = coeff_2[..., np.newaxis] * r2 - r1 / den[..., np.newaxis]
+
+    scaled_cross = r1_x_r2 * scale[..., np.newaxis]
+    deriv_1 = np.einsum("...i,...j->...ij", scaled_cross, grad_1)
+    deriv_1 -= _compute_skew(r2) * scale[..., np.newaxis, np.newaxis]
+    deriv_2 = np.einsum("...i,...j->...ij", scaled_cross, grad_2)
+    deriv_2 += _compute_skew(r1) * scale[..., np.newaxis, np.newaxis]
+
+    return deriv_1, deriv_2
+
+
+def _compute_semi_infinite_filaments_deriv(u, r, r_norm):
+    """
+    Compute the derivatives of the velocity induced by semi-infinite vortex
+    filaments with respect to their starting point vectors.
+    """
+    u_d_r = np.einsum("i,...i->...", u, r)
+    den = r_norm * (r_norm - u_d_r) * 4 * np.pi
+
+    # Replace the degenerate entries with harmless values, as in
+    # _compute_filaments_deriv
+    mask = np.abs(den) > tol
+    r_norm = np.where(mask, r_norm, 1.0)
+    u_d_r = np.where(mask, u_d_r, 0.0)
+    scale = np.where(mask, 1.0 / np.where(mask, den, 1.0), 0.0)
+
+    result = np.cross(u, r) * scale[..., np.newaxis]
+    grad = r / (r_norm**2)[..., np.newaxis] + (r / r_norm[..., np.newaxis] - u) / (r_norm - u_d_r)[..., np.newaxis]
+
+    deriv = _compute_skew(np.broadcast_to(u, r.shape)) * scale[..., np.newaxis, np.newaxis]
+    deriv -= np.einsum("...i,...j->...ij", result, grad)
+    return deriv
+
+
+def _compute_semi_infinite_filaments_direction_deriv(u, du, r, r_norm):
+    """
+    Compute the derivatives of the velocity induced by semi-infinite vortex
+    filaments along a change du of their direction u. This only involves
+    products and quotients of the inputs, so it can be complex stepped.
+    """
+    u_d_r = np.einsum("i,...i->...", u, r)
+    den = r_norm * (r_norm - u_d_r) * 4 * np.pi
+
+    # Replace the degenerate entries with harmless values, as in
+    # _compute_filaments_deriv
+    mask = np.abs(den) > tol
+    gap = np.where(mask, r_norm - u_d_r, 1.0)
+    scale = np.where(mask, 1.0 / np.where(mask, den, 1.0), 0.0)
+
+    du_d_r = np.einsum("i,...i->...", du, r)
+    result = np.cross(du, r) + np.cross(u, r) * (du_d_r / gap)[..., np.newaxis]
+    result *= scale[..., np.newaxis]
+    return result
+
+
+def _compute_ring_influence(vectors, u):
+    """
+    Compute the influence of every vortex ring of a single (possibly mirrored)
+    surface on a tile of evaluation points. The rings in the last chordwise
+    row are horseshoes with semi-infinite trailing legs aligned with u.
+
+    Parameters
+    ----------
+    vectors[num_tile_points, nx, ny, 3] : numpy array
+        Vectors from the vortex mesh vertices to the evaluation points.
+    u[3] : numpy array
+        Unit vector defining the direction of the trailing legs.
+
+    Returns
+    -------
+    result[num_tile_points, nx - 1, ny - 1, 3] : numpy array
+        Induced velocity per unit circulation for each ring.
+    """
+    norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+    # Ring vertices:
+    #         A ----- B
+    #         |       |
+    #         |       |
+    #         D-------C
+    #
+    # Spanwise filaments, going from A to B, for every row but the trailing
+    # edge one. The rear filament of a ring is the reversed front filament
+    # of the ring behind it, and the rear filament of the last row is
+    # cancelled by the bound part of the trailing horseshoe.
+    spanwise = _compute_filaments(vectors[:, :-1, 1:], norms[:, :-1, 1:], vectors[:, :-1, :-1], norms[:, :-1, :-1])
+
+    # Chordwise filaments, going from B to C, for every column. The left
+    # filament of a ring is the reversed right filament of its neighbor.
+    chordwise = _compute_filaments(vectors[:, :-1], norms[:, :-1], vectors[:, 1:], norms[:, 1:])
+
+    result = chordwise[:, :, :-1] - chordwise[:, :, 1:]
+    result += spanwise
+    result[:, :-1] -= spanwise[:, 1:]
+
+    # Semi-infinite trailing legs, evaluated once per trailing-edge vertex
+    trailing = _compute_semi_infinite_filaments(u, vectors[:, -1], norms[:, -1])
+    result[:, -1] += trailing[:, :-1]
+    result[:, -1] -= trailing[:, 1:]
+
+    return result
+
+
+def _compute_ring_influence_deriv(vectors, u):
+    """
+    Compute the derivatives of the ring influences computed in
+    `_compute_ring_influence` with respect to the vectors of the four
+    vertices of each ring.
+
+    Parameters
+    ----------
+    vectors[num_tile_points, nx, ny, 3] : numpy array
+        Vectors from the vortex mesh vertices to the evaluation points.
+    u[3] : numpy array
+        Unit vector defining the direction of the trailing legs.
+
+    Returns
+    -------
+    derivs[4, num_tile_points, nx - 1, ny - 1, 3, 3] : numpy array
+        Derivatives of each ring influence with respect to the vectors of its
+        A, B, C, and D vertices, respectively.
+    """
+    num_points, nx, ny = vectors.shape[:3]
+    norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+    # Each shared filament is differentiated only once, the same way it is
+    # evaluated in _compute_ring_influence.
+    spanwise_1, spanwise_2 = _compute_filaments_deriv(
+        vectors[:, :-1, 1:], norms[:, :-1, 1:], vectors[:, :-1, :-1], norms[:, :-1, :-1]
+    )
+    chordwise_1, chordwise_2 = _compute_filaments_deriv(vectors[:, :-1], norms[:, :-1], vectors[:, 1:], norms[:, 1:])
+
+    derivs = np.empty((4, num_points, nx - 1, ny - 1, 3, 3), dtype=vectors.dtype)
+
+    # vertex A: front and left filaments
+    np.subtract(spanwise_1, chordwise_1[:, :, 1:], out=derivs[0])
+    # vertex B: front and right filaments
+    np.add(spanwise_2, chordwise_1[:, :, :-1], out=derivs[1])
+    # vertex C: right and rear filaments
+    derivs[2] = chordwise_2[:, :, :-1]
+    derivs[2, :, :-1] -= spanwise_2[:, 1:]
+    # vertex D: rear and left filaments
+    np.negative(chordwise_2[:, :, 1:], out=derivs[3])
+    derivs[3, :, :-1] -= spanwise_1[:, 1:]
+
+    # Semi-infinite trailing legs
+    trailing = _compute_semi_infinite_filaments_deriv(u, vectors[:, -1], norms[:, -1])
+    derivs[2, :, -1] += trailing[:, :-1]
+    derivs[3, :, -1] -= trailing[:, 1:]
+
+    return derivs
+
+
+def compute_vel_mtx_tile(vectors, alpha, nx, symmetry=False, ground_effect=False, right_wing=False):
+    """
+    Compute a tile of the AIC matrix for a single lifting surface from the
+    vectors going from the vortex mesh to the evaluation points.
+
+    Parameters
+    ----------
+    vectors[num_tile_points, nx_actual, ny_actual, 3] : numpy array
+        Vectors from the vortex mesh to the evaluation points, including the
+        mirrored "ghost" surface when symmetric and the ground plane image
+        when ground effect is turned on.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    nx : int
+        Number of chordwise vertices of the physical surface.
+    symmetry : bool
+        Whether the vectors include a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vectors include a ground plane image of the surface.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing, in which case the
+        spanwise ordering of the output is flipped.
+
+    Returns
+    -------
+    vel_mtx[num_tile_points, nx - 1, ny - 1, 3] : numpy array
+        The AIC entries for this tile of evaluation points.
+    """
+    cosa = np.cos(alpha * np.pi / 180.0)
+    sina = np.sin(alpha * np.pi / 180.0)
+    u = np.array([cosa, 0.0 * cosa, sina])
+
+    # Keep single precision vectors from being promoted back to double
+    if vectors.dtype == np.float32:
+        u = u.astype(np.float32)
+
+    ny_actual = vectors.shape[2]
+    if symmetry:
+        ny = (ny_actual + 1) // 2
+    else:
+        ny = ny_actual
+
+    if ground_effect:
+        # mirrored surface along the x mesh direction
+        surfaces_to_compute = [vectors[:, :nx], vectors[:, nx:]]
+        vortex_mults = [1.0, -1.0]
+    else:
+        surfaces_to_compute = [vectors]
+        vortex_mults = [1.0]
+
+    vel_mtx = np.zeros((vectors.shape[0], nx - 1, ny - 1, 3), dtype=np.result_type(vectors, u))
+
+    for surface_to_compute, vortex_mult in zip(surfaces_to_compute, vortex_mults):
+        result = _compute_ring_influence(surface_to_compute, u)
+
+        # If the surface is symmetric, fold the ghost panels onto the real ones
+        if symmetry:
+            result = result[:, :, : ny - 1] + result[:, :, ny - 1 :][:, :, ::-1]
+
+        vel_mtx += vortex_mult * result
+
+    if symmetry and right_wing:
+        vel_mtx = vel_mtx[:, :, ::-1]
+
+    return vel_mtx
+
+
+def compute_vel_mtx_deriv_tile(vectors, alpha, nx, ground_effect=False):
+    """
+    Compute the derivatives of a tile of the AIC matrix for a single lifting
+    surface with respect to the vectors going from the vortex mesh to the
+    evaluation points.
+
+    No folding of the ghost surface is done here; the derivatives are returned
+    for every ring of the (possibly mirrored) vortex mesh.
+
+    Parameters
+    ----------
+    vectors[num_tile_points, nx_actual, ny_actual, 3] : numpy array
+        Vectors from the vortex mesh to the evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    nx : int
+        Number of chordwise vertices of the physical surface.
+    ground_effect : bool
+        Whether the vectors include a ground plane image of the surface.
+
+    Returns
+    -------
+    derivs : list of numpy arrays
+        One array of shape [4, num_tile_points, nx - 1, ny_actual - 1, 3, 3]
+        per image of the surface (two when ground effect is turned on),
+        holding the derivatives with respect to the A, B, C, and D vertices.
+    """
+    cosa = np.cos(alpha * np.pi / 180.0)
+    sina = np.sin(alpha * np.pi / 180.0)
+    u = np.array([cosa, 0.0, sina])
+
+    if ground_effect:
+        derivs_list = [_compute_ring_influence_deriv(vectors[:, :nx], u)]
+        derivs = _compute_ring_influence_deriv(vectors[:, nx:], u)
+        derivs *= -1.0
+        derivs_list.append(derivs)
+    else:
+        derivs_list = [_compute_ring_influence_deriv(vectors, u)]
+
+    return derivs_list
+
+
+def compute_vel_mtx(
+    vortex_mesh,
+    eval_points,
+    alpha,
+    symmetry=False,
+    ground_effect=False,
+    right_wing=False,
+    mem_budget=TILE_MEM_BUDGET,
+    out=None,
+    dtype=None,
+):
+    """
+    Compute the AIC matrix of a single lifting surface directly from its
+    vortex mesh and the evaluation points, without ever forming the full
+    array of vectors between them.
+
+    The vectors are always formed in the precision of the inputs, so that
+    distant evaluation points do not lose accuracy, and only then converted
+    to `dtype` for the Biot-Savart kernels.
+
+    Parameters
+    ----------
+    vortex_mesh[nx_actual, ny_actual, 3] : numpy array
+        The vortex mesh as produced by `VortexMesh`, including the mirrored
+        ghost surface and ground plane image, if present.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points, either collocation or force points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vortex mesh includes a ground plane image.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+    out[num_eval_points, nx - 1, ny - 1, 3] : numpy array, optional
+        Array to store the result in. By default, a new array of type `dtype`
+        is returned.
+    dtype : numpy dtype, optional
+        Type to evaluate the kernels in, for example np.float32 for a single
+        precision AIC matrix. By default the type of the inputs is used.
+
+    Returns
+    -------
+    vel_mtx[num_eval_points, nx - 1, ny - 1, 3] : numpy array
+        The AIC matrix for this surface and these evaluation points.
+    """
+    nx_actual, ny_actual = vortex_mesh.shape[:2]
+    nx = nx_actual // 2 if ground_effect else nx_actual
+    ny = (ny_actual + 1) // 2 if symmetry else ny_actual
+    num_eval_points = eval_points.shape[0]
+
+    if out is None:
+        if dtype is None:
+            dtype = np.result_type(vortex_mesh, eval_points, alpha)
+        out = np.zeros((num_eval_points, nx - 1, ny - 1, 3), dtype=dtype)
+
+    tile_size = get_tile_size(num_eval_points, nx_actual * ny_actual, out.itemsize, mem_budget)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[ind_1:ind_2, np.newaxis, np.newaxis, :] - vortex_mesh[np.newaxis]
+        if dtype is not None:
+            vectors = vectors.astype(dtype)
+        out[ind_1:ind_2] = compute_vel_mtx_tile(vectors, alpha, nx, symmetry, ground_effect, right_wing)
+
+    return out
+
+
+@cached_sparsity_pattern
+def get_vel_mtx_jac_pattern(nx, ny, symmetry, ground_effect, right_wing):
+    """
+    Compute the sparsity pattern of the derivatives of vel_mtx with respect to
+    the vectors for a single evaluation point. Because each evaluation point
+    only depends on its own vectors, the full pattern is this one repeated
+    with an offset for each evaluation point, so the partials of a block of
+    evaluation points are stored contiguously.
+
+    For symmetric surfaces, the ghost ring next to the symmetry plane folds
+    onto the real ring next to it, and the two share their vertices on the
+    symmetry plane. The B and C vertices of that ghost ring are therefore
+    left out of the pattern, and their derivatives are added to those of the
+    A and D vertices of the real ring by assemble_vel_mtx_partials.
+
+    Parameters
+    ----------
+    nx : int
+        Number of chordwise vertices of the physical surface.
+    ny : int
+        Number of spanwise vertices of the physical surface.
+    symmetry : bool
+        Whether the vectors include a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vectors include a ground plane image of the surface.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+
+    Returns
+    -------
+    rows : numpy array
+        Indices into the vel_mtx of a single evaluation point.
+    cols : numpy array
+        Indices into the vectors of a single evaluation point.
+    """
+    if ground_effect:
+        nx_actual = 2 * nx
+    else:
+        nx_actual = nx
+    if symmetry:
+        ny_actual = 2 * ny - 1
+    else:
+        ny_actual = ny
+
+    # Get an array of indices representing the number of entries
+    # in the vectors array.
+    vectors_indices = np.arange(nx_actual * ny_actual * 3).reshape((nx_actual, ny_actual, 3))
+    vel_mtx_indices = np.arange((nx - 1) * (ny - 1) * 3).reshape((nx - 1, ny - 1, 3))
+    aic_base = np.einsum("jkl,m->jklm", vel_mtx_indices, np.ones(3, int))
+
+    # If this is a right-hand symmetrical wing, we need to flip the "y" indexing
+    if symmetry and right_wing:
+        aic_base = aic_base[:, ::-1]
+
+    if ground_effect:
+        # mirrored surface along the x mesh direction
+        surfaces_to_compute = [vectors_indices[:nx, :], vectors_indices[nx:, :]]
+    else:
+        surfaces_to_compute = [vectors_indices]
+
+    rows = []
+    cols = []
+
+    for surface_to_compute in surfaces_to_compute:
+        inds_A = surface_to_compute[0:-1, 1:, :]
+        inds_B = surface_to_compute[0:-1, 0:-1, :]
+        inds_C = surface_to_compute[1:, 0:-1, :]
+        inds_D = surface_to_compute[1:, 1:, :]
+        vertices_to_compute = [inds_A, inds_B, inds_C, inds_D]
+        for ivert, vertex_to_compute in enumerate(vertices_to_compute):
+            if symmetry:
+                rows.append(aic_base.flatten())
+                cols.append(np.einsum("jkm,l->jklm", vertex_to_compute[:, : ny - 1, :], np.ones(3, int)).flatten())
+
+                # The ghost rings fold onto the real ones in reverse order
+                ghost_rows = aic_base[:, ::-1]
+                ghost_cols = vertex_to_compute[:, ny - 1 :, :]
+                if ivert in [1, 2]:
+                    ghost_rows = ghost_rows[:, 1:]
+                    ghost_cols = ghost_cols[:, 1:]
+
+                rows.append(ghost_rows.flatten())
+                cols.append(np.einsum("jkm,l->jklm", ghost_cols, np.ones(3, int)).flatten())
+
+            else:
+                rows.append(aic_base.flatten())
+                cols.append(np.einsum("jkm,l->jklm", vertex_to_compute, np.ones(3, int)).flatten())
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+
+    return rows, cols
+
+
+def assemble_vel_mtx_partials(derivs_list, ny, symmetry, out=None):
+    """
+    Assemble the derivative data for a tile of evaluation points in the order
+    given by get_vel_mtx_jac_pattern. Each block of derivatives is copied
+    straight into its place in the output.
+
+    Parameters
+    ----------
+    derivs_list : list of numpy arrays
+        The derivatives returned by compute_vel_mtx_deriv_tile. These are not
+        modified.
+    ny : int
+        Number of spanwise vertices of the physical surface.
+    symmetry : bool
+        Whether the vectors include a mirrored ghost surface.
+    out[num_tile_points, num_entries] : numpy array, optional
+        Array to store the result in, for example a view of the Jacobian.
+
+    Returns
+    -------
+    data[num_tile_points, num_entries] : numpy array
+        The partials of each evaluation point in the tile.
+    """
+    num_points = derivs_list[0].shape[1]
+
+    # Each block is paired with the derivatives that share its last ring
+    blocks = []
+    for derivs in derivs_list:
+        for i in range(4):
+            if symmetry:
+                # The B and C vertices of the ghost ring next to the symmetry
+                # plane are the A and D vertices of the real ring it folds onto
+                if i == 0:
+                    blocks.append((derivs[0, :, :, : ny - 1], derivs[1, :, :, ny - 1]))
+                elif i == 3:
+                    blocks.append((derivs[3, :, :, : ny - 1], derivs[2, :, :, ny - 1]))
+                else:
+                    blocks.append((derivs[i, :, :, : ny - 1], None))
+
+                if i in [1, 2]:
+                    blocks.append((derivs[i, :, :, ny:], None))
+                else:
+                    blocks.append((derivs[i, :, :, ny - 1 :], None))
+            else:
+                blocks.append((derivs[i], None))
+
+    if out is None:
+        num_entries = sum(block[0].size for block, _ in blocks)
+        out = np.empty((num_points, num_entries), dtype=derivs_list[0].dtype)
+
+    ind_1 = 0
+    for block, shared in blocks:
+        ind_2 = ind_1 + block[0].size
+
+        # Reshaping a range of columns only splits the contiguous axis, so
+        # this is always a view of the output
+        data = out[:, ind_1:ind_2].reshape(block.shape)
+        data[:] = block
+        if shared is not None:
+            data[:, :, -1] += shared
+
+        ind_1 = ind_2
+
+    return out
+
+
+def compute_vel_mtx_partials(
+    vortex_mesh,
+    eval_points,
+    alpha,
+    jac_mesh,
+    jac_eval,
+    symmetry=False,
+    ground_effect=False,
+    right_wing=False,
+    mem_budget=TILE_MEM_BUDGET,
+    normals=None,
+    normals_sum=None,
+):
+    """
+    Compute the partials of the AIC matrix of a single lifting surface with
+    respect to its vortex mesh and the evaluation points, one tile of
+    evaluation points at a time, straight into the Jacobian data.
+
+    With the normals, the partials are those of the normal velocities, i.e.,
+    of the AIC matrix contracted with the normal at each evaluation point.
+
+    Parameters
+    ----------
+    vortex_mesh[nx_actual, ny_actual, 3] : numpy array
+        The vortex mesh as produced by `VortexMesh`, including the mirrored
+        ghost surface and ground plane image, if present.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points, either collocation or force points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    jac_mesh[num_eval_points, num_entries] : numpy array
+        The partials with respect to the vortex mesh, with one row per
+        evaluation point. Without the normals, these are in the order given
+        by get_vel_mtx_jac_pattern, and with them, in the order of the
+        columns of `normals_sum`.
+    jac_eval[num_eval_points, nx - 1, ny - 1, 3, 3] : numpy array
+        The partials with respect to the evaluation points. With the normals,
+        the shape is [num_eval_points, nx - 1, ny - 1, 3].
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vortex mesh includes a ground plane image.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+    normals[num_eval_points, 3] : numpy array, optional
+        The normal at each evaluation point.
+    normals_sum : scipy sparse matrix, optional
+        Matrix that sums the entries of the pattern given by
+        get_vel_mtx_jac_pattern, once multiplied by the normals, into the
+        entries of `jac_mesh`. Required with the normals.
+
+    Returns
+    -------
+    jac_mesh[num_eval_points, num_entries] : numpy array
+        The partials with respect to the vortex mesh.
+    jac_eval[num_eval_points, nx - 1, ny - 1, 3, 3] : numpy array
+        The partials with respect to the evaluation points.
+    """
+    nx_actual, ny_actual = vortex_mesh.shape[:2]
+    nx = nx_actual // 2 if ground_effect else nx_actual
+    ny = (ny_actual + 1) // 2 if symmetry else ny_actual
+    num_eval_points = eval_points.shape[0]
+
+    if normals is not None:
+        # Velocity component of each entry of the pattern
+        vel_components = get_vel_mtx_jac_pattern(nx, ny, symmetry, ground_effect, right_wing)[0] % 3
+
+    tile_size = get_tile_size(num_eval_points, nx_actual * ny_actual, jac_mesh.itemsize, mem_budget, deriv=True)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[ind_1:ind_2, np.newaxis, np.newaxis, :] - vortex_mesh[np.newaxis]
+        derivs_list = compute_vel_mtx_deriv_tile(vectors, alpha, nx, ground_effect)
+
+        # The vectors point from the mesh to the evaluation points
+        if normals is None:
+            assemble_vel_mtx_partials(derivs_list, ny, symmetry, out=jac_mesh[ind_1:ind_2])
+            jac_mesh[ind_1:ind_2] *= -1.0
+        else:
+            vel_data = assemble_vel_mtx_partials(derivs_list, ny, symmetry)
+            vel_data *= normals[ind_1:ind_2, vel_components]
+            jac_mesh[ind_1:ind_2] = -normals_sum.T.dot(vel_data.T).T
+
+        # Moving an evaluation point moves it relative to every vertex
+        derivs = sum(np.sum(derivs, axis=0) for derivs in derivs_list)
+        if symmetry:
+            derivs = derivs[:, :, : ny - 1] + derivs[:, :, ny - 1 :][:, :, ::-1]
+            if right_wing:
+                derivs = derivs[:, :, ::-1]
+
+        if normals is None:
+            jac_eval[ind_1:ind_2] = derivs
+        else:
+            jac_eval[ind_1:ind_2] = np.einsum("tijab,ta->tijb", derivs, normals[ind_1:ind_2])
+
+    return jac_mesh, jac_eval
+
+
+def expand_circulations(circulations, symmetry=False, right_wing=False):
+    """
+    Expand the circulations of a single lifting surface to every ring of the
+    vortex mesh of one image of that surface, including the ghost rings of a
+    symmetric surface, which carry the circulations of their mirrored rings.
+
+    Parameters
+    ----------
+    circulations[..., nx - 1, ny - 1] : numpy array
+        The vortex ring circulations of the surface, optionally for several
+        right-hand sides along the leading dimensions.
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+
+    Returns
+    -------
+    circulations[..., nx - 1, ny_actual - 1] : numpy array
+        The circulations of every ring of the (possibly mirrored) vortex mesh.
+    """
+    if symmetry:
+        if right_wing:
+            circulations = circulations[..., ::-1]
+        circulations = np.concatenate([circulations, circulations[..., ::-1]], axis=-1)
+    return circulations
+
+
+def apply_vel_mtx_deriv(
+    vortex_mesh,
+    eval_points,
+    alpha,
+    circulations,
+    d_vortex_mesh,
+    d_eval_points,
+    d_velocities,
+    mode,
+    symmetry=False,
+    ground_effect=False,
+    right_wing=False,
+    mem_budget=TILE_MEM_BUDGET,
+):
+    """
+    Apply the derivatives of the velocities induced by a single lifting
+    surface, vel_mtx . circulations, with respect to the vortex mesh and the
+    evaluation points, without storing the Jacobian of the AIC matrix.
+
+    The derivatives are accumulated into the seed arrays in place, in the
+    same way as the OpenMDAO matrix-free API: in forward mode into
+    d_velocities, and in reverse mode into d_vortex_mesh and d_eval_points.
+    Either of those two may be None to skip it.
+
+    Several sets of circulations that share the same geometry and alpha can
+    be handled at once by giving circulations and d_velocities the same
+    leading dimensions, so that the kernel derivatives are computed only
+    once for all of them.
+
+    Parameters
+    ----------
+    vortex_mesh[nx_actual, ny_actual, 3] : numpy array
+        The vortex mesh as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    circulations[..., nx - 1, ny - 1] : numpy array
+        The vortex ring circulations of the surface.
+    d_vortex_mesh[nx_actual, ny_actual, 3] : numpy array or None
+        Seed for the vortex mesh.
+    d_eval_points[num_eval_points, 3] : numpy array or None
+        Seed for the evaluation points.
+    d_velocities[..., num_eval_points, 3] : numpy array
+        Seed for the induced velocities.
+    mode : str
+        Either 'fwd' or 'rev'.
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vortex mesh includes a ground plane image.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+    """
+    nx_actual, ny_actual = vortex_mesh.shape[:2]
+    nx = nx_actual // 2 if ground_effect else nx_actual
+    num_eval_points = eval_points.shape[0]
+
+    # Flatten any leading dimensions into a single one, keeping a view of
+    # the seed so that it is still updated in place
+    circulations = expand_circulations(circulations, symmetry, right_wing)
+    circulations = circulations.reshape((-1,) + circulations.shape[-2:])
+    d_velocities = d_velocities.reshape((-1, num_eval_points, 3))
+
+    # The A, B, C, and D vertices of every ring, as used in compute_vel_mtx_deriv_tile
+    vertex_slices = [
+        (slice(None, -1), slice(1, None)),
+        (slice(None, -1), slice(None, -1)),
+        (slice(1, None), slice(None, -1)),
+        (slice(1, None), slice(1, None)),
+    ]
+    image_slices = [slice(0, nx), slice(nx, 2 * nx)]
+
+    tile_size = get_tile_size(num_eval_points, nx_actual * ny_actual, vortex_mesh.itemsize, mem_budget, deriv=True)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[ind_1:ind_2, np.newaxis, np.newaxis, :] - vortex_mesh[np.newaxis]
+        derivs_list = compute_vel_mtx_deriv_tile(vectors, alpha, nx, ground_effect)
+
+        for image_slice, derivs in zip(image_slices, derivs_list):
+            d_velocities_tile = d_velocities[:, ind_1:ind_2]
+
+            if d_eval_points is not None:
+                # Moving an evaluation point moves it relative to every vertex
+                derivs_pts = np.einsum("vtijab,pij->ptab", derivs, circulations)
+                if mode == "fwd":
+                    d_velocities_tile += np.einsum("ptab,tb->pta", derivs_pts, d_eval_points[ind_1:ind_2])
+                else:
+                    d_eval_points[ind_1:ind_2] += np.einsum("ptab,pta->tb", derivs_pts, d_velocities_tile)
+
+            if d_vortex_mesh is not None:
+                # The vectors point from the mesh to the evaluation points
+                d_image = d_vortex_mesh[image_slice]
+                for vertex, vertex_slice in enumerate(vertex_slices):
+                    if mode == "fwd":
+                        d_velocities_tile -= np.einsum(
+                            "tijab,pijb->pta", derivs[vertex], circulations[..., np.newaxis] * d_image[vertex_slice]
+                        )
+                    else:
+                        d_image[vertex_slice] -= np.einsum(
+                            "pij,tijab,pta->ijb", circulations, derivs[vertex], d_velocities_tile
+                        )
+
+
+def get_surface_options(surface):
+    """
+    Get the sizes and the mirroring options of a lifting surface.
+    """
+    mesh = surface["mesh"]
+    nx = mesh.shape[0]
+    ny = mesh.shape[1]
+    ground_effect = surface.get("groundplane", False)
+    right_wing = abs(mesh[0, 0, 1]) < abs(mesh[0, -1, 1])
+    return nx, ny, surface["symmetry"], ground_effect, right_wing
+
+
+def compute_system_vel_mtx(surfaces, vortex_meshes, eval_points, alpha, mem_budget=TILE_MEM_BUDGET):
+    """
+    Compute the AIC matrix of all lifting surfaces together, with one column
+    per vortex ring in the same order as the circulations.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+
+    Returns
+    -------
+    vel_mtx[num_eval_points, system_size, 3] : numpy array
+        The AIC matrix for all lifting surfaces and these evaluation points.
+    """
+    vel_mtxs = []
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+        vel_mtx = compute_vel_mtx(vortex_mesh, eval_points, alpha, symmetry, ground_effect, right_wing, mem_budget)
+        vel_mtxs.append(vel_mtx.reshape((eval_points.shape[0], -1, 3)))
+
+    return np.concatenate(vel_mtxs, axis=1)
+
+
+def compute_image_vel_mtx(
+    image_meshes, eval_points, alpha, symmetry=False, right_wing=False, mem_budget=TILE_MEM_BUDGET
+):
+    """
+    Compute the part of the AIC matrix of a single lifting surface that comes
+    from its ground plane image, for several images at once, e.g. one per
+    height above the ground. The vectors from all images to a tile of
+    evaluation points are stacked and go through the Biot-Savart kernels in
+    a single call.
+
+    Parameters
+    ----------
+    image_meshes[num_images, nx, ny_actual, 3] : numpy array
+        The ground plane images of the vortex mesh, as in the second half of
+        the first dimension of the vortex mesh produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    symmetry : bool
+        Whether the images include a mirrored ghost surface.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+
+    Returns
+    -------
+    vel_mtx[num_images, num_eval_points, nx - 1, ny - 1, 3] : numpy array
+        The influence of the rings of each image, whose circulations are
+        opposite to those of the surface.
+    """
+    num_images, nx, ny_actual = image_meshes.shape[:3]
+    ny = (ny_actual + 1) // 2 if symmetry else ny_actual
+    num_eval_points = eval_points.shape[0]
+
+    dtype = np.result_type(image_meshes, eval_points, alpha)
+    vel_mtx = np.empty((num_images, num_eval_points, nx - 1, ny - 1, 3), dtype=dtype)
+
+    # Each tile holds the vectors to all images
+    tile_size = get_tile_size(num_eval_points, num_images * nx * ny_actual, vel_mtx.itemsize, mem_budget)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[np.newaxis, ind_1:ind_2, np.newaxis, np.newaxis, :] - image_meshes[:, np.newaxis]
+        vel_mtx_tile = compute_vel_mtx_tile(
+            vectors.reshape((-1, nx, ny_actual, 3)), alpha, nx, symmetry, False, right_wing
+        )
+        vel_mtx[:, ind_1:ind_2] = -vel_mtx_tile.reshape((num_images, ind_2 - ind_1, nx - 1, ny - 1, 3))
+
+    return vel_mtx
+
+
+def compute_batched_system_vel_mtx(surfaces, vortex_meshes, eval_points, alpha, mem_budget=TILE_MEM_BUDGET):
+    """
+    Compute the AIC matrix of all lifting surfaces together for several
+    flight conditions that share the same alpha but not the ground plane
+    images, e.g. a sweep in height above the ground. The part of the matrix
+    that comes from the surfaces themselves is computed once, and the part
+    that comes from the images of all flight conditions is computed with
+    `compute_image_vel_mtx`.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+        For the surfaces with ground effect, these have a leading dimension
+        with one vortex mesh per flight condition.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+
+    Returns
+    -------
+    vel_mtx[num_conditions, num_eval_points, system_size, 3] : numpy array
+        The AIC matrix for all lifting surfaces and these evaluation points,
+        for each flight condition.
+    """
+    num_conditions = 1
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        if surface.get("groundplane", False):
+            num_conditions = vortex_mesh.shape[0]
+
+    vel_mtxs = []
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+        if ground_effect:
+            # The surface itself is normally the same for every flight
+            # condition, and only its images differ
+            real_meshes = vortex_mesh[:, :nx]
+            if np.all(real_meshes == real_meshes[0]):
+                vel_mtx = compute_vel_mtx(real_meshes[0], eval_points, alpha, symmetry, False, right_wing, mem_budget)
+            else:
+                vel_mtx = np.array(
+                    [
+                        compute_vel_mtx(real_mesh, eval_points, alpha, symmetry, False, right_wing, mem_budget)
+                        for real_mesh in real_meshes
+                    ]
+                )
+            vel_mtx = vel_mtx + compute_image_vel_mtx(
+                vortex_mesh[:, nx:], eval_points, alpha, symmetry, right_wing, mem_budget
+            )
+        else:
+            vel_mtx = compute_vel_mtx(vortex_mesh, eval_points, alpha, symmetry, False, right_wing, mem_budget)
+            vel_mtx = np.broadcast_to(vel_mtx, (num_conditions,) + vel_mtx.shape)
+        vel_mtxs.append(vel_mtx.reshape((num_conditions, eval_points.shape[0], -1, 3)))
+
+    return np.concatenate(vel_mtxs, axis=2)
+
+
+def apply_system_vel_mtx_deriv(
+    surfaces,
+    vortex_meshes,
+    eval_points,
+    alpha,
+    circulations,
+    d_vortex_meshes,
+    d_eval_points,
+    d_velocities,
+    mode,
+    mem_budget=TILE_MEM_BUDGET,
+):
+    """
+    Apply the derivatives of the velocities induced by all lifting surfaces
+    with respect to their vortex meshes and the evaluation points. This calls
+    `apply_vel_mtx_deriv` for each surface with its part of the circulations.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    circulations[..., system_size] : numpy array
+        The vortex ring circulations of all lifting surfaces.
+    d_vortex_meshes : list of numpy arrays or None
+        Seed for the vortex mesh of each lifting surface, where any of them
+        may be None to skip it.
+    d_eval_points[num_eval_points, 3] : numpy array or None
+        Seed for the evaluation points.
+    d_velocities[..., num_eval_points, 3] : numpy array
+        Seed for the induced velocities.
+    mode : str
+        Either 'fwd' or 'rev'.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+    """
+    ind_1 = 0
+    for surface, vortex_mesh, d_vortex_mesh in zip(surfaces, vortex_meshes, d_vortex_meshes):
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+        ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+        if d_vortex_mesh is not None or d_eval_points is not None:
+            apply_vel_mtx_deriv(
+                vortex_mesh,
+                eval_points,
+                alpha,
+                circulations[..., ind_1:ind_2].reshape(circulations.shape[:-1] + (nx - 1, ny - 1)),
+                d_vortex_mesh,
+                d_eval_points,
+                d_velocities,
+                mode,
+                symmetry,
+                ground_effect,
+                right_wing,
+                mem_budget,
+            )
+
+        ind_1 = ind_2
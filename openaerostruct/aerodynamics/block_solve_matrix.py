@@ -0,0 +1,257 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+import openmdao.api as om
+
+
+class BlockSolveMatrix(om.ImplicitComponent):
+    """
+    Solve the AIC linear system, given as one block per pair of lifting
+    surfaces, to obtain the vortex ring circulations.
+
+    The AIC matrix is factored with a block LU factorization, where block
+    (i, j) of the combined factors holds U[i, j] for i <= j and L[i, j] for
+    i > j, and the diagonal blocks of U are kept as dense LU factorizations.
+    Each block of the factors only depends on the AIC blocks with the same
+    row or column and on the blocks of the factors before it, so when some
+    AIC blocks change, only the blocks of the factors that depend on them
+    are computed again. For example, when only the last surface changes, the
+    factorization of the AIC blocks of all other surfaces is reused, and the
+    cost of the update scales with the size of the last surface instead of
+    the size of the whole system. The surface whose geometry changes most
+    often should therefore come last in the list of surfaces.
+
+    Parameters
+    ----------
+    aic[num_target, num_source] : numpy array
+        The block of the AIC matrix with the rows of the target panels and the
+        columns of the source panels, as computed by AICBlock. There is one
+        of these arrays for each pair of lifting surfaces in the problem.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel, computed as the cross of the two
+        diagonals from the mesh points.
+    freestream_velocities[system_size, 3] : numpy array
+        The rotated freestream velocities at each collocation point for all
+        lifting surfaces.
+
+    Returns
+    -------
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+
+        slices = []
+        system_size = 0
+        for surface in surfaces:
+            nx, ny = surface["mesh"].shape[:2]
+            slices.append(slice(system_size, system_size + (nx - 1) * (ny - 1)))
+            system_size += (nx - 1) * (ny - 1)
+
+        self.system_size = system_size
+        self.slices = slices
+
+        self.add_input("freestream_velocities", shape=(system_size, 3), units="m/s")
+        self.add_output("circulations", shape=system_size, units="m**2/s", tags=["mphys_coupling"])
+
+        system_indices = np.arange(system_size)
+
+        self.declare_partials(
+            "circulations",
+            "circulations",
+            rows=np.repeat(system_indices, system_size),
+            cols=np.tile(system_indices, system_size),
+        )
+        self.declare_partials(
+            "circulations",
+            "freestream_velocities",
+            rows=np.repeat(system_indices, 3),
+            cols=np.arange(system_size * 3),
+        )
+
+        for target, target_slice in zip(surfaces, slices):
+            num_target = target_slice.stop - target_slice.start
+            normals_name = "{}_normals".format(target["name"])
+
+            nx, ny = target["mesh"].shape[:2]
+            self.add_input(normals_name, shape=(nx - 1, ny - 1, 3))
+            self.declare_partials(
+                "circulations",
+                normals_name,
+                rows=np.repeat(system_indices[target_slice], 3),
+                cols=np.arange(num_target * 3),
+            )
+
+            for source, source_slice in zip(surfaces, slices):
+                num_source = source_slice.stop - source_slice.start
+                aic_name = "{}_{}_aic".format(target["name"], source["name"])
+
+                self.add_input(aic_name, shape=(num_target, num_source), units="1/m")
+                self.declare_partials(
+                    "circulations",
+                    aic_name,
+                    rows=np.repeat(system_indices[target_slice], num_source),
+                    cols=np.arange(num_target * num_source),
+                )
+
+        self.aic_blocks = None
+        self.lu_blocks = None
+        self.factor_blocks = None
+
+    def _get_aic_blocks(self, inputs):
+        surfaces = self.options["surfaces"]
+        return [
+            [inputs["{}_{}_aic".format(target["name"], source["name"])] for source in surfaces] for target in surfaces
+        ]
+
+    def _get_rhs(self, inputs):
+        normals = np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in self.options["surfaces"]]
+        )
+        return -np.einsum("ij,ij->i", inputs["freestream_velocities"], normals)
+
+    def _factor(self, inputs):
+        """
+        Update the block LU factorization of the AIC matrix, computing again
+        only the blocks of the factors that depend on AIC blocks that changed
+        since the last time. Under complex step, everything is computed and
+        the factorization of the real AIC matrix is kept.
+
+        Returns
+        -------
+        lu_blocks : list
+            The dense LU factorizations of the diagonal blocks of U.
+        factor_blocks : list of lists
+            The off-diagonal blocks of U and L.
+        """
+        aic_blocks = self._get_aic_blocks(inputs)
+        num_surfaces = len(aic_blocks)
+
+        complex_step = any(np.iscomplexobj(block) for row in aic_blocks for block in row)
+        if complex_step or self.aic_blocks is None:
+            changed = [[True] * num_surfaces for _ in range(num_surfaces)]
+            lu_blocks = [None] * num_surfaces
+            factor_blocks = [[None] * num_surfaces for _ in range(num_surfaces)]
+        else:
+            changed = [
+                [not np.array_equal(block, cached) for block, cached in zip(row, cached_row)]
+                for row, cached_row in zip(aic_blocks, self.aic_blocks)
+            ]
+            lu_blocks = self.lu_blocks
+            factor_blocks = self.factor_blocks
+
+        # Whether each block of the factors is computed again
+        dirty = [[False] * num_surfaces for _ in range(num_surfaces)]
+
+        def depends(ind_i, ind_j, ind_k):
+            # Block (i, j) is updated with the products of blocks (i, m) and
+            # (m, j) of the factors for all m < k
+            return changed[ind_i][ind_j] or any(dirty[ind_i][m] or dirty[m][ind_j] for m in range(ind_k))
+
+        def reduce(ind_i, ind_j, ind_k):
+            block = aic_blocks[ind_i][ind_j].copy()
+            for m in range(ind_k):
+                block -= factor_blocks[ind_i][m].dot(factor_blocks[m][ind_j])
+            return block
+
+        for k in range(num_surfaces):
+            dirty[k][k] = depends(k, k, k)
+            if dirty[k][k]:
+                factor_blocks[k][k] = reduce(k, k, k)
+                lu_blocks[k] = lu_factor(factor_blocks[k][k])
+
+            for j in range(k + 1, num_surfaces):
+                dirty[k][j] = depends(k, j, k)
+                if dirty[k][j]:
+                    factor_blocks[k][j] = reduce(k, j, k)
+
+            for i in range(k + 1, num_surfaces):
+                dirty[i][k] = depends(i, k, k) or dirty[k][k]
+                if dirty[i][k]:
+                    factor_blocks[i][k] = lu_solve(lu_blocks[k], reduce(i, k, k).T, trans=1).T
+
+        if not complex_step:
+            self.aic_blocks = [[block.copy() for block in row] for row in aic_blocks]
+            self.lu_blocks = lu_blocks
+            self.factor_blocks = factor_blocks
+
+        return lu_blocks, factor_blocks
+
+    def _solve(self, lu_blocks, factor_blocks, rhs, trans):
+        """
+        Solve the AIC linear system, or its transpose, with the block LU
+        factorization.
+        """
+        slices = self.slices
+        num_surfaces = len(slices)
+        sol = np.zeros(rhs.shape, dtype=np.result_type(rhs, *lu_blocks[0]))
+
+        if trans == 0:
+            # Forward substitution with L, then back substitution with U
+            for k in range(num_surfaces):
+                sol[slices[k]] = rhs[slices[k]]
+                for m in range(k):
+                    sol[slices[k]] -= factor_blocks[k][m].dot(sol[slices[m]])
+            for k in reversed(range(num_surfaces)):
+                for j in range(k + 1, num_surfaces):
+                    sol[slices[k]] -= factor_blocks[k][j].dot(sol[slices[j]])
+                sol[slices[k]] = lu_solve(lu_blocks[k], sol[slices[k]])
+        else:
+            # Forward substitution with U^T, then back substitution with L^T
+            for k in range(num_surfaces):
+                sol[slices[k]] = rhs[slices[k]]
+                for m in range(k):
+                    sol[slices[k]] -= factor_blocks[m][k].T.dot(sol[slices[m]])
+                sol[slices[k]] = lu_solve(lu_blocks[k], sol[slices[k]], trans=1)
+            for k in reversed(range(num_surfaces)):
+                for i in range(k + 1, num_surfaces):
+                    sol[slices[k]] -= factor_blocks[i][k].T.dot(sol[slices[i]])
+
+        return sol
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        circulations = outputs["circulations"]
+        aic_blocks = self._get_aic_blocks(inputs)
+
+        residuals["circulations"] = -self._get_rhs(inputs)
+        for target_slice, row in zip(self.slices, aic_blocks):
+            for source_slice, block in zip(self.slices, row):
+                residuals["circulations"][target_slice] += block.dot(circulations[source_slice])
+
+    def solve_nonlinear(self, inputs, outputs):
+        lu_blocks, factor_blocks = self._factor(inputs)
+        outputs["circulations"] = self._solve(lu_blocks, factor_blocks, self._get_rhs(inputs), 0)
+
+    def linearize(self, inputs, outputs, partials):
+        surfaces = self.options["surfaces"]
+        system_size = self.system_size
+        circulations = outputs["circulations"]
+        aic_blocks = self._get_aic_blocks(inputs)
+
+        self._factor(inputs)
+
+        jac = partials["circulations", "circulations"].reshape((system_size, system_size))
+        for target, target_slice, row in zip(surfaces, self.slices, aic_blocks):
+            normals_name = "{}_normals".format(target["name"])
+            partials["circulations", normals_name] = inputs["freestream_velocities"][target_slice].flatten()
+
+            for source, source_slice, block in zip(surfaces, self.slices, row):
+                aic_name = "{}_{}_aic".format(target["name"], source["name"])
+                jac[target_slice, source_slice] = block
+                partials["circulations", aic_name] = np.tile(circulations[source_slice], block.shape[0])
+
+        normals = np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in surfaces]
+        )
+        partials["circulations", "freestream_velocities"] = normals.flatten()
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if mode == "fwd":
+            d_outputs["circulations"] = self._solve(self.lu_blocks, self.factor_blocks, d_residuals["circulations"], 0)
+        else:
+            d_residuals["circulations"] = self._solve(self.lu_blocks, self.factor_blocks, d_outputs["circulations"], 1)
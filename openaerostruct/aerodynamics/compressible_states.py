@@ -17,8 +17,10 @@ from openaerostruct.aerodynamics.panel_forces import PanelForces
 from openaerostruct.aerodynamics.panel_forces_surf import PanelForcesSurf
 from openaerostruct.aerodynamics.rotational_velocity import RotationalVelocity
 from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.aerodynamics.vortex_influence import VortexInfluence
 
-from openaerostruct.aerodynamics.pg_transform import PGTransform, InversePGTransform
+from openaerostruct.aerodynamics.pg_fused_transform import FusedPGTransform, FusedInversePGTransform
+from openaerostruct.aerodynamics.aic_cache import AICCache
 
 
 class CompressibleVLMStates(om.Group):
@@ -42,10 +44,64 @@ class CompressibleVLMStates(om.Group):
         self.options.declare(
             "rotational", False, types=bool, desc="Set to True to turn on support for computing angular velocities"
         )
+        self.options.declare(
+            "fused_aic",
+            False,
+            types=bool,
+            desc="Set to True to compute the AIC matrices directly from the vortex mesh and the evaluation points "
+            "with VortexInfluence instead of going through the GetVectors intermediate.",
+        )
+        self.options.declare(
+            "aic_solver",
+            "direct",
+            values=["direct", "gmres"],
+            desc="Solve the AIC linear system with a dense LU factorization or iteratively with GMRES, "
+            "warm-started from the previous circulations.",
+        )
+        self.options.declare(
+            "aic_preconditioner",
+            "strip",
+            values=["surface", "strip"],
+            desc="Blocks of the block-diagonal preconditioner used by the GMRES AIC solver, either one per "
+            "lifting surface or one per chordwise strip of panels.",
+        )
+        self.options.declare(
+            "aic_precision",
+            "double",
+            values=["double", "mixed"],
+            desc='Precision of the AIC linear system. With "mixed", the AIC matrices are assembled with float32 '
+            "Biot-Savart kernels and the direct AIC solver factors the matrix in float32, refining the solution "
+            "in float64. The circulations then solve the assembled system to double precision, and CL and CDi "
+            "typically agree with the double precision analysis to about 1e-6 relative.",
+        )
+        self.options.declare(
+            "aic_matrix_free",
+            False,
+            types=bool,
+            desc="Set to True to apply the derivatives of the AIC matrix, the AIC linear system and the velocities at "
+            "the force points matrix-free instead of declaring their dense partials. This cannot be used under a "
+            "linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "aic_cache",
+            None,
+            types=AICCache,
+            allow_none=True,
+            recordable=False,
+            desc="Persistent on-disk cache for the AIC matrices and their LU factorizations. Repeated analyses "
+            "with exactly the same geometry and angles, e.g. across optimization restarts, then read them back "
+            "instead of assembling and factoring them again.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
         rotational = self.options["rotational"]
+        fused_aic = self.options["fused_aic"]
+
+        if self.options["aic_precision"] == "mixed":
+            kernel_precision = "single"
+        else:
+            kernel_precision = "double"
 
         num_collocation_points = 0
         for surface in surfaces:
@@ -92,8 +148,9 @@ class CompressibleVLMStates(om.Group):
             prom_in.append(vname)
             self.connect("pg_transform." + vname + "_pg", "mtx_rhs." + vname)
 
+        # Rotate to the wind frame and scale to the PG domain in one step
         self.add_subsystem(
-            "pg_transform", PGTransform(surfaces=surfaces, rotational=rotational), promotes_inputs=prom_in
+            "pg_transform", FusedPGTransform(surfaces=surfaces, rotational=rotational), promotes_inputs=prom_in
         )
 
         self.connect("pg_transform.coll_pts_pg", "coll_pts")
@@ -109,13 +166,14 @@ class CompressibleVLMStates(om.Group):
         # Compute the vortex mesh based off the deformed aerodynamic mesh
         self.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes_outputs=["*"])
 
-        # Get vectors from mesh points to collocation points
-        self.add_subsystem(
-            "get_vectors",
-            GetVectors(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
+        if not fused_aic:
+            # Get vectors from mesh points to collocation points
+            self.add_subsystem(
+                "get_vectors",
+                GetVectors(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
 
         # In the PG domain, alpha and beta are zero.
         indep_var_comp = om.IndepVarComp()
@@ -124,12 +182,32 @@ class CompressibleVLMStates(om.Group):
         self.add_subsystem("pg_frame", indep_var_comp)
 
         # Construct matrix based on rings, not horseshoes
-        self.add_subsystem(
-            "mtx_assy",
-            EvalVelMtx(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
-            promotes_inputs=["*_vectors"],
-            promotes_outputs=["*"],
-        )
+        if fused_aic:
+            self.add_subsystem(
+                "mtx_assy",
+                VortexInfluence(
+                    surfaces=surfaces,
+                    num_eval_points=num_collocation_points,
+                    eval_name="coll_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*_vortex_mesh", "coll_pts"],
+                promotes_outputs=["*"],
+            )
+        else:
+            self.add_subsystem(
+                "mtx_assy",
+                EvalVelMtx(
+                    surfaces=surfaces,
+                    num_eval_points=num_collocation_points,
+                    eval_name="coll_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*_vectors"],
+                promotes_outputs=["*"],
+            )
 
         self.connect("pg_frame.alpha_pg", "mtx_assy.alpha")
 
@@ -151,14 +229,24 @@ class CompressibleVLMStates(om.Group):
         # Construct RHS and full matrix of system
         self.add_subsystem(
             "mtx_rhs",
-            VLMMtxRHSComp(surfaces=surfaces),
+            VLMMtxRHSComp(surfaces=surfaces, matrix_free=self.options["aic_matrix_free"]),
             promotes_inputs=["freestream_velocities", "*coll_pts_vel_mtx"],
             promotes_outputs=["*"],
         )
 
         # Solve Mtx RHS to get ring circs
         self.add_subsystem(
-            "solve_matrix", SolveMatrix(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"]
+            "solve_matrix",
+            SolveMatrix(
+                surfaces=surfaces,
+                solver=self.options["aic_solver"],
+                preconditioner=self.options["aic_preconditioner"],
+                matrix_free=self.options["aic_matrix_free"],
+                precision=self.options["aic_precision"],
+                aic_cache=self.options["aic_cache"],
+            ),
+            promotes_inputs=["*"],
+            promotes_outputs=["*"],
         )
 
         # Convert ring circs to horseshoe circs
@@ -169,29 +257,54 @@ class CompressibleVLMStates(om.Group):
             promotes_outputs=["*"],
         )
 
-        # Eval force vectors
-        self.add_subsystem(
-            "get_vectors_force",
-            GetVectors(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
-
         # Set up force mtx
         # Note, don't want to promote Alpha here because we are in the transformed system.
-        self.add_subsystem(
-            "mtx_assy_forces",
-            EvalVelMtx(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
-            promotes_inputs=["*_force_pts_vectors"],
-            promotes_outputs=["*"],
-        )
+        if fused_aic:
+            self.add_subsystem(
+                "mtx_assy_forces",
+                VortexInfluence(
+                    surfaces=surfaces,
+                    num_eval_points=num_force_points,
+                    eval_name="force_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*_vortex_mesh", "force_pts"],
+                promotes_outputs=["*"],
+            )
+        else:
+            # Eval force vectors
+            self.add_subsystem(
+                "get_vectors_force",
+                GetVectors(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+
+            self.add_subsystem(
+                "mtx_assy_forces",
+                EvalVelMtx(
+                    surfaces=surfaces,
+                    num_eval_points=num_force_points,
+                    eval_name="force_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*_force_pts_vectors"],
+                promotes_outputs=["*"],
+            )
 
         self.connect("pg_frame.alpha_pg", "mtx_assy_forces.alpha")
 
         # Multiply by horseshoe circs to get velocities
         self.add_subsystem(
             "eval_velocities",
-            EvalVelocities(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
+            EvalVelocities(
+                surfaces=surfaces,
+                num_eval_points=num_force_points,
+                eval_name="force_pts",
+                matrix_free=self.options["aic_matrix_free"],
+            ),
             promotes_inputs=["*"],
             promotes_outputs=["*"],
         )
@@ -216,7 +329,7 @@ class CompressibleVLMStates(om.Group):
 
         self.add_subsystem(
             "inverse_pg_transform",
-            InversePGTransform(surfaces=surfaces),
+            FusedInversePGTransform(surfaces=surfaces),
             promotes_inputs=["alpha", "beta", "Mach_number"],
             promotes_outputs=prom_out,
         )
@@ -9,25 +9,31 @@ class ConvertVelocity(om.ExplicitComponent):
     evaluation point. In this case, each of the panels sees the same velocity.
     This really just helps us set up the velocities for use in the VLM analysis.
 
+    With vec_size > 1, alpha and beta are arrays with one flight condition
+    per entry, and the freestream velocities are computed for each of them,
+    each with its own rotational velocities.
+
     Parameters
     ----------
-    alpha : float
+    alpha[vec_size] : numpy array
         The angle of attack for the aircraft (all lifting surfaces) in degrees.
-    beta : float
+    beta[vec_size] : numpy array
         The sideslip angle for the aircraft (all lifting surfaces) in degrees.
     v : float
         The freestream velocity magnitude.
     rotational_velocities[system_size, 3] : numpy array
         The rotated freestream velocities at each evaluation point for all
         lifting surfaces. system_size is the sum of the count of all panels
-        for all lifting surfaces.
+        for all lifting surfaces. With vec_size > 1, the shape is
+        [vec_size, system_size, 3].
 
     Returns
     -------
     freestream_velocities[system_size, 3] : numpy array
         The rotated freestream velocities at each evaluation point for all
         lifting surfaces. system_size is the sum of the count of all panels
-        for all lifting surfaces.
+        for all lifting surfaces. With vec_size > 1, the shape is
+        [vec_size, system_size, 3].
     """
 
     def initialize(self):
@@ -35,10 +41,14 @@ class ConvertVelocity(om.ExplicitComponent):
         self.options.declare(
             "rotational", False, types=bool, desc="Set to True to turn on support for computing angular velocities"
         )
+        self.options.declare(
+            "vec_size", 1, types=int, lower=1, desc="Number of flight conditions (alpha and beta) to compute."
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
         rotational = self.options["rotational"]
+        vec_size = self.options["vec_size"]
 
         system_size = 0
         sizes = []
@@ -55,54 +65,62 @@ class ConvertVelocity(om.ExplicitComponent):
 
         self.system_size = system_size
 
-        self.add_input("alpha", val=0.0, units="deg", tags=["mphys_input"])
-        self.add_input("beta", val=0.0, units="deg", tags=["mphys_input"])
+        self.add_input("alpha", val=0.0, shape=vec_size, units="deg", tags=["mphys_input"])
+        self.add_input("beta", val=0.0, shape=vec_size, units="deg", tags=["mphys_input"])
         self.add_input("v", val=1.0, units="m/s", tags=["mphys_input"])
 
+        if vec_size > 1:
+            shape = (vec_size, system_size, 3)
+        else:
+            shape = (system_size, 3)
+
         if rotational:
-            self.add_input("rotational_velocities", shape=(system_size, 3), units="m/s")
+            self.add_input("rotational_velocities", shape=shape, units="m/s")
+
+        self.add_output("freestream_velocities", shape=shape, units="m/s")
 
-        self.add_output("freestream_velocities", shape=(system_size, 3), units="m/s")
+        # Each flight condition only affects its own velocities
+        nn = 3 * system_size
+        rows = np.arange(vec_size * nn)
+        cols = np.repeat(np.arange(vec_size), nn)
 
-        self.declare_partials("freestream_velocities", "alpha")
-        self.declare_partials("freestream_velocities", "beta")
+        self.declare_partials("freestream_velocities", "alpha", rows=rows, cols=cols)
+        self.declare_partials("freestream_velocities", "beta", rows=rows, cols=cols)
         self.declare_partials("freestream_velocities", "v")
 
         if rotational:
-            nn = 3 * system_size
-            row_col = np.arange(nn)
-            val = np.ones((nn,))
-            self.declare_partials("freestream_velocities", "rotational_velocities", rows=row_col, cols=row_col, val=val)
+            val = np.ones((vec_size * nn,))
+            self.declare_partials("freestream_velocities", "rotational_velocities", rows=rows, cols=rows, val=val)
+
+    def _get_trig(self, inputs):
+        """
+        Compute the sines and cosines of the flight angles, with a trailing
+        axis to broadcast against the velocity components.
+        """
+        alpha = inputs["alpha"][:, np.newaxis] * np.pi / 180.0
+        beta = inputs["beta"][:, np.newaxis] * np.pi / 180.0
+
+        return np.cos(alpha), np.sin(alpha), np.cos(beta), np.sin(beta)
 
     def compute(self, inputs, outputs):
         # Rotate the freestream velocities based on the angle of attack and the sideslip angle.
-        alpha = inputs["alpha"][0] * np.pi / 180.0
-        beta = inputs["beta"][0] * np.pi / 180.0
-
-        cosa = np.cos(alpha)
-        sina = np.sin(alpha)
-        cosb = np.cos(beta)
-        sinb = np.sin(beta)
+        cosa, sina, cosb, sinb = self._get_trig(inputs)
 
-        v_inf = inputs["v"][0] * np.array([cosa * cosb, -sinb, sina * cosb])
-        outputs["freestream_velocities"][:, :] = v_inf
+        v_inf = inputs["v"][0] * np.hstack([cosa * cosb, -sinb, sina * cosb])
+        freestream_velocities = outputs["freestream_velocities"].reshape((-1, self.system_size, 3))
+        freestream_velocities[:] = v_inf[:, np.newaxis, :]
 
         if self.options["rotational"]:
-            outputs["freestream_velocities"][:, :] += inputs["rotational_velocities"]
+            freestream_velocities += inputs["rotational_velocities"]
 
     def compute_partials(self, inputs, J):
-        alpha = inputs["alpha"][0] * np.pi / 180.0
-        beta = inputs["beta"][0] * np.pi / 180.0
-
-        cosa = np.cos(alpha)
-        sina = np.sin(alpha)
-        cosb = np.cos(beta)
-        sinb = np.sin(beta)
+        cosa, sina, cosb, sinb = self._get_trig(inputs)
+        system_size = self.system_size
 
-        J["freestream_velocities", "v"] = np.tile(np.array([cosa * cosb, -sinb, sina * cosb]), self.system_size)
+        J["freestream_velocities", "v"] = np.tile(np.hstack([cosa * cosb, -sinb, sina * cosb]), system_size).flatten()
         J["freestream_velocities", "alpha"] = np.tile(
-            inputs["v"][0] * np.array([-sina * cosb, 0.0, cosa * cosb]) * np.pi / 180.0, self.system_size
-        )
+            inputs["v"][0] * np.hstack([-sina * cosb, 0.0 * cosa, cosa * cosb]) * np.pi / 180.0, system_size
+        ).flatten()
         J["freestream_velocities", "beta"] = np.tile(
-            inputs["v"][0] * np.array([-cosa * sinb, -cosb, -sina * sinb]) * np.pi / 180.0, self.system_size
-        )
+            inputs["v"][0] * np.hstack([-cosa * sinb, -cosb, -sina * sinb]) * np.pi / 180.0, system_size
+        ).flatten()
@@ -37,6 +37,13 @@ class EvalVelocities(om.ExplicitComponent):
         self.options.declare("surfaces", types=list)
         self.options.declare("eval_name", types=str)
         self.options.declare("num_eval_points", types=int)
+        self.options.declare(
+            "matrix_free",
+            default=False,
+            types=bool,
+            desc="Set to True to apply the derivatives in compute_jacvec_product instead of declaring the dense "
+            "partials. This cannot be used under a linear solver that assembles the Jacobian.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
@@ -63,6 +70,20 @@ class EvalVelocities(om.ExplicitComponent):
         velocities_name = "{}_velocities".format(eval_name)
         self.add_output(velocities_name, shape=(num_eval_points, 3), units="m/s")
 
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            vel_mtx_name = "{}_{}_vel_mtx".format(surface["name"], eval_name)
+
+            self.add_input(vel_mtx_name, shape=(num_eval_points, nx - 1, ny - 1, 3), units="1/m")
+
+        # OpenMDAO only calls compute_jacvec_product on matrix free components, and
+        # uses the declared partials otherwise
+        self.matrix_free = self.options["matrix_free"]
+        if self.matrix_free:
+            return
+
         # Set up indices to create the sparsity pattern for the derivatives.
         circulations_indices = np.arange(system_size)
         velocities_indices = np.arange(num_eval_points * 3).reshape((num_eval_points, 3))
@@ -86,8 +107,6 @@ class EvalVelocities(om.ExplicitComponent):
         # For each surface we need to correctly set up the sparsity pattern
         # based on the vel_mtx. This is pretty hairy due to the highly
         # dimensional nature of the vel_mtx.
-        ind_1 = 0
-        ind_2 = 0
         for surface in surfaces:
             mesh = surface["mesh"]
             nx = mesh.shape[0]
@@ -95,12 +114,8 @@ class EvalVelocities(om.ExplicitComponent):
             name = surface["name"]
             num = (nx - 1) * (ny - 1)
 
-            ind_2 += num
-
             vel_mtx_name = "{}_{}_vel_mtx".format(name, eval_name)
 
-            self.add_input(vel_mtx_name, shape=(num_eval_points, nx - 1, ny - 1, 3), units="1/m")
-
             vel_mtx_indices = np.arange(num_eval_points * num * 3).reshape((num_eval_points, num, 3))
 
             self.declare_partials(
@@ -110,8 +125,6 @@ class EvalVelocities(om.ExplicitComponent):
                 cols=vel_mtx_indices.flatten(),
             )
 
-            ind_1 += num
-
     def compute(self, inputs, outputs):
         surfaces = self.options["surfaces"]
         eval_name = self.options["eval_name"]
@@ -147,6 +160,9 @@ class EvalVelocities(om.ExplicitComponent):
             ind_1 += num
 
     def compute_partials(self, inputs, partials):
+        if self.options["matrix_free"]:
+            return
+
         surfaces = self.options["surfaces"]
         eval_name = self.options["eval_name"]
         num_eval_points = self.options["num_eval_points"]
@@ -181,3 +197,58 @@ class EvalVelocities(om.ExplicitComponent):
             ind_1 += num
 
         partials[velocities_name, "circulations"] = dv_dcirc.flatten()
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        """
+        Apply the derivatives directly from the vel_mtx inputs and the
+        circulations. This is only called with the matrix_free option, since
+        the component otherwise uses its declared partials.
+        """
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+
+        velocities_name = "{}_velocities".format(eval_name)
+
+        if velocities_name not in d_outputs:
+            return
+
+        d_velocities = d_outputs[velocities_name]
+
+        if "freestream_velocities" in d_inputs:
+            if mode == "fwd":
+                d_velocities += d_inputs["freestream_velocities"]
+            else:
+                d_inputs["freestream_velocities"] += d_velocities
+
+        ind_1 = 0
+        ind_2 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            num = (nx - 1) * (ny - 1)
+
+            ind_2 += num
+
+            vel_mtx_name = "{}_{}_vel_mtx".format(name, eval_name)
+            vel_mtx = inputs[vel_mtx_name].reshape((num_eval_points, num, 3))
+            circulations = inputs["circulations"][ind_1:ind_2]
+
+            if mode == "fwd":
+                if "circulations" in d_inputs:
+                    d_velocities += np.einsum("ijk,j->ik", vel_mtx, d_inputs["circulations"][ind_1:ind_2])
+                if vel_mtx_name in d_inputs:
+                    d_velocities += np.einsum(
+                        "ijk,j->ik", d_inputs[vel_mtx_name].reshape((num_eval_points, num, 3)), circulations
+                    )
+            else:
+                if "circulations" in d_inputs:
+                    d_inputs["circulations"][ind_1:ind_2] += np.einsum("ijk,ik->j", vel_mtx, d_velocities)
+                if vel_mtx_name in d_inputs:
+                    d_inputs[vel_mtx_name] += np.einsum("ik,j->ijk", d_velocities, circulations).reshape(
+                        (num_eval_points, nx - 1, ny - 1, 3)
+                    )
+
+            ind_1 += num
@@ -0,0 +1,366 @@
+"""
+Free-wake model for the vortex lattice method.
+
+In the default model, every trailing-edge vertex of the vortex mesh sheds a
+straight semi-infinite trailing leg aligned with alpha. In the free-wake
+model, each of these wake lines is instead a polyline of
+`num_wake_panels` straight filaments starting at its trailing-edge vertex,
+closed by a semi-infinite filament aligned with alpha at its far end. The
+vertices of the polylines are unknowns, found by relaxing the wake until
+each filament is aligned with the local velocity at its upstream end.
+
+The influence of the wake is split into that of the straight trailing legs,
+which is already part of the usual AIC matrix, and a correction for the
+polylines: their filaments, plus the semi-infinite filament at their far
+end, minus the straight trailing leg. The correction vanishes for a straight
+wake, and only involves the circulations of the last chordwise row of rings,
+so moving the wake only changes those columns of the AIC matrix. The rest
+of the AIC matrix, that is the bound-to-bound blocks, is assembled and
+factored once per geometry, and the system updated with the wake is solved
+with the Woodbury identity.
+
+The wake lines of all lifting surfaces are gathered in a single array of
+polylines, ordered by surface and, for each surface, with the lines of the
+(possibly mirrored) vortex mesh followed by those of its ground plane image,
+if any. The image lines are the reflections of the real ones across the
+ground plane, as in `VortexMesh`.
+"""
+
+import numpy as np
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    _compute_filaments,
+    _compute_filaments_deriv,
+    _compute_semi_infinite_filaments,
+    _compute_semi_infinite_filaments_deriv,
+    get_surface_options,
+    get_tile_size,
+)
+from openaerostruct.aerodynamics.tree_code import _get_ring_indices
+
+
+# Default number of straight filaments along each wake line
+NUM_WAKE_PANELS = 8
+
+# Default length of the relaxed part of the wake, in multiples of the
+# largest chord of the lifting surfaces
+WAKE_LENGTH = 5.0
+
+
+def get_wake_direction(alpha):
+    """
+    Get the direction of the semi-infinite filaments for alpha in degrees.
+    """
+    cosa = np.cos(alpha * np.pi / 180.0)
+    sina = np.sin(alpha * np.pi / 180.0)
+    return np.array([cosa, 0.0 * cosa, sina])
+
+
+def get_ground_reflection(alpha, height_agl):
+    """
+    Get the reflection across the ground plane used in `VortexMesh`, which is
+    parallel to the freestream and height_agl away from the origin, as
+    x -> mtx . x + offset for alpha in degrees.
+    """
+    alpha = alpha * np.pi / 180.0
+    plane_normal = np.array([np.sin(alpha), 0.0 * alpha, -np.cos(alpha)])
+    mtx = np.eye(3) - 2.0 * np.outer(plane_normal, plane_normal)
+    offset = 2.0 * height_agl * plane_normal
+    return mtx, offset
+
+
+def get_wake_step(surfaces, num_wake_panels, wake_length=WAKE_LENGTH):
+    """
+    Get the length of the filaments of the wake lines, which is the same for
+    all lifting surfaces.
+    """
+    chord = max(np.max(np.linalg.norm(surface["mesh"][-1] - surface["mesh"][0], axis=-1)) for surface in surfaces)
+    return wake_length * chord / num_wake_panels
+
+
+class WakeLines(object):
+    """
+    Bookkeeping of the wake lines of all lifting surfaces.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    num_wake_panels : int
+        Number of straight filaments along each wake line.
+
+    Attributes
+    ----------
+    num_lines : int
+        Total number of wake lines, including the ground plane images.
+    te_indices[num_te] : numpy array
+        Indices of the circulations of the last chordwise row of rings of
+        every lifting surface, which are the only ones that shed a wake.
+    line_mtx[num_lines, num_te] : numpy array
+        The circulation of each wake line per unit circulation of the rings
+        in te_indices; each line carries the difference between the
+        circulations of the rings on either side of it.
+    line_slices : list of tuple
+        For each surface, the slices of its real and image wake lines, where
+        the latter is None without ground effect.
+    """
+
+    def __init__(self, surfaces, num_wake_panels):
+        self.surfaces = surfaces
+        self.num_wake_panels = num_wake_panels
+
+        te_indices = []
+        line_blocks = []
+        self.line_slices = []
+
+        offset = 0
+        num_lines = 0
+        for surface in surfaces:
+            nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+            ny_actual = 2 * ny - 1 if symmetry else ny
+
+            te_indices.append(offset + (nx - 2) * (ny - 1) + np.arange(ny - 1))
+
+            # Ring i of the last row sheds line i with its circulation and
+            # line i + 1 with the opposite one, as in _compute_ring_influence
+            ring_indices = _get_ring_indices(nx, ny, symmetry, right_wing)[-1] - (nx - 2) * (ny - 1)
+            block = np.zeros((ny_actual, ny - 1))
+            block[np.arange(ny_actual - 1), ring_indices] += 1.0
+            block[np.arange(1, ny_actual), ring_indices] -= 1.0
+
+            real_slice = slice(num_lines, num_lines + ny_actual)
+            line_blocks.append(block)
+            num_lines += ny_actual
+
+            if ground_effect:
+                image_slice = slice(num_lines, num_lines + ny_actual)
+                line_blocks.append(-block)
+                num_lines += ny_actual
+            else:
+                image_slice = None
+
+            self.line_slices.append((real_slice, image_slice))
+            offset += (nx - 1) * (ny - 1)
+
+        self.num_lines = num_lines
+        self.te_indices = np.concatenate(te_indices)
+
+        # Each block only involves the rings of its own surface
+        self.line_mtx = np.zeros((num_lines, len(self.te_indices)))
+        row = 0
+        col = 0
+        for surface, (real_slice, image_slice) in zip(surfaces, self.line_slices):
+            num_te = surface["mesh"].shape[1] - 1
+            for line_slice in (real_slice, image_slice):
+                if line_slice is not None:
+                    self.line_mtx[line_slice, col : col + num_te] = line_blocks[row]
+                    row += 1
+            col += num_te
+
+    def get_strengths(self, circulations):
+        """
+        Get the circulation of every wake line from the ring circulations.
+        """
+        return self.line_mtx.dot(circulations[..., self.te_indices].T).T
+
+    def get_polylines(self, vortex_meshes, wake_meshes, alpha=0.0, height_agl=0.0):
+        """
+        Gather the vertices of all wake lines, starting at the trailing edge
+        of the vortex meshes and followed by the wake meshes.
+
+        Parameters
+        ----------
+        vortex_meshes : list of numpy arrays
+            The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+        wake_meshes : list of numpy arrays
+            The vertices of the wake lines of each lifting surface, past the
+            trailing edge, with shape [num_wake_panels, ny_actual, 3].
+        alpha : float
+            Angle of attack in degrees, used to reflect the wake across the
+            ground plane.
+        height_agl : float
+            Height above the ground plane, used to reflect the wake across it.
+
+        Returns
+        -------
+        polylines[num_wake_panels + 1, num_lines, 3] : numpy array
+            The vertices of every wake line.
+        """
+        dtype = np.result_type(alpha, height_agl, *vortex_meshes, *wake_meshes)
+        polylines = np.zeros((self.num_wake_panels + 1, self.num_lines, 3), dtype=dtype)
+
+        for surface, vortex_mesh, wake_mesh, (real_slice, image_slice) in zip(
+            self.surfaces, vortex_meshes, wake_meshes, self.line_slices
+        ):
+            nx = surface["mesh"].shape[0]
+
+            polylines[0, real_slice] = vortex_mesh[nx - 1]
+            polylines[1:, real_slice] = wake_mesh
+
+            if image_slice is not None:
+                mtx, offset = get_ground_reflection(alpha, height_agl)
+                polylines[0, image_slice] = vortex_mesh[-1]
+                polylines[1:, image_slice] = wake_mesh.dot(mtx.T) + offset
+
+        return polylines
+
+    def gather_te_seeds(self, d_vortex_meshes):
+        """
+        Gather the seeds of the trailing edges of the vortex meshes, any of
+        which may be None, into seeds for the first vertex of each wake line.
+        """
+        d_te = np.zeros((self.num_lines, 3))
+        for surface, d_vortex_mesh, (real_slice, image_slice) in zip(self.surfaces, d_vortex_meshes, self.line_slices):
+            if d_vortex_mesh is None:
+                continue
+            nx = surface["mesh"].shape[0]
+            d_te[real_slice] += d_vortex_mesh[nx - 1]
+            if image_slice is not None:
+                d_te[image_slice] += d_vortex_mesh[-1]
+        return d_te
+
+    def scatter_te_seeds(self, d_te, d_vortex_meshes):
+        """
+        Accumulate the seeds of the first vertex of each wake line into the
+        trailing edges of the vortex meshes, any of which may be None.
+        """
+        for surface, d_vortex_mesh, (real_slice, image_slice) in zip(self.surfaces, d_vortex_meshes, self.line_slices):
+            if d_vortex_mesh is None:
+                continue
+            nx = surface["mesh"].shape[0]
+            d_vortex_mesh[nx - 1] += d_te[real_slice]
+            if image_slice is not None:
+                d_vortex_mesh[-1] += d_te[image_slice]
+
+    def get_wake_partials(self, d_polylines, alpha=0.0):
+        """
+        Gather the derivatives with respect to the vertices of the wake lines
+        past the trailing edge into derivatives with respect to the wake
+        meshes, including the reflected vertices of the ground plane images.
+
+        Parameters
+        ----------
+        d_polylines[..., num_wake_panels + 1, num_lines, 3] : numpy array
+            Derivatives with respect to the vertices of every wake line.
+        alpha : float
+            Angle of attack in degrees.
+
+        Returns
+        -------
+        d_wake_meshes[..., num_wake_dofs] : numpy array
+            Derivatives with respect to the wake meshes of all surfaces,
+            flattened and concatenated.
+        """
+        leading_shape = d_polylines.shape[:-3]
+        d_wake_meshes = []
+
+        for real_slice, image_slice in self.line_slices:
+            d_wake_mesh = d_polylines[..., 1:, real_slice, :].copy()
+            if image_slice is not None:
+                mtx, _ = get_ground_reflection(alpha, 0.0)
+                d_wake_mesh += d_polylines[..., 1:, image_slice, :].dot(mtx)
+            d_wake_meshes.append(d_wake_mesh.reshape(leading_shape + (-1,)))
+
+        return np.concatenate(d_wake_meshes, axis=-1)
+
+
+def compute_wake_influence(polylines, eval_points, u, mem_budget=TILE_MEM_BUDGET):
+    """
+    Compute the velocity induced at the evaluation points by each wake line
+    with a unit circulation, minus that of the straight trailing leg at its
+    trailing-edge vertex.
+
+    Parameters
+    ----------
+    polylines[num_wake_panels + 1, num_lines, 3] : numpy array
+        The vertices of every wake line, starting at the trailing edge.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    u[3] : numpy array
+        Direction of the semi-infinite filaments.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+
+    Returns
+    -------
+    wake_vel_mtx[num_eval_points, num_lines, 3] : numpy array
+        The velocity correction induced by each wake line.
+    """
+    num_vertices, num_lines = polylines.shape[:2]
+    num_eval_points = eval_points.shape[0]
+
+    dtype = np.result_type(polylines, eval_points, u)
+    wake_vel_mtx = np.zeros((num_eval_points, num_lines, 3), dtype=dtype)
+
+    tile_size = get_tile_size(num_eval_points, num_vertices * num_lines, wake_vel_mtx.itemsize, mem_budget)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[ind_1:ind_2, np.newaxis, np.newaxis, :] - polylines[np.newaxis]
+        norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+        filaments = _compute_filaments(vectors[:, :-1], norms[:, :-1], vectors[:, 1:], norms[:, 1:])
+
+        result = wake_vel_mtx[ind_1:ind_2]
+        np.sum(filaments, axis=1, out=result)
+        result += _compute_semi_infinite_filaments(u, vectors[:, -1], norms[:, -1])
+        result -= _compute_semi_infinite_filaments(u, vectors[:, 0], norms[:, 0])
+
+    return wake_vel_mtx
+
+
+def compute_wake_influence_deriv(polylines, eval_points, u, strengths, mem_budget=TILE_MEM_BUDGET):
+    """
+    Compute the derivatives of the velocity correction induced by the wake
+    lines with the given circulations, with respect to the vertices of the
+    wake lines and to the evaluation points.
+
+    Parameters
+    ----------
+    polylines[num_wake_panels + 1, num_lines, 3] : numpy array
+        The vertices of every wake line, starting at the trailing edge.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    u[3] : numpy array
+        Direction of the semi-infinite filaments.
+    strengths[num_lines] : numpy array
+        The circulation of every wake line.
+    mem_budget : float
+        Memory budget in bytes for the temporaries of a single tile.
+
+    Returns
+    -------
+    d_polylines[num_eval_points, 3, num_wake_panels + 1, num_lines, 3] : numpy array
+        Derivatives of each velocity component with respect to the vertices.
+    d_eval_points[num_eval_points, 3, 3] : numpy array
+        Derivatives of each velocity component with respect to the
+        evaluation point it is computed at.
+    """
+    num_vertices, num_lines = polylines.shape[:2]
+    num_eval_points = eval_points.shape[0]
+
+    dtype = np.result_type(polylines, eval_points, u, strengths)
+    d_polylines = np.zeros((num_eval_points, 3, num_vertices, num_lines, 3), dtype=dtype)
+
+    tile_size = get_tile_size(num_eval_points, num_vertices * num_lines, d_polylines.itemsize, mem_budget, deriv=True)
+
+    for ind_1 in range(0, num_eval_points, tile_size):
+        ind_2 = min(ind_1 + tile_size, num_eval_points)
+        vectors = eval_points[ind_1:ind_2, np.newaxis, np.newaxis, :] - polylines[np.newaxis]
+        norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+        # Derivatives with respect to the vectors from each vertex
+        deriv_1, deriv_2 = _compute_filaments_deriv(vectors[:, :-1], norms[:, :-1], vectors[:, 1:], norms[:, 1:])
+        derivs = np.zeros(vectors.shape + (3,), dtype=dtype)
+        derivs[:, :-1] += deriv_1
+        derivs[:, 1:] += deriv_2
+        derivs[:, -1] += _compute_semi_infinite_filaments_deriv(u, vectors[:, -1], norms[:, -1])
+        derivs[:, 0] -= _compute_semi_infinite_filaments_deriv(u, vectors[:, 0], norms[:, 0])
+
+        # The vectors point from the vertices to the evaluation points
+        d_polylines[ind_1:ind_2] = -np.einsum("tklab,l->taklb", derivs, strengths)
+
+    d_eval_points = -np.sum(d_polylines, axis=(2, 3))
+
+    return d_polylines, d_eval_points
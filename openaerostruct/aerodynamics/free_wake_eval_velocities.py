@@ -0,0 +1,300 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    apply_system_vel_mtx_deriv,
+    compute_system_vel_mtx,
+)
+from openaerostruct.aerodynamics.free_wake import (
+    NUM_WAKE_PANELS,
+    WakeLines,
+    compute_wake_influence,
+    compute_wake_influence_deriv,
+    get_wake_direction,
+)
+from openaerostruct.aerodynamics.tree_code import compute_trailing_alpha_deriv
+
+
+class FreeWakeEvalVelocities(om.ExplicitComponent):
+    """
+    Compute the total velocities at each of the evaluation points, like
+    EvalVelocities, with the relaxed wake computed by FreeWakeSolveMatrix
+    instead of straight trailing legs. This replaces the combination of
+    GetVectors, EvalVelMtx, and EvalVelocities.
+
+    The derivatives are computed matrix-free, so this component cannot be
+    used under a linear solver that assembles the Jacobian.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    height_agl : float
+        If ground effect is turned on, the height above the ground plane.
+    eval_name[num_eval_points, 3] : numpy array
+        These are the evaluation points, either collocation or force points.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+    wake_mesh[num_wake_panels, ny, 3] : numpy array
+        The vertices of the wake lines shed at the trailing edge of the vortex
+        mesh, past the trailing edge. For the symmetric case, the second
+        dimension is length (2 * ny - 1). There is one of these arrays for
+        each lifting surface in the problem.
+    freestream_velocities[system_size, 3] : numpy array
+        The rotated freestream velocities at each evaluation point for all
+        lifting surfaces. system_size is the sum of the count of all panels
+        for all lifting surfaces.
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained from solving the AIC linear
+        system.
+
+    Returns
+    -------
+    velocities[num_eval_points, 3] : numpy array
+        The actual velocities experienced at the evaluation points for each
+        lifting surface in the system. This is the summation of the freestream
+        velocities and the induced velocities caused by the circulations.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("eval_name", types=str)
+        self.options.declare("num_eval_points", types=int)
+        self.options.declare(
+            "num_wake_panels",
+            default=NUM_WAKE_PANELS,
+            types=int,
+            lower=1,
+            desc="Number of straight filaments along each wake line.",
+        )
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+        num_wake_panels = self.options["num_wake_panels"]
+
+        system_size = 0
+        ground_effect = False
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+                ground_effect = True
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+            self.add_input("{}_wake_mesh".format(name), val=np.zeros((num_wake_panels, ny_actual, 3)), units="m")
+
+        self.system_size = system_size
+        self.ground_effect = ground_effect
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        if ground_effect:
+            self.add_input("height_agl", val=8000.0, units="m")
+        self.add_input(eval_name, val=np.zeros((num_eval_points, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(system_size, 3), units="m/s")
+        self.add_input("circulations", shape=system_size, units="m**2/s")
+
+        self.add_output("{}_velocities".format(eval_name), val=np.zeros((num_eval_points, 3)), units="m/s")
+
+        self.lines = WakeLines(surfaces, num_wake_panels)
+
+    def _get_vortex_meshes(self, inputs):
+        return [inputs["{}_vortex_mesh".format(surface["name"])] for surface in self.options["surfaces"]]
+
+    def _get_wake_meshes(self, inputs):
+        return [inputs["{}_wake_mesh".format(surface["name"])] for surface in self.options["surfaces"]]
+
+    def _get_height_agl(self, inputs):
+        if self.ground_effect:
+            return inputs["height_agl"][0]
+        return 0.0
+
+    def _compute_wake_velocities(self, inputs, alpha, height_agl):
+        """
+        Compute the velocity corrections of the wake lines at the evaluation
+        points. This is complex-step safe in alpha and height_agl.
+        """
+        polylines = self.lines.get_polylines(
+            self._get_vortex_meshes(inputs), self._get_wake_meshes(inputs), alpha, height_agl
+        )
+        wake_vel_mtx = compute_wake_influence(
+            polylines, inputs[self.options["eval_name"]], get_wake_direction(alpha), self.options["mem_budget"]
+        )
+        return np.einsum("ilk,l->ik", wake_vel_mtx, self.lines.get_strengths(inputs["circulations"]))
+
+    def compute(self, inputs, outputs):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        alpha = inputs["alpha"][0]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        polylines = self.lines.get_polylines(
+            vortex_meshes, self._get_wake_meshes(inputs), alpha, self._get_height_agl(inputs)
+        )
+
+        self.vel_mtx = compute_system_vel_mtx(
+            surfaces, vortex_meshes, inputs[eval_name], alpha, self.options["mem_budget"]
+        )
+        self.wake_vel_mtx = compute_wake_influence(
+            polylines, inputs[eval_name], get_wake_direction(alpha), self.options["mem_budget"]
+        )
+
+        circulations = inputs["circulations"]
+        outputs["{}_velocities".format(eval_name)] = (
+            inputs["freestream_velocities"]
+            + np.einsum("ijk,j->ik", self.vel_mtx, circulations)
+            + np.einsum("ilk,l->ik", self.wake_vel_mtx, self.lines.get_strengths(circulations))
+        )
+
+        # These depend on the circulations, so they are computed again when needed
+        self.derivs = None
+
+    def _compute_derivs(self, inputs):
+        """
+        Compute the derivatives of the velocities with respect to the wake
+        lines, the evaluation points, and the scalar inputs.
+        """
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        alpha = inputs["alpha"][0]
+        height_agl = self._get_height_agl(inputs)
+        circulations = inputs["circulations"]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        polylines = self.lines.get_polylines(vortex_meshes, self._get_wake_meshes(inputs), alpha, height_agl)
+
+        d_polylines, d_eval_points = compute_wake_influence_deriv(
+            polylines,
+            inputs[eval_name],
+            get_wake_direction(alpha),
+            self.lines.get_strengths(circulations),
+            self.options["mem_budget"],
+        )
+
+        # Alpha sets the direction of the semi-infinite filaments and the
+        # ground plane, and height_agl the ground plane, so we complex step
+        # the velocity corrections of the wake with respect to both
+        step = 1e-40
+        dvel_dalpha = self._compute_wake_velocities(inputs, alpha + step * 1j, height_agl).imag / step
+        dvel_dalpha += compute_trailing_alpha_deriv(surfaces, vortex_meshes, inputs[eval_name], alpha, circulations)
+        scalar_derivs = {"alpha": dvel_dalpha}
+        if self.ground_effect:
+            scalar_derivs["height_agl"] = (
+                self._compute_wake_velocities(inputs, alpha, height_agl + step * 1j).imag / step
+            )
+
+        self.derivs = {
+            "te": d_polylines[:, :, 0].copy(),
+            "wake": self.lines.get_wake_partials(d_polylines, alpha),
+            "eval_points": d_eval_points,
+            "scalars": scalar_derivs,
+        }
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        velocities_name = "{}_velocities".format(eval_name)
+
+        if velocities_name not in d_outputs:
+            return
+
+        if self.derivs is None:
+            self._compute_derivs(inputs)
+        derivs = self.derivs
+
+        d_velocities = d_outputs[velocities_name]
+        wake_mesh_names = ["{}_wake_mesh".format(surface["name"]) for surface in surfaces]
+
+        d_eval_points = d_inputs[eval_name] if eval_name in d_inputs else None
+        d_vortex_meshes = []
+        for surface in surfaces:
+            vortex_mesh_name = "{}_vortex_mesh".format(surface["name"])
+            d_vortex_meshes.append(d_inputs[vortex_mesh_name] if vortex_mesh_name in d_inputs else None)
+        any_d_vortex_mesh = any(d_vortex_mesh is not None for d_vortex_mesh in d_vortex_meshes)
+
+        if mode == "fwd":
+            if "freestream_velocities" in d_inputs:
+                d_velocities += d_inputs["freestream_velocities"]
+            if "circulations" in d_inputs:
+                d_circulations = d_inputs["circulations"]
+                d_velocities += np.einsum("ijk,j->ik", self.vel_mtx, d_circulations)
+                d_velocities += np.einsum("ilk,l->ik", self.wake_vel_mtx, self.lines.get_strengths(d_circulations))
+            for scalar_name, dvel_dscalar in derivs["scalars"].items():
+                if scalar_name in d_inputs:
+                    d_velocities += dvel_dscalar * d_inputs[scalar_name]
+            if d_eval_points is not None:
+                d_velocities += np.einsum("iab,ib->ia", derivs["eval_points"], d_eval_points)
+            if any_d_vortex_mesh:
+                d_te = self.lines.gather_te_seeds(d_vortex_meshes)
+                d_velocities += np.einsum("ialb,lb->ia", derivs["te"], d_te)
+            if any(name in d_inputs for name in wake_mesh_names):
+                d_wake_meshes = np.concatenate(
+                    [
+                        d_inputs[name].flatten() if name in d_inputs else np.zeros(inputs[name].size)
+                        for name in wake_mesh_names
+                    ]
+                )
+                d_velocities += derivs["wake"].dot(d_wake_meshes)
+        else:
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_velocities
+            if "circulations" in d_inputs:
+                d_inputs["circulations"] += np.einsum("ijk,ik->j", self.vel_mtx, d_velocities)
+                d_strengths = np.einsum("ilk,ik->l", self.wake_vel_mtx, d_velocities)
+                d_inputs["circulations"][self.lines.te_indices] += self.lines.line_mtx.T.dot(d_strengths)
+            for scalar_name, dvel_dscalar in derivs["scalars"].items():
+                if scalar_name in d_inputs:
+                    d_inputs[scalar_name] += np.sum(dvel_dscalar * d_velocities)
+            if d_eval_points is not None:
+                d_eval_points += np.einsum("iab,ia->ib", derivs["eval_points"], d_velocities)
+            if any_d_vortex_mesh:
+                d_te = np.einsum("ialb,ia->lb", derivs["te"], d_velocities)
+                self.lines.scatter_te_seeds(d_te, d_vortex_meshes)
+            if any(name in d_inputs for name in wake_mesh_names):
+                d_wake_meshes = np.einsum("iaj,ia->j", derivs["wake"], d_velocities)
+                ind_1 = 0
+                for name in wake_mesh_names:
+                    ind_2 = ind_1 + inputs[name].size
+                    if name in d_inputs:
+                        d_inputs[name] += d_wake_meshes[ind_1:ind_2].reshape(inputs[name].shape)
+                    ind_1 = ind_2
+
+        # The velocities induced with straight trailing legs
+        if d_eval_points is not None or any_d_vortex_mesh:
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                self._get_vortex_meshes(inputs),
+                inputs[eval_name],
+                inputs["alpha"][0],
+                inputs["circulations"],
+                d_vortex_meshes,
+                d_eval_points,
+                d_velocities,
+                mode,
+                self.options["mem_budget"],
+            )
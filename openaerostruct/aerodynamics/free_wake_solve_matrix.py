@@ -0,0 +1,744 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    apply_system_vel_mtx_deriv,
+    compute_system_vel_mtx,
+)
+from openaerostruct.aerodynamics.free_wake import (
+    NUM_WAKE_PANELS,
+    WAKE_LENGTH,
+    WakeLines,
+    compute_wake_influence,
+    compute_wake_influence_deriv,
+    get_wake_direction,
+    get_wake_step,
+)
+from openaerostruct.aerodynamics.tree_code import compute_trailing_alpha_deriv
+
+
+class FreeWakeSolveMatrix(om.ImplicitComponent):
+    """
+    Solve for the vortex ring circulations together with the shape of a
+    relaxed wake. This replaces the combination of GetVectors, EvalVelMtx,
+    VLMMtxRHSComp, and SolveMatrix for the collocation points.
+
+    Each trailing-edge vertex sheds a wake line made of `num_wake_panels`
+    straight filaments of equal length, closed by a semi-infinite filament
+    aligned with alpha, instead of a straight trailing leg (see free_wake.py).
+    The residuals are the flow tangency conditions at the collocation points,
+    with the influence of the wake lines, and for each vertex of the wake
+    lines past the trailing edge,
+
+        wake_mesh[k] - P[k] - wake_step * V(P[k]) / |V(P[k])|,
+
+    where P[k] is the previous vertex along the same line and V(P[k]) is the
+    total velocity there, so that each filament is aligned with the local
+    velocity at its upstream end.
+
+    The nonlinear solve relaxes the wake with under-relaxed fixed-point
+    sweeps. The AIC matrix with straight trailing legs is assembled and
+    factored once per geometry; in each sweep only the influence of the wake
+    on the collocation points is computed again, and since it only involves
+    the circulations of the last chordwise row of rings, the circulations are
+    updated with the Woodbury identity from the factored AIC matrix.
+
+    The derivatives are computed matrix-free with respect to the inputs, and
+    the linear system of the derivatives of the circulations and the wake
+    together is assembled densely and factored in linearize, so this
+    component cannot be used under a linear solver that assembles the
+    Jacobian.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    beta : float
+        The sideslip angle for the aircraft (all lifting surfaces) in degrees.
+    v : float
+        The freestream velocity magnitude.
+    height_agl : float
+        If ground effect is turned on, the height above the ground plane.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel, computed as the cross of the two
+        diagonals from the mesh points.
+    freestream_velocities[system_size, 3] : numpy array
+        The rotated freestream velocities at each collocation point for all
+        lifting surfaces.
+
+    Returns
+    -------
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system
+        with the relaxed wake.
+    wake_mesh[num_wake_panels, ny, 3] : numpy array
+        The vertices of the wake lines shed at the trailing edge of the vortex
+        mesh, past the trailing edge. For the symmetric case, the second
+        dimension is length (2 * ny - 1). There is one of these arrays for
+        each lifting surface in the problem.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "num_wake_panels",
+            default=NUM_WAKE_PANELS,
+            types=int,
+            lower=1,
+            desc="Number of straight filaments along each wake line.",
+        )
+        self.options.declare(
+            "wake_length",
+            default=WAKE_LENGTH,
+            types=(int, float),
+            lower=0.0,
+            desc="Length of the relaxed part of the wake lines, in multiples of the largest chord of the lifting "
+            "surfaces.",
+        )
+        self.options.declare(
+            "relaxation",
+            default=0.5,
+            types=(int, float),
+            lower=0.0,
+            upper=1.0,
+            desc="Fraction of the update of the wake applied in each relaxation sweep.",
+        )
+        self.options.declare(
+            "tol",
+            default=1e-10,
+            types=float,
+            desc="Tolerance on the largest displacement of the wake vertices in a relaxation sweep, relative to "
+            "the length of the wake filaments.",
+        )
+        self.options.declare("maxiter", default=200, types=int, desc="Maximum number of relaxation sweeps.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        num_wake_panels = self.options["num_wake_panels"]
+
+        system_size = 0
+        num_wake_dofs = 0
+        ground_effect = False
+
+        # The velocity is evaluated at every vertex of the wake lines but the
+        # last ones: the trailing edge and all wake vertices but the last
+        # row. With the evaluation points of each surface stacked like its
+        # wake mesh, evaluation point i sets the direction of wake vertex i,
+        # and wake vertex i is evaluation point i + ny_actual.
+        eval_te_slices = []
+        eval_wake_indices = []
+        wake_mesh_shapes = []
+        wake_indices = []
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+                ground_effect = True
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+            self.add_input("{}_normals".format(name), shape=(nx - 1, ny - 1, 3))
+            self.add_output("{}_wake_mesh".format(name), shape=(num_wake_panels, ny_actual, 3), units="m")
+
+            wake_mesh_shapes.append((num_wake_panels, ny_actual))
+            offset = num_wake_dofs // 3
+            eval_te_slices.append(slice(offset, offset + ny_actual))
+            eval_wake_indices.append(offset + np.arange(ny_actual, num_wake_panels * ny_actual))
+            wake_indices.append(offset + np.arange((num_wake_panels - 1) * ny_actual))
+            num_wake_dofs += num_wake_panels * ny_actual * 3
+
+        self.system_size = system_size
+        self.num_wake_dofs = num_wake_dofs
+        self.ground_effect = ground_effect
+
+        self.eval_te_slices = eval_te_slices
+        self.wake_mesh_shapes = wake_mesh_shapes
+        self.eval_wake_indices = np.concatenate(eval_wake_indices)
+        self.wake_indices = np.concatenate(wake_indices)
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        self.add_input("beta", val=0.0, units="deg", tags=["mphys_input"])
+        self.add_input("v", val=1.0, units="m/s", tags=["mphys_input"])
+        if ground_effect:
+            self.add_input("height_agl", val=8000.0, units="m")
+        self.add_input("coll_pts", val=np.zeros((system_size, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(system_size, 3), units="m/s")
+        self.add_output("circulations", shape=system_size, units="m**2/s", tags=["mphys_coupling"])
+
+        self.lines = WakeLines(surfaces, num_wake_panels)
+        self.wake_step = get_wake_step(surfaces, num_wake_panels, self.options["wake_length"])
+
+        self.mtx_inputs = None
+        self.jac = None
+
+    def _get_vortex_meshes(self, inputs):
+        return [inputs["{}_vortex_mesh".format(surface["name"])] for surface in self.options["surfaces"]]
+
+    def _get_wake_meshes(self, outputs):
+        return [outputs["{}_wake_mesh".format(surface["name"])] for surface in self.options["surfaces"]]
+
+    def _get_height_agl(self, inputs):
+        if self.ground_effect:
+            return inputs["height_agl"][0]
+        return 0.0
+
+    def _get_freestream(self, inputs):
+        """
+        Get the freestream velocity vector and its derivatives with respect to
+        alpha, beta, and v.
+        """
+        alpha = inputs["alpha"][0] * np.pi / 180.0
+        beta = inputs["beta"][0] * np.pi / 180.0
+        cosa, sina, cosb, sinb = np.cos(alpha), np.sin(alpha), np.cos(beta), np.sin(beta)
+        v = inputs["v"][0]
+
+        direction = np.array([cosa * cosb, -sinb, sina * cosb])
+        derivs = {
+            "alpha": v * np.array([-sina * cosb, 0.0, cosa * cosb]) * np.pi / 180.0,
+            "beta": v * np.array([-cosa * sinb, -cosb, -sina * sinb]) * np.pi / 180.0,
+            "v": direction,
+        }
+        return v * direction, derivs
+
+    def _get_eval_points(self, vortex_meshes, wake_meshes):
+        """
+        Gather the vertices of the wake lines that the velocity is evaluated
+        at: the trailing edge and all wake vertices but the last ones.
+        """
+        eval_points = []
+        for surface, vortex_mesh, wake_mesh in zip(self.options["surfaces"], vortex_meshes, wake_meshes):
+            nx = surface["mesh"].shape[0]
+            eval_points.append(vortex_mesh[nx - 1])
+            eval_points.append(wake_mesh[:-1].reshape((-1, 3)))
+        return np.concatenate(eval_points)
+
+    def _get_wake_mesh_names(self):
+        return ["{}_wake_mesh".format(surface["name"]) for surface in self.options["surfaces"]]
+
+    def _update_mtx(self, inputs):
+        """
+        Assemble and factor the AIC matrix with straight trailing legs, unless
+        the geometry and alpha have not changed since the last time.
+        """
+        surfaces = self.options["surfaces"]
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        normals = np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in surfaces]
+        )
+
+        mtx_inputs = np.concatenate(
+            [inputs["alpha"], inputs["coll_pts"].flatten(), normals.flatten()]
+            + [vortex_mesh.flatten() for vortex_mesh in vortex_meshes]
+        )
+        if self.mtx_inputs is not None and np.array_equal(mtx_inputs, self.mtx_inputs):
+            return
+        self.mtx_inputs = mtx_inputs
+
+        self.normals = normals
+        self.vel_mtx = compute_system_vel_mtx(
+            surfaces, vortex_meshes, inputs["coll_pts"], inputs["alpha"][0], self.options["mem_budget"]
+        )
+        self.mtx = np.einsum("ijk,ik->ij", self.vel_mtx, normals)
+        self.lu = lu_factor(self.mtx)
+
+    def _compute_wake_velocities(self, inputs, wake_meshes, circulations, eval_points, alpha, height_agl):
+        """
+        Compute the velocity corrections of the wake lines at the collocation
+        points and at the given evaluation points. This is complex-step safe
+        in alpha and height_agl.
+        """
+        polylines = self.lines.get_polylines(self._get_vortex_meshes(inputs), wake_meshes, alpha, height_agl)
+        u = get_wake_direction(alpha)
+        strengths = self.lines.get_strengths(circulations)
+        mem_budget = self.options["mem_budget"]
+
+        coll_velocities = np.einsum(
+            "ilk,l->ik", compute_wake_influence(polylines, inputs["coll_pts"], u, mem_budget), strengths
+        )
+        eval_velocities = np.einsum(
+            "ilk,l->ik", compute_wake_influence(polylines, eval_points, u, mem_budget), strengths
+        )
+        return coll_velocities, eval_velocities
+
+    def _compute_fixed_velocities(self, inputs, circulations, eval_points):
+        """
+        Compute the freestream velocity plus the velocities induced with
+        straight trailing legs at the evaluation points along the wake.
+        """
+        freestream, _ = self._get_freestream(inputs)
+        vel_mtx = compute_system_vel_mtx(
+            self.options["surfaces"],
+            self._get_vortex_meshes(inputs),
+            eval_points,
+            inputs["alpha"][0],
+            self.options["mem_budget"],
+        )
+        return freestream + np.einsum("ijk,j->ik", vel_mtx, circulations), vel_mtx
+
+    def _split_wake_meshes(self, array):
+        """
+        Split an array stacked like the evaluation points into arrays shaped
+        like the wake meshes of each surface.
+        """
+        arrays = []
+        ind_1 = 0
+        for num_wake_panels, ny_actual in self.wake_mesh_shapes:
+            ind_2 = ind_1 + num_wake_panels * ny_actual
+            arrays.append(array[ind_1:ind_2].reshape((num_wake_panels, ny_actual) + array.shape[1:]))
+            ind_1 = ind_2
+        return arrays
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        self._update_mtx(inputs)
+
+        circulations = outputs["circulations"]
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        wake_meshes = self._get_wake_meshes(outputs)
+        eval_points = self._get_eval_points(vortex_meshes, wake_meshes)
+
+        coll_velocities, eval_velocities = self._compute_wake_velocities(
+            inputs, wake_meshes, circulations, eval_points, inputs["alpha"][0], self._get_height_agl(inputs)
+        )
+        coll_velocities += inputs["freestream_velocities"]
+        eval_velocities += self._compute_fixed_velocities(inputs, circulations, eval_points)[0]
+
+        residuals["circulations"] = self.mtx.dot(circulations) + np.einsum("ij,ij->i", self.normals, coll_velocities)
+
+        directions = eval_velocities / np.sqrt(np.einsum("ij,ij->i", eval_velocities, eval_velocities))[:, np.newaxis]
+        wake_residuals = self._split_wake_meshes(-eval_points - self.wake_step * directions)
+        for wake_mesh_name, wake_mesh, wake_residual in zip(self._get_wake_mesh_names(), wake_meshes, wake_residuals):
+            residuals[wake_mesh_name] = wake_mesh + wake_residual
+
+    def solve_nonlinear(self, inputs, outputs):
+        self._update_mtx(inputs)
+
+        surfaces = self.options["surfaces"]
+        alpha = inputs["alpha"][0]
+        height_agl = self._get_height_agl(inputs)
+        relaxation = self.options["relaxation"]
+        te_indices = self.lines.te_indices
+        line_mtx = self.lines.line_mtx
+
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        u = get_wake_direction(alpha)
+
+        # Start from the current wake, unless it has never been computed, in
+        # which case we start from the straight trailing legs
+        wake_meshes = [wake_mesh.copy() for wake_mesh in self._get_wake_meshes(outputs)]
+        if not any(np.any(wake_mesh) for wake_mesh in wake_meshes):
+            steps = self.wake_step * np.arange(1, self.options["num_wake_panels"] + 1)
+            for surface, vortex_mesh, wake_mesh in zip(surfaces, vortex_meshes, wake_meshes):
+                nx = surface["mesh"].shape[0]
+                wake_mesh[:] = vortex_mesh[nx - 1] + steps[:, np.newaxis, np.newaxis] * u
+
+        rhs = -np.einsum("ij,ij->i", self.normals, inputs["freestream_velocities"])
+        base_circulations = lu_solve(self.lu, rhs)
+
+        for _ in range(self.options["maxiter"]):
+            polylines = self.lines.get_polylines(vortex_meshes, wake_meshes, alpha, height_agl)
+
+            # Only the columns of the trailing-edge rings change with the
+            # wake, so the factored AIC matrix with straight trailing legs is
+            # updated with the Woodbury identity
+            wake_vel_mtx = compute_wake_influence(polylines, inputs["coll_pts"], u, self.options["mem_budget"])
+            wake_mtx = np.einsum("ilk,lm,ik->im", wake_vel_mtx, line_mtx, self.normals)
+            lu_wake_mtx = lu_solve(self.lu, wake_mtx)
+            capacitance = np.eye(len(te_indices)) + lu_wake_mtx[te_indices]
+            circulations = base_circulations - lu_wake_mtx.dot(
+                np.linalg.solve(capacitance, base_circulations[te_indices])
+            )
+
+            # March along each wake line in the direction of the velocity at
+            # the previous vertex
+            eval_points = self._get_eval_points(vortex_meshes, wake_meshes)
+            eval_velocities = self._compute_fixed_velocities(inputs, circulations, eval_points)[0]
+            eval_wake_vel_mtx = compute_wake_influence(polylines, eval_points, u, self.options["mem_budget"])
+            eval_velocities += np.einsum("ilk,l->ik", eval_wake_vel_mtx, self.lines.get_strengths(circulations))
+            directions = (
+                eval_velocities / np.sqrt(np.einsum("ij,ij->i", eval_velocities, eval_velocities))[:, np.newaxis]
+            )
+
+            updates = []
+            for surface, vortex_mesh, wake_mesh, direction in zip(
+                surfaces, vortex_meshes, wake_meshes, self._split_wake_meshes(directions)
+            ):
+                nx = surface["mesh"].shape[0]
+                updates.append(vortex_mesh[nx - 1] + self.wake_step * np.cumsum(direction, axis=0) - wake_mesh)
+
+            if max(np.max(np.abs(update)) for update in updates) < self.options["tol"] * self.wake_step:
+                break
+
+            for wake_mesh, update in zip(wake_meshes, updates):
+                wake_mesh += relaxation * update
+        else:
+            raise om.AnalysisError(
+                "{}: the wake did not converge to the requested tolerance in {} relaxation sweeps.".format(
+                    self.msginfo, self.options["maxiter"]
+                )
+            )
+
+        # The circulations were solved with this wake, so the derivatives
+        # are computed again when needed
+        self.jac = None
+        outputs["circulations"] = circulations
+        for wake_mesh_name, wake_mesh in zip(self._get_wake_mesh_names(), wake_meshes):
+            outputs[wake_mesh_name] = wake_mesh
+
+    def linearize(self, inputs, outputs, partials):
+        self._compute_derivs(inputs, outputs)
+
+    def _compute_derivs(self, inputs, outputs):
+        """
+        Assemble and factor the Jacobian of the residuals with respect to the
+        circulations and the wake meshes, and compute the derivatives with
+        respect to the inputs that are applied matrix-free.
+        """
+        self._update_mtx(inputs)
+
+        surfaces = self.options["surfaces"]
+        system_size = self.system_size
+        wake_step = self.wake_step
+        line_mtx = self.lines.line_mtx
+        te_indices = self.lines.te_indices
+        mem_budget = self.options["mem_budget"]
+
+        alpha = inputs["alpha"][0]
+        height_agl = self._get_height_agl(inputs)
+        circulations = outputs["circulations"]
+        normals = self.normals
+        vortex_meshes = self._get_vortex_meshes(inputs)
+        wake_meshes = self._get_wake_meshes(outputs)
+        eval_points = self._get_eval_points(vortex_meshes, wake_meshes)
+        num_eval_points = eval_points.shape[0]
+
+        polylines = self.lines.get_polylines(vortex_meshes, wake_meshes, alpha, height_agl)
+        u = get_wake_direction(alpha)
+        strengths = self.lines.get_strengths(circulations)
+
+        coll_wake_vel_mtx = compute_wake_influence(polylines, inputs["coll_pts"], u, mem_budget)
+        eval_wake_vel_mtx = compute_wake_influence(polylines, eval_points, u, mem_budget)
+        eval_velocities, eval_vel_mtx = self._compute_fixed_velocities(inputs, circulations, eval_points)
+        eval_velocities += np.einsum("ilk,l->ik", eval_wake_vel_mtx, strengths)
+
+        # The velocities at the collocation points themselves, not just their
+        # normal components, for the derivatives with respect to the normals
+        self.coll_velocities = (
+            inputs["freestream_velocities"]
+            + np.einsum("ijk,j->ik", self.vel_mtx, circulations)
+            + np.einsum("ilk,l->ik", coll_wake_vel_mtx, strengths)
+        )
+
+        # Derivatives of the wake directions with respect to the velocities,
+        # scaled by the length of the filaments
+        speeds = np.sqrt(np.einsum("ij,ij->i", eval_velocities, eval_velocities))
+        directions = eval_velocities / speeds[:, np.newaxis]
+        self.direction_derivs = (
+            wake_step
+            * (np.eye(3) - np.einsum("ia,ib->iab", directions, directions))
+            / speeds[:, np.newaxis, np.newaxis]
+        )
+
+        # Derivatives of the wake velocity corrections with respect to the
+        # vertices of the wake lines and the evaluation points
+        coll_d_polylines, self.coll_d_points = compute_wake_influence_deriv(
+            polylines, inputs["coll_pts"], u, strengths, mem_budget
+        )
+        eval_d_polylines, eval_d_points = compute_wake_influence_deriv(polylines, eval_points, u, strengths, mem_budget)
+
+        # Add the derivatives of the velocities induced with straight trailing
+        # legs with respect to the evaluation points, one direction at a time
+        self.eval_d_points = eval_d_points
+        for ind in range(3):
+            d_eval_points = np.zeros((num_eval_points, 3))
+            d_eval_points[:, ind] = 1.0
+            d_velocities = np.zeros((num_eval_points, 3))
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                vortex_meshes,
+                eval_points,
+                alpha,
+                circulations,
+                [None] * len(surfaces),
+                d_eval_points,
+                d_velocities,
+                "fwd",
+                mem_budget,
+            )
+            self.eval_d_points[:, :, ind] += d_velocities
+
+        # The trailing-edge vertices are inputs, so their derivatives are
+        # applied matrix-free
+        self.coll_d_te = coll_d_polylines[:, :, 0].copy()
+        self.eval_d_te = eval_d_polylines[:, :, 0].copy()
+
+        # Assemble the Jacobian of the residuals with respect to the
+        # circulations and the wake meshes
+        num_wake_dofs = self.num_wake_dofs
+        jac = np.zeros((system_size + num_wake_dofs, system_size + num_wake_dofs))
+
+        jac[:system_size, :system_size] = self.mtx
+        jac[:system_size, te_indices] += np.einsum("ilk,lm,ik->im", coll_wake_vel_mtx, line_mtx, normals)
+        jac[:system_size, system_size:] = np.einsum(
+            "iaj,ia->ij", self.lines.get_wake_partials(coll_d_polylines, alpha), normals
+        )
+
+        d_eval_velocities = np.zeros((num_eval_points, 3, system_size + num_wake_dofs))
+        d_eval_velocities[:, :, :system_size] = eval_vel_mtx.transpose((0, 2, 1))
+        d_eval_velocities[:, :, te_indices] += np.einsum("ilk,lm->ikm", eval_wake_vel_mtx, line_mtx)
+        d_eval_velocities[:, :, system_size:] = self.lines.get_wake_partials(eval_d_polylines, alpha)
+
+        # The evaluation points past the trailing edge are wake vertices
+        eval_indices = self.eval_wake_indices[:, np.newaxis]
+        wake_indices = 3 * self.wake_indices[:, np.newaxis] + np.arange(3)
+        d_eval_velocities[
+            eval_indices[:, :, np.newaxis], np.arange(3)[:, np.newaxis], system_size + wake_indices[:, np.newaxis]
+        ] += eval_d_points[self.eval_wake_indices]
+
+        jac[system_size:] = -np.einsum("iab,ibj->iaj", self.direction_derivs, d_eval_velocities).reshape(
+            (num_wake_dofs, -1)
+        )
+        jac[system_size:, system_size:] += np.eye(num_wake_dofs)
+        jac[system_size + 3 * eval_indices + np.arange(3), system_size + wake_indices] -= 1.0
+
+        self.jac = jac
+        self.jac_lu = lu_factor(jac)
+
+        # Derivatives of the residuals with respect to the scalar inputs. Alpha
+        # sets the direction of the semi-infinite filaments and the ground
+        # plane, and height_agl the ground plane, so we complex step the
+        # velocity corrections of the wake with respect to both.
+        _, freestream_derivs = self._get_freestream(inputs)
+
+        step = 1e-40
+        scalars = [("alpha", alpha + step * 1j, height_agl)]
+        if self.ground_effect:
+            scalars.append(("height_agl", alpha, height_agl + step * 1j))
+
+        dvel_dscalars = {}
+        for scalar_name, scalar_alpha, scalar_height_agl in scalars:
+            coll_dvel, eval_dvel = self._compute_wake_velocities(
+                inputs, wake_meshes, circulations, eval_points, scalar_alpha, scalar_height_agl
+            )
+            dvel_dscalars[scalar_name] = (coll_dvel.imag / step, eval_dvel.imag / step)
+
+        coll_dvel, eval_dvel = dvel_dscalars["alpha"]
+        coll_dvel += compute_trailing_alpha_deriv(surfaces, vortex_meshes, inputs["coll_pts"], alpha, circulations)
+        eval_dvel += compute_trailing_alpha_deriv(surfaces, vortex_meshes, eval_points, alpha, circulations)
+        eval_dvel += freestream_derivs["alpha"]
+        dvel_dscalars["beta"] = (None, freestream_derivs["beta"])
+        dvel_dscalars["v"] = (None, freestream_derivs["v"])
+
+        self.scalar_derivs = {}
+        for scalar_name, (coll_dvel, eval_dvel) in dvel_dscalars.items():
+            scalar_deriv = np.zeros(system_size + num_wake_dofs)
+            if coll_dvel is not None:
+                scalar_deriv[:system_size] = np.einsum("ij,ij->i", normals, coll_dvel)
+            scalar_deriv[system_size:] = -np.einsum(
+                "iab,ib->ia", self.direction_derivs, np.broadcast_to(eval_dvel, eval_points.shape)
+            ).flatten()
+            self.scalar_derivs[scalar_name] = scalar_deriv
+
+        self.eval_points = eval_points
+
+    def _gather_te(self, d_vortex_meshes, d_eval_points):
+        """
+        Gather the seeds of the trailing edges of the vortex meshes into seeds
+        for the first vertex of each wake line and for the evaluation points.
+        """
+        for surface, d_vortex_mesh, eval_te_slice in zip(
+            self.options["surfaces"], d_vortex_meshes, self.eval_te_slices
+        ):
+            if d_vortex_mesh is not None:
+                d_eval_points[eval_te_slice] += d_vortex_mesh[surface["mesh"].shape[0] - 1]
+        return self.lines.gather_te_seeds(d_vortex_meshes)
+
+    def _scatter_te(self, d_vortex_meshes, d_te, d_eval_points):
+        """
+        Accumulate the seeds of the first vertex of each wake line and of the
+        evaluation points into the trailing edges of the vortex meshes.
+        """
+        for surface, d_vortex_mesh, eval_te_slice in zip(
+            self.options["surfaces"], d_vortex_meshes, self.eval_te_slices
+        ):
+            if d_vortex_mesh is not None:
+                d_vortex_mesh[surface["mesh"].shape[0] - 1] += d_eval_points[eval_te_slice]
+        self.lines.scatter_te_seeds(d_te, d_vortex_meshes)
+
+    def apply_linear(self, inputs, outputs, d_inputs, d_outputs, d_residuals, mode):
+        surfaces = self.options["surfaces"]
+        system_size = self.system_size
+        state_names = ["circulations"] + self._get_wake_mesh_names()
+
+        if self.jac is None:
+            self._compute_derivs(inputs, outputs)
+
+        alpha = inputs["alpha"][0]
+        circulations = outputs["circulations"]
+        eval_points = self.eval_points
+        num_eval_points = eval_points.shape[0]
+        vortex_meshes = self._get_vortex_meshes(inputs)
+
+        d_coll_pts = d_inputs["coll_pts"] if "coll_pts" in d_inputs else None
+        d_vortex_meshes = []
+        for surface in surfaces:
+            vortex_mesh_name = "{}_vortex_mesh".format(surface["name"])
+            d_vortex_meshes.append(d_inputs[vortex_mesh_name] if vortex_mesh_name in d_inputs else None)
+        any_d_vortex_mesh = any(d_vortex_mesh is not None for d_vortex_mesh in d_vortex_meshes)
+
+        d_eval_te = np.zeros((num_eval_points, 3))
+
+        if mode == "fwd":
+            d_states = np.concatenate([d_outputs[name].flatten() for name in state_names])
+            d_res = self.jac.dot(d_states)
+
+            for scalar_name, scalar_deriv in self.scalar_derivs.items():
+                if scalar_name in d_inputs:
+                    d_res += scalar_deriv * d_inputs[scalar_name]
+
+            d_coll_velocities = np.zeros((system_size, 3))
+            d_eval_velocities = np.zeros((num_eval_points, 3))
+
+            if "freestream_velocities" in d_inputs:
+                d_coll_velocities += d_inputs["freestream_velocities"]
+            if d_coll_pts is not None:
+                d_coll_velocities += np.einsum("iab,ib->ia", self.coll_d_points, d_coll_pts)
+            if any_d_vortex_mesh:
+                d_te = self._gather_te(d_vortex_meshes, d_eval_te)
+                d_coll_velocities += np.einsum("ialb,lb->ia", self.coll_d_te, d_te)
+                d_eval_velocities += np.einsum("ialb,lb->ia", self.eval_d_te, d_te)
+                d_eval_velocities += np.einsum("iab,ib->ia", self.eval_d_points, d_eval_te)
+        else:
+            d_res = np.concatenate([d_residuals[name].flatten() for name in state_names])
+
+            d_states = self.jac.T.dot(d_res)
+            ind_1 = 0
+            for name in state_names:
+                ind_2 = ind_1 + d_outputs[name].size
+                d_outputs[name] += d_states[ind_1:ind_2].reshape(d_outputs[name].shape)
+                ind_1 = ind_2
+
+            for scalar_name, scalar_deriv in self.scalar_derivs.items():
+                if scalar_name in d_inputs:
+                    d_inputs[scalar_name] += scalar_deriv.dot(d_res)
+
+            d_wake_res = d_res[system_size:].reshape((num_eval_points, 3))
+            d_coll_velocities = self.normals * d_res[:system_size, np.newaxis]
+            d_eval_velocities = -np.einsum("iab,ib->ia", self.direction_derivs, d_wake_res)
+            d_eval_te -= d_wake_res
+
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_coll_velocities
+            if d_coll_pts is not None:
+                d_coll_pts += np.einsum("iab,ia->ib", self.coll_d_points, d_coll_velocities)
+            if any_d_vortex_mesh:
+                d_te = np.einsum("ialb,ia->lb", self.coll_d_te, d_coll_velocities)
+                d_te += np.einsum("ialb,ia->lb", self.eval_d_te, d_eval_velocities)
+                d_eval_te += np.einsum("iab,ia->ib", self.eval_d_points, d_eval_velocities)
+                self._scatter_te(d_vortex_meshes, d_te, d_eval_te)
+
+        # The velocities induced with straight trailing legs
+        if any_d_vortex_mesh or d_coll_pts is not None:
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                vortex_meshes,
+                inputs["coll_pts"],
+                alpha,
+                circulations,
+                d_vortex_meshes,
+                d_coll_pts,
+                d_coll_velocities,
+                mode,
+                self.options["mem_budget"],
+            )
+        if any_d_vortex_mesh:
+            apply_system_vel_mtx_deriv(
+                surfaces,
+                vortex_meshes,
+                eval_points,
+                alpha,
+                circulations,
+                d_vortex_meshes,
+                None,
+                d_eval_velocities,
+                mode,
+                self.options["mem_budget"],
+            )
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            normals_name = "{}_normals".format(surface["name"])
+
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            if normals_name in d_inputs:
+                if mode == "fwd":
+                    d_res[ind_1:ind_2] += np.einsum(
+                        "ij,ij->i", d_inputs[normals_name].reshape((-1, 3)), self.coll_velocities[ind_1:ind_2]
+                    )
+                else:
+                    d_inputs[normals_name] += (
+                        self.coll_velocities[ind_1:ind_2] * d_res[ind_1:ind_2, np.newaxis]
+                    ).reshape((nx - 1, ny - 1, 3))
+
+            ind_1 = ind_2
+
+        if mode == "fwd":
+            d_res[:system_size] += np.einsum("ij,ij->i", self.normals, d_coll_velocities)
+            d_res[system_size:] -= (
+                np.einsum("iab,ib->ia", self.direction_derivs, d_eval_velocities) + d_eval_te
+            ).flatten()
+
+            ind_1 = 0
+            for name in state_names:
+                ind_2 = ind_1 + d_residuals[name].size
+                d_residuals[name] += d_res[ind_1:ind_2].reshape(d_residuals[name].shape)
+                ind_1 = ind_2
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        state_names = ["circulations"] + self._get_wake_mesh_names()
+
+        if mode == "fwd":
+            rhs = np.concatenate([d_residuals[name].flatten() for name in state_names])
+            sol = lu_solve(self.jac_lu, rhs, trans=0)
+            vec = d_outputs
+        else:
+            rhs = np.concatenate([d_outputs[name].flatten() for name in state_names])
+            sol = lu_solve(self.jac_lu, rhs, trans=1)
+            vec = d_residuals
+
+        ind_1 = 0
+        for name in state_names:
+            ind_2 = ind_1 + vec[name].size
+            vec[name] = sol[ind_1:ind_2].reshape(vec[name].shape)
+            ind_1 = ind_2
@@ -14,10 +14,23 @@ class VLMFunctionals(om.Group):
     performance. These are not included in the coupled aerostructural group,
     but are only used to compute aerodynamic performance. This includes
     computing lift, drag, CL, CD, viscous CD, and wave drag CD.
+
+    With batched_drag, the viscous and wave drag and the total CD of the
+    surface are left to BatchedViscousWaveDrag and TotalDrag, which compute
+    them for several flight conditions at once, and this group stops at CL
+    and the induced CD. This is only done by an `AeroPoint` with several
+    flight conditions.
     """
 
     def initialize(self):
         self.options.declare("surface", types=dict)
+        self.options.declare(
+            "batched_drag",
+            False,
+            types=bool,
+            desc="Set to True to leave out the viscous and wave drag and the total CD, which are then computed "
+            "for several flight conditions at once outside of this group, as in an AeroPoint with vec_size > 1.",
+        )
 
     def setup(self):
         surface = self.options["surface"]
@@ -42,6 +55,9 @@ class VLMFunctionals(om.Group):
 
         self.add_subsystem("CL", TotalLift(surface=surface), promotes_inputs=["CL1"], promotes_outputs=["CL"])
 
+        if self.options["batched_drag"]:
+            return
+
         self.add_subsystem(
             "viscousdrag",
             ViscousDrag(surface=surface),
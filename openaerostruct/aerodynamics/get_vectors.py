@@ -2,6 +2,23 @@ import numpy as np
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+@cached_sparsity_pattern
+def _get_jac_pattern(num_eval_points, nx, ny):
+    vector_indices = np.arange(num_eval_points * nx * ny * 3)
+    mesh_indices = np.outer(
+        np.ones(num_eval_points, int),
+        np.arange(nx * ny * 3),
+    ).flatten()
+    eval_indices = np.einsum(
+        "il,jk->ijkl",
+        np.arange(num_eval_points * 3).reshape((num_eval_points, 3)),
+        np.ones((nx, ny), int),
+    ).flatten()
+    return vector_indices, mesh_indices, eval_indices
+
 
 class GetVectors(om.ExplicitComponent):
     """
@@ -68,16 +85,9 @@ class GetVectors(om.ExplicitComponent):
             self.add_output(vectors_name, val=np.ones((num_eval_points, actual_nx_size, actual_ny_size, 3)), units="m")
 
             # Set up indices so we can get the rows and cols for the delcare
-            vector_indices = np.arange(num_eval_points * actual_nx_size * actual_ny_size * 3)
-            mesh_indices = np.outer(
-                np.ones(num_eval_points, int),
-                np.arange(actual_nx_size * actual_ny_size * 3),
-            ).flatten()
-            eval_indices = np.einsum(
-                "il,jk->ijkl",
-                np.arange(num_eval_points * 3).reshape((num_eval_points, 3)),
-                np.ones((actual_nx_size, actual_ny_size), int),
-            ).flatten()
+            vector_indices, mesh_indices, eval_indices = _get_jac_pattern(
+                num_eval_points, actual_nx_size, actual_ny_size
+            )
 
             self.declare_partials(vectors_name, name + "_vortex_mesh", val=-1.0, rows=vector_indices, cols=mesh_indices)
             self.declare_partials(vectors_name, eval_name, val=1.0, rows=vector_indices, cols=eval_indices)
@@ -2,6 +2,33 @@ import numpy as np
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+@cached_sparsity_pattern
+def _get_rhs_jac_pattern(system_size):
+    rows = np.einsum("i,j->ij", np.arange(system_size), np.ones(3, int)).flatten()
+    cols = np.arange(system_size * 3)
+    return rows, cols
+
+
+@cached_sparsity_pattern
+def _get_surface_jac_pattern(system_size, ind_1, nx, ny):
+    # The surface's indices within the total system's indices
+    num = (nx - 1) * (ny - 1)
+    ind_2 = ind_1 + num
+
+    mtx_indices = np.arange(system_size * system_size).reshape((system_size, system_size))
+    velocities_indices = np.arange(system_size * num * 3)
+    normals_indices = np.arange(num * 3).reshape((num, 3))
+
+    vel_mtx_rows = np.einsum("ij,k->ijk", mtx_indices[:, ind_1:ind_2], np.ones(3, int)).flatten()
+    normals_rows = np.einsum("ij,k->ijk", mtx_indices[ind_1:ind_2, :], np.ones(3, int)).flatten()
+    normals_cols = np.einsum("ik,j->ijk", normals_indices, np.ones(system_size, int)).flatten()
+    rhs_rows = np.outer(np.arange(ind_1, ind_2), np.ones(3, int)).flatten()
+
+    return vel_mtx_rows, velocities_indices, normals_rows, normals_cols, rhs_rows, normals_indices.flatten()
+
 
 class VLMMtxRHSComp(om.ExplicitComponent):
     """
@@ -32,10 +59,26 @@ class VLMMtxRHSComp(om.ExplicitComponent):
     rhs[system_size] : numpy array
         Right-hand side of the AIC linear system, constructed from the
         freestream velocities and panel normals.
+
+    Notes
+    -----
+    The vel_mtx inputs are contracted with the normals one surface at a
+    time, directly into the columns of mtx that belong to that surface, so
+    the velocities of the full system are never staged in a separate
+    [system_size, system_size, 3] array. With the matrix_free option, the
+    partials are not declared either, and the derivatives are applied from
+    the vel_mtx inputs and the normals in compute_jacvec_product instead.
     """
 
     def initialize(self):
         self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "matrix_free",
+            default=False,
+            types=bool,
+            desc="Set to True to apply the derivatives in compute_jacvec_product instead of declaring the dense "
+            "partials. This cannot be used under a linear solver that assembles the Jacobian.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
@@ -56,22 +99,36 @@ class VLMMtxRHSComp(om.ExplicitComponent):
         self.add_output("mtx", shape=(system_size, system_size), units="1/m")
         self.add_output("rhs", shape=system_size, units="m/s")
 
-        # Set up indicies arrays for sparse Jacobians
-        vel_indices = np.arange(system_size * 3).reshape((system_size, 3))
-        mtx_indices = np.arange(system_size * system_size).reshape((system_size, system_size))
-        rhs_indices = np.arange(system_size)
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
 
-        self.declare_partials(
-            "rhs",
-            "freestream_velocities",
-            rows=np.einsum("i,j->ij", rhs_indices, np.ones(3, int)).flatten(),
-            cols=vel_indices.flatten(),
-        )
+            # Get the correct names for each vel_mtx and normals, then
+            # add them to the component
+            vel_mtx_name = "{}_{}_vel_mtx".format(name, "coll_pts")
+            normals_name = "{}_normals".format(name)
+
+            self.add_input(vel_mtx_name, shape=(system_size, nx - 1, ny - 1, 3), units="1/m")
+            self.add_input(normals_name, shape=(nx - 1, ny - 1, 3))
+
+        self.set_check_partial_options(wrt="*", method="fd", step=1e-5)
+
+        # OpenMDAO only calls compute_jacvec_product on matrix free components, and
+        # uses the declared partials otherwise
+        self.matrix_free = self.options["matrix_free"]
+        if self.matrix_free:
+            return
+
+        # Set up indicies arrays for sparse Jacobians. They are shared by
+        # all the instances with the same surface shapes.
+        rows, cols = _get_rhs_jac_pattern(system_size)
+        self.declare_partials("rhs", "freestream_velocities", rows=rows, cols=cols)
 
         ind_1 = 0
-        ind_2 = 0
 
-        # Loop through each surface to add inputs and set up derivatives.
+        # Loop through each surface to set up derivatives.
         # We keep track of the surface's indices within the total system's
         # indices to access the matrix in the correct locations for the derivs.
         # This is because the AIC linear system has information for all surfaces
@@ -83,104 +140,152 @@ class VLMMtxRHSComp(om.ExplicitComponent):
             name = surface["name"]
             num = (nx - 1) * (ny - 1)
 
-            ind_2 += num
-
-            # Get the correct names for each vel_mtx and normals, then
-            # add them to the component
             vel_mtx_name = "{}_{}_vel_mtx".format(name, "coll_pts")
             normals_name = "{}_normals".format(name)
 
-            self.add_input(vel_mtx_name, shape=(system_size, nx - 1, ny - 1, 3), units="1/m")
-            self.add_input(normals_name, shape=(nx - 1, ny - 1, 3))
-
-            velocities_indices = np.arange(system_size * num * 3).reshape((system_size, nx - 1, ny - 1, 3))
-            normals_indices = np.arange(num * 3).reshape((num, 3))
-
-            # Declare each set of partials based on the indices, ind_1 and ind_2
-            self.declare_partials(
-                "mtx",
-                vel_mtx_name,
-                rows=np.einsum("ij,k->ijk", mtx_indices[:, ind_1:ind_2], np.ones(3, int)).flatten(),
-                cols=velocities_indices.flatten(),
-            )
-            self.declare_partials(
-                "mtx",
-                normals_name,
-                rows=np.einsum("ij,k->ijk", mtx_indices[ind_1:ind_2, :], np.ones(3, int)).flatten(),
-                cols=np.einsum("ik,j->ijk", normals_indices, np.ones(system_size, int)).flatten(),
-            )
-            self.declare_partials(
-                "rhs",
-                normals_name,
-                rows=np.outer(rhs_indices[ind_1:ind_2], np.ones(3, int)).flatten(),
-                cols=normals_indices.flatten(),
+            # Declare each set of partials based on the indices of the surface
+            vel_mtx_rows, vel_mtx_cols, normals_rows, normals_cols, rhs_rows, rhs_cols = _get_surface_jac_pattern(
+                system_size, ind_1, nx, ny
             )
+            self.declare_partials("mtx", vel_mtx_name, rows=vel_mtx_rows, cols=vel_mtx_cols)
+            self.declare_partials("mtx", normals_name, rows=normals_rows, cols=normals_cols)
+            self.declare_partials("rhs", normals_name, rows=rhs_rows, cols=rhs_cols)
 
             ind_1 += num
 
-        self.mtx_n_n_3 = np.zeros((system_size, system_size, 3))
-        self.normals_n_3 = np.zeros((system_size, 3))
-        self.set_check_partial_options(wrt="*", method="fd", step=1e-5)
+    def _get_normals(self, inputs):
+        """
+        Gather the normals of all lifting surfaces in a single array.
+        """
+        return np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in self.options["surfaces"]]
+        )
+
+    def _get_vel_mtx(self, inputs, surface):
+        """
+        Get the vel_mtx of a single lifting surface as a view of shape
+        [system_size, num, 3].
+        """
+        vel_mtx_name = "{}_{}_vel_mtx".format(surface["name"], "coll_pts")
+        return inputs[vel_mtx_name].reshape((self.system_size, -1, 3))
 
     def compute(self, inputs, outputs):
         surfaces = self.options["surfaces"]
 
-        system_size = self.system_size
+        normals = self._get_normals(inputs)
 
+        # Construct the full matrix of all of the lifting surfaces together
+        # by multiplying the velocities of each one through with the normals.
+        # Also create the rhs based on v dot n.
+        mtx = outputs["mtx"]
         ind_1 = 0
-        ind_2 = 0
         for surface in surfaces:
-            nx = surface["mesh"].shape[0]
-            ny = surface["mesh"].shape[1]
-            name = surface["name"]
-            num = (nx - 1) * (ny - 1)
-
-            ind_2 += num
-
-            vel_mtx_name = "{}_{}_vel_mtx".format(name, "coll_pts")
-            normals_name = "{}_normals".format(name)
+            vel_mtx = self._get_vel_mtx(inputs, surface)
+            ind_2 = ind_1 + vel_mtx.shape[1]
 
-            # Construct the full matrix and all of the lifting surfaces
-            # together
-            # TODO: This is not complex-safe
-            self.mtx_n_n_3[:, ind_1:ind_2, :] = inputs[vel_mtx_name].reshape((system_size, num, 3))
-            self.normals_n_3[ind_1:ind_2, :] = inputs[normals_name].reshape((num, 3))
+            mtx[:, ind_1:ind_2] = np.einsum("ijk,ik->ij", vel_mtx, normals)
 
-            ind_1 += num
+            ind_1 = ind_2
 
-        # Actually obtain the final matrix by multiplying through with the
-        # normals. Also create the rhs based on v dot n.
-        outputs["mtx"] = np.einsum("ijk,ik->ij", self.mtx_n_n_3, self.normals_n_3)
-        outputs["rhs"] = -np.einsum("ij,ij->i", inputs["freestream_velocities"], self.normals_n_3)
+        outputs["rhs"] = -np.einsum("ij,ij->i", inputs["freestream_velocities"], normals)
 
     def compute_partials(self, inputs, partials):
+        if self.options["matrix_free"]:
+            return
+
         surfaces = self.options["surfaces"]
 
         system_size = self.system_size
 
+        normals = self._get_normals(inputs)
+        vel_mtxs = [self._get_vel_mtx(inputs, surface) for surface in surfaces]
+
         ind_1 = 0
         ind_2 = 0
-        for surface in surfaces:
-            nx = surface["mesh"].shape[0]
-            ny = surface["mesh"].shape[1]
-            name = surface["name"]
-            num = (nx - 1) * (ny - 1)
+        for surface, vel_mtx in zip(surfaces, vel_mtxs):
+            num = vel_mtx.shape[1]
 
             ind_2 += num
 
-            vel_mtx_name = "{}_{}_vel_mtx".format(name, "coll_pts")
-            normals_name = "{}_normals".format(name)
+            vel_mtx_name = "{}_{}_vel_mtx".format(surface["name"], "coll_pts")
+            normals_name = "{}_normals".format(surface["name"])
 
-            partials["mtx", vel_mtx_name] = np.einsum(
-                "ijk,ik->ijk",
-                np.ones((system_size, num, 3)),
-                self.normals_n_3,
-            ).flatten()
+            partials["mtx", vel_mtx_name] = np.broadcast_to(normals[:, np.newaxis, :], (system_size, num, 3)).flatten()
 
-            partials["mtx", normals_name] = self.mtx_n_n_3[ind_1:ind_2, :, :].flatten()
+            partials["mtx", normals_name] = np.concatenate(
+                [other_vel_mtx[ind_1:ind_2] for other_vel_mtx in vel_mtxs], axis=1
+            ).flatten()
 
             partials["rhs", normals_name] = -inputs["freestream_velocities"][ind_1:ind_2, :].flatten()
 
             ind_1 += num
 
-        partials["rhs", "freestream_velocities"] = -self.normals_n_3.flatten()
+        partials["rhs", "freestream_velocities"] = -normals.flatten()
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        """
+        Apply the derivatives directly from the vel_mtx inputs and the
+        normals. This is only called with the matrix_free option, since the
+        component otherwise uses its declared partials.
+        """
+        surfaces = self.options["surfaces"]
+
+        system_size = self.system_size
+
+        normals = self._get_normals(inputs)
+        freestream_velocities = inputs["freestream_velocities"]
+
+        normals_names = ["{}_normals".format(surface["name"]) for surface in surfaces]
+
+        # The derivatives of the normals of all lifting surfaces together
+        d_normals = np.zeros((system_size, 3), dtype=normals.dtype)
+        if mode == "fwd":
+            ind_1 = 0
+            for surface, normals_name in zip(surfaces, normals_names):
+                num = self._get_vel_mtx(inputs, surface).shape[1]
+                if normals_name in d_inputs:
+                    d_normals[ind_1 : ind_1 + num] = d_inputs[normals_name].reshape((num, 3))
+                ind_1 += num
+
+        if "rhs" in d_outputs:
+            d_rhs = d_outputs["rhs"]
+            if mode == "fwd":
+                if "freestream_velocities" in d_inputs:
+                    d_rhs -= np.einsum("ij,ij->i", d_inputs["freestream_velocities"], normals)
+                d_rhs -= np.einsum("ij,ij->i", freestream_velocities, d_normals)
+            else:
+                if "freestream_velocities" in d_inputs:
+                    d_inputs["freestream_velocities"] -= d_rhs[:, np.newaxis] * normals
+                d_normals -= d_rhs[:, np.newaxis] * freestream_velocities
+
+        if "mtx" in d_outputs:
+            d_mtx = d_outputs["mtx"]
+            ind_1 = 0
+            for surface in surfaces:
+                vel_mtx = self._get_vel_mtx(inputs, surface)
+                ind_2 = ind_1 + vel_mtx.shape[1]
+
+                vel_mtx_name = "{}_{}_vel_mtx".format(surface["name"], "coll_pts")
+
+                if mode == "fwd":
+                    if vel_mtx_name in d_inputs:
+                        d_mtx[:, ind_1:ind_2] += np.einsum(
+                            "ijk,ik->ij", d_inputs[vel_mtx_name].reshape(vel_mtx.shape), normals
+                        )
+                    d_mtx[:, ind_1:ind_2] += np.einsum("ijk,ik->ij", vel_mtx, d_normals)
+                else:
+                    if vel_mtx_name in d_inputs:
+                        d_inputs[vel_mtx_name] += np.einsum("ij,ik->ijk", d_mtx[:, ind_1:ind_2], normals).reshape(
+                            d_inputs[vel_mtx_name].shape
+                        )
+                    d_normals += np.einsum("ijk,ij->ik", vel_mtx, d_mtx[:, ind_1:ind_2])
+
+                ind_1 = ind_2
+
+        if mode == "rev":
+            ind_1 = 0
+            for surface, normals_name in zip(surfaces, normals_names):
+                num = self._get_vel_mtx(inputs, surface).shape[1]
+                if normals_name in d_inputs:
+                    d_inputs[normals_name] += d_normals[ind_1 : ind_1 + num].reshape(d_inputs[normals_name].shape)
+                ind_1 += num
@@ -0,0 +1,304 @@
+import numpy as np
+
+import openmdao.api as om
+
+
+def _get_wind_rotation(alpha, beta):
+    """
+    Get the aero->wind rotation matrix and its derivatives with respect to
+    the angle of attack and the sideslip angle, both in radians.
+    """
+    cosa = np.cos(alpha)
+    sina = np.sin(alpha)
+    cosb = np.cos(beta)
+    sinb = np.sin(beta)
+    zero = np.zeros_like(cosa)
+
+    Tw = np.array([[cosb * cosa, -sinb, cosb * sina], [sinb * cosa, cosb, sinb * sina], [-sina, zero, cosa]])
+    dTw_dalpha = np.array([[-cosb * sina, zero, cosb * cosa], [-sinb * sina, zero, sinb * cosa], [-cosa, zero, -sina]])
+    dTw_dbeta = np.array([[-sinb * cosa, -cosb, -sinb * sina], [cosb * cosa, -sinb, cosb * sina], [zero, zero, zero]])
+
+    return Tw, dTw_dalpha, dTw_dbeta
+
+
+def _get_block_diag_pattern(num):
+    """
+    Get the rows and cols of the Jacobian of a [num, 3] array multiplied by
+    the same 3x3 matrix at each of its rows.
+    """
+    rows = np.repeat(np.arange(3 * num), 3)
+    cols = (np.arange(3 * num)[:, np.newaxis] // 3 * 3 + np.arange(3)).flatten()
+    return rows, cols
+
+
+class FusedPGTransform(om.ExplicitComponent):
+    """
+    Transform the VLM geometries from physical coordinates to
+    Prandtl-Glauert coordinates in a single step. This is equivalent to the
+    PGTransform group, which rotates the geometry to the wind frame with
+    RotateToWindFrame and then scales it with ScaleToPrandtlGlauert, but each
+    array is multiplied by the product of the rotation and scaling matrices
+    in one pass, without the intermediate wind frame variables.
+
+    The rotation matrix Tw is given in RotateToWindFrame and the scaling
+    matrices in ScaleToPrandtlGlauert: S = diag(1, B, B) for the coordinates,
+    diag(B, 1, 1) for the normals, and diag(B^2, B, B) for the rotational
+    velocities, with B = sqrt(1 - M^2). Each output is then S * Tw times the
+    input at each point, so the Jacobians with respect to the arrays are
+    block diagonal with 3x3 blocks, and the ones with respect to alpha, beta
+    and the Mach number are computed analytically.
+
+    Parameters
+    ----------
+    def_mesh[nx, ny, 3] : numpy array
+        Array defining the nodal coordinates of the lifting surface in aero
+        frame.
+    bound_vecs[num_eval_points, 3] : numpy array
+        The vectors representing the bound vortices for each panel in the
+        problem.
+        This array contains points for all lifting surfaces in the problem.
+    coll_pts[num_eval_points, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+        This array contains points for all lifting surfaces in the problem.
+    force_pts[num_eval_points, 3] : numpy array
+        The xyz coordinates of the force points used in the VLM analysis.
+        This array contains points for all lifting surfaces in the problem.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel in aero frame, computed as the cross of
+        the two diagonals from the mesh points.
+    rotational_velocities[num_eval_points, 3] : numpy array
+        The rotated freestream velocities at each evaluation point for all
+        lifting surfaces.
+        This array contains points for all lifting surfaces in the problem.
+    alpha : float
+        Angle of attack in degrees.
+    beta : float
+        Sideslip angle in degrees.
+    M : float
+        Freestream Mach number.
+
+    Returns
+    -------
+    def_mesh_pg[nx, ny, 3] : numpy array
+        Array defining the nodal coordinates of the lifting surface in PG frame.
+    bound_vecs_pg[num_eval_points, 3] : numpy array
+        Bound points in PG frame.
+    coll_pts_pg[num_eval_points, 3] : numpy array
+        Collocation points in PG frame.
+    force_pts_pg[num_eval_points, 3] : numpy array
+        Force points in PG frame.
+    normals_pg[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel in PG frame.
+    rotational_velocities_pg[num_eval_points, 3] : numpy array
+        Velocity component at collocation points due to rotational velocity in PG frame.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "rotational", False, types=bool, desc="Set to True to turn on support for computing angular velocities"
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        rotational = self.options["rotational"]
+
+        # Loop through all the surfaces to determine the total number
+        # of evaluation points.
+        num_eval_points = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+
+            num_eval_points += (nx - 1) * (ny - 1)
+
+        self.add_input("alpha", val=0.0, units="rad", tags=["mphys_input"])
+        self.add_input("beta", val=0.0, units="rad", tags=["mphys_input"])
+        self.add_input("Mach_number", val=0.0, tags=["mphys_input"])
+
+        # Each transformed array, with its shape and the kind of scaling
+        # it gets in the PG domain
+        self.transformed = [
+            ("coll_pts", (num_eval_points, 3), "m", "points"),
+            ("force_pts", (num_eval_points, 3), "m", "points"),
+            ("bound_vecs", (num_eval_points, 3), "m", "points"),
+        ]
+        if rotational:
+            self.transformed.append(("rotational_velocities", (num_eval_points, 3), "m/s", "velocities"))
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+
+            self.transformed.append(("{}_def_mesh".format(name), (nx, ny, 3), "m", "points"))
+            self.transformed.append(("{}_normals".format(name), (nx - 1, ny - 1, 3), None, "normals"))
+
+        for in_name, shape, units, _ in self.transformed:
+            out_name = in_name + "_pg"
+            num = int(np.prod(shape[:-1]))
+
+            self.add_input(in_name, shape=shape, units=units)
+            self.add_output(out_name, shape=shape, units=units)
+
+            rows, cols = _get_block_diag_pattern(num)
+            self.declare_partials(out_name, in_name, rows=rows, cols=cols)
+
+            scalar_rows = np.arange(3 * num)
+            scalar_cols = np.zeros(3 * num, int)
+            self.declare_partials(out_name, ["alpha", "beta", "Mach_number"], rows=scalar_rows, cols=scalar_cols)
+
+    def _get_scaling(self, M):
+        """
+        Get the diagonals of the PG scaling matrices, and their derivatives
+        with respect to the Mach number, for each kind of scaling.
+        """
+        betaPG = np.sqrt(1 - M**2)
+        dbetaPG_dM = -M / betaPG
+        one = np.ones_like(betaPG)
+        zero = np.zeros_like(betaPG)
+
+        scaling = {
+            "points": np.array([one, betaPG, betaPG]),
+            "normals": np.array([betaPG, one, one]),
+            "velocities": np.array([betaPG**2, betaPG, betaPG]),
+        }
+        dscaling_dM = {
+            "points": np.array([zero, dbetaPG_dM, dbetaPG_dM]),
+            "normals": np.array([dbetaPG_dM, zero, zero]),
+            "velocities": np.array([2 * betaPG * dbetaPG_dM, dbetaPG_dM, dbetaPG_dM]),
+        }
+
+        return scaling, dscaling_dM
+
+    def compute(self, inputs, outputs):
+        Tw, _, _ = _get_wind_rotation(inputs["alpha"][0], inputs["beta"][0])
+        scaling, _ = self._get_scaling(inputs["Mach_number"][0])
+
+        for in_name, _, _, kind in self.transformed:
+            # Rotate and scale in a single matrix product
+            mtx = scaling[kind][:, np.newaxis] * Tw
+            outputs[in_name + "_pg"] = np.einsum("lk,...k->...l", mtx, inputs[in_name])
+
+    def compute_partials(self, inputs, partials):
+        Tw, dTw_dalpha, dTw_dbeta = _get_wind_rotation(inputs["alpha"][0], inputs["beta"][0])
+        scaling, dscaling_dM = self._get_scaling(inputs["Mach_number"][0])
+
+        for in_name, _, _, kind in self.transformed:
+            out_name = in_name + "_pg"
+            vecs = inputs[in_name].reshape((-1, 3))
+
+            mtx = scaling[kind][:, np.newaxis] * Tw
+            partials[out_name, in_name] = np.tile(mtx.flatten(), vecs.shape[0])
+
+            dmtx_dalpha = scaling[kind][:, np.newaxis] * dTw_dalpha
+            dmtx_dbeta = scaling[kind][:, np.newaxis] * dTw_dbeta
+            dmtx_dM = dscaling_dM[kind][:, np.newaxis] * Tw
+
+            partials[out_name, "alpha"] = vecs.dot(dmtx_dalpha.T).flatten()
+            partials[out_name, "beta"] = vecs.dot(dmtx_dbeta.T).flatten()
+            partials[out_name, "Mach_number"] = vecs.dot(dmtx_dM.T).flatten()
+
+
+class FusedInversePGTransform(om.ExplicitComponent):
+    """
+    Transform the solved incompressible forces in the Prandtl-Glauert domain
+    to the compressible forces in the physical aerodynamic frame in a single
+    step. This is equivalent to the InversePGTransform group, which scales
+    the forces with ScaleFromPrandtlGlauert and then rotates them with
+    RotateFromWindFrame, but each array is multiplied by the product of the
+    two matrices in one pass, Tw^T * diag(1/B^4, 1/B^3, 1/B^3), without the
+    intermediate wind frame variables.
+
+    Parameters
+    ----------
+    sec_forces_pg[nx-1, ny-1, 3] : numpy array
+        Force vectors on each panel (lattice) in PG domain.
+    alpha : float
+        Angle of attack in degrees.
+    beta : float
+        Sideslip angle in degrees.
+    M : float
+        Freestream Mach number.
+
+    Returns
+    -------
+    sec_forces[nx-1, ny-1, 3] : numpy array
+        Force vectors on each panel (lattice) in aero frame.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        self.add_input("alpha", val=0.0, units="rad", tags=["mphys_input"])
+        self.add_input("beta", val=0.0, units="rad", tags=["mphys_input"])
+        self.add_input("Mach_number", val=0.0, tags=["mphys_input"])
+
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+
+            wrt_name = "{}_sec_forces_pg".format(name)
+            of_name = "{}_sec_forces".format(name)
+
+            self.add_input(wrt_name, val=np.zeros((nx - 1, ny - 1, 3)), units="N")
+            self.add_output(of_name, val=np.zeros((nx - 1, ny - 1, 3)), units="N", tags=["mphys_coupling"])
+
+            nn = (nx - 1) * (ny - 1)
+            rows, cols = _get_block_diag_pattern(nn)
+            self.declare_partials(of_name, wrt_name, rows=rows, cols=cols)
+            self.declare_partials(
+                of_name, ["alpha", "beta", "Mach_number"], rows=np.arange(3 * nn), cols=np.zeros(3 * nn, int)
+            )
+
+    def _get_scaling(self, M):
+        """
+        Get the diagonal of the inverse PG scaling matrix for forces, and its
+        derivative with respect to the Mach number.
+        """
+        betaPG = np.sqrt(1 - M**2)
+        dbetaPG_dM = -M / betaPG
+
+        scaling = np.array([1.0 / betaPG**4, 1.0 / betaPG**3, 1.0 / betaPG**3])
+        dscaling_dM = np.array([-4.0 / betaPG**5, -3.0 / betaPG**4, -3.0 / betaPG**4]) * dbetaPG_dM
+
+        return scaling, dscaling_dM
+
+    def compute(self, inputs, outputs):
+        Tw, _, _ = _get_wind_rotation(inputs["alpha"][0], inputs["beta"][0])
+        scaling, _ = self._get_scaling(inputs["Mach_number"][0])
+
+        # Scale and rotate back to the aero frame in a single matrix product
+        mtx = Tw.T * scaling
+
+        for surface in self.options["surfaces"]:
+            name = surface["name"]
+            outputs["{}_sec_forces".format(name)] = np.einsum(
+                "lk,ijk->ijl", mtx, inputs["{}_sec_forces_pg".format(name)]
+            )
+
+    def compute_partials(self, inputs, partials):
+        Tw, dTw_dalpha, dTw_dbeta = _get_wind_rotation(inputs["alpha"][0], inputs["beta"][0])
+        scaling, dscaling_dM = self._get_scaling(inputs["Mach_number"][0])
+
+        mtx = Tw.T * scaling
+        dmtx_dalpha = dTw_dalpha.T * scaling
+        dmtx_dbeta = dTw_dbeta.T * scaling
+        dmtx_dM = Tw.T * dscaling_dM
+
+        for surface in self.options["surfaces"]:
+            name = surface["name"]
+            wrt_name = "{}_sec_forces_pg".format(name)
+            of_name = "{}_sec_forces".format(name)
+
+            forces = inputs[wrt_name].reshape((-1, 3))
+
+            partials[of_name, wrt_name] = np.tile(mtx.flatten(), forces.shape[0])
+            partials[of_name, "alpha"] = forces.dot(dmtx_dalpha.T).flatten()
+            partials[of_name, "beta"] = forces.dot(dmtx_dbeta.T).flatten()
+            partials[of_name, "Mach_number"] = forces.dot(dmtx_dM.T).flatten()
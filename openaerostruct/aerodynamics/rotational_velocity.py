@@ -7,9 +7,12 @@ class RotationalVelocity(om.ExplicitComponent):
     """
     Compute the velocity due to rigid body rotation.
 
+    With vec_size > 1, omega has one angular velocity vector per flight
+    condition, and the rotational velocities are computed for each of them.
+
     Parameters
     ----------
-    omega[3] : ndarray
+    omega[vec_size, 3] : ndarray
         Angular velocity vector for each surface about center of gravity.
         Only available if the rotational options is set to True.
     cg[3] : ndarray
@@ -26,13 +29,16 @@ class RotationalVelocity(om.ExplicitComponent):
         The rotated freestream velocities at each evaluation point for all
         lifting surfaces.
         This array contains points for all lifting surfaces in the problem.
+        With vec_size > 1, the shape is [vec_size, num_eval_points, 3].
     """
 
     def initialize(self):
         self.options.declare("surfaces", types=list)
+        self.options.declare("vec_size", 1, types=int, lower=1, desc="Number of flight conditions (omega) to compute.")
 
     def setup(self):
         surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
 
         system_size = 0
         sizes = []
@@ -50,10 +56,14 @@ class RotationalVelocity(om.ExplicitComponent):
         self.system_size = system_size
 
         self.add_input("coll_pts", shape=(system_size, 3), units="m")
-        self.add_input("omega", val=np.zeros((3,)), units="rad/s", tags=["mphys_input"])
         self.add_input("cg", val=np.ones((3,)), units="m", tags=["mphys_input"])
 
-        self.add_output("rotational_velocities", shape=(system_size, 3), units="m/s")
+        if vec_size > 1:
+            self.add_input("omega", val=np.zeros((vec_size, 3)), units="rad/s", tags=["mphys_input"])
+            self.add_output("rotational_velocities", shape=(vec_size, system_size, 3), units="m/s")
+        else:
+            self.add_input("omega", val=np.zeros((3,)), units="rad/s", tags=["mphys_input"])
+            self.add_output("rotational_velocities", shape=(system_size, 3), units="m/s")
 
         # First Half of cross product
         row = np.array([1, 2, 0])
@@ -69,52 +79,35 @@ class RotationalVelocity(om.ExplicitComponent):
         rows = np.concatenate([rows1, rows2])
         cols = np.concatenate([cols1, cols2])
 
-        self.declare_partials("rotational_velocities", "cg", rows=rows, cols=cols)
-        self.declare_partials("rotational_velocities", "omega", rows=rows, cols=cols)
+        # Each flight condition only affects its own velocities, with its own omega
+        offsets = np.arange(vec_size)[:, np.newaxis]
+        rows = (rows + 3 * system_size * offsets).flatten()
+
+        self.declare_partials("rotational_velocities", "cg", rows=rows, cols=np.tile(cols, vec_size))
+        self.declare_partials("rotational_velocities", "omega", rows=rows, cols=(cols + 3 * offsets).flatten())
 
         cols1 = np.tile(col, system_size) + np.repeat(3 * np.arange(system_size), 3)
         cols2 = np.tile(row, system_size) + np.repeat(3 * np.arange(system_size), 3)
         cols = np.concatenate([cols1, cols2])
 
-        self.declare_partials("rotational_velocities", "coll_pts", rows=rows, cols=cols)
+        self.declare_partials("rotational_velocities", "coll_pts", rows=rows, cols=np.tile(cols, vec_size))
 
     def compute(self, inputs, outputs):
-        # Angular velocity term
-        cg = inputs["cg"]
-        omega = inputs["omega"]
-        c_pts = inputs["coll_pts"]
+        # Angular velocity term for every collocation point and flight condition at once
+        omega = inputs["omega"].reshape((-1, 1, 3))
+        r = inputs["coll_pts"] - inputs["cg"]
 
-        for j in np.arange(c_pts.shape[0]):
-            r = c_pts[j, :] - cg
-
-            outputs["rotational_velocities"][j, :] = np.cross(omega, r)
+        outputs["rotational_velocities"] = np.cross(omega, r).reshape(outputs["rotational_velocities"].shape)
 
     def compute_partials(self, inputs, J):
-        cg = inputs["cg"]
-        omega = inputs["omega"]
-        c_pts = inputs["coll_pts"]
-
-        surfaces = self.options["surfaces"]
-        idx = jdx = 0
-        ii = self.system_size * 3
-        for surface in surfaces:
-            mesh = surface["mesh"]
-            nx = mesh.shape[0]
-            ny = mesh.shape[1]
-            size = (nx - 1) * (ny - 1)
-
-            r = c_pts[jdx : jdx + size, :] - cg
-
-            # Cross product derivatives organized so we can tile a variable directly into slices
-
-            J["rotational_velocities", "cg"][idx : idx + size * 3] = np.tile(omega, size)
-            J["rotational_velocities", "cg"][idx + ii : idx + ii + size * 3] = -np.tile(omega, size)
-
-            J["rotational_velocities", "coll_pts"][idx : idx + size * 3] = -np.tile(omega, size)
-            J["rotational_velocities", "coll_pts"][idx + ii : idx + ii + size * 3] = np.tile(omega, size)
+        system_size = self.system_size
+        omega = inputs["omega"].reshape((-1, 3))
+        r = (inputs["coll_pts"] - inputs["cg"]).flatten()
 
-            J["rotational_velocities", "omega"][idx : idx + size * 3] = r.flatten()
-            J["rotational_velocities", "omega"][idx + ii : idx + ii + size * 3] = -r.flatten()
+        # Cross product derivatives organized so we can tile a variable
+        # directly into the two halves of each flight condition
+        omega_data = np.tile(omega, (1, system_size))
 
-            idx += 3 * size
-            jdx += size
+        J["rotational_velocities", "cg"] = np.hstack([omega_data, -omega_data]).flatten()
+        J["rotational_velocities", "coll_pts"] = np.hstack([-omega_data, omega_data]).flatten()
+        J["rotational_velocities", "omega"] = np.tile(np.concatenate([r, -r]), omega.shape[0])
@@ -1,13 +1,65 @@
+import inspect
+
 import numpy as np
 from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse.linalg import LinearOperator, gmres
 
 import openmdao.api as om
 
+from openaerostruct.aerodynamics.aic_cache import AICCache
+
+
+def solve_gmres(mtx, rhs, rtol, **kwargs):
+    """
+    Call scipy's GMRES with a relative tolerance, which scipy only takes as
+    rtol from version 1.12 on, and as tol before that.
+    """
+    if "rtol" in inspect.signature(gmres).parameters:
+        return gmres(mtx, rhs, rtol=rtol, **kwargs)
+    return gmres(mtx, rhs, tol=rtol, **kwargs)
+
 
 class SolveMatrix(om.ImplicitComponent):
     """
     Solve the AIC linear system to obtain the vortex ring circulations.
 
+    By default the system is solved directly with a dense LU factorization.
+    With the "gmres" solver it is instead solved iteratively with GMRES,
+    warm-started from the current circulations and preconditioned with the
+    LU factorizations of the diagonal blocks of the AIC matrix, either one
+    block per chordwise strip of panels, by default, or one block per lifting
+    surface. The preconditioner is kept across solves and only rebuilt from
+    the current AIC matrix once GMRES needs more than `refactor_iter`
+    iterations, so a solve for a slightly changed AIC matrix, like the ones
+    in the aerostructural coupling iterations, costs O(N^2) instead of
+    O(N^3). The strips are small enough that even building the
+    preconditioner is cheaper than a dense solve, while the surface blocks
+    cost as much as a dense factorization of each surface.
+
+    The LU factorization of the direct solver is cached along with the AIC
+    matrix it was computed from, so linearize reuses the factorization from
+    solve_nonlinear instead of computing it again, and other components can
+    solve for more right-hand sides with it through `solve`. With the matrix_free
+    option the derivatives are applied directly from the AIC matrix in
+    apply_linear, which avoids the dense sparse-format Jacobians and their
+    N^2 row and column index arrays.
+
+    With the "mixed" precision option the direct solver factors a float32
+    copy of the AIC matrix, which halves the memory of the factorization,
+    and recovers a double precision solution with iterative refinement: the
+    residual is computed in float64 against the full AIC matrix and the
+    correction is solved with the float32 factors until the residual drops
+    below `rtol`. Each refinement step reduces the error by a factor of
+    about cond(mtx) * 1e-7, so this converges in a few steps for the
+    well-conditioned AIC matrices of typical wings, and raises an
+    AnalysisError after `maxiter` steps otherwise. Complex-step solves are
+    always done in double precision.
+
+    With an AICCache in the `aic_cache` option, the LU factorizations of the
+    direct solver are stored on disk and read back as memory maps instead of
+    computed again whenever the AIC matrix is exactly the same as in a
+    previous analysis.
+
     Parameters
     ----------
     mtx[system_size, system_size] : numpy array
@@ -26,6 +78,61 @@ class SolveMatrix(om.ImplicitComponent):
 
     def initialize(self):
         self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "solver",
+            default="direct",
+            values=["direct", "gmres"],
+            desc="Solve the AIC linear system with a dense LU factorization or iteratively with GMRES.",
+        )
+        self.options.declare(
+            "preconditioner",
+            default="strip",
+            values=["surface", "strip"],
+            desc="Blocks of the block-diagonal GMRES preconditioner, either one per lifting surface or one per "
+            "chordwise strip of panels.",
+        )
+        self.options.declare(
+            "rtol",
+            default=1e-12,
+            types=float,
+            desc="Relative tolerance of the GMRES solves and of the iterative refinement of the mixed precision "
+            "direct solves.",
+        )
+        self.options.declare(
+            "maxiter",
+            default=100,
+            types=int,
+            desc="Maximum number of GMRES restarts or of iterative refinement steps.",
+        )
+        self.options.declare(
+            "precision",
+            default="double",
+            values=["double", "mixed"],
+            desc="Factor the AIC matrix of the direct solver in double precision, or in single precision with "
+            "iterative refinement of the solutions in double precision.",
+        )
+        self.options.declare(
+            "refactor_iter",
+            default=20,
+            types=int,
+            desc="Rebuild the GMRES preconditioner from the current AIC matrix once a solve needs more than this "
+            "number of iterations.",
+        )
+        self.options.declare(
+            "matrix_free",
+            default=False,
+            types=bool,
+            desc="Set to True to apply the derivatives in apply_linear instead of declaring the dense partials. "
+            "This cannot be used under a linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "aic_cache",
+            default=None,
+            types=AICCache,
+            allow_none=True,
+            recordable=False,
+            desc="Persistent cache to store the LU factorizations of the direct solver in and read them back from.",
+        )
 
     def setup(self):
         system_size = 0
@@ -43,6 +150,18 @@ class SolveMatrix(om.ImplicitComponent):
         self.add_input("rhs", shape=system_size, units="m/s")
         self.add_output("circulations", shape=system_size, units="m**2/s", tags=["mphys_coupling"])
 
+        self.precon_blocks = self._get_precon_blocks()
+        self.precon_factors = None
+
+        self.lu = None
+        self.lu_mtx = None
+
+        # OpenMDAO only calls apply_linear on matrix free components, and
+        # uses the declared partials otherwise
+        self.matrix_free = self.options["matrix_free"]
+        if self.matrix_free:
+            return
+
         self.declare_partials(
             "circulations",
             "circulations",
@@ -63,23 +182,249 @@ class SolveMatrix(om.ImplicitComponent):
             cols=np.arange(system_size),
         )
 
+    def _factor(self, mtx):
+        """
+        Compute the LU factorization of the AIC matrix, or read it from the
+        cache, unless it is the one that was factored last.
+        """
+        if self.lu_mtx is None or not np.array_equal(mtx, self.lu_mtx):
+            cache = self.options["aic_cache"]
+            if cache is not None and not np.iscomplexobj(mtx):
+                key = cache.get_key(("SolveMatrix", self.options["precision"]), [mtx])
+                cached = cache.load(key)
+            else:
+                cache = cached = None
+
+            if cached is not None:
+                # LAPACK cannot take the pivots as a read-only memory map
+                self.lu = (cached["lu"], np.array(cached["piv"]))
+            elif self.options["precision"] == "mixed" and not np.iscomplexobj(mtx):
+                self.lu = lu_factor(mtx.astype(np.float32))
+            else:
+                self.lu = lu_factor(mtx)
+
+            if cache is not None and cached is None:
+                cache.save(key, {"lu": self.lu[0], "piv": self.lu[1]})
+
+            self.lu_mtx = mtx.copy()
+
+    def _solve_direct(self, rhs, trans):
+        """
+        Solve the AIC linear system, or its transpose, with the cached LU
+        factorization, refining the solution in double precision when the
+        factors are single precision.
+        """
+        if self.lu[0].dtype != np.float32:
+            return lu_solve(self.lu, rhs, trans=trans)
+
+        if trans:
+            mtx = self.lu_mtx.T
+        else:
+            mtx = self.lu_mtx
+
+        sol = lu_solve(self.lu, rhs.astype(np.float32), trans=trans).astype(rhs.dtype)
+
+        tol = self.options["rtol"] * np.linalg.norm(rhs)
+        for _ in range(self.options["maxiter"]):
+            residual = rhs - mtx.dot(sol)
+            if np.linalg.norm(residual) <= tol:
+                return sol
+            sol += lu_solve(self.lu, residual.astype(np.float32), trans=trans)
+
+        raise om.AnalysisError(
+            "{}: Iterative refinement did not converge to the requested tolerance in {} steps.".format(
+                self.msginfo, self.options["maxiter"]
+            )
+        )
+
+    def solve(self, mtx, rhs, trans=0):
+        """
+        Solve the AIC linear system, or its transpose, for other right-hand
+        sides with the LU factorization of the direct solver. The factorization
+        cached by solve_nonlinear and linearize is reused as long as `mtx` is
+        the AIC matrix it was computed from.
+
+        Parameters
+        ----------
+        mtx[system_size, system_size] : numpy array
+            The AIC matrix.
+        rhs[system_size, ...] : numpy array
+            The right-hand sides, optionally several of them along the
+            trailing dimension.
+        trans : int
+            0 to solve the AIC linear system, and 1 to solve its transpose.
+
+        Returns
+        -------
+        sol[system_size, ...] : numpy array
+            The solutions.
+        """
+        self._factor(mtx)
+        return self._solve_direct(rhs, trans)
+
+    def _get_precon_blocks(self):
+        """
+        Get the indices of the circulations in each block of the
+        preconditioner, as a list with one [num_blocks, block_size] array per
+        lifting surface.
+        """
+        precon_blocks = []
+
+        ind_1 = 0
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            indices = np.arange(ind_1, ind_2)
+            if self.options["preconditioner"] == "surface":
+                precon_blocks.append(indices[np.newaxis, :])
+            else:
+                # The circulations are ordered chordwise-major, so each
+                # chordwise strip is a column of this array
+                precon_blocks.append(indices.reshape((nx - 1, ny - 1)).T)
+
+            ind_1 = ind_2
+
+        return precon_blocks
+
+    def _update_preconditioner(self, mtx):
+        """
+        Compute the LU factorizations of the diagonal blocks of the AIC matrix.
+        """
+        self.precon_factors = [
+            [lu_factor(mtx[np.ix_(block, block)]) for block in blocks] for blocks in self.precon_blocks
+        ]
+
+    def _apply_preconditioner(self, vec, trans):
+        """
+        Apply the block-diagonal preconditioner, or its transpose, to a vector.
+        """
+        result = np.empty_like(vec)
+        for blocks, factors in zip(self.precon_blocks, self.precon_factors):
+            for block, factor in zip(blocks, factors):
+                result[block] = lu_solve(factor, vec[block], trans=trans)
+        return result
+
+    def _solve_gmres(self, mtx, rhs, x0, trans):
+        """
+        Solve the AIC linear system, or its transpose, with preconditioned
+        GMRES, rebuilding the preconditioner when it no longer keeps the
+        iteration count low.
+        """
+        system_size = self.system_size
+        dtype = np.result_type(mtx, rhs)
+
+        if trans:
+            mtx_op = LinearOperator((system_size, system_size), matvec=lambda vec: mtx.T.dot(vec), dtype=dtype)
+        else:
+            mtx_op = LinearOperator((system_size, system_size), matvec=mtx.dot, dtype=dtype)
+
+        # A stale preconditioner gets one retry with a fresh one before
+        # giving up. A preconditioner built during complex step is never
+        # reused for a real solve, or vice versa.
+        if self.precon_factors is not None and np.iscomplexobj(self.precon_factors[0][0][0]) != np.iscomplexobj(mtx):
+            self.precon_factors = None
+
+        for attempt in range(2):
+            fresh = self.precon_factors is None
+            if fresh:
+                self._update_preconditioner(mtx)
+
+            precon = LinearOperator(
+                (system_size, system_size), matvec=lambda vec: self._apply_preconditioner(vec, trans), dtype=dtype
+            )
+
+            num_iter = [0]
+
+            def callback(residual_norm):
+                num_iter[0] += 1
+
+            sol, info = solve_gmres(
+                mtx_op,
+                rhs,
+                self.options["rtol"],
+                x0=x0,
+                atol=0.0,
+                maxiter=self.options["maxiter"],
+                M=precon,
+                callback=callback,
+                callback_type="pr_norm",
+            )
+
+            if info > 0 or num_iter[0] > self.options["refactor_iter"]:
+                self.precon_factors = None
+
+            if info == 0 or fresh:
+                break
+
+        if info > 0:
+            raise om.AnalysisError(
+                "{}: GMRES did not converge to the requested tolerance in {} iterations.".format(self.msginfo, info)
+            )
+
+        return sol
+
     def apply_nonlinear(self, inputs, outputs, residuals):
         residuals["circulations"] = inputs["mtx"].dot(outputs["circulations"]) - inputs["rhs"]
 
     def solve_nonlinear(self, inputs, outputs):
-        self.lu = lu_factor(inputs["mtx"])
+        if self.options["solver"] == "gmres":
+            # Warm start from the previous circulations
+            outputs["circulations"] = self._solve_gmres(inputs["mtx"], inputs["rhs"], outputs["circulations"], False)
+        else:
+            self._factor(inputs["mtx"])
 
-        outputs["circulations"] = lu_solve(self.lu, inputs["rhs"])
+            outputs["circulations"] = self._solve_direct(inputs["rhs"], 0)
 
     def linearize(self, inputs, outputs, partials):
         system_size = self.system_size
-        self.lu = lu_factor(inputs["mtx"])
+
+        if self.options["solver"] == "gmres":
+            self.mtx = inputs["mtx"].copy()
+        else:
+            self._factor(inputs["mtx"])
+
+        if self.options["matrix_free"]:
+            return
 
         partials["circulations", "circulations"] = inputs["mtx"].flatten()
         partials["circulations", "mtx"] = np.outer(np.ones(system_size), outputs["circulations"]).flatten()
 
-    def solve_linear(self, d_outputs, d_residuals, mode):
+    def apply_linear(self, inputs, outputs, d_inputs, d_outputs, d_residuals, mode):
+        """
+        Apply the derivatives of the residuals directly from the AIC matrix.
+        This is only called with the matrix_free option, since the component
+        otherwise uses its declared partials.
+        """
+        if "circulations" not in d_residuals:
+            return
+
+        d_circ_residuals = d_residuals["circulations"]
+
         if mode == "fwd":
-            d_outputs["circulations"] = lu_solve(self.lu, d_residuals["circulations"], trans=0)
+            if "circulations" in d_outputs:
+                d_circ_residuals += inputs["mtx"].dot(d_outputs["circulations"])
+            if "mtx" in d_inputs:
+                d_circ_residuals += d_inputs["mtx"].dot(outputs["circulations"])
+            if "rhs" in d_inputs:
+                d_circ_residuals -= d_inputs["rhs"]
+        else:
+            if "circulations" in d_outputs:
+                d_outputs["circulations"] += inputs["mtx"].T.dot(d_circ_residuals)
+            if "mtx" in d_inputs:
+                d_inputs["mtx"] += np.outer(d_circ_residuals, outputs["circulations"])
+            if "rhs" in d_inputs:
+                d_inputs["rhs"] -= d_circ_residuals
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if self.options["solver"] == "gmres":
+            if mode == "fwd":
+                d_outputs["circulations"] = self._solve_gmres(self.mtx, d_residuals["circulations"], None, False)
+            else:
+                d_residuals["circulations"] = self._solve_gmres(self.mtx, d_outputs["circulations"], None, True)
+        elif mode == "fwd":
+            d_outputs["circulations"] = self._solve_direct(d_residuals["circulations"], 0)
         else:
-            d_residuals["circulations"] = lu_solve(self.lu, d_outputs["circulations"], trans=1)
+            d_residuals["circulations"] = self._solve_direct(d_outputs["circulations"], 1)
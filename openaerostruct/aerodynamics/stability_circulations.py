@@ -0,0 +1,192 @@
+import numpy as np
+from scipy.linalg import lu_factor, lu_solve
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.solve_matrix import SolveMatrix
+from openaerostruct.aerodynamics.stability_freestream_velocities import STABILITY_STATES
+
+
+class StabilityCirculations(om.ImplicitComponent):
+    """
+    Solve for the derivatives of the vortex ring circulations with respect to
+    each of the flight states in STABILITY_STATES. Differentiating the AIC
+    linear system mtx * circulations = rhs gives one more linear system with
+    the same AIC matrix per flight state,
+
+        mtx * circulation_derivs = rhs_derivs - mtx_alpha * circulations,
+
+    where rhs_derivs = -normals . freestream_velocity_derivs and the last term
+    only appears for alpha, which is the only state that changes the AIC
+    matrix, through the direction of the trailing legs.
+
+    These right-hand sides are all solved at once with the LU factorization
+    of the AIC matrix that the SolveMatrix component in the `solve_matrix`
+    option already computed for the circulations, so no other factorization
+    is needed. Without it, the AIC matrix is factored here.
+
+    Parameters
+    ----------
+    mtx[system_size, system_size] : numpy array
+        Final fully assembled AIC matrix that is used to solve for the
+        circulations.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel, computed as the cross of the two
+        diagonals from the mesh points. There is one of these arrays for each
+        lifting surface in the problem.
+    freestream_velocity_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the freestream velocities at each collocation point
+        with respect to each flight state.
+    coll_pts_alpha_velocities[system_size, 3] : numpy array
+        The derivatives of the induced velocities at the collocation points
+        with respect to alpha, mtx_alpha * circulations before the dot product
+        with the normals.
+
+    Returns
+    -------
+    circulation_derivs[num_states, system_size] : numpy array
+        The derivatives of the vortex ring circulations with respect to each
+        flight state.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "solve_matrix",
+            None,
+            types=SolveMatrix,
+            allow_none=True,
+            recordable=False,
+            desc="SolveMatrix component of the same AIC matrix, whose LU factorization is reused.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        num_states = len(STABILITY_STATES)
+
+        system_size = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+            self.add_input("{}_normals".format(surface["name"]), shape=(nx - 1, ny - 1, 3))
+
+        self.system_size = system_size
+        self.alpha_index = STABILITY_STATES.index("alpha")
+
+        self.add_input("mtx", shape=(system_size, system_size), units="1/m")
+        self.add_input("freestream_velocity_derivs", shape=(num_states, system_size, 3))
+        self.add_input("coll_pts_alpha_velocities", shape=(system_size, 3), units="m/s/deg")
+        self.add_output("circulation_derivs", shape=(num_states, system_size))
+
+        self.lu = None
+        self.lu_mtx = None
+
+        indices = np.arange(num_states * system_size).reshape((num_states, system_size))
+        mtx_indices = np.arange(system_size**2).reshape((system_size, system_size))
+
+        # One copy of the AIC matrix per flight state
+        rows = np.repeat(indices, system_size, axis=1).flatten()
+        self.declare_partials(
+            "circulation_derivs",
+            "circulation_derivs",
+            rows=rows,
+            cols=np.repeat(indices, system_size, axis=0).flatten(),
+        )
+        self.declare_partials("circulation_derivs", "mtx", rows=rows, cols=np.tile(mtx_indices.flatten(), num_states))
+
+        # Each residual only depends on the velocities at its own collocation point
+        rows = np.repeat(indices, 3, axis=1).flatten()
+        self.declare_partials(
+            "circulation_derivs", "freestream_velocity_derivs", rows=rows, cols=np.arange(num_states * system_size * 3)
+        )
+        self.declare_partials(
+            "circulation_derivs",
+            "coll_pts_alpha_velocities",
+            rows=np.repeat(indices[self.alpha_index], 3),
+            cols=np.arange(system_size * 3),
+        )
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            num = (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+            ind_2 = ind_1 + num
+            self.declare_partials(
+                "circulation_derivs",
+                "{}_normals".format(surface["name"]),
+                rows=np.repeat(indices[:, ind_1:ind_2], 3, axis=1).flatten(),
+                cols=np.tile(np.arange(num * 3), num_states),
+            )
+            ind_1 = ind_2
+
+    def _get_normals(self, inputs):
+        """
+        Gather the normals of all lifting surfaces in a single array.
+        """
+        return np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in self.options["surfaces"]]
+        )
+
+    def _get_velocity_derivs(self, inputs):
+        """
+        Compute the derivatives of the velocities that the normals are dotted
+        with, including the change of the AIC matrix with alpha.
+        """
+        velocity_derivs = inputs["freestream_velocity_derivs"].copy()
+        velocity_derivs[self.alpha_index] += inputs["coll_pts_alpha_velocities"]
+        return velocity_derivs
+
+    def _solve(self, mtx, rhs, trans):
+        """
+        Solve the AIC linear system, or its transpose, for the right-hand
+        sides of all flight states at once.
+        """
+        solve_matrix = self.options["solve_matrix"]
+        if solve_matrix is not None:
+            return solve_matrix.solve(mtx, rhs.T, trans).T
+
+        if self.lu_mtx is None or not np.array_equal(mtx, self.lu_mtx):
+            self.lu = lu_factor(mtx)
+            self.lu_mtx = mtx.copy()
+
+        return lu_solve(self.lu, rhs.T, trans=trans).T
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        rhs_derivs = -np.einsum("kij,ij->ki", self._get_velocity_derivs(inputs), self._get_normals(inputs))
+        residuals["circulation_derivs"] = outputs["circulation_derivs"].dot(inputs["mtx"].T) - rhs_derivs
+
+    def solve_nonlinear(self, inputs, outputs):
+        rhs_derivs = -np.einsum("kij,ij->ki", self._get_velocity_derivs(inputs), self._get_normals(inputs))
+        outputs["circulation_derivs"] = self._solve(inputs["mtx"], rhs_derivs, 0)
+
+    def linearize(self, inputs, outputs, partials):
+        num_states = len(STABILITY_STATES)
+        system_size = self.system_size
+
+        self.mtx = inputs["mtx"].copy()
+
+        normals = self._get_normals(inputs)
+        velocity_derivs = self._get_velocity_derivs(inputs)
+
+        partials["circulation_derivs", "circulation_derivs"] = np.tile(inputs["mtx"].flatten(), num_states)
+        partials["circulation_derivs", "mtx"] = np.repeat(outputs["circulation_derivs"], system_size, axis=0).flatten()
+        partials["circulation_derivs", "freestream_velocity_derivs"] = np.tile(normals.flatten(), num_states)
+        partials["circulation_derivs", "coll_pts_alpha_velocities"] = normals.flatten()
+
+        ind_1 = 0
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            ind_2 = ind_1 + (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+            partials["circulation_derivs", "{}_normals".format(surface["name"])] = velocity_derivs[
+                :, ind_1:ind_2
+            ].flatten()
+            ind_1 = ind_2
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if mode == "fwd":
+            d_outputs["circulation_derivs"] = self._solve(self.mtx, d_residuals["circulation_derivs"], 0)
+        else:
+            d_residuals["circulation_derivs"] = self._solve(self.mtx, d_outputs["circulation_derivs"], 1)
@@ -0,0 +1,391 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import _compute_skew
+from openaerostruct.aerodynamics.stability_freestream_velocities import STABILITY_STATES
+
+
+class StabilityCoefficients(om.ExplicitComponent):
+    """
+    Compute the stability derivatives of the aircraft, that is the derivatives
+    of CL, CD, and CM as given by LiftDrag, TotalLiftDrag, and
+    MomentCoefficient with respect to each of the flight states in
+    STABILITY_STATES, from the derivatives of the panel forces. Besides the
+    change of the forces, alpha and beta also rotate the lift and drag
+    directions, and the wave drag changes with the CL of its surface.
+
+    Parameters
+    ----------
+    panel_forces[system_size, 3] : numpy array
+        All of the forces acting on all panels in the total system.
+    panel_force_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the panel forces with respect to each flight state.
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    beta : float
+        The sideslip angle for the aircraft (all lifting surfaces) in degrees.
+    v : float
+        Freestream air velocity in m/s.
+    rho : float
+        Air density in kg/m^3.
+    cg[3] : numpy array
+        The x, y, z coordinates of the center of gravity for the entire aircraft.
+    S_ref_total : float
+        Total surface area of the aircraft based on the sum of individual
+        surface areas.
+    b_pts[nx-1, ny, 3] : numpy array
+        Bound points for the horseshoe vortices, found along the 1/4 chord.
+        There is one of these arrays for each lifting surface in the problem.
+    widths[ny-1] : numpy array
+        The spanwise widths of each individual panel of the first lifting
+        surface, whose mean aerodynamic chord normalizes CM.
+    chords[ny] : numpy array
+        The chordwise length of the entire airfoil following the camber line,
+        for the first lifting surface.
+    S_ref : float
+        The reference area of the first lifting surface.
+    CDw_CL : float
+        The derivative of the wave drag coefficient of a lifting surface with
+        respect to its CL. There is one of these for each lifting surface with
+        the with_wave option.
+
+    Returns
+    -------
+    CL_state : float
+        The derivative of the lift coefficient with respect to each of alpha,
+        beta, p, q, and r, e.g. CL_alpha. Those with respect to the angles are
+        per degree, and those with respect to the rates are per rad/s.
+    CD_state : float
+        The derivative of the drag coefficient with respect to each state.
+    CM_state[3] : numpy array
+        The derivatives of the moment coefficients with respect to each state,
+        e.g. CM_p[0] is the roll damping Cl_p and CM_r[2] is the yaw damping
+        Cn_r.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        num_states = len(STABILITY_STATES)
+
+        system_size = 0
+        for surface in surfaces:
+            name = surface["name"]
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+            self.add_input(name + "_b_pts", val=np.ones((nx - 1, ny, 3)), units="m")
+            if surface["with_wave"]:
+                self.add_input(name + "_CDw_CL", val=0.0)
+
+        # Only the first (main) lifting surface sets the MAC that normalizes CM
+        name = surfaces[0]["name"]
+        ny = surfaces[0]["mesh"].shape[1]
+        self.add_input(name + "_widths", val=np.ones((ny - 1)), units="m")
+        self.add_input(name + "_chords", val=np.ones((ny)), units="m")
+        self.add_input(name + "_S_ref", val=1.0, units="m**2")
+
+        self.system_size = system_size
+
+        self.add_input("panel_forces", val=np.ones((system_size, 3)), units="N")
+        self.add_input("panel_force_derivs", val=np.ones((num_states, system_size, 3)))
+        self.add_input("alpha", val=0.0, units="deg")
+        self.add_input("beta", val=0.0, units="deg")
+        self.add_input("v", val=10.0, units="m/s")
+        self.add_input("rho", val=3.0, units="kg/m**3")
+        self.add_input("cg", val=np.ones((3)), units="m")
+        self.add_input("S_ref_total", val=1.0, units="m**2")
+
+        for state in STABILITY_STATES:
+            if state in ["alpha", "beta"]:
+                units = "1/deg"
+            else:
+                units = "s/rad"
+
+            self.add_output("CL_" + state, val=0.0, units=units)
+            self.add_output("CD_" + state, val=0.0, units=units)
+            self.add_output("CM_" + state, val=np.zeros(3), units=units)
+
+        wave_names = [surface["name"] + "_CDw_CL" for surface in surfaces if surface["with_wave"]]
+        b_pts_names = [surface["name"] + "_b_pts" for surface in surfaces]
+        force_indices = np.arange(num_states * system_size * 3).reshape((num_states, system_size * 3))
+
+        for ind, state in enumerate(STABILITY_STATES):
+            CL_name = "CL_" + state
+            CD_name = "CD_" + state
+            CM_name = "CM_" + state
+
+            # Each stability derivative only depends on the force derivatives
+            # of its own flight state
+            self.declare_partials(
+                [CL_name, CD_name],
+                "panel_force_derivs",
+                rows=np.zeros(system_size * 3, int),
+                cols=force_indices[ind],
+            )
+            self.declare_partials(
+                CM_name,
+                "panel_force_derivs",
+                rows=np.repeat(np.arange(3), system_size * 3),
+                cols=np.tile(force_indices[ind], 3),
+            )
+
+            self.declare_partials([CL_name, CD_name, CM_name], ["v", "rho", "S_ref_total"])
+            self.declare_partials([CL_name, CD_name], "alpha")
+            self.declare_partials(CD_name, ["beta"] + wave_names)
+            self.declare_partials(CM_name, ["cg"] + b_pts_names + [name + "_widths", name + "_chords", name + "_S_ref"])
+
+            # Alpha and beta also rotate the lift and drag directions
+            if state == "alpha":
+                self.declare_partials([CL_name, CD_name], "panel_forces")
+            elif state == "beta":
+                self.declare_partials(CD_name, "panel_forces")
+
+    def _get_projections(self, inputs):
+        """
+        Compute the lift and drag directions and their first and second
+        derivatives with respect to alpha and beta, per degree.
+        """
+        p180 = np.pi / 180.0
+        alpha = inputs["alpha"][0] * p180
+        beta = inputs["beta"][0] * p180
+
+        cosa = np.cos(alpha)
+        sina = np.sin(alpha)
+        cosb = np.cos(beta)
+        sinb = np.sin(beta)
+
+        projections = {
+            "l": np.array([-sina, 0.0, cosa]),
+            "l_a": p180 * np.array([-cosa, 0.0, -sina]),
+            "l_aa": p180**2 * np.array([sina, 0.0, -cosa]),
+            "d": np.array([cosa * cosb, -sinb, sina * cosb]),
+            "d_a": p180 * np.array([-sina * cosb, 0.0, cosa * cosb]),
+            "d_b": p180 * np.array([-cosa * sinb, -cosb, -sina * sinb]),
+            "d_aa": p180**2 * np.array([-cosa * cosb, 0.0, -sina * cosb]),
+            "d_ab": p180**2 * np.array([sina * sinb, 0.0, -cosa * sinb]),
+            "d_bb": p180**2 * np.array([-cosa * cosb, sinb, -sina * cosb]),
+        }
+
+        return projections
+
+    def _get_surface_terms(self, inputs):
+        """
+        Compute the derivatives of the lift, the drag, and the moment of each
+        lifting surface, before the normalization, as well as the MAC of the
+        first lifting surface.
+        """
+        ia = STABILITY_STATES.index("alpha")
+        ib = STABILITY_STATES.index("beta")
+        proj = self._get_projections(inputs)
+
+        terms = []
+        ind_1 = 0
+        for surface in self.options["surfaces"]:
+            name = surface["name"]
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            if surface["symmetry"]:
+                symmetry_factor = 2.0
+                moment_mask = np.array([0.0, 2.0, 0.0])
+            else:
+                symmetry_factor = 1.0
+                moment_mask = np.ones(3)
+
+            forces = np.sum(inputs["panel_forces"][ind_1:ind_2], axis=0)
+            force_derivs = inputs["panel_force_derivs"][:, ind_1:ind_2]
+            sum_force_derivs = np.sum(force_derivs, axis=1)
+
+            lift_derivs = symmetry_factor * sum_force_derivs.dot(proj["l"])
+            lift_derivs[ia] += symmetry_factor * forces.dot(proj["l_a"])
+
+            drag_derivs = symmetry_factor * sum_force_derivs.dot(proj["d"])
+            drag_derivs[ia] += symmetry_factor * forces.dot(proj["d_a"])
+            drag_derivs[ib] += symmetry_factor * forces.dot(proj["d_b"])
+
+            # Moment arm of each panel relative to the cg
+            b_pts = inputs[name + "_b_pts"]
+            diff = ((b_pts[:, 1:, :] + b_pts[:, :-1, :]) * 0.5).reshape((-1, 3)) - inputs["cg"]
+            moment_derivs = np.sum(np.cross(diff, force_derivs), axis=1) * moment_mask
+
+            if surface["with_wave"]:
+                CDw_CL = inputs[name + "_CDw_CL"][0]
+            else:
+                CDw_CL = 0.0
+
+            terms.append(
+                {
+                    "slice": slice(ind_1, ind_2),
+                    "symmetry_factor": symmetry_factor,
+                    "moment_mask": moment_mask,
+                    "forces": forces,
+                    "sum_force_derivs": sum_force_derivs,
+                    "lift_derivs": lift_derivs,
+                    "drag_derivs": drag_derivs,
+                    "moment_derivs": moment_derivs,
+                    "diff": diff,
+                    "CDw_CL": CDw_CL,
+                }
+            )
+
+            ind_1 = ind_2
+
+        # Mean aerodynamic chord of the first lifting surface, as in
+        # MomentCoefficient
+        surface = self.options["surfaces"][0]
+        name = surface["name"]
+        chords = inputs[name + "_chords"]
+        panel_chords = (chords[1:] + chords[:-1]) * 0.5
+        MAC = 1.0 / inputs[name + "_S_ref"][0] * np.sum(panel_chords**2 * inputs[name + "_widths"])
+        if surface["symmetry"]:
+            MAC *= 2.0
+
+        return proj, terms, MAC
+
+    def compute(self, inputs, outputs):
+        _, terms, MAC = self._get_surface_terms(inputs)
+
+        lift_derivs = sum(term["lift_derivs"] for term in terms)
+        drag_derivs = sum(term["drag_derivs"] + term["CDw_CL"] * term["lift_derivs"] for term in terms)
+        moment_derivs = sum(term["moment_derivs"] for term in terms)
+
+        fact = 1.0 / (0.5 * inputs["rho"][0] * inputs["v"][0] ** 2 * inputs["S_ref_total"][0])
+
+        for ind, state in enumerate(STABILITY_STATES):
+            outputs["CL_" + state] = lift_derivs[ind] * fact
+            outputs["CD_" + state] = drag_derivs[ind] * fact
+            outputs["CM_" + state] = moment_derivs[ind] * fact / MAC
+
+    def compute_partials(self, inputs, partials):
+        surfaces = self.options["surfaces"]
+        system_size = self.system_size
+        ia = STABILITY_STATES.index("alpha")
+        ib = STABILITY_STATES.index("beta")
+
+        proj, terms, MAC = self._get_surface_terms(inputs)
+
+        lift_derivs = sum(term["lift_derivs"] for term in terms)
+        drag_derivs = sum(term["drag_derivs"] + term["CDw_CL"] * term["lift_derivs"] for term in terms)
+        moment_derivs = sum(term["moment_derivs"] for term in terms)
+
+        rho = inputs["rho"][0]
+        v = inputs["v"][0]
+        S_ref_total = inputs["S_ref_total"][0]
+        fact = 1.0 / (0.5 * rho * v**2 * S_ref_total)
+
+        first = surfaces[0]
+        name = first["name"]
+        chords = inputs[name + "_chords"]
+        widths = inputs[name + "_widths"]
+        S_ref = inputs[name + "_S_ref"][0]
+        panel_chords = (chords[1:] + chords[:-1]) * 0.5
+        symmetry_factor = 2.0 if first["symmetry"] else 1.0
+
+        dMAC_dwidths = symmetry_factor * panel_chords**2 / S_ref
+        dMAC_dpanel_chords = symmetry_factor * 2.0 * panel_chords * widths / S_ref
+        dMAC_dchords = np.zeros(chords.size)
+        dMAC_dchords[1:] += 0.5 * dMAC_dpanel_chords
+        dMAC_dchords[:-1] += 0.5 * dMAC_dpanel_chords
+        dMAC_dS_ref = -MAC / S_ref
+
+        for ind, state in enumerate(STABILITY_STATES):
+            CL_name = "CL_" + state
+            CD_name = "CD_" + state
+            CM_name = "CM_" + state
+
+            CL = lift_derivs[ind] * fact
+            CD = drag_derivs[ind] * fact
+            CM = moment_derivs[ind] * fact / MAC
+
+            for of, val in [(CL_name, CL), (CD_name, CD), (CM_name, CM)]:
+                partials[of, "v"] = -2.0 * val / v
+                partials[of, "rho"] = -val / rho
+                partials[of, "S_ref_total"] = -val / S_ref_total
+
+            # Only the MAC of the first lifting surface changes CM
+            partials[CM_name, name + "_widths"] = -np.outer(CM, dMAC_dwidths) / MAC
+            partials[CM_name, name + "_chords"] = -np.outer(CM, dMAC_dchords) / MAC
+            partials[CM_name, name + "_S_ref"] = -CM * dMAC_dS_ref / MAC
+
+            dCL_dforce_derivs = np.zeros((system_size, 3))
+            dCD_dforce_derivs = np.zeros((system_size, 3))
+            dCM_dforce_derivs = np.zeros((3, system_size, 3))
+            dCL_dforces = np.zeros((system_size, 3))
+            dCD_dforces = np.zeros((system_size, 3))
+            dCL_dalpha = 0.0
+            dCD_dalpha = 0.0
+            dCD_dbeta = 0.0
+            dCM_dcg = np.zeros((3, 3))
+
+            for surface, term in zip(surfaces, terms):
+                sl = term["slice"]
+                sym = term["symmetry_factor"]
+                mask = term["moment_mask"]
+                forces = term["forces"]
+                sum_force_derivs = term["sum_force_derivs"][ind]
+                CDw_CL = term["CDw_CL"]
+
+                dCL_dforce_derivs[sl] = sym * proj["l"] * fact
+                dCD_dforce_derivs[sl] = sym * (proj["d"] + CDw_CL * proj["l"]) * fact
+
+                # The moment r x f has the derivative skew(r) with respect to f
+                # and -skew(f) with respect to r
+                dCM_dforce_derivs[:, sl] = (
+                    mask[:, np.newaxis, np.newaxis] * _compute_skew(term["diff"]).transpose((1, 0, 2)) * fact / MAC
+                )
+
+                lift_alpha = sym * sum_force_derivs.dot(proj["l_a"])
+                drag_alpha = sym * sum_force_derivs.dot(proj["d_a"])
+                drag_beta = sym * sum_force_derivs.dot(proj["d_b"])
+                if ind == ia:
+                    dCL_dforces[sl] = sym * proj["l_a"] * fact
+                    dCD_dforces[sl] = sym * (proj["d_a"] + CDw_CL * proj["l_a"]) * fact
+                    lift_alpha += sym * forces.dot(proj["l_aa"])
+                    drag_alpha += sym * forces.dot(proj["d_aa"])
+                    drag_beta += sym * forces.dot(proj["d_ab"])
+                elif ind == ib:
+                    dCD_dforces[sl] = sym * proj["d_b"] * fact
+                    drag_alpha += sym * forces.dot(proj["d_ab"])
+                    drag_beta += sym * forces.dot(proj["d_bb"])
+
+                dCL_dalpha += lift_alpha * fact
+                dCD_dalpha += (drag_alpha + CDw_CL * lift_alpha) * fact
+                dCD_dbeta += drag_beta * fact
+
+                dCM_dcg += mask[:, np.newaxis] * _compute_skew(sum_force_derivs) * fact / MAC
+
+                force_derivs = inputs["panel_force_derivs"][ind, sl]
+                nx = surface["mesh"].shape[0]
+                ny = surface["mesh"].shape[1]
+                dCM_dpts = (
+                    -(mask[:, np.newaxis] * _compute_skew(force_derivs))
+                    .transpose((1, 0, 2))
+                    .reshape((3, nx - 1, ny - 1, 3))
+                    * fact
+                    / MAC
+                )
+                dCM_db_pts = np.zeros((3, nx - 1, ny, 3))
+                dCM_db_pts[:, :, 1:, :] += 0.5 * dCM_dpts
+                dCM_db_pts[:, :, :-1, :] += 0.5 * dCM_dpts
+                partials[CM_name, surface["name"] + "_b_pts"] = dCM_db_pts.reshape((3, -1))
+
+                if surface["with_wave"]:
+                    partials[CD_name, surface["name"] + "_CDw_CL"] = term["lift_derivs"][ind] * fact
+
+            partials[CL_name, "panel_force_derivs"] = dCL_dforce_derivs.flatten()
+            partials[CD_name, "panel_force_derivs"] = dCD_dforce_derivs.flatten()
+            partials[CM_name, "panel_force_derivs"] = dCM_dforce_derivs.flatten()
+            if ind == ia:
+                partials[CL_name, "panel_forces"] = dCL_dforces.reshape((1, -1))
+            if ind in [ia, ib]:
+                partials[CD_name, "panel_forces"] = dCD_dforces.reshape((1, -1))
+            partials[CL_name, "alpha"] = dCL_dalpha
+            partials[CD_name, "alpha"] = dCD_dalpha
+            partials[CD_name, "beta"] = dCD_dbeta
+            partials[CM_name, "cg"] = dCM_dcg
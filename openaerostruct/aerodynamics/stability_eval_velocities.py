@@ -0,0 +1,141 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.stability_freestream_velocities import STABILITY_STATES
+
+
+class StabilityEvalVelocities(om.ExplicitComponent):
+    """
+    Compute the derivatives of the total velocities at the force points, as
+    given by EvalVelocities, with respect to each of the flight states in
+    STABILITY_STATES. These are the derivatives of the freestream velocities
+    plus the velocities induced by the derivatives of the circulations and,
+    for alpha, the change of the AIC matrix times the circulations.
+
+    Parameters
+    ----------
+    freestream_velocity_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the freestream velocities with respect to each
+        flight state.
+    circulation_derivs[num_states, system_size] : numpy array
+        The derivatives of the vortex ring circulations with respect to each
+        flight state.
+    force_pts_alpha_velocities[system_size, 3] : numpy array
+        The derivatives of the induced velocities at the force points with
+        respect to alpha.
+    vel_mtx[system_size, nx - 1, ny - 1, 3] : numpy array
+        The AIC matrix of the force points for each lifting surface.
+
+    Returns
+    -------
+    force_pts_velocity_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the velocities at the force points with respect to
+        each flight state.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        num_states = len(STABILITY_STATES)
+
+        system_size = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            system_size += (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+
+        self.system_size = system_size
+        self.alpha_index = STABILITY_STATES.index("alpha")
+
+        self.add_input("freestream_velocity_derivs", shape=(num_states, system_size, 3))
+        self.add_input("circulation_derivs", shape=(num_states, system_size))
+        self.add_input("force_pts_alpha_velocities", shape=(system_size, 3), units="m/s/deg")
+        self.add_output("force_pts_velocity_derivs", shape=(num_states, system_size, 3))
+
+        velocity_indices = np.arange(num_states * system_size * 3).reshape((num_states, system_size, 3))
+
+        self.declare_partials(
+            "force_pts_velocity_derivs",
+            "freestream_velocity_derivs",
+            val=1.0,
+            rows=velocity_indices.flatten(),
+            cols=velocity_indices.flatten(),
+        )
+        self.declare_partials(
+            "force_pts_velocity_derivs",
+            "force_pts_alpha_velocities",
+            val=1.0,
+            rows=velocity_indices[self.alpha_index].flatten(),
+            cols=np.arange(system_size * 3),
+        )
+
+        # Each velocity depends on the circulations of its own flight state
+        circulation_indices = np.arange(num_states * system_size).reshape((num_states, system_size))
+        self.declare_partials(
+            "force_pts_velocity_derivs",
+            "circulation_derivs",
+            rows=np.einsum("lik,j->lijk", velocity_indices, np.ones(system_size, int)).flatten(),
+            cols=np.einsum("lj,ik->lijk", circulation_indices, np.ones((system_size, 3), int)).flatten(),
+        )
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            num = (nx - 1) * (ny - 1)
+
+            vel_mtx_name = "{}_force_pts_vel_mtx".format(surface["name"])
+            self.add_input(vel_mtx_name, shape=(system_size, nx - 1, ny - 1, 3), units="1/m")
+
+            vel_mtx_indices = np.arange(system_size * num * 3).reshape((system_size, num, 3))
+            self.declare_partials(
+                "force_pts_velocity_derivs",
+                vel_mtx_name,
+                rows=np.einsum("lik,j->lijk", velocity_indices, np.ones(num, int)).flatten(),
+                cols=np.tile(vel_mtx_indices.flatten(), num_states),
+            )
+
+    def compute(self, inputs, outputs):
+        system_size = self.system_size
+
+        velocity_derivs = outputs["force_pts_velocity_derivs"]
+        velocity_derivs[:] = inputs["freestream_velocity_derivs"]
+        velocity_derivs[self.alpha_index] += inputs["force_pts_alpha_velocities"]
+
+        ind_1 = 0
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            num = (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+            ind_2 = ind_1 + num
+
+            vel_mtx = inputs["{}_force_pts_vel_mtx".format(surface["name"])].reshape((system_size, num, 3))
+            velocity_derivs += np.einsum("ijk,lj->lik", vel_mtx, inputs["circulation_derivs"][:, ind_1:ind_2])
+
+            ind_1 = ind_2
+
+    def compute_partials(self, inputs, partials):
+        num_states = len(STABILITY_STATES)
+        system_size = self.system_size
+
+        dv_dcirc = np.zeros((system_size, system_size, 3))
+
+        ind_1 = 0
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            num = (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+            ind_2 = ind_1 + num
+
+            vel_mtx_name = "{}_force_pts_vel_mtx".format(surface["name"])
+            vel_mtx = inputs[vel_mtx_name].reshape((system_size, num, 3))
+
+            partials["force_pts_velocity_derivs", vel_mtx_name] = np.einsum(
+                "ijk,lj->lijk", np.ones((system_size, num, 3)), inputs["circulation_derivs"][:, ind_1:ind_2]
+            ).flatten()
+
+            dv_dcirc[:, ind_1:ind_2, :] = vel_mtx
+
+            ind_1 = ind_2
+
+        partials["force_pts_velocity_derivs", "circulation_derivs"] = np.tile(dv_dcirc.flatten(), num_states)
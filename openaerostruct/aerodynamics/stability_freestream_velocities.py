@@ -0,0 +1,138 @@
+import numpy as np
+
+import openmdao.api as om
+
+
+# Flight state variables the stability derivatives are computed with respect
+# to: the angle of attack, the sideslip angle, and the roll, pitch, and yaw
+# rates about the x, y, and z axes.
+STABILITY_STATES = ["alpha", "beta", "p", "q", "r"]
+
+
+class StabilityFreestreamVelocities(om.ExplicitComponent):
+    """
+    Compute the derivatives of the freestream velocities at the collocation
+    points, as given by ConvertVelocity and RotationalVelocity, with respect
+    to each of the flight states in STABILITY_STATES. Those with respect to
+    alpha and beta rotate the freestream velocity, and those with respect to
+    the roll, pitch, and yaw rates are the velocities due to a unit rotation
+    about the x, y, and z axes.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    beta : float
+        The sideslip angle for the aircraft (all lifting surfaces) in degrees.
+    v : float
+        The freestream velocity magnitude.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+    cg[3] : numpy array
+        The x, y, z coordinates of the center of gravity for the entire aircraft.
+
+    Returns
+    -------
+    freestream_velocity_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the freestream velocities at each collocation point
+        with respect to each flight state, per degree for alpha and beta and
+        per rad/s for the rates.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        system_size = 0
+        for surface in self.options["surfaces"]:
+            mesh = surface["mesh"]
+            system_size += (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+
+        self.system_size = system_size
+        num_states = len(STABILITY_STATES)
+
+        self.add_input("alpha", val=0.0, units="deg")
+        self.add_input("beta", val=0.0, units="deg")
+        self.add_input("v", val=1.0, units="m/s")
+        self.add_input("coll_pts", shape=(system_size, 3), units="m")
+        self.add_input("cg", val=np.ones(3), units="m")
+
+        self.add_output("freestream_velocity_derivs", shape=(num_states, system_size, 3))
+
+        indices = np.arange(num_states * system_size * 3).reshape((num_states, system_size, 3))
+
+        # The derivatives with respect to the angles are the same at every point
+        angle_rows = indices[:2].flatten()
+        self.declare_partials("freestream_velocity_derivs", "v", rows=angle_rows, cols=np.zeros(angle_rows.size, int))
+        self.declare_partials(
+            "freestream_velocity_derivs", "alpha", rows=angle_rows, cols=np.zeros(angle_rows.size, int)
+        )
+        self.declare_partials(
+            "freestream_velocity_derivs", "beta", rows=angle_rows, cols=np.zeros(angle_rows.size, int)
+        )
+
+        # Each rate gives e_k x (coll_pts - cg), whose components are +-1
+        # times the two other components of the position
+        rows = []
+        cols = []
+        vals = []
+        for axis in range(3):
+            for comp in range(3):
+                if comp == axis:
+                    continue
+                other = 3 - axis - comp
+                rows.append(indices[2 + axis, :, comp])
+                cols.append(3 * np.arange(system_size) + other)
+                vals.append(np.full(system_size, np.cross(np.eye(3)[axis], np.eye(3)[other])[comp]))
+
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        vals = np.concatenate(vals)
+
+        self.declare_partials("freestream_velocity_derivs", "coll_pts", rows=rows, cols=cols, val=vals)
+        self.declare_partials("freestream_velocity_derivs", "cg", rows=rows, cols=cols % 3, val=-vals)
+
+    def _get_angle_derivs(self, inputs):
+        """
+        Compute the derivatives of the freestream velocity vector with respect
+        to alpha and beta, per degree, and their own derivatives with respect
+        to alpha and beta, as [2, 3] arrays.
+        """
+        p180 = np.pi / 180.0
+        alpha = inputs["alpha"][0] * p180
+        beta = inputs["beta"][0] * p180
+
+        cosa = np.cos(alpha)
+        sina = np.sin(alpha)
+        cosb = np.cos(beta)
+        sinb = np.sin(beta)
+
+        derivs = p180 * np.array([[-sina * cosb, 0.0 * cosa, cosa * cosb], [-cosa * sinb, -cosb, -sina * sinb]])
+        derivs_alpha = p180**2 * np.array(
+            [[-cosa * cosb, 0.0 * cosa, -sina * cosb], [sina * sinb, 0.0 * cosa, -cosa * sinb]]
+        )
+        derivs_beta = p180**2 * np.array([[sina * sinb, 0.0 * cosa, -cosa * sinb], [-cosa * cosb, sinb, -sina * cosb]])
+
+        return derivs, derivs_alpha, derivs_beta
+
+    def compute(self, inputs, outputs):
+        derivs, _, _ = self._get_angle_derivs(inputs)
+        r = inputs["coll_pts"] - inputs["cg"]
+
+        velocity_derivs = outputs["freestream_velocity_derivs"]
+        velocity_derivs[:2] = inputs["v"][0] * derivs[:, np.newaxis, :]
+        for axis in range(3):
+            velocity_derivs[2 + axis] = np.cross(np.eye(3)[axis], r)
+
+    def compute_partials(self, inputs, partials):
+        system_size = self.system_size
+        derivs, derivs_alpha, derivs_beta = self._get_angle_derivs(inputs)
+        v = inputs["v"][0]
+
+        partials["freestream_velocity_derivs", "v"] = np.repeat(derivs[:, np.newaxis, :], system_size, axis=1).flatten()
+        partials["freestream_velocity_derivs", "alpha"] = np.repeat(
+            v * derivs_alpha[:, np.newaxis, :], system_size, axis=1
+        ).flatten()
+        partials["freestream_velocity_derivs", "beta"] = np.repeat(
+            v * derivs_beta[:, np.newaxis, :], system_size, axis=1
+        ).flatten()
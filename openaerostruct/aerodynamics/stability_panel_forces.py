@@ -0,0 +1,188 @@
+import numpy as np
+from scipy.sparse import coo_matrix
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import _compute_skew
+from openaerostruct.aerodynamics.stability_freestream_velocities import STABILITY_STATES
+from openaerostruct.utils.vector_algebra import compute_cross
+
+
+class StabilityPanelForces(om.ExplicitComponent):
+    """
+    Compute the derivatives of the panel forces, as given by
+    HorseshoeCirculations and PanelForces, with respect to each of the flight
+    states in STABILITY_STATES. The forces are the product of the horseshoe
+    circulations and the cross product of the velocities at the force points
+    with the bound vortex vectors, so their derivatives follow from the
+    derivatives of both.
+
+    Parameters
+    ----------
+    rho : float
+        Air density in kg/m^3.
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system.
+    circulation_derivs[num_states, system_size] : numpy array
+        The derivatives of the vortex ring circulations with respect to each
+        flight state.
+    force_pts_velocities[system_size, 3] : numpy array
+        The velocities at the force points.
+    force_pts_velocity_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the velocities at the force points with respect to
+        each flight state.
+    bound_vecs[system_size, 3] : numpy array
+        The vectors representing the bound vortices for each panel.
+
+    Returns
+    -------
+    panel_force_derivs[num_states, system_size, 3] : numpy array
+        The derivatives of the panel forces with respect to each flight state.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        num_states = len(STABILITY_STATES)
+
+        system_size = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            system_size += (mesh.shape[0] - 1) * (mesh.shape[1] - 1)
+
+        # The horseshoe circulations are the ring circulations minus those of
+        # the previous chordwise row, as in HorseshoeCirculations
+        data = [np.ones(system_size)]
+        rows = [np.arange(system_size)]
+        cols = [np.arange(system_size)]
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            num = (nx - 1) * (ny - 1)
+
+            arange = np.arange(num).reshape((nx - 1), (ny - 1))
+
+            data.append(-np.ones((nx - 2) * (ny - 1)))
+            rows.append(ind_1 + arange[1:, :].flatten())
+            cols.append(ind_1 + arange[:-1, :].flatten())
+
+            ind_1 += num
+
+        self.horseshoe_mtx = coo_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=(system_size, system_size)
+        )
+
+        self.system_size = system_size
+
+        self.add_input("rho", val=1.0, units="kg/m**3")
+        self.add_input("circulations", shape=system_size, units="m**2/s")
+        self.add_input("circulation_derivs", shape=(num_states, system_size))
+        self.add_input("force_pts_velocities", shape=(system_size, 3), units="m/s")
+        self.add_input("force_pts_velocity_derivs", shape=(num_states, system_size, 3))
+        self.add_input("bound_vecs", shape=(system_size, 3), units="m")
+        self.add_output("panel_force_derivs", shape=(num_states, system_size, 3))
+
+        force_indices = np.arange(num_states * system_size * 3).reshape((num_states, system_size, 3))
+
+        self.declare_partials(
+            "panel_force_derivs", "rho", rows=force_indices.flatten(), cols=np.zeros(force_indices.size, int)
+        )
+
+        # The horseshoe circulation of each panel depends on at most two ring
+        # circulations
+        hs_rows = self.horseshoe_mtx.row
+        hs_cols = self.horseshoe_mtx.col
+
+        rows = force_indices[:, hs_rows, :].flatten()
+        self.declare_partials(
+            "panel_force_derivs",
+            "circulation_derivs",
+            rows=rows,
+            cols=np.repeat(np.arange(num_states)[:, np.newaxis] * system_size + hs_cols, 3).flatten(),
+        )
+        self.declare_partials(
+            "panel_force_derivs", "circulations", rows=rows, cols=np.tile(np.repeat(hs_cols, 3), num_states)
+        )
+
+        # Each force only depends on the vectors of its own panel
+        rows = np.repeat(force_indices, 3, axis=2).flatten()
+        cols = np.tile(np.arange(3), num_states * system_size * 3) + 3 * np.repeat(
+            np.tile(np.arange(system_size), num_states), 9
+        )
+        self.declare_partials("panel_force_derivs", "force_pts_velocities", rows=rows, cols=cols)
+        self.declare_partials("panel_force_derivs", "bound_vecs", rows=rows, cols=cols)
+        self.declare_partials(
+            "panel_force_derivs",
+            "force_pts_velocity_derivs",
+            rows=rows,
+            cols=np.tile(np.arange(3), num_states * system_size * 3)
+            + 3 * np.repeat(np.arange(num_states * system_size), 9),
+        )
+
+    def _get_terms(self, inputs):
+        """
+        Compute the horseshoe circulations and their derivatives, and the
+        cross products of the velocities and their derivatives with the bound
+        vortex vectors.
+        """
+        horseshoe_mtx = self.horseshoe_mtx.tocsr()
+        horseshoe_circulations = horseshoe_mtx.dot(inputs["circulations"])
+        horseshoe_derivs = horseshoe_mtx.dot(inputs["circulation_derivs"].T).T
+
+        bound_vecs = inputs["bound_vecs"]
+        cross = compute_cross(inputs["force_pts_velocities"], bound_vecs)
+        cross_derivs = np.cross(inputs["force_pts_velocity_derivs"], bound_vecs)
+
+        return horseshoe_circulations, horseshoe_derivs, cross, cross_derivs
+
+    def compute(self, inputs, outputs):
+        rho = inputs["rho"][0]
+        horseshoe_circulations, horseshoe_derivs, cross, cross_derivs = self._get_terms(inputs)
+
+        outputs["panel_force_derivs"] = rho * (
+            horseshoe_derivs[:, :, np.newaxis] * cross + horseshoe_circulations[:, np.newaxis] * cross_derivs
+        )
+
+    def compute_partials(self, inputs, partials):
+        num_states = len(STABILITY_STATES)
+        rho = inputs["rho"][0]
+
+        horseshoe_circulations, horseshoe_derivs, cross, cross_derivs = self._get_terms(inputs)
+        hs_rows = self.horseshoe_mtx.row
+        hs_data = self.horseshoe_mtx.data
+
+        partials["panel_force_derivs", "rho"] = (
+            horseshoe_derivs[:, :, np.newaxis] * cross + horseshoe_circulations[:, np.newaxis] * cross_derivs
+        ).flatten()
+
+        partials["panel_force_derivs", "circulation_derivs"] = np.tile(
+            rho * hs_data[:, np.newaxis] * cross[hs_rows], (num_states, 1)
+        ).flatten()
+        partials["panel_force_derivs", "circulations"] = (
+            rho * hs_data[:, np.newaxis] * cross_derivs[:, hs_rows]
+        ).flatten()
+
+        # The cross product v x b has the derivatives -skew(b) and skew(v)
+        # with respect to v and b
+        bound_skew = _compute_skew(inputs["bound_vecs"])
+        velocities_skew = _compute_skew(inputs["force_pts_velocities"])
+        velocity_derivs_skew = _compute_skew(inputs["force_pts_velocity_derivs"])
+
+        partials["panel_force_derivs", "force_pts_velocities"] = (
+            -rho * horseshoe_derivs[:, :, np.newaxis, np.newaxis] * bound_skew
+        ).flatten()
+        partials["panel_force_derivs", "force_pts_velocity_derivs"] = np.tile(
+            -rho * horseshoe_circulations[:, np.newaxis, np.newaxis] * bound_skew, (num_states, 1, 1, 1)
+        ).flatten()
+        partials["panel_force_derivs", "bound_vecs"] = (
+            rho
+            * (
+                horseshoe_derivs[:, :, np.newaxis, np.newaxis] * velocities_skew
+                + horseshoe_circulations[:, np.newaxis, np.newaxis] * velocity_derivs_skew
+            )
+        ).flatten()
@@ -0,0 +1,84 @@
+import numpy as np
+
+import openmdao.api as om
+
+
+class StabilityWaveDrag(om.ExplicitComponent):
+    """
+    Compute the derivative of the wave drag coefficient given by WaveDrag with
+    respect to the CL of the lifting surface, through which the wave drag
+    depends on the flight states. This component exists for each lifting
+    surface with the with_wave option.
+
+    The partials of this derivative are second derivatives of the wave drag,
+    so they are complex stepped.
+
+    Parameters
+    ----------
+    Mach_number : float
+        Mach number.
+    widths[ny-1] : numpy array
+        The width in the spanwise direction of each VLM panel. This is the numerator of cos(sweep).
+    lengths_spanwise[ny-1] : numpy array
+        The spanwise length of each VLM panel at 1/4 chord, rotated by the sweep angle. This is the denominator
+        of cos(sweep)
+    CL : float
+        The CL of the lifting surface used for wave drag estimation.
+    chords[ny] : numpy array
+        The chord length of each mesh slice. This is dimension ny rather than ny-1 which would be
+        expected for chord length of each VLM panel.
+    t_over_c[ny-1] : numpy array
+        The streamwise thickness-to-chord ratio of each VLM panel.
+
+    Returns
+    -------
+    CDw_CL : float
+        The derivative of the wave drag coefficient of the lifting surface
+        with respect to its CL.
+    """
+
+    def initialize(self):
+        self.options.declare("surface", types=dict)
+
+    def setup(self):
+        self.surface = surface = self.options["surface"]
+
+        # Airfoil technology level, as in WaveDrag
+        self.ka = 0.95
+
+        ny = surface["mesh"].shape[1]
+
+        self.add_input("Mach_number", val=1.6)
+        self.add_input("widths", val=np.ones((ny - 1)) * 0.2, units="m")
+        self.add_input("lengths_spanwise", val=np.arange((ny - 1)) + 1.0, units="m")
+        self.add_input("CL", val=0.33)
+        self.add_input("chords", val=np.ones((ny)), units="m")
+        self.add_input("t_over_c", val=np.arange((ny - 1)))
+        self.add_output("CDw_CL", val=0.0)
+
+        self.declare_partials("CDw_CL", "*", method="cs")
+
+    def compute(self, inputs, outputs):
+        t_over_c = inputs["t_over_c"]
+        widths = inputs["widths"]
+        cos_sweep = widths / inputs["lengths_spanwise"]
+        M = inputs["Mach_number"]
+        chords = inputs["chords"]
+        CL = inputs["CL"]
+
+        panel_mid_chords = (chords[:-1] + chords[1:]) / 2.0
+        panel_areas = panel_mid_chords * widths
+        sum_panel_areas = np.sum(panel_areas)
+        avg_cos_sweep = np.sum(cos_sweep * panel_areas) / sum_panel_areas
+        avg_t_over_c = np.sum(t_over_c * panel_areas) / sum_panel_areas
+        MDD = self.ka / avg_cos_sweep - avg_t_over_c / avg_cos_sweep**2 - CL / (10 * avg_cos_sweep**3)
+        Mcrit = MDD - (0.1 / 80.0) ** (1.0 / 3.0)
+
+        # CDw = 20 * (M - Mcrit)**4 and Mcrit decreases with CL
+        if np.real(M) > np.real(Mcrit):
+            outputs["CDw_CL"] = 8 * (M - Mcrit) ** 3 / avg_cos_sweep**3
+        else:
+            outputs["CDw_CL"] = 0.0
+
+        if self.surface["symmetry"]:
+            outputs["CDw_CL"] *= 2
@@ -12,6 +12,18 @@ from openaerostruct.aerodynamics.mesh_point_forces import MeshPointForces
 from openaerostruct.aerodynamics.panel_forces import PanelForces
 from openaerostruct.aerodynamics.panel_forces_surf import PanelForcesSurf
 from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.aerodynamics.vortex_influence import VortexInfluence
+from openaerostruct.aerodynamics.tree_code import THETA
+from openaerostruct.aerodynamics.tree_eval_velocities import TreeEvalVelocities
+from openaerostruct.aerodynamics.tree_solve_matrix import TreeSolveMatrix
+from openaerostruct.aerodynamics.batched_eval_velocities import BatchedEvalVelocities
+from openaerostruct.aerodynamics.batched_solve_matrix import BatchedSolveMatrix
+from openaerostruct.aerodynamics.aic_cache import AICCache
+from openaerostruct.aerodynamics.aic_block import AICBlock
+from openaerostruct.aerodynamics.block_solve_matrix import BlockSolveMatrix
+from openaerostruct.aerodynamics.free_wake import NUM_WAKE_PANELS, WAKE_LENGTH
+from openaerostruct.aerodynamics.free_wake_eval_velocities import FreeWakeEvalVelocities
+from openaerostruct.aerodynamics.free_wake_solve_matrix import FreeWakeSolveMatrix
 
 
 class VLMStates(om.Group):
@@ -24,10 +36,160 @@ class VLMStates(om.Group):
         self.options.declare(
             "rotational", False, types=bool, desc="Set to True to turn on support for computing angular velocities"
         )
+        self.options.declare(
+            "fused_aic",
+            False,
+            types=bool,
+            desc="Set to True to compute the AIC matrices directly from the vortex mesh and the evaluation points "
+            "with VortexInfluence instead of going through the GetVectors intermediate.",
+        )
+        self.options.declare(
+            "aic_solver",
+            "direct",
+            values=["direct", "gmres"],
+            desc="Solve the AIC linear system with a dense LU factorization or iteratively with GMRES, "
+            "warm-started from the previous circulations.",
+        )
+        self.options.declare(
+            "aic_preconditioner",
+            "strip",
+            values=["surface", "strip"],
+            desc="Blocks of the block-diagonal preconditioner used by the GMRES AIC solver, either one per "
+            "lifting surface or one per chordwise strip of panels.",
+        )
+        self.options.declare(
+            "aic_precision",
+            "double",
+            values=["double", "mixed"],
+            desc='Precision of the AIC linear system. With "mixed", the AIC matrices are assembled with float32 '
+            "Biot-Savart kernels and the direct AIC solver factors the matrix in float32, refining the solution "
+            "in float64. The circulations then solve the assembled system to double precision, and CL and CDi "
+            "typically agree with the double precision analysis to about 1e-6 relative.",
+        )
+        self.options.declare(
+            "aic_matrix_free",
+            False,
+            types=bool,
+            desc="Set to True to apply the derivatives of the AIC matrix, the AIC linear system and the velocities at "
+            "the force points matrix-free instead of declaring their dense partials. This cannot be used under a "
+            "linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "aic_cache",
+            None,
+            types=AICCache,
+            allow_none=True,
+            recordable=False,
+            desc="Persistent on-disk cache for the AIC matrices and their LU factorizations. Repeated analyses "
+            "with exactly the same geometry and angles, e.g. across optimization restarts, then read them back "
+            "instead of assembling and factoring them again.",
+        )
+        self.options.declare(
+            "aic_blocks",
+            False,
+            types=bool,
+            desc="Set to True to compute the AIC matrix as one block per pair of lifting surfaces and solve it with "
+            "a block LU factorization. Each block and each block of the factors is then only computed again when "
+            "the geometry it depends on changes, so a change to the last surface, e.g. the tail incidence, does "
+            "not recompute or refactor the blocks of the other surfaces. Only available with the double precision "
+            "direct AIC solver.",
+        )
+        self.options.declare(
+            "tree_code",
+            False,
+            types=bool,
+            desc="Set to True to evaluate the velocities at the force points with the Barnes-Hut tree code "
+            "instead of the dense AIC matrices. The derivatives are then computed matrix-free, so this "
+            "cannot be used under a linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "tree_code_solve",
+            False,
+            types=bool,
+            desc="Set to True to solve for the circulations iteratively with GMRES, applying the AIC matrix "
+            "with the Barnes-Hut tree code instead of assembling and factoring it.",
+        )
+        self.options.declare(
+            "tree_code_theta",
+            THETA,
+            types=(int, float),
+            lower=0.0,
+            desc="Opening angle of the tree code. Smaller values are more accurate, and 0 recovers the dense result.",
+        )
+        self.options.declare(
+            "free_wake",
+            False,
+            types=bool,
+            desc="Set to True to replace the straight trailing legs with wake lines made of straight filaments that "
+            "are relaxed to follow the local velocity. The AIC matrix with straight trailing legs is factored once, "
+            "and only the influence of the wake is updated while relaxing it. The AIC solver, precision, and cache "
+            "options do not apply, and the derivatives are computed matrix-free, so this cannot be used under a "
+            "linear solver that assembles the Jacobian.",
+        )
+        self.options.declare(
+            "free_wake_panels",
+            NUM_WAKE_PANELS,
+            types=int,
+            lower=1,
+            desc="Number of straight filaments along each wake line of the free wake.",
+        )
+        self.options.declare(
+            "free_wake_length",
+            WAKE_LENGTH,
+            types=(int, float),
+            lower=0.0,
+            desc="Length of the relaxed part of the free wake, in multiples of the largest chord of the lifting "
+            "surfaces. The wake lines are closed with semi-infinite filaments aligned with alpha.",
+        )
+        self.options.declare(
+            "vec_size",
+            1,
+            types=int,
+            lower=1,
+            desc="Number of flight conditions, given as arrays of alpha, beta, and omega, to analyze at once. When "
+            "greater than 1, the AIC matrix is factored once per distinct alpha and the circulations and the "
+            "velocities at the force points of all flight conditions are computed together. With ground effect, "
+            "height_agl is also an array and the AIC matrix is factored once per distinct pair of alpha and "
+            "height_agl. The forces are then left to the caller.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
         rotational = self.options["rotational"]
+        fused_aic = self.options["fused_aic"]
+        tree_code = self.options["tree_code"]
+        tree_code_solve = self.options["tree_code_solve"]
+        theta = self.options["tree_code_theta"]
+        vec_size = self.options["vec_size"]
+        free_wake = self.options["free_wake"]
+        num_wake_panels = self.options["free_wake_panels"]
+        aic_blocks = self.options["aic_blocks"]
+
+        if free_wake and (rotational or tree_code or tree_code_solve or vec_size > 1):
+            raise ValueError(
+                "The free wake is not available with rotational velocities, the tree code, or several flight "
+                "conditions at once."
+            )
+
+        if aic_blocks and (
+            tree_code_solve
+            or free_wake
+            or vec_size > 1
+            or self.options["aic_solver"] != "direct"
+            or self.options["aic_precision"] != "double"
+            or self.options["aic_matrix_free"]
+            or self.options["aic_cache"] is not None
+        ):
+            raise ValueError(
+                "The block AIC matrix is only available with the double precision direct AIC solver, without the "
+                "matrix-free derivatives, the AIC cache, the tree code solve, the free wake, or several flight "
+                "conditions at once."
+            )
+
+        if self.options["aic_precision"] == "mixed":
+            kernel_precision = "single"
+        else:
+            kernel_precision = "double"
 
         num_collocation_points = 0
         for surface in surfaces:
@@ -47,23 +209,115 @@ class VLMStates(om.Group):
         )
 
         # Compute the vortex mesh based off the deformed aerodynamic mesh
-        self.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"])
-
-        # Get vectors from mesh points to collocation points
         self.add_subsystem(
-            "get_vectors",
-            GetVectors(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
+            "vortex_mesh",
+            VortexMesh(surfaces=surfaces, vec_size=vec_size),
             promotes_inputs=["*"],
             promotes_outputs=["*"],
         )
 
-        # Construct matrix based on rings, not horseshoes
-        self.add_subsystem(
-            "mtx_assy",
-            EvalVelMtx(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
+        if vec_size > 1:
+            if (
+                tree_code
+                or tree_code_solve
+                or self.options["aic_solver"] != "direct"
+                or self.options["aic_precision"] != "double"
+                or self.options["aic_cache"] is not None
+            ):
+                raise ValueError(
+                    "Analyzing several flight conditions at once is only available with the double precision "
+                    "direct AIC solver and without the tree code or the AIC cache."
+                )
+
+            # Convert the freestream velocity and the angular velocity of
+            # every flight condition to arrays of velocities
+            if rotational:
+                self.add_subsystem(
+                    "rotational_velocity",
+                    RotationalVelocity(surfaces=surfaces, vec_size=vec_size),
+                    promotes_inputs=["*"],
+                    promotes_outputs=["*"],
+                )
+
+            self.add_subsystem(
+                "convert_velocity",
+                ConvertVelocity(surfaces=surfaces, rotational=rotational, vec_size=vec_size),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+
+            # Solve for the ring circs of all flight conditions, factoring
+            # the AIC matrix once per wake direction
+            self.add_subsystem(
+                "solve_matrix",
+                BatchedSolveMatrix(surfaces=surfaces, vec_size=vec_size),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+
+            # Eval the velocities at the force points of all flight conditions
+            self.add_subsystem(
+                "eval_velocities",
+                BatchedEvalVelocities(
+                    surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts", vec_size=vec_size
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+            return
+
+        if tree_code_solve or free_wake:
+            # The AIC matrix for the collocation points is applied by the tree
+            # code or assembled with the wake inside solve_matrix
+            pass
+        elif aic_blocks:
+            # Construct one block of the matrix for each pair of surfaces, so
+            # that each one only depends on the geometry of those two
+            for target in surfaces:
+                for source in surfaces:
+                    self.add_subsystem(
+                        "aic_{}_{}".format(target["name"], source["name"]),
+                        AICBlock(surfaces=surfaces, source=source["name"], target=target["name"]),
+                        promotes_inputs=["*"],
+                        promotes_outputs=["*"],
+                    )
+        elif fused_aic:
+            # Construct matrix based on rings, not horseshoes, directly from
+            # the vortex mesh and the collocation points
+            self.add_subsystem(
+                "mtx_assy",
+                VortexInfluence(
+                    surfaces=surfaces,
+                    num_eval_points=num_collocation_points,
+                    eval_name="coll_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        else:
+            # Get vectors from mesh points to collocation points
+            self.add_subsystem(
+                "get_vectors",
+                GetVectors(surfaces=surfaces, num_eval_points=num_collocation_points, eval_name="coll_pts"),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+
+            # Construct matrix based on rings, not horseshoes
+            self.add_subsystem(
+                "mtx_assy",
+                EvalVelMtx(
+                    surfaces=surfaces,
+                    num_eval_points=num_collocation_points,
+                    eval_name="coll_pts",
+                    precision=kernel_precision,
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
 
         # Convert freestream velocity to array of velocities
         if rotational:
@@ -81,13 +335,59 @@ class VLMStates(om.Group):
             promotes_outputs=["*"],
         )
 
-        # Construct RHS and full matrix of system
-        self.add_subsystem("mtx_rhs", VLMMtxRHSComp(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"])
+        if free_wake:
+            # Solve for the ring circs together with the relaxed wake
+            self.add_subsystem(
+                "solve_matrix",
+                FreeWakeSolveMatrix(
+                    surfaces=surfaces,
+                    num_wake_panels=num_wake_panels,
+                    wake_length=self.options["free_wake_length"],
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        elif aic_blocks:
+            # Solve for the ring circs with a block LU factorization that is
+            # only updated where the blocks changed
+            self.add_subsystem(
+                "solve_matrix",
+                BlockSolveMatrix(surfaces=surfaces),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        elif tree_code_solve:
+            # Solve for the ring circs iteratively, applying the AIC matrix
+            # with the tree code
+            self.add_subsystem(
+                "solve_matrix",
+                TreeSolveMatrix(surfaces=surfaces, theta=theta),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        else:
+            # Construct RHS and full matrix of system
+            self.add_subsystem(
+                "mtx_rhs",
+                VLMMtxRHSComp(surfaces=surfaces, matrix_free=self.options["aic_matrix_free"]),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
 
-        # Solve Mtx RHS to get ring circs
-        self.add_subsystem(
-            "solve_matrix", SolveMatrix(surfaces=surfaces), promotes_inputs=["*"], promotes_outputs=["*"]
-        )
+            # Solve Mtx RHS to get ring circs
+            self.add_subsystem(
+                "solve_matrix",
+                SolveMatrix(
+                    surfaces=surfaces,
+                    solver=self.options["aic_solver"],
+                    preconditioner=self.options["aic_preconditioner"],
+                    matrix_free=self.options["aic_matrix_free"],
+                    precision=self.options["aic_precision"],
+                    aic_cache=self.options["aic_cache"],
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
 
         # Convert ring circs to horseshoe circs
         self.add_subsystem(
@@ -97,29 +397,80 @@ class VLMStates(om.Group):
             promotes_outputs=["*"],
         )
 
-        # Eval force vectors
-        self.add_subsystem(
-            "get_vectors_force",
-            GetVectors(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
+        if free_wake:
+            # Evaluate the velocities at the force points with the relaxed wake
+            self.add_subsystem(
+                "eval_velocities",
+                FreeWakeEvalVelocities(
+                    surfaces=surfaces,
+                    num_eval_points=num_force_points,
+                    eval_name="force_pts",
+                    num_wake_panels=num_wake_panels,
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        elif tree_code:
+            # Evaluate the velocities at the force points with the tree code,
+            # without assembling the force mtx
+            self.add_subsystem(
+                "eval_velocities",
+                TreeEvalVelocities(
+                    surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts", theta=theta
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
+        else:
+            if fused_aic:
+                # Set up force mtx directly from the vortex mesh and force points
+                self.add_subsystem(
+                    "mtx_assy_forces",
+                    VortexInfluence(
+                        surfaces=surfaces,
+                        num_eval_points=num_force_points,
+                        eval_name="force_pts",
+                        precision=kernel_precision,
+                        aic_cache=self.options["aic_cache"],
+                    ),
+                    promotes_inputs=["*"],
+                    promotes_outputs=["*"],
+                )
+            else:
+                # Eval force vectors
+                self.add_subsystem(
+                    "get_vectors_force",
+                    GetVectors(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
+                    promotes_inputs=["*"],
+                    promotes_outputs=["*"],
+                )
 
-        # Set up force mtx
-        self.add_subsystem(
-            "mtx_assy_forces",
-            EvalVelMtx(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
+                # Set up force mtx
+                self.add_subsystem(
+                    "mtx_assy_forces",
+                    EvalVelMtx(
+                        surfaces=surfaces,
+                        num_eval_points=num_force_points,
+                        eval_name="force_pts",
+                        precision=kernel_precision,
+                        aic_cache=self.options["aic_cache"],
+                    ),
+                    promotes_inputs=["*"],
+                    promotes_outputs=["*"],
+                )
 
-        # Multiply by horseshoe circs to get velocities
-        self.add_subsystem(
-            "eval_velocities",
-            EvalVelocities(surfaces=surfaces, num_eval_points=num_force_points, eval_name="force_pts"),
-            promotes_inputs=["*"],
-            promotes_outputs=["*"],
-        )
+            # Multiply by horseshoe circs to get velocities
+            self.add_subsystem(
+                "eval_velocities",
+                EvalVelocities(
+                    surfaces=surfaces,
+                    num_eval_points=num_force_points,
+                    eval_name="force_pts",
+                    matrix_free=self.options["aic_matrix_free"],
+                ),
+                promotes_inputs=["*"],
+                promotes_outputs=["*"],
+            )
 
         # Get sectional panel forces
         self.add_subsystem(
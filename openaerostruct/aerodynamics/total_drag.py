@@ -1,3 +1,5 @@
+import numpy as np
+
 import openmdao.api as om
 
 
@@ -6,34 +8,39 @@ class TotalDrag(om.ExplicitComponent):
 
     Parameters
     ----------
-    CDi : float
+    CDi[vec_size] : numpy array
         Induced coefficient of drag (CD) for the lifting surface.
-    CDv : float
+    CDv[vec_size] : numpy array
         Calculated coefficient of viscous drag for the lifting surface.
+    CDw[vec_size] : numpy array
+        Calculated coefficient of wave drag for the lifting surface.
 
     Returns
     -------
-    CD : float
+    CD[vec_size] : numpy array
         Total coefficient of drag (CD) for the lifting surface.
     """
 
     def initialize(self):
         self.options.declare("surface", types=dict)
+        self.options.declare("vec_size", 1, types=int, lower=1, desc="Number of flight conditions.")
 
     def setup(self):
         surface = self.options["surface"]
+        vec_size = self.options["vec_size"]
 
-        self.add_input("CDi", val=1.0)
-        self.add_input("CDv", val=1.0)
-        self.add_input("CDw", val=1.0)
+        self.add_input("CDi", val=np.ones(vec_size))
+        self.add_input("CDv", val=np.ones(vec_size))
+        self.add_input("CDw", val=np.ones(vec_size))
 
-        self.add_output("CD", val=1.0, tags=["mphys_result"])
+        self.add_output("CD", val=np.ones(vec_size), tags=["mphys_result"])
 
         self.CD0 = surface["CD0"]
 
-        self.declare_partials("CD", "CDi", val=1.0)
-        self.declare_partials("CD", "CDv", val=1.0)
-        self.declare_partials("CD", "CDw", val=1.0)
+        conditions = np.arange(vec_size)
+        self.declare_partials("CD", "CDi", rows=conditions, cols=conditions, val=1.0)
+        self.declare_partials("CD", "CDv", rows=conditions, cols=conditions, val=1.0)
+        self.declare_partials("CD", "CDw", rows=conditions, cols=conditions, val=1.0)
 
     def compute(self, inputs, outputs):
         outputs["CD"] = inputs["CDi"] + inputs["CDv"] + inputs["CDw"] + self.CD0
@@ -0,0 +1,136 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import get_surface_options
+from openaerostruct.aerodynamics.tree_code import compute_trailing_influence_alpha_deriv
+
+
+class TrailingAlphaVelocities(om.ExplicitComponent):
+    """
+    Compute the derivatives with respect to alpha of the velocities induced
+    by the circulations at the collocation and force points, that is the
+    derivatives of the AIC matrices times the circulations. Alpha only
+    changes the direction of the semi-infinite trailing legs, so only the
+    circulations of the last chordwise row of rings of each surface
+    contribute.
+
+    The derivatives with respect to the circulations are analytic. Those
+    with respect to the geometry and alpha are second derivatives of the
+    induced velocities, so they are complex stepped, which is cheap since
+    only the trailing legs are evaluated.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+    force_pts[system_size, 3] : numpy array
+        The xyz coordinates of the force points used in the VLM analysis.
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system.
+
+    Returns
+    -------
+    coll_pts_alpha_velocities[system_size, 3] : numpy array
+        The derivatives of the induced velocities at the collocation points
+        with respect to alpha.
+    force_pts_alpha_velocities[system_size, 3] : numpy array
+        The derivatives of the induced velocities at the force points with
+        respect to alpha.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+
+        system_size = 0
+        for surface in surfaces:
+            if surface.get("groundplane", False):
+                raise ValueError("The derivatives of the trailing legs with respect to alpha ignore ground effect.")
+
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface["symmetry"]:
+                self.add_input("{}_vortex_mesh".format(surface["name"]), shape=(nx, 2 * ny - 1, 3), units="m")
+            else:
+                self.add_input("{}_vortex_mesh".format(surface["name"]), shape=(nx, ny, 3), units="m")
+
+        self.system_size = system_size
+
+        self.add_input("alpha", val=0.0, units="deg")
+        self.add_input("coll_pts", shape=(system_size, 3), units="m")
+        self.add_input("force_pts", shape=(system_size, 3), units="m")
+        self.add_input("circulations", shape=system_size, units="m**2/s")
+
+        wrt = ["alpha"] + ["{}_vortex_mesh".format(surface["name"]) for surface in surfaces]
+        for eval_name in ["coll_pts", "force_pts"]:
+            velocities_name = "{}_alpha_velocities".format(eval_name)
+            self.add_output(velocities_name, shape=(system_size, 3), units="m/s/deg")
+
+            self.declare_partials(velocities_name, wrt + [eval_name], method="cs")
+
+            # Only the last chordwise row of rings has trailing legs
+            rows = []
+            cols = []
+            ind_1 = 0
+            for surface in surfaces:
+                nx, ny = surface["mesh"].shape[:2]
+                ind_2 = ind_1 + (nx - 1) * (ny - 1)
+                rows.append(np.repeat(np.arange(3 * system_size), ny - 1))
+                cols.append(np.tile(np.arange(ind_2 - ny + 1, ind_2), 3 * system_size))
+                ind_1 = ind_2
+            self.declare_partials(velocities_name, "circulations", rows=np.concatenate(rows), cols=np.concatenate(cols))
+
+    def _compute_trailing_vel_mtxs(self, inputs, eval_name):
+        """
+        Compute the derivative with respect to alpha of the influence of the
+        trailing-edge horseshoes of each surface on the evaluation points.
+        """
+        vel_mtxs = []
+        for surface in self.options["surfaces"]:
+            nx, _, symmetry, ground_effect, right_wing = get_surface_options(surface)
+            vel_mtxs.append(
+                compute_trailing_influence_alpha_deriv(
+                    inputs["{}_vortex_mesh".format(surface["name"])],
+                    inputs[eval_name],
+                    inputs["alpha"][0],
+                    nx,
+                    symmetry,
+                    ground_effect,
+                    right_wing,
+                )
+            )
+        return vel_mtxs
+
+    def compute(self, inputs, outputs):
+        circulations = inputs["circulations"]
+
+        for eval_name in ["coll_pts", "force_pts"]:
+            velocities = outputs["{}_alpha_velocities".format(eval_name)]
+            velocities[:] = 0.0
+
+            ind_1 = 0
+            for surface, vel_mtx in zip(self.options["surfaces"], self._compute_trailing_vel_mtxs(inputs, eval_name)):
+                nx, ny = surface["mesh"].shape[:2]
+                ind_2 = ind_1 + (nx - 1) * (ny - 1)
+                velocities += np.einsum("ijk,j->ik", vel_mtx, circulations[ind_2 - ny + 1 : ind_2])
+                ind_1 = ind_2
+
+    def compute_partials(self, inputs, partials):
+        for eval_name in ["coll_pts", "force_pts"]:
+            vel_mtxs = self._compute_trailing_vel_mtxs(inputs, eval_name)
+            partials["{}_alpha_velocities".format(eval_name), "circulations"] = np.concatenate(
+                [vel_mtx.transpose((0, 2, 1)).flatten() for vel_mtx in vel_mtxs]
+            )
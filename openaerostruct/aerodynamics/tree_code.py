@@ -0,0 +1,681 @@
+"""
+Barnes-Hut tree code for the velocities induced by the vortex rings of the
+VLM analysis.
+
+The dense AIC matrices cost O(N^2) time and memory to assemble and apply.
+Here the closed vortex rings of all lifting surfaces are sorted into a
+binary tree of clusters. A cluster that is far enough from an evaluation
+point, relative to its size, is replaced by a multipole expansion of its
+rings about the cluster center: the far field of a closed vortex ring is
+that of a dipole whose moment is its circulation times its vector area, and
+we keep the dipole and quadrupole terms of the cluster expansion. Rings in
+clusters that are too close are evaluated exactly. The ratio between the
+cluster radius and its distance from the evaluation point below which the
+expansion is used is the opening angle `theta`; a smaller `theta` is more
+accurate and `theta = 0` recovers the dense result.
+
+The last chordwise row of rings is split into a closed ring and a horseshoe
+vortex along the trailing edge. The horseshoes are always evaluated exactly,
+which only costs O(N * ny) since there is a single row of them.
+
+The interactions only depend on the geometry, so they are stored as sparse
+matrices that are linear in the circulations. This makes both the
+matrix-vector product and its transpose cheap to apply repeatedly, e.g.
+inside an iterative solver or for reverse-mode derivatives.
+"""
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+from openaerostruct.aerodynamics.biot_savart import (
+    _compute_filaments,
+    _compute_semi_infinite_filaments,
+    _compute_semi_infinite_filaments_direction_deriv,
+    get_surface_options,
+)
+
+
+# Default opening angle and number of rings per leaf of the tree
+THETA = 0.2
+LEAF_SIZE = 32
+
+# Number of (evaluation point, ring) pairs evaluated at once for the near field
+_NEAR_CHUNK_SIZE = 2**16
+
+# Number of terms in the multipole expansion of each cluster: the three
+# components of the dipole moment and the nine of the quadrupole moment
+_NUM_MOMENTS = 12
+
+
+def _get_ring_indices(nx, ny, symmetry, right_wing):
+    """
+    Get the index of the circulation carried by every ring of one image of a
+    vortex mesh, relative to the first ring of the surface.
+    """
+    if symmetry:
+        ny_actual = 2 * ny - 1
+    else:
+        ny_actual = ny
+
+    j = np.arange(ny_actual - 1)
+    if symmetry:
+        # The ghost rings carry the circulations of their mirrored rings
+        j = np.where(j < ny - 1, j, 2 * ny - 3 - j)
+        if right_wing:
+            j = ny - 2 - j
+
+    return np.arange(nx - 1)[:, np.newaxis] * (ny - 1) + j
+
+
+def get_vortex_rings(surfaces, vortex_meshes):
+    """
+    Gather the closed vortex rings of every lifting surface, including the
+    ghost rings of symmetric surfaces and the ground plane images.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+
+    Returns
+    -------
+    corners[num_rings, 4, 3] : numpy array
+        The vertices of each ring, ordered along the direction of its
+        circulation.
+    ring_indices[num_rings] : numpy array
+        The index of the circulation carried by each ring.
+    ring_signs[num_rings] : numpy array
+        The sign of the circulation carried by each ring; the ground plane
+        images carry the opposite circulation.
+    """
+    corners = []
+    ring_indices = []
+    ring_signs = []
+
+    offset = 0
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+
+        indices = offset + _get_ring_indices(nx, ny, symmetry, right_wing)
+
+        if ground_effect:
+            images = [vortex_mesh[:nx], vortex_mesh[nx:]]
+            signs = [1.0, -1.0]
+        else:
+            images = [vortex_mesh]
+            signs = [1.0]
+
+        for image, sign in zip(images, signs):
+            # The ring goes from A to B to C to D, as in biot_savart
+            ring_corners = np.stack([image[:-1, 1:], image[:-1, :-1], image[1:, :-1], image[1:, 1:]], axis=2)
+            corners.append(ring_corners.reshape((-1, 4, 3)))
+            ring_indices.append(indices.flatten())
+            ring_signs.append(np.full(indices.size, sign))
+
+        offset += (nx - 1) * (ny - 1)
+
+    return np.concatenate(corners), np.concatenate(ring_indices), np.concatenate(ring_signs)
+
+
+def compute_ring_influence(corners, eval_points):
+    """
+    Compute the velocity induced by closed vortex rings of unit circulation
+    at the given evaluation points, one evaluation point per ring.
+
+    Parameters
+    ----------
+    corners[num_pairs, 4, 3] : numpy array
+        The vertices of each ring.
+    eval_points[num_pairs, 3] : numpy array
+        The evaluation point of each ring.
+
+    Returns
+    -------
+    velocities[num_pairs, 3] : numpy array
+        The velocity induced by each ring at its evaluation point.
+    """
+    vectors = eval_points[:, np.newaxis, :] - corners
+    norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+    following = [1, 2, 3, 0]
+    filaments = _compute_filaments(vectors, norms, vectors[:, following], norms[:, following])
+    return np.sum(filaments, axis=1)
+
+
+def compute_trailing_influence(
+    vortex_mesh, eval_points, alpha, nx, symmetry=False, ground_effect=False, right_wing=False
+):
+    """
+    Compute the velocity induced by the trailing-edge horseshoe vortices of a
+    single lifting surface, that is the bound filament along the trailing
+    edge and the two semi-infinite trailing legs of each ring of the last
+    chordwise row. Together with the closed rings, this gives the same
+    influence as the dense AIC matrix.
+
+    Parameters
+    ----------
+    vortex_mesh[nx_actual, ny_actual, 3] : numpy array
+        The vortex mesh as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    nx : int
+        Number of chordwise vertices of the physical surface.
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vortex mesh includes a ground plane image.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+
+    Returns
+    -------
+    trailing_vel_mtx[num_eval_points, ny - 1, 3] : numpy array
+        The influence of the horseshoe of each ring of the last chordwise
+        row, per unit circulation.
+    """
+    cosa = np.cos(alpha * np.pi / 180.0)
+    sina = np.sin(alpha * np.pi / 180.0)
+    u = np.array([cosa, 0.0 * cosa, sina])
+
+    ny_actual = vortex_mesh.shape[1]
+    ny = (ny_actual + 1) // 2 if symmetry else ny_actual
+
+    if ground_effect:
+        trailing_edges = [vortex_mesh[nx - 1], vortex_mesh[-1]]
+        vortex_mults = [1.0, -1.0]
+    else:
+        trailing_edges = [vortex_mesh[-1]]
+        vortex_mults = [1.0]
+
+    vel_mtx = np.zeros((eval_points.shape[0], ny - 1, 3), dtype=np.result_type(vortex_mesh, eval_points, u))
+
+    for trailing_edge, vortex_mult in zip(trailing_edges, vortex_mults):
+        vectors = eval_points[:, np.newaxis, :] - trailing_edge
+        norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+        trailing = _compute_semi_infinite_filaments(u, vectors, norms)
+        result = trailing[:, :-1] - trailing[:, 1:]
+
+        # The bound filament cancels the rear filament of the closed ring
+        result += _compute_filaments(vectors[:, 1:], norms[:, 1:], vectors[:, :-1], norms[:, :-1])
+
+        if symmetry:
+            result = result[:, : ny - 1] + result[:, ny - 1 :][:, ::-1]
+
+        vel_mtx += vortex_mult * result
+
+    if symmetry and right_wing:
+        vel_mtx = vel_mtx[:, ::-1]
+
+    return vel_mtx
+
+
+def compute_trailing_influence_alpha_deriv(
+    vortex_mesh, eval_points, alpha, nx, symmetry=False, ground_effect=False, right_wing=False
+):
+    """
+    Compute the derivatives with respect to alpha of the influence of the
+    trailing-edge horseshoe vortices of a single lifting surface, as given by
+    `compute_trailing_influence`. Only the direction of the semi-infinite
+    trailing legs depends on alpha, and their derivatives are computed
+    analytically, so this can itself be complex stepped.
+
+    Parameters
+    ----------
+    vortex_mesh[nx_actual, ny_actual, 3] : numpy array
+        The vortex mesh as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    nx : int
+        Number of chordwise vertices of the physical surface.
+    symmetry : bool
+        Whether the vortex mesh includes a mirrored ghost surface.
+    ground_effect : bool
+        Whether the vortex mesh includes a ground plane image.
+    right_wing : bool
+        Whether the symmetric surface is a right-hand wing.
+
+    Returns
+    -------
+    trailing_vel_mtx_alpha[num_eval_points, ny - 1, 3] : numpy array
+        The derivative with respect to alpha, per degree, of the influence of
+        the horseshoe of each ring of the last chordwise row, per unit
+        circulation.
+    """
+    cosa = np.cos(alpha * np.pi / 180.0)
+    sina = np.sin(alpha * np.pi / 180.0)
+    u = np.array([cosa, 0.0 * cosa, sina])
+    du = np.array([-sina, 0.0 * cosa, cosa]) * np.pi / 180.0
+
+    ny_actual = vortex_mesh.shape[1]
+    ny = (ny_actual + 1) // 2 if symmetry else ny_actual
+
+    if ground_effect:
+        trailing_edges = [vortex_mesh[nx - 1], vortex_mesh[-1]]
+        vortex_mults = [1.0, -1.0]
+    else:
+        trailing_edges = [vortex_mesh[-1]]
+        vortex_mults = [1.0]
+
+    vel_mtx = np.zeros((eval_points.shape[0], ny - 1, 3), dtype=np.result_type(vortex_mesh, eval_points, u))
+
+    for trailing_edge, vortex_mult in zip(trailing_edges, vortex_mults):
+        vectors = eval_points[:, np.newaxis, :] - trailing_edge
+        norms = np.sqrt(np.einsum("...i,...i->...", vectors, vectors))
+
+        trailing = _compute_semi_infinite_filaments_direction_deriv(u, du, vectors, norms)
+        result = trailing[:, :-1] - trailing[:, 1:]
+
+        if symmetry:
+            result = result[:, : ny - 1] + result[:, ny - 1 :][:, ::-1]
+
+        vel_mtx += vortex_mult * result
+
+    if symmetry and right_wing:
+        vel_mtx = vel_mtx[:, ::-1]
+
+    return vel_mtx
+
+
+def compute_trailing_alpha_deriv(surfaces, vortex_meshes, eval_points, alpha, circulations):
+    """
+    Compute the derivatives with respect to alpha of the velocities induced
+    by the given circulations. Alpha only changes the direction of the
+    trailing legs, which are always evaluated exactly, so we complex step
+    the influence of the trailing-edge horseshoes.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees.
+    circulations[..., system_size] : numpy array
+        The vortex ring circulations of all lifting surfaces, optionally for
+        several right-hand sides along the leading dimensions.
+
+    Returns
+    -------
+    dvel_dalpha[..., num_eval_points, 3] : numpy array
+        The derivatives of the induced velocities with respect to alpha.
+    """
+    step = 1e-40
+    alpha = alpha.real + step * 1j
+    dvel_dalpha = np.zeros(circulations.shape[:-1] + (eval_points.shape[0], 3))
+
+    ind_1 = 0
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+
+        trailing_vel_mtx = compute_trailing_influence(
+            vortex_mesh.real, eval_points.real, alpha, nx, symmetry, ground_effect, right_wing
+        )
+
+        # Only the last chordwise row of rings has trailing legs
+        ind_2 = ind_1 + (nx - 1) * (ny - 1)
+        dvel_dalpha += np.einsum(
+            "ijk,...j->...ik", trailing_vel_mtx.imag / step, circulations[..., ind_2 - ny + 1 : ind_2].real
+        )
+        ind_1 = ind_2
+
+    return dvel_dalpha
+
+
+class VortexRingTree(object):
+    """
+    Binary tree of clusters of vortex rings, obtained by recursively
+    splitting the rings in half along the longest dimension of their
+    bounding box.
+
+    Parameters
+    ----------
+    corners[num_rings, 4, 3] : numpy array
+        The vertices of each ring.
+    leaf_size : int
+        Maximum number of rings in the leaves of the tree.
+
+    Attributes
+    ----------
+    order[num_rings] : numpy array
+        Permutation of the rings such that the rings of each node are
+        contiguous.
+    starts, ends[num_nodes] : numpy array
+        Range of each node in the permuted rings.
+    children[num_nodes, 2] : numpy array
+        The two children of each node, or -1 for the leaves.
+    centers[num_nodes, 3] : numpy array
+        The center of each node, about which its multipole expansion is
+        computed.
+    radii[num_nodes] : numpy array
+        Radius of a sphere around the center that contains every ring of the
+        node.
+    """
+
+    def __init__(self, corners, leaf_size=LEAF_SIZE):
+        centroids = np.mean(corners, axis=1)
+
+        # The clustering only depends on the real part of the geometry, so
+        # that the tree does not change under a complex step.
+        real_centroids = centroids.real
+        ring_radii = np.max(np.linalg.norm(corners.real - real_centroids[:, np.newaxis], axis=2), axis=1)
+
+        num_rings = corners.shape[0]
+        self.order = np.arange(num_rings)
+
+        starts = [0]
+        ends = [num_rings]
+        children = [[-1, -1]]
+
+        # Split the nodes breadth-first; new nodes are appended to the lists
+        node = 0
+        while node < len(starts):
+            start, end = starts[node], ends[node]
+            if end - start > leaf_size:
+                rings = self.order[start:end]
+                points = real_centroids[rings]
+                axis = np.argmax(np.max(points, axis=0) - np.min(points, axis=0))
+                mid = (end - start) // 2
+                self.order[start:end] = rings[np.argsort(points[:, axis], kind="stable")]
+
+                children[node] = [len(starts), len(starts) + 1]
+                starts.extend([start, start + mid])
+                ends.extend([start + mid, end])
+                children.extend([[-1, -1], [-1, -1]])
+            node += 1
+
+        self.starts = np.array(starts)
+        self.ends = np.array(ends)
+        self.children = np.array(children)
+        self.is_leaf = self.children[:, 0] < 0
+
+        num_nodes = self.starts.size
+        self.centers = np.zeros((num_nodes, 3), dtype=centroids.dtype)
+        self.radii = np.zeros(num_nodes)
+        for node in range(num_nodes):
+            rings = self.order[self.starts[node] : self.ends[node]]
+            self.centers[node] = np.mean(centroids[rings], axis=0)
+            distances = np.linalg.norm(real_centroids[rings] - self.centers[node].real, axis=1)
+            self.radii[node] = np.max(distances + ring_radii[rings])
+
+        self.corners = corners
+        self.centroids = centroids
+
+    def get_node_rings(self, nodes):
+        """
+        Get the rings contained in each of the given nodes.
+
+        Parameters
+        ----------
+        nodes[num_nodes] : numpy array
+            Indices of the nodes.
+
+        Returns
+        -------
+        node_indices[num_entries] : numpy array
+            Position in `nodes` of each entry.
+        rings[num_entries] : numpy array
+            The rings contained in the nodes.
+        """
+        counts = self.ends[nodes] - self.starts[nodes]
+        node_indices = np.repeat(np.arange(nodes.size), counts)
+        positions = np.arange(node_indices.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        rings = self.order[self.starts[nodes][node_indices] + positions]
+        return node_indices, rings
+
+    def get_interactions(self, eval_points, theta=THETA):
+        """
+        Traverse the tree for all evaluation points at once to find which
+        nodes can be approximated by their multipole expansion.
+
+        Parameters
+        ----------
+        eval_points[num_eval_points, 3] : numpy array
+            The evaluation points.
+        theta : float
+            Opening angle of the tree code.
+
+        Returns
+        -------
+        near_points, near_nodes : numpy arrays
+            The leaves that are evaluated exactly for each evaluation point.
+        far_points, far_nodes : numpy arrays
+            The nodes that are approximated for each evaluation point.
+        """
+        points = eval_points.real
+
+        near_points = []
+        near_nodes = []
+        far_points = []
+        far_nodes = []
+
+        current_points = np.arange(points.shape[0])
+        current_nodes = np.zeros(points.shape[0], int)
+        while current_points.size:
+            distances = np.linalg.norm(points[current_points] - self.centers[current_nodes].real, axis=1)
+            far = self.radii[current_nodes] < theta * distances
+            leaf = np.logical_and(~far, self.is_leaf[current_nodes])
+            split = np.logical_and(~far, ~leaf)
+
+            far_points.append(current_points[far])
+            far_nodes.append(current_nodes[far])
+            near_points.append(current_points[leaf])
+            near_nodes.append(current_nodes[leaf])
+
+            current_points = np.repeat(current_points[split], 2)
+            current_nodes = self.children[current_nodes[split]].flatten()
+
+        return (
+            np.concatenate(near_points),
+            np.concatenate(near_nodes),
+            np.concatenate(far_points),
+            np.concatenate(far_nodes),
+        )
+
+
+class InducedVelocityOperator(object):
+    """
+    Linear operator giving the velocities induced at a set of evaluation
+    points by the vortex ring circulations of all lifting surfaces, using
+    the tree code for the closed rings and the exact influence of the
+    trailing-edge horseshoes.
+
+    Parameters
+    ----------
+    surfaces : list of dict
+        The lifting surfaces.
+    vortex_meshes : list of numpy arrays
+        The vortex mesh of each lifting surface, as produced by `VortexMesh`.
+    eval_points[num_eval_points, 3] : numpy array
+        The evaluation points.
+    alpha : float
+        Angle of attack in degrees; this sets the trailing leg direction.
+    theta : float
+        Opening angle of the tree code.
+    leaf_size : int
+        Maximum number of rings in the leaves of the tree.
+    """
+
+    def __init__(self, surfaces, vortex_meshes, eval_points, alpha, theta=THETA, leaf_size=LEAF_SIZE):
+        num_eval_points = eval_points.shape[0]
+        system_size = 0
+        for surface in surfaces:
+            nx, ny = surface["mesh"].shape[:2]
+            system_size += (nx - 1) * (ny - 1)
+
+        self.num_eval_points = num_eval_points
+        self.system_size = system_size
+
+        corners, ring_indices, ring_signs = get_vortex_rings(surfaces, vortex_meshes)
+        tree = VortexRingTree(corners, leaf_size)
+        near_points, near_nodes, far_points, far_nodes = tree.get_interactions(eval_points, theta)
+
+        dtype = np.result_type(corners, eval_points)
+        xyz = np.arange(3)
+
+        # Near field: exact influence of every ring of the leaves that are too
+        # close to the evaluation points.
+        pair_indices, near_rings = tree.get_node_rings(near_nodes)
+        near_points = near_points[pair_indices]
+        near_data = np.zeros((near_points.size, 3), dtype=dtype)
+        for ind_1 in range(0, near_points.size, _NEAR_CHUNK_SIZE):
+            ind_2 = min(ind_1 + _NEAR_CHUNK_SIZE, near_points.size)
+            near_data[ind_1:ind_2] = compute_ring_influence(
+                corners[near_rings[ind_1:ind_2]], eval_points[near_points[ind_1:ind_2]]
+            )
+        near_data *= ring_signs[near_rings][:, np.newaxis]
+
+        self.near_mtx = coo_matrix(
+            (
+                near_data.flatten(),
+                (
+                    (3 * near_points[:, np.newaxis] + xyz).flatten(),
+                    np.repeat(ring_indices[near_rings], 3),
+                ),
+            ),
+            shape=(3 * num_eval_points, system_size),
+        ).tocsr()
+
+        # Multipole moments of each node: the dipole moment is the sum of the
+        # circulations times the vector areas, and the quadrupole moment adds
+        # the offset of each ring from the center of the node.
+        areas = 0.5 * np.cross(corners[:, 2] - corners[:, 0], corners[:, 3] - corners[:, 1])
+        areas *= ring_signs[:, np.newaxis]
+
+        nodes = np.unique(far_nodes)
+        node_positions = np.zeros(tree.starts.size, int)
+        node_positions[nodes] = np.arange(nodes.size)
+
+        entry_nodes, node_rings = tree.get_node_rings(nodes)
+        offsets = tree.centroids[node_rings] - tree.centers[nodes[entry_nodes]]
+        moments = np.concatenate(
+            [areas[node_rings], np.einsum("ij,ik->ijk", areas[node_rings], offsets).reshape((-1, 9))], axis=1
+        )
+
+        self.moments_mtx = coo_matrix(
+            (
+                moments.flatten(),
+                (
+                    (_NUM_MOMENTS * entry_nodes[:, np.newaxis] + np.arange(_NUM_MOMENTS)).flatten(),
+                    np.repeat(ring_indices[node_rings], _NUM_MOMENTS),
+                ),
+            ),
+            shape=(_NUM_MOMENTS * nodes.size, system_size),
+        ).tocsr()
+
+        # Far field: dipole and quadrupole expansion of each node about its
+        # center.
+        r = eval_points[far_points] - tree.centers[far_nodes]
+        r_norm = np.sqrt(np.einsum("ij,ij->i", r, r))
+        eye = np.eye(3)
+
+        dipole = 3 * np.einsum("ni,nj->nij", r, r) / r_norm[:, np.newaxis, np.newaxis] ** 5
+        dipole -= eye / r_norm[:, np.newaxis, np.newaxis] ** 3
+
+        quadrupole = 3 * np.einsum("ni,jl->nijl", r, eye)
+        quadrupole += 3 * np.einsum("nj,il->nijl", r, eye)
+        quadrupole += 3 * np.einsum("ij,nl->nijl", eye, r)
+        quadrupole -= 15 * np.einsum("ni,nj,nl->nijl", r, r, r) / r_norm[:, np.newaxis, np.newaxis, np.newaxis] ** 2
+        quadrupole /= -(r_norm[:, np.newaxis, np.newaxis, np.newaxis] ** 5)
+
+        far_data = np.concatenate([dipole, quadrupole.reshape((-1, 3, 9))], axis=2) / (4 * np.pi)
+
+        self.far_mtx = coo_matrix(
+            (
+                far_data.flatten(),
+                (
+                    np.repeat((3 * far_points[:, np.newaxis] + xyz).flatten(), _NUM_MOMENTS),
+                    np.tile(
+                        (_NUM_MOMENTS * node_positions[far_nodes][:, np.newaxis] + np.arange(_NUM_MOMENTS)),
+                        (1, 3),
+                    ).flatten(),
+                ),
+            ),
+            shape=(3 * num_eval_points, _NUM_MOMENTS * nodes.size),
+        ).tocsr()
+
+        # Trailing-edge horseshoes, evaluated exactly for every evaluation point
+        trailing_mtx = []
+        trailing_indices = []
+        offset = 0
+        for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+            nx, ny, symmetry, ground_effect, right_wing = get_surface_options(surface)
+            trailing_mtx.append(
+                compute_trailing_influence(vortex_mesh, eval_points, alpha, nx, symmetry, ground_effect, right_wing)
+            )
+            trailing_indices.append(offset + (nx - 2) * (ny - 1) + np.arange(ny - 1))
+            offset += (nx - 1) * (ny - 1)
+
+        self.trailing_mtx = np.concatenate(trailing_mtx, axis=1).transpose((0, 2, 1)).reshape((3 * num_eval_points, -1))
+        self.trailing_indices = np.concatenate(trailing_indices)
+
+    def matvec(self, circulations):
+        """
+        Compute the velocities induced by the given circulations.
+
+        Parameters
+        ----------
+        circulations[system_size] : numpy array
+            The vortex ring circulations of all lifting surfaces.
+
+        Returns
+        -------
+        velocities[num_eval_points, 3] : numpy array
+            The induced velocities at the evaluation points.
+        """
+        velocities = self.near_mtx.dot(circulations)
+        velocities += self.far_mtx.dot(self.moments_mtx.dot(circulations))
+        velocities += self.trailing_mtx.dot(circulations[self.trailing_indices])
+        return velocities.reshape((self.num_eval_points, 3))
+
+    def rmatvec(self, velocities):
+        """
+        Apply the transpose of the operator.
+
+        Parameters
+        ----------
+        velocities[num_eval_points, 3] : numpy array
+            Seed for the induced velocities.
+
+        Returns
+        -------
+        circulations[system_size] : numpy array
+            The corresponding seed for the circulations.
+        """
+        velocities = velocities.flatten()
+        circulations = self.near_mtx.T.dot(velocities)
+        circulations += self.moments_mtx.T.dot(self.far_mtx.T.dot(velocities))
+        circulations[self.trailing_indices] += self.trailing_mtx.T.dot(velocities)
+        return circulations
+
+    def get_near_mtx(self):
+        """
+        Get the exactly evaluated part of the operator as a sparse matrix,
+        including the trailing-edge horseshoes of the rings in the near field.
+        This is a good approximation of the full operator to build a
+        preconditioner from.
+
+        Returns
+        -------
+        near_mtx[3 * num_eval_points, system_size] : scipy sparse matrix
+            The near-field influence matrix.
+        """
+        near_mtx = self.near_mtx.tocoo()
+
+        trailing_positions = -np.ones(self.system_size, int)
+        trailing_positions[self.trailing_indices] = np.arange(self.trailing_indices.size)
+        positions = trailing_positions[near_mtx.col]
+        mask = positions >= 0
+
+        data = near_mtx.data.copy()
+        data[mask] += self.trailing_mtx[near_mtx.row[mask], positions[mask]]
+
+        return coo_matrix((data, (near_mtx.row, near_mtx.col)), shape=near_mtx.shape).tocsr()
@@ -0,0 +1,201 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import TILE_MEM_BUDGET, apply_vel_mtx_deriv
+from openaerostruct.aerodynamics.tree_code import (
+    LEAF_SIZE,
+    THETA,
+    InducedVelocityOperator,
+    compute_trailing_alpha_deriv,
+)
+
+
+class TreeEvalVelocities(om.ExplicitComponent):
+    """
+    Compute the total velocities at each of the evaluation points, like
+    EvalVelocities, but with the Barnes-Hut tree code instead of the dense
+    AIC matrices. This replaces the combination of GetVectors, EvalVelMtx,
+    and EvalVelocities, and never forms the [num_eval_points, nx - 1, ny - 1, 3]
+    vel_mtx arrays.
+
+    The derivatives are computed matrix-free. Those with respect to the
+    circulations apply the tree code operator or its transpose, so they are
+    consistent with the analysis. Those with respect to the vortex mesh and
+    the evaluation points are computed from the exact Biot-Savart kernels,
+    one tile of evaluation points at a time, so they agree with the analysis
+    to within the accuracy of the tree code.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    eval_name[num_eval_points, 3] : numpy array
+        These are the evaluation points, either collocation or force points.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+    freestream_velocities[system_size, 3] : numpy array
+        The rotated freestream velocities at each evaluation point for all
+        lifting surfaces. system_size is the sum of the count of all panels
+        for all lifting surfaces.
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained from solving the AIC linear
+        system.
+
+    Returns
+    -------
+    velocities[num_eval_points, 3] : numpy array
+        The actual velocities experienced at the evaluation points for each
+        lifting surface in the system. This is the summation of the freestream
+        velocities and the induced velocities caused by the circulations.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("eval_name", types=str)
+        self.options.declare("num_eval_points", types=int)
+        self.options.declare(
+            "theta",
+            default=THETA,
+            types=(int, float),
+            lower=0.0,
+            desc="Opening angle of the tree code. Smaller values are more accurate, and 0 recovers the dense result.",
+        )
+        self.options.declare("leaf_size", default=LEAF_SIZE, types=int, desc="Maximum number of rings per leaf.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points "
+            "when computing the derivatives.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+
+        system_size = 0
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+
+        self.system_size = system_size
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        self.add_input(eval_name, val=np.zeros((num_eval_points, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(system_size, 3), units="m/s")
+        self.add_input("circulations", shape=system_size, units="m**2/s", tags=["mphys_coupling"])
+
+        self.add_output("{}_velocities".format(eval_name), shape=(num_eval_points, 3), units="m/s")
+
+        self.operator = None
+
+    def compute(self, inputs, outputs):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        vortex_meshes = [inputs["{}_vortex_mesh".format(surface["name"])] for surface in surfaces]
+
+        self.dvel_dalpha = None
+        self.operator = InducedVelocityOperator(
+            surfaces,
+            vortex_meshes,
+            inputs[eval_name],
+            inputs["alpha"][0],
+            self.options["theta"],
+            self.options["leaf_size"],
+        )
+
+        outputs["{}_velocities".format(eval_name)] = inputs["freestream_velocities"] + self.operator.matvec(
+            inputs["circulations"]
+        )
+
+    def compute_jacvec_product(self, inputs, d_inputs, d_outputs, mode):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        velocities_name = "{}_velocities".format(eval_name)
+
+        if velocities_name not in d_outputs:
+            return
+
+        d_velocities = d_outputs[velocities_name]
+
+        if "alpha" in d_inputs and self.dvel_dalpha is None:
+            vortex_meshes = [inputs["{}_vortex_mesh".format(surface["name"])] for surface in surfaces]
+            self.dvel_dalpha = compute_trailing_alpha_deriv(
+                surfaces, vortex_meshes, inputs[eval_name], inputs["alpha"][0], inputs["circulations"]
+            )
+
+        if mode == "fwd":
+            if "freestream_velocities" in d_inputs:
+                d_velocities += d_inputs["freestream_velocities"]
+            if "circulations" in d_inputs:
+                d_velocities += self.operator.matvec(d_inputs["circulations"])
+            if "alpha" in d_inputs:
+                d_velocities += self.dvel_dalpha * d_inputs["alpha"]
+        else:
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_velocities
+            if "circulations" in d_inputs:
+                d_inputs["circulations"] += self.operator.rmatvec(d_velocities)
+            if "alpha" in d_inputs:
+                d_inputs["alpha"] += np.sum(self.dvel_dalpha * d_velocities)
+
+        if eval_name in d_inputs:
+            d_eval_points = d_inputs[eval_name]
+        else:
+            d_eval_points = None
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            right_wing = abs(mesh[0, 0, 1]) < abs(mesh[0, -1, 1])
+
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            vortex_mesh_name = "{}_vortex_mesh".format(name)
+            if vortex_mesh_name in d_inputs:
+                d_vortex_mesh = d_inputs[vortex_mesh_name]
+            else:
+                d_vortex_mesh = None
+
+            if d_vortex_mesh is not None or d_eval_points is not None:
+                apply_vel_mtx_deriv(
+                    inputs[vortex_mesh_name],
+                    inputs[eval_name],
+                    inputs["alpha"][0],
+                    inputs["circulations"][ind_1:ind_2].reshape((nx - 1, ny - 1)),
+                    d_vortex_mesh,
+                    d_eval_points,
+                    d_velocities,
+                    mode,
+                    surface["symmetry"],
+                    surface.get("groundplane", False),
+                    right_wing,
+                    self.options["mem_budget"],
+                )
+
+            ind_1 = ind_2
@@ -0,0 +1,319 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import LinearOperator, splu
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import TILE_MEM_BUDGET, apply_vel_mtx_deriv
+from openaerostruct.aerodynamics.solve_matrix import solve_gmres
+from openaerostruct.aerodynamics.tree_code import (
+    LEAF_SIZE,
+    THETA,
+    InducedVelocityOperator,
+    compute_trailing_alpha_deriv,
+)
+
+
+class TreeSolveMatrix(om.ImplicitComponent):
+    """
+    Solve the AIC linear system to obtain the vortex ring circulations
+    iteratively with GMRES, applying the AIC matrix with the Barnes-Hut tree
+    code instead of assembling it. This replaces the combination of
+    GetVectors, EvalVelMtx, VLMMtxRHSComp, and SolveMatrix for the
+    collocation points.
+
+    GMRES is preconditioned with a sparse LU factorization of the part of the
+    AIC matrix that the tree code evaluates exactly, which holds the strong
+    interactions between neighboring panels, and is warm-started from the
+    current circulations. The same preconditioner is reused for the linear
+    solves of the derivative computations.
+
+    The derivatives with respect to the vortex mesh and the collocation
+    points are computed from the exact Biot-Savart kernels, one tile of
+    collocation points at a time, so they agree with the analysis to within
+    the accuracy of the tree code.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    coll_pts[system_size, 3] : numpy array
+        The xyz coordinates of the collocation points used in the VLM analysis.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+    normals[nx-1, ny-1, 3] : numpy array
+        The normal vector for each panel, computed as the cross of the two
+        diagonals from the mesh points.
+    freestream_velocities[system_size, 3] : numpy array
+        The rotated freestream velocities at each collocation point for all
+        lifting surfaces.
+
+    Returns
+    -------
+    circulations[system_size] : numpy array
+        The vortex ring circulations obtained by solving the AIC linear system.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "theta",
+            default=THETA,
+            types=(int, float),
+            lower=0.0,
+            desc="Opening angle of the tree code. Smaller values are more accurate, and 0 recovers the dense result.",
+        )
+        self.options.declare("leaf_size", default=LEAF_SIZE, types=int, desc="Maximum number of rings per leaf.")
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of collocation points "
+            "when computing the derivatives.",
+        )
+        self.options.declare("rtol", default=1e-12, types=float, desc="Relative tolerance of the GMRES solves.")
+        self.options.declare("maxiter", default=100, types=int, desc="Maximum number of GMRES restarts.")
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+
+        system_size = 0
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            system_size += (nx - 1) * (ny - 1)
+
+            if surface.get("groundplane", False):
+                nx_actual = 2 * nx
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            self.add_input("{}_vortex_mesh".format(name), val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+            self.add_input("{}_normals".format(name), shape=(nx - 1, ny - 1, 3))
+
+        self.system_size = system_size
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        self.add_input("coll_pts", val=np.zeros((system_size, 3)), units="m")
+        self.add_input("freestream_velocities", shape=(system_size, 3), units="m/s")
+        self.add_output("circulations", shape=system_size, units="m**2/s", tags=["mphys_coupling"])
+
+        self.operator = None
+        self.operator_inputs = None
+
+    def _get_normals(self, inputs):
+        """
+        Gather the normals of all lifting surfaces in a single array.
+        """
+        return np.concatenate(
+            [inputs["{}_normals".format(surface["name"])].reshape((-1, 3)) for surface in self.options["surfaces"]]
+        )
+
+    def _update_operator(self, inputs):
+        """
+        Build the tree code operator and the preconditioner, unless the
+        geometry has not changed since they were last built.
+        """
+        surfaces = self.options["surfaces"]
+
+        vortex_meshes = [inputs["{}_vortex_mesh".format(surface["name"])] for surface in surfaces]
+        normals = self._get_normals(inputs)
+
+        operator_inputs = np.concatenate(
+            [inputs["alpha"], inputs["coll_pts"].flatten(), normals.flatten()]
+            + [vortex_mesh.flatten() for vortex_mesh in vortex_meshes]
+        )
+        if self.operator_inputs is not None and np.array_equal(operator_inputs, self.operator_inputs):
+            return
+        self.operator_inputs = operator_inputs
+
+        self.operator = InducedVelocityOperator(
+            surfaces,
+            vortex_meshes,
+            inputs["coll_pts"],
+            inputs["alpha"][0],
+            self.options["theta"],
+            self.options["leaf_size"],
+        )
+        self.normals = normals
+        self.velocities = None
+        self.dvel_dalpha = None
+
+        # Project the near field onto the normals to get the preconditioner
+        system_size = self.system_size
+        normals_mtx = csr_matrix(
+            (normals.flatten(), (np.repeat(np.arange(system_size), 3), np.arange(3 * system_size))),
+            shape=(system_size, 3 * system_size),
+        )
+        self.lu = splu(normals_mtx.dot(self.operator.get_near_mtx()).tocsc())
+
+    def _solve(self, rhs, x0, mode):
+        """
+        Solve the AIC linear system, or its transpose, with preconditioned GMRES.
+        """
+        system_size = self.system_size
+        operator = self.operator
+        normals = self.normals
+
+        if mode == "fwd":
+
+            def matvec(circulations):
+                return np.einsum("ij,ij->i", normals, operator.matvec(circulations))
+
+            def precon(vec):
+                return self.lu.solve(vec)
+
+        else:
+
+            def matvec(vec):
+                return operator.rmatvec(normals * vec[:, np.newaxis])
+
+            def precon(vec):
+                return self.lu.solve(vec, trans="T")
+
+        dtype = np.result_type(rhs, normals)
+        mtx = LinearOperator((system_size, system_size), matvec=matvec, dtype=dtype)
+        precon = LinearOperator((system_size, system_size), matvec=precon, dtype=dtype)
+
+        sol, info = solve_gmres(
+            mtx,
+            rhs,
+            self.options["rtol"],
+            x0=x0,
+            atol=0.0,
+            maxiter=self.options["maxiter"],
+            M=precon,
+        )
+
+        if info > 0:
+            raise om.AnalysisError(
+                "{}: GMRES did not converge to the requested tolerance in {} iterations.".format(self.msginfo, info)
+            )
+
+        return sol
+
+    def apply_nonlinear(self, inputs, outputs, residuals):
+        self._update_operator(inputs)
+
+        velocities = self.operator.matvec(outputs["circulations"]) + inputs["freestream_velocities"]
+        residuals["circulations"] = np.einsum("ij,ij->i", self.normals, velocities)
+
+    def solve_nonlinear(self, inputs, outputs):
+        self._update_operator(inputs)
+
+        rhs = -np.einsum("ij,ij->i", self.normals, inputs["freestream_velocities"])
+        outputs["circulations"] = self._solve(rhs, outputs["circulations"], "fwd")
+
+        self.velocities = None
+        self.dvel_dalpha = None
+
+    def linearize(self, inputs, outputs, partials):
+        self._update_operator(inputs)
+
+        # These depend on the circulations, so they are computed again when needed
+        self.velocities = None
+        self.dvel_dalpha = None
+
+    def apply_linear(self, inputs, outputs, d_inputs, d_outputs, d_residuals, mode):
+        surfaces = self.options["surfaces"]
+
+        if "circulations" not in d_residuals:
+            return
+
+        d_circ_residuals = d_residuals["circulations"]
+
+        if self.velocities is None:
+            self.velocities = self.operator.matvec(outputs["circulations"]) + inputs["freestream_velocities"]
+
+        if "alpha" in d_inputs and self.dvel_dalpha is None:
+            vortex_meshes = [inputs["{}_vortex_mesh".format(surface["name"])] for surface in surfaces]
+            self.dvel_dalpha = compute_trailing_alpha_deriv(
+                surfaces, vortex_meshes, inputs["coll_pts"], inputs["alpha"][0], outputs["circulations"]
+            )
+
+        if mode == "fwd":
+            d_velocities = np.zeros((self.system_size, 3))
+            if "circulations" in d_outputs:
+                d_velocities += self.operator.matvec(d_outputs["circulations"])
+            if "freestream_velocities" in d_inputs:
+                d_velocities += d_inputs["freestream_velocities"]
+            if "alpha" in d_inputs:
+                d_velocities += self.dvel_dalpha * d_inputs["alpha"]
+        else:
+            d_velocities = self.normals * d_circ_residuals[:, np.newaxis]
+            if "circulations" in d_outputs:
+                d_outputs["circulations"] += self.operator.rmatvec(d_velocities)
+            if "freestream_velocities" in d_inputs:
+                d_inputs["freestream_velocities"] += d_velocities
+            if "alpha" in d_inputs:
+                d_inputs["alpha"] += np.sum(self.dvel_dalpha * d_velocities)
+
+        if "coll_pts" in d_inputs:
+            d_coll_pts = d_inputs["coll_pts"]
+        else:
+            d_coll_pts = None
+
+        ind_1 = 0
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+            right_wing = abs(mesh[0, 0, 1]) < abs(mesh[0, -1, 1])
+
+            ind_2 = ind_1 + (nx - 1) * (ny - 1)
+
+            vortex_mesh_name = "{}_vortex_mesh".format(name)
+            normals_name = "{}_normals".format(name)
+
+            if vortex_mesh_name in d_inputs:
+                d_vortex_mesh = d_inputs[vortex_mesh_name]
+            else:
+                d_vortex_mesh = None
+
+            if d_vortex_mesh is not None or d_coll_pts is not None:
+                apply_vel_mtx_deriv(
+                    inputs[vortex_mesh_name],
+                    inputs["coll_pts"],
+                    inputs["alpha"][0],
+                    outputs["circulations"][ind_1:ind_2].reshape((nx - 1, ny - 1)),
+                    d_vortex_mesh,
+                    d_coll_pts,
+                    d_velocities,
+                    mode,
+                    surface["symmetry"],
+                    surface.get("groundplane", False),
+                    right_wing,
+                    self.options["mem_budget"],
+                )
+
+            if normals_name in d_inputs:
+                if mode == "fwd":
+                    d_circ_residuals[ind_1:ind_2] += np.einsum(
+                        "ij,ij->i", d_inputs[normals_name].reshape((-1, 3)), self.velocities[ind_1:ind_2]
+                    )
+                else:
+                    d_inputs[normals_name] += (
+                        self.velocities[ind_1:ind_2] * d_circ_residuals[ind_1:ind_2, np.newaxis]
+                    ).reshape((nx - 1, ny - 1, 3))
+
+            ind_1 = ind_2
+
+        if mode == "fwd":
+            d_circ_residuals += np.einsum("ij,ij->i", self.normals, d_velocities)
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        if mode == "fwd":
+            d_outputs["circulations"] = self._solve(d_residuals["circulations"], None, "fwd")
+        else:
+            d_residuals["circulations"] = self._solve(d_outputs["circulations"], None, "rev")
@@ -0,0 +1,225 @@
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.aerodynamics.biot_savart import (
+    TILE_MEM_BUDGET,
+    compute_vel_mtx,
+    compute_vel_mtx_partials,
+    get_surface_options,
+    get_vel_mtx_jac_pattern,
+)
+from openaerostruct.aerodynamics.aic_cache import AICCache
+
+
+class VortexInfluence(om.ExplicitComponent):
+    """
+    Computes the aerodynamic influence coefficient (AIC) matrix for the VLM
+    analysis directly from the vortex mesh and the evaluation points.
+
+    This is equivalent to the combination of GetVectors and EvalVelMtx, but
+    the vectors going from every mesh point to every evaluation point are
+    only ever formed one tile of evaluation points at a time inside the
+    component. This removes the [num_eval_points, nx, ny, 3] vectors variable
+    from the model, along with the two large sparse Jacobians of GetVectors.
+
+    With an AICCache in the `aic_cache` option, the AIC matrices are stored
+    on disk and read back instead of computed again whenever the vortex
+    meshes, the evaluation points and alpha are exactly the same as in a
+    previous analysis. The partials are always computed.
+
+    Parameters
+    ----------
+    alpha : float
+        The angle of attack for the aircraft (all lifting surfaces) in degrees.
+    eval_name[num_eval_points, 3] : numpy array
+        These are the evaluation points, either collocation or force points.
+    vortex_mesh[nx, ny, 3] : numpy array
+        The actual aerodynamic mesh used in VLM calculations, where we look
+        at the rings of the panels instead of the panels themselves. For the
+        symmetric case, the second dimension is length (2 * ny - 1).
+        There is one of these arrays for each lifting surface in the problem.
+
+    Returns
+    -------
+    vel_mtx[num_eval_points, nx - 1, ny - 1, 3] : numpy array
+        The AIC matrix for the all lifting surfaces representing the aircraft.
+        One exists for each combination of surface name and evaluation points
+        name.
+    """
+
+    def initialize(self):
+        self.options.declare("surfaces", types=list)
+        self.options.declare("eval_name", types=str)
+        self.options.declare("num_eval_points", types=int)
+        self.options.declare(
+            "mem_budget",
+            default=TILE_MEM_BUDGET,
+            types=(int, float),
+            desc="Memory budget in bytes for the intermediate arrays of each tile of evaluation points.",
+        )
+        self.options.declare(
+            "precision",
+            default="double",
+            values=["double", "single"],
+            desc="Precision of the Biot-Savart kernels used to assemble the AIC matrix. In single precision the "
+            "kernels are evaluated in float32 and the result is stored in the float64 output. The partials are "
+            "always computed in double precision.",
+        )
+        self.options.declare(
+            "aic_cache",
+            default=None,
+            types=AICCache,
+            allow_none=True,
+            recordable=False,
+            desc="Persistent cache to store the AIC matrices in and read them back from.",
+        )
+
+    def setup(self):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+
+        self.add_input("alpha", val=1.0, units="deg", tags=["mphys_input"])
+        self.add_input(eval_name, val=np.zeros((num_eval_points, 3)), units="m")
+
+        eval_indices = np.arange(num_eval_points)[:, np.newaxis]
+
+        for surface in surfaces:
+            mesh = surface["mesh"]
+            nx = mesh.shape[0]
+            ny = mesh.shape[1]
+            name = surface["name"]
+
+            ground_effect = surface.get("groundplane", False)
+            right_wing = abs(mesh[0, 0, 1]) < abs(mesh[0, -1, 1])
+
+            vortex_mesh_name = "{}_vortex_mesh".format(name)
+            vel_mtx_name = "{}_{}_vel_mtx".format(name, eval_name)
+
+            if ground_effect:
+                nx_actual = 2 * nx
+            else:
+                nx_actual = nx
+            if surface["symmetry"]:
+                ny_actual = 2 * ny - 1
+            else:
+                ny_actual = ny
+
+            self.add_input(vortex_mesh_name, val=np.zeros((nx_actual, ny_actual, 3)), units="m")
+            self.add_output(vel_mtx_name, shape=(num_eval_points, nx - 1, ny - 1, 3), units="1/m")
+
+            # The vectors of a single evaluation point are laid out exactly
+            # like the vortex mesh, so the pattern for a single evaluation
+            # point gives the columns directly.
+            rows, cols = get_vel_mtx_jac_pattern(nx, ny, surface["symmetry"], ground_effect, right_wing)
+            rows = (rows + eval_indices * (nx - 1) * (ny - 1) * 3).flatten()
+            cols = np.tile(cols, num_eval_points)
+
+            self.declare_partials(vel_mtx_name, vortex_mesh_name, rows=rows, cols=cols)
+
+            # Each AIC entry depends on all three coordinates of its own
+            # evaluation point.
+            vel_mtx_indices = np.arange(num_eval_points * (nx - 1) * (ny - 1) * 3).reshape(
+                (num_eval_points, (nx - 1) * (ny - 1) * 3)
+            )
+            eval_pts_indices = np.arange(num_eval_points * 3).reshape((num_eval_points, 3))
+            rows = np.einsum("ij,k->ijk", vel_mtx_indices, np.ones(3, int)).flatten()
+            cols = np.einsum("ik,j->ijk", eval_pts_indices, np.ones((nx - 1) * (ny - 1) * 3, int)).flatten()
+
+            self.declare_partials(vel_mtx_name, eval_name, rows=rows, cols=cols)
+
+            # It's worth the cs cost here because alpha is just a scalar
+            self.declare_partials(vel_mtx_name, "alpha", method="cs")
+            self.set_check_partial_options(wrt="alpha", method="fd")
+
+    def compute(self, inputs, outputs):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+
+        alpha = inputs["alpha"][0]
+        eval_points = inputs[eval_name]
+
+        # The kernels stay in double precision under complex step
+        if self.options["precision"] == "single" and not self.under_complex_step:
+            dtype = np.float32
+        else:
+            dtype = None
+
+        cache = self.options["aic_cache"]
+        if cache is not None and not self.under_complex_step:
+            vortex_mesh_names = ["{}_vortex_mesh".format(surface["name"]) for surface in surfaces]
+            vel_mtx_names = ["{}_{}_vel_mtx".format(surface["name"], eval_name) for surface in surfaces]
+
+            tags = (
+                "VortexInfluence",
+                self.options["precision"],
+                [get_surface_options(surface) for surface in surfaces],
+                vel_mtx_names,
+            )
+            key = cache.get_key(
+                tags,
+                [inputs["alpha"], eval_points] + [inputs[vortex_mesh_name] for vortex_mesh_name in vortex_mesh_names],
+            )
+
+            cached = cache.load(key)
+            if cached is not None:
+                for vel_mtx_name in vel_mtx_names:
+                    outputs[vel_mtx_name] = cached[vel_mtx_name]
+                return
+        else:
+            cache = None
+
+        for surface in surfaces:
+            name = surface["name"]
+            ground_effect = surface.get("groundplane", False)
+
+            # If this is a right-hand symmetrical wing, we need to flip the "y" indexing
+            right_wing = abs(surface["mesh"][0, 0, 1]) < abs(surface["mesh"][0, -1, 1])
+
+            compute_vel_mtx(
+                inputs["{}_vortex_mesh".format(name)],
+                eval_points,
+                alpha,
+                surface["symmetry"],
+                ground_effect,
+                right_wing,
+                self.options["mem_budget"],
+                out=outputs["{}_{}_vel_mtx".format(name, eval_name)],
+                dtype=dtype,
+            )
+
+        if cache is not None:
+            cache.save(key, {vel_mtx_name: outputs[vel_mtx_name] for vel_mtx_name in vel_mtx_names})
+
+    def compute_partials(self, inputs, partials):
+        surfaces = self.options["surfaces"]
+        eval_name = self.options["eval_name"]
+        num_eval_points = self.options["num_eval_points"]
+
+        alpha = inputs["alpha"][0]
+        eval_points = inputs[eval_name]
+
+        for surface in surfaces:
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            name = surface["name"]
+            ground_effect = surface.get("groundplane", False)
+            right_wing = abs(surface["mesh"][0, 0, 1]) < abs(surface["mesh"][0, -1, 1])
+
+            vortex_mesh_name = "{}_vortex_mesh".format(name)
+            vel_mtx_name = "{}_{}_vel_mtx".format(name, eval_name)
+
+            # View the Jacobian data with one row per evaluation point so
+            # that each tile is written in place.
+            compute_vel_mtx_partials(
+                inputs[vortex_mesh_name],
+                eval_points,
+                alpha,
+                partials[vel_mtx_name, vortex_mesh_name].reshape((num_eval_points, -1)),
+                partials[vel_mtx_name, eval_name].reshape((num_eval_points, nx - 1, ny - 1, 3, 3)),
+                surface["symmetry"],
+                ground_effect,
+                right_wing,
+                self.options["mem_budget"],
+            )
@@ -13,12 +13,13 @@ class VortexMesh(om.ExplicitComponent):
         We have a mesh for each lifting surface in the problem.
         That is, if we have both a wing and a tail surface, we will have both
         `wing_def_mesh` and `tail_def_mesh` as inputs.
-    height_agl : scalar
+    height_agl[vec_size] : numpy array
         If ground effect is turned on, this input defines the height above
-        the groud plane (defined from the origin 0,0,0)
-    alpha : scalar
+        the groud plane (defined from the origin 0,0,0), for each flight
+        condition.
+    alpha[vec_size] : numpy array
         If ground effect is turned on, this input defines the angular
-        rotation of the ground plane
+        rotation of the ground plane, for each flight condition.
 
     Returns
     -------
@@ -26,14 +27,25 @@ class VortexMesh(om.ExplicitComponent):
         The actual aerodynamic mesh used in VLM calculations, where we look
         at the rings of the panels instead of the panels themselves. That is,
         this mesh coincides with the quarter-chord panel line, except for the
-        final row, where it lines up with the trailing edge.
+        final row, where it lines up with the trailing edge. With ground
+        effect and several flight conditions, there is one vortex mesh per
+        flight condition along a leading dimension.
     """
 
     def initialize(self):
         self.options.declare("surfaces", types=list)
+        self.options.declare(
+            "vec_size",
+            1,
+            types=int,
+            lower=1,
+            desc="Number of flight conditions. With ground effect, the ground plane image of the vortex mesh is "
+            "computed for the alpha and height_agl of each of them.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
 
         # Because the vortex_mesh always comes from the deformed mesh in the
         # same way, the Jacobian is fully linear and can be set here instead
@@ -61,13 +73,16 @@ class VortexMesh(om.ExplicitComponent):
                     # only need to add the extra inputs once
                     any_ground_effect = True
                     self._cached_constant_partial_vals = dict()
-                    self.add_input("height_agl", val=8000.0, units="m")
-                    self.add_input("alpha", val=0.0 * np.pi / 180, units="rad", tags=["mphys_inputs"])
+                    self.add_input("height_agl", val=8000.0, shape=vec_size, units="m")
+                    self.add_input("alpha", val=0.0 * np.pi / 180, shape=vec_size, units="rad", tags=["mphys_inputs"])
 
             if surface["symmetry"]:
                 left_wing = abs(surface["mesh"][0, 0, 1]) > abs(surface["mesh"][0, -1, 1])
                 if ground_effect:
-                    self.add_output(vortex_mesh_name, shape=(2 * nx, ny * 2 - 1, 3), units="m")
+                    if vec_size > 1:
+                        self.add_output(vortex_mesh_name, shape=(vec_size, 2 * nx, ny * 2 - 1, 3), units="m")
+                    else:
+                        self.add_output(vortex_mesh_name, shape=(2 * nx, ny * 2 - 1, 3), units="m")
                     # these are cheaper to just do with CS
                     self.declare_partials(vortex_mesh_name, ["alpha", "height_agl"], method="cs")
                     mesh_indices = np.arange(nx * ny * 3).reshape((nx, ny, 3))
@@ -170,6 +185,11 @@ class VortexMesh(om.ExplicitComponent):
                             ]
                         )
 
+                    # each flight condition has its own copy of the vortex mesh
+                    num_vortex_mesh = 2 * nx * (2 * ny - 1) * 3
+                    rows = (rows + num_vortex_mesh * np.arange(vec_size)[:, np.newaxis]).flatten()
+                    cols = np.tile(cols, vec_size)
+
                     # can't declare constant partials because these depend on alpha (and h?)
                     self.declare_partials(vortex_mesh_name, mesh_name, rows=rows, cols=cols)
                     self._cached_constant_partial_vals[name] = data.copy()
@@ -208,6 +228,7 @@ class VortexMesh(om.ExplicitComponent):
 
     def compute(self, inputs, outputs):
         surfaces = self.options["surfaces"]
+        vec_size = self.options["vec_size"]
 
         for surface in surfaces:
             nx = surface["mesh"].shape[0]
@@ -260,21 +281,24 @@ class VortexMesh(om.ExplicitComponent):
                     mesh[:nx, : ny - 1, :] = inputs[mesh_name][:, 1:, :][:, ::-1, :]
                     mesh[:nx, : ny - 1, 1] *= -1.0
 
-                alpha = inputs["alpha"][0]
-                plane_normal = np.array([np.sin(alpha), 0.0, -np.cos(alpha)]).reshape((1, 1, 3))
-                plane_point = np.zeros((1, 1, 3)) + plane_normal * inputs["height_agl"]
+                alpha = inputs["alpha"]
+                plane_normal = np.zeros((vec_size, 1, 1, 3), dtype=alpha.dtype)
+                plane_normal[:, 0, 0, 0] = np.sin(alpha)
+                plane_normal[:, 0, 0, 2] = -np.cos(alpha)
+                plane_point = plane_normal * inputs["height_agl"][:, np.newaxis, np.newaxis, np.newaxis]
 
-                # reflect about the ground plane
+                # reflect about the ground plane of every flight condition at once
                 # plane is defined parallel to the free stream and height_agl from the origin 0 0 0
-                v = mesh[:nx, :, :] - plane_point
-                temp = np.inner(v, plane_normal).squeeze()[:, :, np.newaxis]
+                v = mesh[np.newaxis, :nx, :, :] - plane_point
+                temp = np.sum(v * plane_normal, axis=-1)[:, :, :, np.newaxis]
                 v_par = temp * plane_normal
-                mesh[nx:, :, :] = mesh[:nx, :, :] - 2 * v_par
+                image = mesh[np.newaxis, :nx, :, :] - 2 * v_par
 
-                outputs[vortex_mesh_name][: nx - 1, :, :] = 0.75 * mesh[: nx - 1, :, :] + 0.25 * mesh[1:nx, :, :]
-                outputs[vortex_mesh_name][nx - 1, :, :] = mesh[nx - 1, :, :]
-                outputs[vortex_mesh_name][nx:-1, :, :] = 0.75 * mesh[nx:-1, :, :] + 0.25 * mesh[nx + 1 :, :, :]
-                outputs[vortex_mesh_name][-1, :, :] = mesh[-1, :, :]
+                vortex_mesh = outputs[vortex_mesh_name].reshape((vec_size, 2 * nx, 2 * ny - 1, 3))
+                vortex_mesh[:, : nx - 1, :, :] = 0.75 * mesh[: nx - 1, :, :] + 0.25 * mesh[1:nx, :, :]
+                vortex_mesh[:, nx - 1, :, :] = mesh[nx - 1, :, :]
+                vortex_mesh[:, nx:-1, :, :] = 0.75 * image[:, :-1, :, :] + 0.25 * image[:, 1:, :, :]
+                vortex_mesh[:, -1, :, :] = image[:, -1, :, :]
 
     def compute_partials(self, inputs, J):
         surfaces = self.options["surfaces"]
@@ -292,71 +316,74 @@ class VortexMesh(om.ExplicitComponent):
                 # and this method need nto be called
                 pass
             else:
-                data = self._cached_constant_partial_vals[name]
-                # we've already figured out the partials for quadrants 1 and 2
-                # quandrants 3 and 4 are the ground plane reflections which
-                # depend on angle of attack so they need to be computed each time
-
-                # first comes quadrant 3
-                # x on x, y on y, z on z, x on z, z on x is the order
-                alpha = inputs["alpha"]
-                x_on_x_const = 1 - 2 * np.sin(alpha) ** 2
-                z_on_z_const = 1 - 2 * np.cos(alpha) ** 2
-                x_on_z_const = 2 * np.sin(alpha) * np.cos(alpha)
-                z_on_x_const = 2 * np.sin(alpha) * np.cos(alpha)
-
-                data = np.concatenate(
-                    [
-                        data,
-                        # x on x
-                        x_on_x_const * 0.75 * np.ones((nx - 1) * ny),
-                        x_on_x_const * 0.25 * np.ones((nx - 1) * ny),
-                        x_on_x_const * np.ones(ny),
-                        # y on y
-                        0.75 * np.ones((nx - 1) * ny),
-                        0.25 * np.ones((nx - 1) * ny),
-                        np.ones(ny),
-                        # z on z
-                        z_on_z_const * 0.75 * np.ones((nx - 1) * ny),
-                        z_on_z_const * 0.25 * np.ones((nx - 1) * ny),
-                        z_on_z_const * np.ones(ny),
-                        # x on z
-                        x_on_z_const * 0.75 * np.ones((nx - 1) * ny),
-                        x_on_z_const * 0.25 * np.ones((nx - 1) * ny),
-                        x_on_z_const * np.ones(ny),
-                        # z on x
-                        z_on_x_const * 0.75 * np.ones((nx - 1) * ny),
-                        z_on_x_const * 0.25 * np.ones((nx - 1) * ny),
-                        z_on_x_const * np.ones(ny),
-                    ]
-                )
+                # each flight condition has its own ground plane
+                data_list = []
+                for alpha in inputs["alpha"]:
+                    data = self._cached_constant_partial_vals[name]
+                    # we've already figured out the partials for quadrants 1 and 2
+                    # quandrants 3 and 4 are the ground plane reflections which
+                    # depend on angle of attack so they need to be computed each time
+
+                    # first comes quadrant 3
+                    # x on x, y on y, z on z, x on z, z on x is the order
+                    x_on_x_const = 1 - 2 * np.sin(alpha) ** 2
+                    z_on_z_const = 1 - 2 * np.cos(alpha) ** 2
+                    x_on_z_const = 2 * np.sin(alpha) * np.cos(alpha)
+                    z_on_x_const = 2 * np.sin(alpha) * np.cos(alpha)
+
+                    data = np.concatenate(
+                        [
+                            data,
+                            # x on x
+                            x_on_x_const * 0.75 * np.ones((nx - 1) * ny),
+                            x_on_x_const * 0.25 * np.ones((nx - 1) * ny),
+                            x_on_x_const * np.ones(ny),
+                            # y on y
+                            0.75 * np.ones((nx - 1) * ny),
+                            0.25 * np.ones((nx - 1) * ny),
+                            np.ones(ny),
+                            # z on z
+                            z_on_z_const * 0.75 * np.ones((nx - 1) * ny),
+                            z_on_z_const * 0.25 * np.ones((nx - 1) * ny),
+                            z_on_z_const * np.ones(ny),
+                            # x on z
+                            x_on_z_const * 0.75 * np.ones((nx - 1) * ny),
+                            x_on_z_const * 0.25 * np.ones((nx - 1) * ny),
+                            x_on_z_const * np.ones(ny),
+                            # z on x
+                            z_on_x_const * 0.75 * np.ones((nx - 1) * ny),
+                            z_on_x_const * 0.25 * np.ones((nx - 1) * ny),
+                            z_on_x_const * np.ones(ny),
+                        ]
+                    )
 
-                # now quadrant 4 with different dims and reflected y coords
+                    # now quadrant 4 with different dims and reflected y coords
 
-                data = np.concatenate(
-                    [
-                        data,
-                        # x on x
-                        x_on_x_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
-                        x_on_x_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
-                        x_on_x_const * np.ones((ny - 1)),
-                        # y on y
-                        -0.75 * np.ones((nx - 1) * (ny - 1)),
-                        -0.25 * np.ones((nx - 1) * (ny - 1)),
-                        -np.ones((ny - 1)),
-                        # z on z
-                        z_on_z_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
-                        z_on_z_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
-                        z_on_z_const * np.ones((ny - 1)),
-                        # x on z
-                        x_on_z_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
-                        x_on_z_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
-                        x_on_z_const * np.ones((ny - 1)),
-                        # z on x
-                        z_on_x_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
-                        z_on_x_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
-                        z_on_x_const * np.ones((ny - 1)),
-                    ]
-                )
+                    data = np.concatenate(
+                        [
+                            data,
+                            # x on x
+                            x_on_x_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
+                            x_on_x_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
+                            x_on_x_const * np.ones((ny - 1)),
+                            # y on y
+                            -0.75 * np.ones((nx - 1) * (ny - 1)),
+                            -0.25 * np.ones((nx - 1) * (ny - 1)),
+                            -np.ones((ny - 1)),
+                            # z on z
+                            z_on_z_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
+                            z_on_z_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
+                            z_on_z_const * np.ones((ny - 1)),
+                            # x on z
+                            x_on_z_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
+                            x_on_z_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
+                            x_on_z_const * np.ones((ny - 1)),
+                            # z on x
+                            z_on_x_const * 0.75 * np.ones((nx - 1) * (ny - 1)),
+                            z_on_x_const * 0.25 * np.ones((nx - 1) * (ny - 1)),
+                            z_on_x_const * np.ones((ny - 1)),
+                        ]
+                    )
+                    data_list.append(data)
 
-                J[vortex_mesh_name, mesh_name] = data
+                J[vortex_mesh_name, mesh_name] = np.concatenate(data_list)
@@ -0,0 +1,56 @@
+"""
+Time the computation of the local stiffness matrices and of their partials
+for increasing numbers of spanwise nodes.
+
+LocalStiff is evaluated at every iteration of a structural sizing loop, so
+this shows how its cost scales with the structural mesh. Run with, e.g.,
+
+    python openaerostruct/examples/benchmark_local_stiff.py --num_y 11 41 161 641
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.structures.local_stiff import LocalStiff
+
+
+def time_local_stiff(ny, num_repeats):
+    # Only the number of nodes of the mesh is used by LocalStiff
+    surface = {"mesh": np.zeros((2, ny, 3)), "E": 70.0e9, "G": 30.0e9}
+
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("local_stiff", LocalStiff(surface=surface), promotes=["*"])
+    prob.setup()
+
+    rng = np.random.RandomState(314)
+    for name in ["A", "J", "Iy", "Iz", "element_lengths"]:
+        prob[name] = rng.random_sample(ny - 1) + 0.5
+    prob.run_model()
+
+    start = time.perf_counter()
+    for _ in range(num_repeats):
+        prob.model.run_apply_nonlinear()
+    time_compute = (time.perf_counter() - start) / num_repeats
+
+    start = time.perf_counter()
+    for _ in range(num_repeats):
+        prob.model.run_linearize(sub_do_ln=False)
+    time_partials = (time.perf_counter() - start) / num_repeats
+
+    return time_compute, time_partials
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--num_y", type=int, nargs="+", default=[11, 41, 161, 641])
+    parser.add_argument("--num_repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print("{:>6} {:>14} {:>14}".format("ny", "compute [us]", "partials [us]"))
+    for ny in args.num_y:
+        time_compute, time_partials = time_local_stiff(ny, args.num_repeats)
+        print("{:>6} {:>14.1f} {:>14.1f}".format(ny, 1e6 * time_compute, 1e6 * time_partials))
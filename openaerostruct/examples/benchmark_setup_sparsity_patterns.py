@@ -0,0 +1,133 @@
+"""
+Time the setup of a multipoint aerostructural problem with and without the
+sparsity pattern cache.
+
+Every point of a multipoint problem declares the same sparse partials, so
+with the cache only the first point builds the index arrays and the others
+reuse them. Run with, e.g.,
+
+    python openaerostruct/examples/benchmark_setup_sparsity_patterns.py --num_points 10 --num_y 31
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import openmdao.api as om
+
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.utils.constants import grav_constant
+from openaerostruct.utils.sparsity_cache import (
+    SPARSITY_CACHE_BUDGET,
+    clear_sparsity_cache,
+    set_sparsity_cache_budget,
+)
+
+
+def build_problem(num_points, num_x, num_y):
+    mesh_dict = {"num_y": num_y, "num_x": num_x, "wing_type": "CRM", "symmetry": True, "num_twist_cp": 5}
+    mesh, twist_cp = generate_mesh(mesh_dict)
+
+    surface = {
+        "name": "wing",
+        "symmetry": True,
+        "S_ref_type": "wetted",
+        "fem_model_type": "tube",
+        "thickness_cp": np.array([0.1, 0.2, 0.3]),
+        "twist_cp": twist_cp,
+        "mesh": mesh,
+        "CL0": 0.0,
+        "CD0": 0.015,
+        "k_lam": 0.05,
+        "t_over_c_cp": np.array([0.15]),
+        "c_max_t": 0.303,
+        "with_viscous": True,
+        "with_wave": False,
+        "E": 70.0e9,
+        "G": 30.0e9,
+        "yield": 500.0e6,
+        "safety_factor": 2.5,
+        "mrho": 3.0e3,
+        "fem_origin": 0.35,
+        "wing_weight_ratio": 2.0,
+        "struct_weight_relief": False,
+        "distributed_fuel_weight": False,
+        "exact_failure_constraint": False,
+    }
+    name = surface["name"]
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=5.0, units="deg")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("CT", val=grav_constant * 17.0e-6, units="1/s")
+    indep_var_comp.add_output("R", val=11.165e6, units="m")
+    indep_var_comp.add_output("W0", val=0.4 * 3e5, units="kg")
+    indep_var_comp.add_output("speed_of_sound", val=295.4, units="m/s")
+    indep_var_comp.add_output("load_factor", val=1.0)
+    indep_var_comp.add_output("empty_cg", val=np.zeros((3)), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+    prob.model.add_subsystem(name, AerostructGeometry(surface=surface))
+
+    for i in range(num_points):
+        point_name = "AS_point_{}".format(i)
+        prob.model.add_subsystem(point_name, AerostructPoint(surfaces=[surface]))
+
+        for var in ["v", "alpha", "Mach_number", "re", "rho", "CT", "R", "W0", "speed_of_sound", "empty_cg"]:
+            prob.model.connect(var, point_name + "." + var)
+        prob.model.connect("load_factor", point_name + ".load_factor")
+
+        com_name = point_name + "." + name + "_perf"
+        prob.model.connect(
+            name + ".local_stiff_transformed", point_name + ".coupled." + name + ".local_stiff_transformed"
+        )
+        prob.model.connect(name + ".nodes", point_name + ".coupled." + name + ".nodes")
+        prob.model.connect(name + ".mesh", point_name + ".coupled." + name + ".mesh")
+        prob.model.connect(name + ".radius", com_name + ".radius")
+        prob.model.connect(name + ".thickness", com_name + ".thickness")
+        prob.model.connect(name + ".nodes", com_name + ".nodes")
+        prob.model.connect(name + ".cg_location", point_name + ".total_perf." + name + "_cg_location")
+        prob.model.connect(name + ".structural_mass", point_name + ".total_perf." + name + "_structural_mass")
+        prob.model.connect(name + ".t_over_c", com_name + ".t_over_c")
+
+    return prob
+
+
+def time_setup(num_points, num_x, num_y, budget, num_repeats):
+    times = []
+    for _ in range(num_repeats):
+        # Start from an empty cache so the first point pays for the patterns
+        set_sparsity_cache_budget(budget)
+
+        prob = build_problem(num_points, num_x, num_y)
+        start = time.perf_counter()
+        prob.setup()
+        prob.final_setup()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--num_points", type=int, default=10)
+    parser.add_argument("--num_x", type=int, default=5)
+    parser.add_argument("--num_y", type=int, default=31)
+    parser.add_argument("--num_repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    time_off = time_setup(args.num_points, args.num_x, args.num_y, 0, args.num_repeats)
+    time_on = time_setup(args.num_points, args.num_x, args.num_y, SPARSITY_CACHE_BUDGET, args.num_repeats)
+    clear_sparsity_cache()
+
+    print("{} points, {} x {} mesh".format(args.num_points, args.num_x, args.num_y))
+    print("Setup without the sparsity pattern cache: {:.3f} s".format(time_off))
+    print("Setup with the sparsity pattern cache:    {:.3f} s".format(time_on))
+    print("Speedup: {:.2f}x".format(time_off / time_on))
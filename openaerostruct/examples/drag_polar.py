@@ -13,13 +13,20 @@ def compute_drag_polar(Mach, alphas, surfaces, trimmed=False):
             surfaces,
         ]
 
+    # An untrimmed polar is analyzed for all angles of attack at once, which
+    # shares the AIC matrix assembly and solves between them
+    if trimmed:
+        vec_size = 1
+    else:
+        vec_size = len(alphas)
+
     # Create the OpenMDAO problem
     prob = om.Problem()
     # Create an independent variable component that will supply the flow
     # conditions to the problem.
     indep_var_comp = om.IndepVarComp()
     indep_var_comp.add_output("v", val=248.136, units="m/s")
-    indep_var_comp.add_output("alpha", val=0.0, units="deg")
+    indep_var_comp.add_output("alpha", val=np.zeros(vec_size), units="deg")
     indep_var_comp.add_output("Mach_number", val=Mach)
     indep_var_comp.add_output("re", val=1.0e6, units="1/m")
     indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
@@ -43,7 +50,7 @@ def compute_drag_polar(Mach, alphas, surfaces, trimmed=False):
     # Create the aero point group, which contains the actual aerodynamic
     # analyses
     point_name = "aero"
-    aero_group = AeroPoint(surfaces=surfaces)
+    aero_group = AeroPoint(surfaces=surfaces, vec_size=vec_size)
     prob.model.add_subsystem(point_name, aero_group, promotes_inputs=["v", "alpha", "Mach_number", "re", "rho", "cg"])
 
     # For trimmed polar, setup balance component
@@ -74,13 +81,21 @@ def compute_drag_polar(Mach, alphas, surfaces, trimmed=False):
     CDs = []
     CMs = []
 
-    for a in alphas:
-        prob["alpha"] = a
+    if vec_size > 1:
+        prob["alpha"] = alphas
         prob.run_model()
-        CLs.append(prob["aero.CL"][0])
-        CDs.append(prob["aero.CD"][0])
-        CMs.append(prob["aero.CM"][1])  # Take only the longitudinal CM
-        # print(a, prob['aero.CL'], prob['aero.CD'], prob['aero.CM'][1])
+        CLs = list(prob["aero.CL"])
+        CDs = list(prob["aero.CD"])
+        CMs = list(prob["aero.CM"][:, 1])  # Take only the longitudinal CM
+
+    else:
+        for a in alphas:
+            prob["alpha"] = a
+            prob.run_model()
+            CLs.append(prob["aero.CL"][0])
+            CDs.append(prob["aero.CD"][0])
+            CMs.append(prob["aero.CM"][1])  # Take only the longitudinal CM
+            # print(a, prob['aero.CL'], prob['aero.CD'], prob['aero.CM'][1])
 
     # Plot CL vs alpha and drag polar
     fig, axes = plt.subplots(nrows=3)
@@ -1,9 +1,9 @@
 """
 Example of aerodynamic analysis including stability derivatives (CL_alpha and CM_alpha).
 
-We compute CL_alpha and CM_alpha by finite differencing with respect to alpha.
-To do so, we instantiate AeroPoint at alpha and alpha + delta_alpha, and add an ExecComp to compute finite difference.
-Finite differencing w.r.t. alpha allows us to compute the derivatives of CL_alpha and CM_alpha w.r.t. design variables.
+We compute CL_alpha and CM_alpha with the StabilityDerivatives group, which analyzes the given flight condition and
+computes the derivatives of its performance with respect to alpha analytically, reusing the factorization of the AIC
+matrix. The derivatives of CL_alpha and CM_alpha w.r.t. design variables are computed by OpenMDAO as usual.
 
 Note that this example does not trim the aircraft (e.g. CM != 0).
 """
@@ -13,7 +13,7 @@ import openmdao.api as om
 
 from openaerostruct.meshing.mesh_generator import generate_mesh
 from openaerostruct.geometry.geometry_group import Geometry
-from openaerostruct.aerodynamics.aero_groups import AeroPoint
+from openaerostruct.aerodynamics.aero_groups import StabilityDerivatives
 
 # Create a dictionary to store options about the surface.
 # Here, we setup a simple rectangular mesh with chord = 1 m and span = 10 m.
@@ -61,10 +61,6 @@ surf_dict = {
 
 surfaces = [surf_dict]
 
-# Although this example only considers cruise, hence single point,
-# We still need to AeroPoint instances to finite difference CL and CM w.r.t. alpha
-n_points = 2
-
 # Create the problem and the model group
 prob = om.Problem()
 
@@ -80,15 +76,6 @@ indep_var_comp.add_output("cg", val=np.array([0.5, 0.0, 0.0]), units="m")
 
 prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
 
-# Compute alpha perturbation for finite difference
-alpha_FD_stepsize = 1e-4  # deg
-alpha_perturb_comp = om.ExecComp(
-    "alpha_plus_delta = alpha + delta_alpha",
-    units="deg",
-    delta_alpha={"val": alpha_FD_stepsize, "constant": True},
-)
-prob.model.add_subsystem("alpha_for_FD", alpha_perturb_comp, promotes=["*"])
-
 # Loop over each surface and create the geometry groups
 for surface in surfaces:
     # Get the surface name and create a group to contain components only for this surface.
@@ -98,53 +85,28 @@ for surface in surfaces:
     # Add geom_group to the problem with the name of the surface.
     prob.model.add_subsystem(name + "_geom", geom_group)
 
-# Create aero analysis point for alpha and alpha_plus_delta
-point_names = ["aero_point", "aero_point_FD"]
-for i in range(n_points):
-    # Create the aero point group and add it to the model
-    aero_group = AeroPoint(surfaces=surfaces)
-    point_name = point_names[i]
-    prob.model.add_subsystem(point_name, aero_group)
-
-    # Connect flow properties to the analysis point
-    prob.model.connect("v", point_name + ".v")
-    prob.model.connect("Mach_number", point_name + ".Mach_number")
-    prob.model.connect("re", point_name + ".re")
-    prob.model.connect("rho", point_name + ".rho")
-    prob.model.connect("cg", point_name + ".cg")
-
-    # Connect angle of attack. Use perturbed alpha for the second point for finite difference
-    alpha_name = "alpha" if i == 0 else "alpha_plus_delta"
-    prob.model.connect(alpha_name, point_name + ".alpha")
-
-    # Connect the parameters within the model for each aero point
-    for surface in surfaces:
-        name = surface["name"]
-
-        # Connect the mesh from the geometry component to the analysis point
-        prob.model.connect(name + "_geom.mesh", point_name + "." + name + ".def_mesh")
-
-        # Perform the connections with the modified names within the 'aero_states' group.
-        prob.model.connect(name + "_geom.mesh", point_name + ".aero_states." + name + "_def_mesh")
-        prob.model.connect(name + "_geom.t_over_c", point_name + "." + name + "_perf." + "t_over_c")
-
-# Compute stability derivatives by finite difference
-stabibility_derivatives_comp = om.ExecComp(
-    ["CL_alpha = (CL_FD - CL) / delta_alpha", "CM_alpha = (CM_FD - CM) / delta_alpha"],
-    delta_alpha={"val": alpha_FD_stepsize, "constant": True},
-    CL_alpha={"val": 0.0, "units": "1/deg"},
-    CL_FD={"val": 0.0, "units": None},
-    CL={"val": 0.0, "units": None},
-    CM_alpha={"val": np.zeros(3), "units": "1/deg"},
-    CM_FD={"val": np.zeros(3), "units": None},
-    CM={"val": np.zeros(3), "units": None},
-)
-prob.model.add_subsystem("stability_derivs", stabibility_derivatives_comp, promotes_outputs=["*"])
-# Connect CL and CM from aero points
-prob.model.connect("aero_point.CL", "stability_derivs.CL")
-prob.model.connect("aero_point.CM", "stability_derivs.CM")
-prob.model.connect("aero_point_FD.CL", "stability_derivs.CL_FD")
-prob.model.connect("aero_point_FD.CM", "stability_derivs.CM_FD")
+# Create the stability derivatives group, which contains the aero analysis point, and add it to the model
+stability_group = StabilityDerivatives(surfaces=surfaces)
+prob.model.add_subsystem("stability", stability_group, promotes_outputs=["*"])
+
+# Connect flow properties to the stability derivatives group
+prob.model.connect("v", "stability.v")
+prob.model.connect("alpha", "stability.alpha")
+prob.model.connect("Mach_number", "stability.Mach_number")
+prob.model.connect("re", "stability.re")
+prob.model.connect("rho", "stability.rho")
+prob.model.connect("cg", "stability.cg")
+
+# Connect the parameters within the model for each surface
+for surface in surfaces:
+    name = surface["name"]
+
+    # Connect the mesh from the geometry component to the analysis point
+    prob.model.connect(name + "_geom.mesh", "stability.aero_point." + name + ".def_mesh")
+
+    # Perform the connections with the modified names within the 'aero_states' group.
+    prob.model.connect(name + "_geom.mesh", "stability.aero_point.aero_states." + name + "_def_mesh")
+    prob.model.connect(name + "_geom.t_over_c", "stability." + name + "_t_over_c")
 
 # Compute static margin
 static_margin_comp = om.ExecComp(
@@ -168,9 +130,9 @@ prob.set_val("wing_geom.sweep", 10.0, units="deg")
 prob.run_model()
 
 print("Sweep angle   =", prob.get_val("wing_geom.sweep", units="deg"), "deg")
-print("CL            =", prob.get_val("aero_point.CL"))
-print("CD            =", prob.get_val("aero_point.CD"))
-print("CM            =", prob.get_val("aero_point.CM"))
+print("CL            =", prob.get_val("CL"))
+print("CD            =", prob.get_val("CD"))
+print("CM            =", prob.get_val("CM"))
 print("CL_alpha      =", prob.get_val("CL_alpha", units="1/deg"), "1/deg")
 print("CM_alpha      =", prob.get_val("CM_alpha", units="1/deg"), "1/deg")
 print("Static Margin =", prob.get_val("static_margin"))
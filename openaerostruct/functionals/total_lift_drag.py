@@ -1,3 +1,5 @@
+import numpy as np
+
 import openmdao.api as om
 
 
@@ -8,9 +10,9 @@ class TotalLiftDrag(om.ExplicitComponent):
 
     Parameters
     ----------
-    CL : float
+    CL[vec_size] : numpy array
         Coefficient of lift (CL) for one lifting surface.
-    CD : float
+    CD[vec_size] : numpy array
         Coefficient of drag (CD) for one lifting surface.
     S_ref : float
         Surface area for one lifting surface.
@@ -21,41 +23,49 @@ class TotalLiftDrag(om.ExplicitComponent):
 
     Returns
     -------
-    CL : float
+    CL[vec_size] : numpy array
         Total coefficient of lift (CL) for the entire aircraft.
-    CD : float
+    CD[vec_size] : numpy array
         Total coefficient of drag (CD) for the entire aircraft.
-    L : float
+    L[vec_size] : numpy array
         Total lift force (L) for the entire aircraft.
-    D : float
+    D[vec_size] : numpy array
         Total drag force (D) for the entire aircraft.
 
     """
 
     def initialize(self):
         self.options.declare("surfaces", types=list)
+        self.options.declare("vec_size", 1, types=int, lower=1, desc="Number of flight conditions.")
 
     def setup(self):
+        vec_size = self.options["vec_size"]
+
+        # Each flight condition depends on its own coefficients and on the
+        # scalar inputs shared by all flight conditions
+        conditions = np.arange(vec_size)
+        shared = np.zeros(vec_size, int)
+
         for surface in self.options["surfaces"]:
             name = surface["name"]
-            self.add_input(name + "_CL", val=1.0, tags=["mphys_result"])
-            self.add_input(name + "_CD", val=1.0, tags=["mphys_result"])
+            self.add_input(name + "_CL", val=np.ones(vec_size), tags=["mphys_result"])
+            self.add_input(name + "_CD", val=np.ones(vec_size), tags=["mphys_result"])
             self.add_input(name + "_S_ref", val=1.0, units="m**2", tags=["mphys_coupling"])
-            self.declare_partials(["CL", "L"], name + "_CL")
-            self.declare_partials(["CD", "D"], name + "_CD")
-            self.declare_partials(["CL", "L"], name + "_S_ref")
-            self.declare_partials(["CD", "D"], name + "_S_ref")
+            self.declare_partials(["CL", "L"], name + "_CL", rows=conditions, cols=conditions)
+            self.declare_partials(["CD", "D"], name + "_CD", rows=conditions, cols=conditions)
+            self.declare_partials(["CL", "L"], name + "_S_ref", rows=conditions, cols=shared)
+            self.declare_partials(["CD", "D"], name + "_S_ref", rows=conditions, cols=shared)
 
         self.add_input("S_ref_total", val=1.0, units="m**2", tags=["mphys_input"])
         self.add_input("rho", val=1.0, units="kg/m**3", tags=["mphys_input"])
         self.add_input("v", val=1.0, units="m/s", tags=["mphys_input"])
-        self.add_output("CL", val=1.0, tags=["mphys_result"])
-        self.add_output("CD", val=1.0, tags=["mphys_result"])
-        self.add_output("L", val=1.0, units="N", tags=["mphys_result"])
-        self.add_output("D", val=1.0, units="N", tags=["mphys_result"])
-        self.declare_partials("CL", "S_ref_total")
-        self.declare_partials("CD", "S_ref_total")
-        self.declare_partials(["L", "D"], ["rho", "v"])
+        self.add_output("CL", val=np.ones(vec_size), tags=["mphys_result"])
+        self.add_output("CD", val=np.ones(vec_size), tags=["mphys_result"])
+        self.add_output("L", val=np.ones(vec_size), units="N", tags=["mphys_result"])
+        self.add_output("D", val=np.ones(vec_size), units="N", tags=["mphys_result"])
+        self.declare_partials("CL", "S_ref_total", rows=conditions, cols=shared)
+        self.declare_partials("CD", "S_ref_total", rows=conditions, cols=shared)
+        self.declare_partials(["L", "D"], ["rho", "v"], rows=conditions, cols=shared)
 
     def compute(self, inputs, outputs):
         # Compute the weighted CL and CD contributions from each surface,
@@ -77,6 +87,8 @@ class TotalLiftDrag(om.ExplicitComponent):
         outputs["CD"] = CD / inputs["S_ref_total"]
 
     def compute_partials(self, inputs, partials):
+        vec_size = self.options["vec_size"]
+
         # Compute the weighted CL and CD contributions from each surface,
         # weighted by the individual surface areas
         CL = 0.0
@@ -101,14 +113,14 @@ class TotalLiftDrag(om.ExplicitComponent):
         for surface in self.options["surfaces"]:
             name = surface["name"]
             S_ref = inputs[name + "_S_ref"]
-            partials["CL", name + "_CL"] = S_ref / S_ref_total
-            partials["CD", name + "_CD"] = S_ref / S_ref_total
+            partials["CL", name + "_CL"] = S_ref / S_ref_total * np.ones(vec_size)
+            partials["CD", name + "_CD"] = S_ref / S_ref_total * np.ones(vec_size)
 
             partials["CL", name + "_S_ref"] = inputs[name + "_CL"] / S_ref_total
             partials["CD", name + "_S_ref"] = inputs[name + "_CD"] / S_ref_total
 
-            partials["L", name + "_CL"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * S_ref
-            partials["D", name + "_CD"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * S_ref
+            partials["L", name + "_CL"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * S_ref * np.ones(vec_size)
+            partials["D", name + "_CD"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * S_ref * np.ones(vec_size)
 
             partials["L", name + "_S_ref"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * inputs[name + "_CL"]
             partials["D", name + "_S_ref"] = 0.5 * inputs["rho"] * inputs["v"] ** 2 * inputs[name + "_CD"]
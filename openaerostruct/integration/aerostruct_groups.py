@@ -364,6 +364,27 @@ class AerostructPoint(om.Group):
         self.options.declare(
             "rotational", False, types=bool, desc="Set to True to turn on support for computing angular velocities"
         )
+        self.options.declare(
+            "fused_aic",
+            False,
+            types=bool,
+            desc="Set to True to compute the AIC matrices directly from the vortex mesh and the evaluation points "
+            "with VortexInfluence instead of going through the GetVectors intermediate.",
+        )
+        self.options.declare(
+            "aic_solver",
+            "direct",
+            values=["direct", "gmres"],
+            desc="Solve the AIC linear system with a dense LU factorization or iteratively with GMRES, "
+            "warm-started from the previous circulations.",
+        )
+        self.options.declare(
+            "aic_preconditioner",
+            "strip",
+            values=["surface", "strip"],
+            desc="Blocks of the block-diagonal preconditioner used by the GMRES AIC solver, either one per "
+            "lifting surface or one per chordwise strip of panels.",
+        )
 
     def setup(self):
         surfaces = self.options["surfaces"]
@@ -491,10 +512,22 @@ class AerostructPoint(om.Group):
                 ground_effect = True
 
         if self.options["compressible"] is True:
-            aero_states = CompressibleVLMStates(surfaces=surfaces, rotational=rotational)
+            aero_states = CompressibleVLMStates(
+                surfaces=surfaces,
+                rotational=rotational,
+                fused_aic=self.options["fused_aic"],
+                aic_solver=self.options["aic_solver"],
+                aic_preconditioner=self.options["aic_preconditioner"],
+            )
             prom_in = ["v", "alpha", "beta", "rho", "Mach_number"]
         else:
-            aero_states = VLMStates(surfaces=surfaces, rotational=rotational)
+            aero_states = VLMStates(
+                surfaces=surfaces,
+                rotational=rotational,
+                fused_aic=self.options["fused_aic"],
+                aic_solver=self.options["aic_solver"],
+                aic_preconditioner=self.options["aic_preconditioner"],
+            )
             prom_in = ["v", "alpha", "beta", "rho"]
         if ground_effect:
             prom_in.append("height_agl")
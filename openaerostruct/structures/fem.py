@@ -1,32 +1,218 @@
 """Define the LinearSystemComp class."""
 
 import numpy as np
-from scipy.sparse import coo_matrix
+from scipy.linalg import get_lapack_funcs
+from scipy.sparse import csc_matrix
 from scipy.sparse.linalg import splu
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+@cached_sparsity_pattern
+def _get_jac_pattern(ny, symmetry, vec_size):
+    # Sparsity pattern of the stiffness matrix K, the derivative of residual wrt displacements.
+    base_row = np.repeat(0, 6)
+    base_col = np.arange(6)
+
+    # Upper diagonal blocks
+    rows1 = np.tile(base_row, 6 * (ny - 1)) + np.repeat(np.arange(6 * (ny - 1)), 6)
+    col = np.tile(base_col + 6, 6)
+    cols1 = np.tile(col, ny - 1) + np.repeat(6 * np.arange(ny - 1), 36)
+
+    # Lower diagonal blocks
+    rows2 = np.tile(base_row + 6, 6 * (ny - 1)) + np.repeat(np.arange(6 * (ny - 1)), 6)
+    col = np.tile(base_col, 6)
+    cols2 = np.tile(col, ny - 1) + np.repeat(6 * np.arange(ny - 1), 36)
+
+    # Main diagonal blocks, root
+    rows3 = np.tile(base_row, 6) + np.repeat(np.arange(6), 6)
+    cols3 = np.tile(base_col, 6)
+
+    # Main diagonal blocks, tip
+    rows4 = np.tile(base_row + (ny - 1) * 6, 6) + np.repeat(np.arange(6), 6)
+    cols4 = np.tile(base_col + (ny - 1) * 6, 6)
+
+    # Main diagonal blocks, interior
+    rows5 = np.tile(base_row + 6, 6 * (ny - 2)) + np.repeat(np.arange(6 * (ny - 2)), 6)
+    col = np.tile(base_col + 6, 6)
+    cols5 = np.tile(col, ny - 2) + np.repeat(6 * np.arange(ny - 2), 36)
+
+    # Find constrained nodes based on closeness to specified cg point
+    if symmetry:
+        idx = ny - 1
+    else:
+        idx = (ny - 1) // 2
+
+    index = 6 * idx
+    num_dofs = 6 * ny
+    arange = np.arange(6)
+
+    # Fixed boundary condition.
+    rows6 = index + arange
+    cols6 = num_dofs + arange
+
+    rows = np.concatenate([rows1, rows2, rows3, rows4, rows5, rows6, cols6])
+    cols = np.concatenate([cols1, cols2, cols3, cols4, cols5, cols6, rows6])
+
+    # Each entry of K is the sum of two entries of the flattened local_stiff_transformed, with a zero
+    # and the boundary condition penalty appended after them. The interior diagonal blocks are the
+    # sum of the blocks of the two elements sharing the node.
+    k_loc_idx = np.arange((ny - 1) * 144).reshape((ny - 1, 12, 12))
+    zero_idx = k_loc_idx.size
+    penalty_idx = k_loc_idx.size + 1
+    k_src1 = np.concatenate(
+        [
+            k_loc_idx[:, :6, 6:].flatten(),
+            k_loc_idx[:, 6:, :6].flatten(),
+            k_loc_idx[0, :6, :6].flatten(),
+            k_loc_idx[-1, 6:, 6:].flatten(),
+            k_loc_idx[:-1, 6:, 6:].flatten(),
+            np.full(12, penalty_idx),
+        ]
+    )
+    k_src2 = np.concatenate(
+        [
+            np.full(len(rows1) + len(rows2) + len(rows3) + len(rows4), zero_idx),
+            k_loc_idx[1:, :6, :6].flatten(),
+            np.full(12, zero_idx),
+        ]
+    )
+
+    # Sort the entries in CSC order so the sparse matrix is built without any conversion
+    order = np.lexsort((rows, cols))
+    k_rows = rows = rows[order]
+    k_cols = cols = cols[order]
+    k_src1 = k_src1[order]
+    k_src2 = k_src2[order]
+    k_indptr = np.concatenate([[0], np.cumsum(np.bincount(cols, minlength=num_dofs + 6))])
+
+    # Every load case has the same K, so the derivatives wrt all the displacements form a block
+    # diagonal matrix, with one block per load case.
+    size = num_dofs + 6
+    sp_size = len(rows)
+    vec_rows = np.tile(rows, vec_size) + np.repeat(size * np.arange(vec_size), sp_size)
+    vec_cols = np.tile(cols, vec_size) + np.repeat(size * np.arange(vec_size), sp_size)
+
+    base_row = np.tile(0, 12)
+    base_col = np.arange(12)
+    row = np.tile(base_row, 12) + np.repeat(np.arange(12), 12)
+    col = np.tile(base_col, 12) + np.repeat(12 * np.arange(12), 12)
+    rows = np.tile(row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 144)
+    cols = np.tile(col, ny - 1) + np.repeat(144 * np.arange(ny - 1), 144)
+
+    # Indices of the displacements multiplying each entry of local_stiff_transformed
+    x_idx = np.tile(np.tile(np.arange(12), 12), ny - 1) + np.repeat(6 * np.arange(ny - 1), 144)
+
+    # All the load cases depend on the same local_stiff_transformed
+    num_entries = len(rows)
+    rows = np.tile(rows, vec_size) + np.repeat(size * np.arange(vec_size), num_entries)
+    cols = np.tile(cols, vec_size)
+
+    return k_rows, k_cols, k_indptr, k_src1, k_src2, vec_rows, vec_cols, rows, cols, x_idx
+
+
+@cached_sparsity_pattern
+def _get_band_pattern(ny, symmetry):
+    # The 6 Lagrange multipliers of the fixed boundary condition are the last unknowns, so they
+    # only couple with the constrained node, which is away from them unless the wing is symmetric.
+    # Moving them right after that node makes K banded, with a bandwidth independent of ny.
+    if symmetry:
+        idx = ny - 1
+    else:
+        idx = (ny - 1) // 2
+
+    num_dofs = 6 * ny
+    size = num_dofs + 6
+    perm = np.concatenate([np.arange(6 * (idx + 1)), num_dofs + np.arange(6), np.arange(6 * (idx + 1), num_dofs)])
+    inv_perm = np.empty(size, int)
+    inv_perm[perm] = np.arange(size)
+
+    k_rows, k_cols = _get_jac_pattern(ny, symmetry, 1)[:2]
+    rows = inv_perm[k_rows]
+    cols = inv_perm[k_cols]
+    num_lower = int(np.max(rows - cols))
+    num_upper = int(np.max(cols - rows))
+
+    # Flat indices of the entries of K in the LAPACK band storage, which also has room for the
+    # num_lower extra upper diagonals filled in by the partial pivoting.
+    band_idx = (num_lower + num_upper + rows - cols) * size + cols
+
+    return perm, band_idx, np.array([num_lower, num_upper])
+
+
+class _BandedLU(object):
+    """
+    LU factorization of a banded matrix with partial pivoting, computed with the LAPACK gbtrf
+    routine and applied with gbtrs. The matrix is given in a permuted order, and the solve
+    method takes and returns vectors in the original order like that of scipy's splu.
+    """
+
+    def __init__(self, ab, num_lower, num_upper, perm):
+        gbtrf, self._gbtrs = get_lapack_funcs(("gbtrf", "gbtrs"), (ab,))
+        self._lu, self._piv, info = gbtrf(ab, num_lower, num_upper, overwrite_ab=True)
+        if info > 0:
+            raise RuntimeError("Factor is exactly singular")
+
+        self._num_lower = num_lower
+        self._num_upper = num_upper
+        self._perm = perm
+
+    def solve(self, rhs, trans="N"):
+        rhs = np.asarray(rhs)
+        if np.iscomplexobj(rhs) and not np.iscomplexobj(self._lu):
+            return self.solve(rhs.real, trans) + 1j * self.solve(rhs.imag, trans)
+
+        sol, info = self._gbtrs(
+            self._lu,
+            self._num_lower,
+            self._num_upper,
+            rhs[self._perm].astype(self._lu.dtype),
+            self._piv,
+            trans={"N": 0, "T": 1}[trans],
+        )
+
+        out = np.empty_like(sol)
+        out[self._perm] = sol
+        return out
+
 
 class FEM(om.ImplicitComponent):
     """
     Component that solves a linear system, Ax=b.
 
     Designed to handle small, dense linear systems (Ax=B) that can be efficiently solved with
-    sparse lu-decomposition. It can be vectorized to either solve for multiple right hand sides,
-    or to solve multiple linear systems.
+    sparse lu-decomposition. It can be vectorized to solve for multiple right hand sides, i.e.
+    multiple load cases of the same structure, with a single factorization of A.
+
+    By default A is factored as a banded matrix with LAPACK, in O(ny) operations and without
+    building a scipy sparse matrix. The Lagrange multipliers of the boundary condition are moved
+    next to the constrained node to keep A banded. The "splu" solver uses scipy's SuperLU instead.
 
     A is represented sparsely as a local_stiff_transformed, which is an ny x 12 x 12 array.
 
     Attributes
     ----------
-    _lup : None or list(object)
-        matrix factorizations returned from scipy.linag.lu_factor for each A matrix
+    _lup : None or object
+        matrix factorization returned from scipy.sparse.linalg.splu or _BandedLU, shared by all the
+        load cases
     k_cols : ndarray
-        Cached column indices for sparse representation of stiffness matrix.
+        Cached column indices for sparse representation of stiffness matrix, in CSC order.
     k_rows : ndarray
-        Cached row indices for sparse representation of stiffness matrix.
+        Cached row indices for sparse representation of stiffness matrix, in CSC order.
     k_data : ndarray
         Cached values for sparse representation of stiffness matrix.
+    _k_indptr : ndarray
+        Cached index pointer of the CSC representation of the stiffness matrix.
+    _k_src : tuple(ndarray)
+        Cached pair of indices of the entries of local_stiff_transformed summed into each entry of k_data.
+    _k_loc : None or ndarray
+        Copy of the local_stiff_transformed the cached stiffness matrix was assembled from.
+    _K : None or csc_matrix
+        Cached stiffness matrix.
+    _x_idx : ndarray
+        Cached indices of the displacements multiplying each entry of local_stiff_transformed.
     """
 
     def __init__(self, **kwargs):
@@ -43,13 +229,26 @@ class FEM(om.ImplicitComponent):
         self.k_cols = None
         self.k_rows = None
         self.k_data = None
+        self._k_indptr = None
+        self._k_src = None
+        self._k_loc = None
+        self._K = None
+        self._x_idx = None
 
     def initialize(self):
         """
         Declare options.
         """
         self.options.declare("surface", types=dict)
-        self.options.declare("vec_size", types=int, default=1, desc="Number of linear systems to solve.")
+        self.options.declare(
+            "vec_size", types=int, default=1, desc="Number of load cases, i.e. right hand sides, to solve for."
+        )
+        self.options.declare(
+            "solver",
+            default="banded",
+            values=["banded", "splu"],
+            desc="Factor the stiffness matrix as a banded matrix with LAPACK or as a sparse matrix with SuperLU.",
+        )
 
     def setup(self):
         """
@@ -62,7 +261,7 @@ class FEM(om.ImplicitComponent):
         vec_size = self.options["vec_size"]
         full_size = size * vec_size
 
-        self._lup = []
+        self._lup = None
         shape = (vec_size, size) if vec_size > 1 else (size,)
 
         init_locK = np.tile(np.eye(12).flatten(), ny - 1).reshape(ny - 1, 12, 12)
@@ -78,66 +277,23 @@ class FEM(om.ImplicitComponent):
 
         # The derivative of residual wrt displacements is the stiffness matrix K. We can use the
         # sparsity pattern here and when constucting the sparse matrix, so save rows and cols.
+        # The patterns are shared by all the instances with the same number of nodes.
+        symmetry = bool(self.options["surface"]["symmetry"])
+        pattern = _get_jac_pattern(ny, symmetry, vec_size)
+        self.k_rows, self.k_cols, self._k_indptr = pattern[:3]
+        self._k_src = pattern[3:5]
+        vec_rows, vec_cols, rows, cols, self._x_idx = pattern[5:]
 
-        base_row = np.repeat(0, 6)
-        base_col = np.arange(6)
-
-        # Upper diagonal blocks
-        rows1 = np.tile(base_row, 6 * (ny - 1)) + np.repeat(np.arange(6 * (ny - 1)), 6)
-        col = np.tile(base_col + 6, 6)
-        cols1 = np.tile(col, ny - 1) + np.repeat(6 * np.arange(ny - 1), 36)
-
-        # Lower diagonal blocks
-        rows2 = np.tile(base_row + 6, 6 * (ny - 1)) + np.repeat(np.arange(6 * (ny - 1)), 6)
-        col = np.tile(base_col, 6)
-        cols2 = np.tile(col, ny - 1) + np.repeat(6 * np.arange(ny - 1), 36)
-
-        # Main diagonal blocks, root
-        rows3 = np.tile(base_row, 6) + np.repeat(np.arange(6), 6)
-        cols3 = np.tile(base_col, 6)
-
-        # Main diagonal blocks, tip
-        rows4 = np.tile(base_row + (ny - 1) * 6, 6) + np.repeat(np.arange(6), 6)
-        cols4 = np.tile(base_col + (ny - 1) * 6, 6)
-
-        # Main diagonal blocks, interior
-        rows5 = np.tile(base_row + 6, 6 * (ny - 2)) + np.repeat(np.arange(6 * (ny - 2)), 6)
-        col = np.tile(base_col + 6, 6)
-        cols5 = np.tile(col, ny - 2) + np.repeat(6 * np.arange(ny - 2), 36)
-
-        # Find constrained nodes based on closeness to specified cg point
-        symmetry = self.options["surface"]["symmetry"]
-        if symmetry:
-            idx = self.ny - 1
-        else:
-            idx = (self.ny - 1) // 2
-
-        index = 6 * idx
-        num_dofs = 6 * ny
-        arange = np.arange(6)
-
-        # Fixed boundary condition.
-        rows6 = index + arange
-        cols6 = num_dofs + arange
-
-        self.k_rows = rows = np.concatenate([rows1, rows2, rows3, rows4, rows5, rows6, cols6])
-        self.k_cols = cols = np.concatenate([cols1, cols2, cols3, cols4, cols5, cols6, rows6])
-
-        sp_size = len(rows)
-        vec_rows = np.tile(rows, vec_size) + np.repeat(sp_size * np.arange(vec_size), sp_size)
-        vec_cols = np.tile(cols, vec_size) + np.repeat(sp_size * np.arange(vec_size), sp_size)
+        self._k_loc = None
+        self._K = None
 
         self.declare_partials(of="disp_aug", wrt="disp_aug", rows=vec_rows, cols=vec_cols)
 
-        base_row = np.tile(0, 12)
-        base_col = np.arange(12)
-        row = np.tile(base_row, 12) + np.repeat(np.arange(12), 12)
-        col = np.tile(base_col, 12) + np.repeat(12 * np.arange(12), 12)
-        rows = np.tile(row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 144)
-        cols = np.tile(col, ny - 1) + np.repeat(144 * np.arange(ny - 1), 144)
-
         self.declare_partials("disp_aug", "local_stiff_transformed", rows=rows, cols=cols)
 
+        if self.options["solver"] == "banded":
+            self._perm, self._band_idx, (self._num_lower, self._num_upper) = _get_band_pattern(ny, symmetry)
+
     def apply_nonlinear(self, inputs, outputs, residuals):
         """
         R = Ax - b.
@@ -151,8 +307,11 @@ class FEM(om.ImplicitComponent):
         residuals : Vector
             unscaled, dimensional residuals written to via residuals[key]
         """
+        # The matrix is only assembled again when local_stiff_transformed changes
         K = self.assemble_CSC_K(inputs)
-        residuals["disp_aug"] = K.dot(outputs["disp_aug"]) - inputs["forces"]
+
+        # The load cases are stored row-wise, so apply K to all of them at once through the transpose
+        residuals["disp_aug"] = K.dot(outputs["disp_aug"].T).T - inputs["forces"]
 
     def solve_nonlinear(self, inputs, outputs):
         """
@@ -165,10 +324,8 @@ class FEM(om.ImplicitComponent):
         outputs : Vector
             unscaled, dimensional output variables read via outputs[key]
         """
-        # lu factorization for use with solve_linear
-        K = self.assemble_CSC_K(inputs)
-        self._lup = splu(K)
-        outputs["disp_aug"] = self._lup.solve(inputs["forces"])
+        self._factor(inputs)
+        outputs["disp_aug"] = self._lup.solve(inputs["forces"].T).T
 
     def linearize(self, inputs, outputs, J):
         """
@@ -185,10 +342,14 @@ class FEM(om.ImplicitComponent):
         """
         x = outputs["disp_aug"]
         vec_size = self.options["vec_size"]
-        ny = self.ny
 
-        idx = np.tile(np.tile(np.arange(12), 12), ny - 1) + np.repeat(6 * np.arange(ny - 1), 144)
-        J["disp_aug", "local_stiff_transformed"] = np.tile(x[idx], vec_size)
+        # The residuals may have been evaluated at other inputs since the last solve_nonlinear, e.g.
+        # under a Newton solver or a complex step, so K and its factorization for solve_linear are
+        # brought up to date here.
+        self._factor(inputs)
+
+        # Each load case depends on the same entries of local_stiff_transformed
+        J["disp_aug", "local_stiff_transformed"] = x[..., self._x_idx].flatten()
 
         J["disp_aug", "disp_aug"] = np.tile(self.k_data, vec_size)
 
@@ -210,40 +371,75 @@ class FEM(om.ImplicitComponent):
         mode : str
             either 'fwd' or 'rev'
         """
-        vec_size = self.options["vec_size"]
-
+        # All the load cases are solved at once as the columns of a single right hand side
         if mode == "fwd":
-            if vec_size > 1:
-                for j in range(vec_size):
-                    d_outputs["disp_aug"] = self._lup.solve(d_residuals["disp_aug"][j])
-            else:
-                d_outputs["disp_aug"] = self._lup.solve(d_residuals["disp_aug"])
+            d_outputs["disp_aug"] = self._lup.solve(d_residuals["disp_aug"].T).T
         else:
-            if vec_size > 1:
-                for j in range(vec_size):
-                    d_residuals["disp_aug"] = self._lup.solve(d_outputs["disp_aug"][j])
+            d_residuals["disp_aug"] = self._lup.solve(d_outputs["disp_aug"].T, trans="T").T
+
+    def _factor(self, inputs):
+        """
+        Compute the lu factorization for use with solve_linear, shared by all the load cases. It is
+        kept as long as local_stiff_transformed does not change.
+        """
+        self._update_K(inputs)
+        if self._lup is None:
+            if self.options["solver"] == "banded":
+                self._lup = _BandedLU(self.assemble_banded_K(inputs), self._num_lower, self._num_upper, self._perm)
             else:
-                d_residuals["disp_aug"] = self._lup.solve(d_outputs["disp_aug"])
+                self._lup = splu(self.assemble_CSC_K(inputs))
 
     def assemble_CSC_K(self, inputs):
         """
         Assemble the stiffness matrix in sparse CSC format.
 
+        Returns
+        -------
+        csc_matrix
+            Stiffness matrix as sparse CSC matrix.
+        """
+        self._update_K(inputs)
+
+        return self._K
+
+    def assemble_banded_K(self, inputs):
+        """
+        Assemble the stiffness matrix, in the order of the banded solver, in LAPACK band storage.
+
         Returns
         -------
         ndarray
-            Stiffness matrix as dense ndarray.
+            Stiffness matrix in band storage, with room for the fill-in of the LU factorization.
+        """
+        self._update_K(inputs)
+
+        data = self.k_data
+        num_diags = 2 * self._num_lower + self._num_upper + 1
+
+        ab = np.zeros((num_diags, self.size), dtype=data.dtype)
+        ab.flat[self._band_idx] = data
+
+        return ab
+
+    def _update_K(self, inputs):
+        """
+        Compute the nonzero entries of the stiffness matrix, in the order of k_rows and k_cols, and
+        the CSC stiffness matrix, unless local_stiff_transformed is the same as in the last call.
+        The factorization is dropped along with the old matrix.
         """
         k_loc = inputs["local_stiff_transformed"]
-        size = self.size
 
-        data1 = k_loc[:, :6, 6:].flatten()
-        data2 = k_loc[:, 6:, :6].flatten()
-        data3 = k_loc[0, :6, :6].flatten()
-        data4 = k_loc[-1, 6:, 6:].flatten()
-        data5 = (k_loc[0:-1, 6:, 6:] + k_loc[1:, :6, :6]).flatten()
-        data6 = np.full((6,), 1e9)
+        if self._k_loc is not None and self._k_loc.dtype == k_loc.dtype and np.array_equal(self._k_loc, k_loc):
+            return
 
-        self.k_data = data = np.concatenate([data1, data2, data3, data4, data5, data6, data6])
+        self._k_loc = k_loc.copy()
 
-        return coo_matrix((data, (self.k_rows, self.k_cols)), shape=(size, size)).tocsc()
+        # Gather the two entries summed into each entry of K, with the zero and the boundary
+        # condition penalty appended after those of local_stiff_transformed.
+        k_src1, k_src2 = self._k_src
+        k_ext = np.concatenate([k_loc.flatten(), [0.0, 1e9]])
+        self.k_data = data = k_ext[k_src1] + k_ext[k_src2]
+
+        size = self.size
+        self._K = csc_matrix((data, self.k_rows, self._k_indptr), shape=(size, size))
+        self._lup = None
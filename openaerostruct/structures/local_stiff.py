@@ -2,6 +2,8 @@ import numpy as np
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
 
 coeffs_2 = np.array(
     [
@@ -29,7 +31,66 @@ coeffs_z = np.array(
 )
 
 
+# Inverse powers of the element length in each entry of the bending blocks. The rows and columns
+# of the rotations, 1 and 3, each divide the base 1 / L**3 factor by 1 / L.
+inv_powers_bending = 3 - np.add.outer([0, 1, 0, 1], [0, 1, 0, 1])
+
+
+def _get_coeffs():
+    """
+    Compute the coefficients in each entry of the flattened local stiffness matrix, along with the
+    index of the section property, out of A, J, Iy, and Iz, and the inverse power of the element
+    length they multiply. The moduli are applied in the component.
+    """
+    coeffs = np.zeros((12, 12))
+    coeffs[0:2, 0:2] = coeffs_2
+    coeffs[2:4, 2:4] = coeffs_2
+    coeffs[4:8, 4:8] = coeffs_y
+    coeffs[8:12, 8:12] = coeffs_z
+
+    props = np.zeros((12, 12), int)
+    props[2:4, 2:4] = 1
+    props[4:8, 4:8] = 2
+    props[8:12, 8:12] = 3
+
+    inv_powers = np.zeros((12, 12), int)
+    inv_powers[0:4, 0:4] = 1
+    inv_powers[4:8, 4:8] = inv_powers_bending
+    inv_powers[8:12, 8:12] = inv_powers_bending
+
+    return coeffs.flatten(), props.flatten(), inv_powers.flatten()
+
+
+coeffs_local_stiff, props_local_stiff, inv_powers_local_stiff = _get_coeffs()
+
+# Names of the section properties, in the order of props_local_stiff
+prop_names = ["A", "J", "Iy", "Iz"]
+
+
+@cached_sparsity_pattern
+def _get_jac_pattern(ny):
+    # Each property only appears in its own block, and the element lengths in all of them
+    nonzero = coeffs_local_stiff != 0.0
+    entries_list = [np.nonzero(nonzero & (props_local_stiff == ind))[0] for ind in range(4)]
+    entries_list.append(np.nonzero(nonzero)[0])
+
+    pattern = []
+    for entries in entries_list:
+        rows = (entries + 144 * np.arange(ny - 1)[:, np.newaxis]).flatten()
+        cols = np.repeat(np.arange(ny - 1), len(entries))
+        pattern.extend([entries, rows, cols])
+
+    return tuple(pattern)
+
+
 class LocalStiff(om.ExplicitComponent):
+    """
+    Compute the local stiffness matrix of each element. Every entry is the product of a constant
+    coefficient, a modulus, one of the section properties, and an inverse power of the element
+    length, so the matrices and their derivatives are each computed with a single broadcast
+    product from precomputed coefficients.
+    """
+
     def initialize(self):
         self.options.declare("surface", types=dict)
 
@@ -46,107 +107,51 @@ class LocalStiff(om.ExplicitComponent):
 
         self.add_output("local_stiff", shape=(ny - 1, 12, 12))
 
-        rows = np.arange(144 * (ny - 1))
-        cols = np.outer(np.arange(ny - 1), np.ones(144, int)).flatten()
+        # Coefficients including the moduli of A, J, Iy, and Iz
+        moduli = np.array([surface["E"], surface["G"], surface["E"], surface["E"]])
+        self.coeffs = moduli[props_local_stiff] * coeffs_local_stiff
 
-        self.declare_partials("local_stiff", "A", rows=rows, cols=cols)
-        self.declare_partials("local_stiff", "J", rows=rows, cols=cols)
-        self.declare_partials("local_stiff", "Iy", rows=rows, cols=cols)
-        self.declare_partials("local_stiff", "Iz", rows=rows, cols=cols)
-        self.declare_partials("local_stiff", "element_lengths", rows=rows, cols=cols)
+        pattern = _get_jac_pattern(ny)
+        self.entries = {}
+        for ind, name in enumerate(prop_names + ["element_lengths"]):
+            entries, rows, cols = pattern[3 * ind : 3 * ind + 3]
+            self.entries[name] = entries
+            self.declare_partials("local_stiff", name, rows=rows, cols=cols)
 
-    def compute(self, inputs, outputs):
-        surface = self.options["surface"]
+    def _get_props_and_inv_L(self, inputs):
+        props = np.stack([inputs[name] for name in prop_names], axis=1)
 
-        E = surface["E"]
-        G = surface["G"]
+        # Powers 0 to 4 of 1 / L, gathered by their exponents
+        inv_L = 1.0 / inputs["element_lengths"]
+        inv_L_powers = np.stack([np.ones_like(inv_L), inv_L, inv_L**2, inv_L**3, inv_L**4], axis=1)
 
-        A = inputs["A"]
-        Iy = inputs["Iy"]
-        Iz = inputs["Iz"]
-        J = inputs["J"]
-        L = inputs["element_lengths"]
+        return props, inv_L_powers
 
-        outputs["local_stiff"] = 0.0
-
-        for i in range(2):
-            for j in range(2):
-                outputs["local_stiff"][:, 0 + i, 0 + j] = E * A / L * coeffs_2[i, j]
-                outputs["local_stiff"][:, 2 + i, 2 + j] = G * J / L * coeffs_2[i, j]
-
-        for i in range(4):
-            for j in range(4):
-                outputs["local_stiff"][:, 4 + i, 4 + j] = E * Iy / L**3 * coeffs_y[i, j]
-                outputs["local_stiff"][:, 8 + i, 8 + j] = E * Iz / L**3 * coeffs_z[i, j]
-
-        for i in [1, 3]:
-            for j in range(4):
-                outputs["local_stiff"][:, 4 + i, 4 + j] *= L
-                outputs["local_stiff"][:, 8 + i, 8 + j] *= L
-        for i in range(4):
-            for j in [1, 3]:
-                outputs["local_stiff"][:, 4 + i, 4 + j] *= L
-                outputs["local_stiff"][:, 8 + i, 8 + j] *= L
+    def compute(self, inputs, outputs):
+        props, inv_L_powers = self._get_props_and_inv_L(inputs)
+
+        # Only the entries in the blocks of the properties are nonzero
+        entries = self.entries["element_lengths"]
+        local_stiff = np.zeros((self.ny - 1, 144), dtype=props.dtype)
+        local_stiff[:, entries] = (
+            self.coeffs[entries]
+            * props[:, props_local_stiff[entries]]
+            * inv_L_powers[:, inv_powers_local_stiff[entries]]
+        )
+        outputs["local_stiff"] = local_stiff.reshape((-1, 12, 12))
 
     def compute_partials(self, inputs, partials):
-        surface = self.options["surface"]
-        ny = surface["mesh"].shape[1]
-        E = surface["E"]
-        G = surface["G"]
-
-        A = inputs["A"]
-        Iy = inputs["Iy"]
-        Iz = inputs["Iz"]
-        J = inputs["J"]
-        L = inputs["element_lengths"]
-
-        derivs_A = partials["local_stiff", "A"].reshape((ny - 1, 12, 12))
-        derivs_Iy = partials["local_stiff", "Iy"].reshape((ny - 1, 12, 12))
-        derivs_Iz = partials["local_stiff", "Iz"].reshape((ny - 1, 12, 12))
-        derivs_J = partials["local_stiff", "J"].reshape((ny - 1, 12, 12))
-        derivs_L = partials["local_stiff", "element_lengths"].reshape((ny - 1, 12, 12))
-
-        derivs_A[:] = 0.0
-        derivs_Iy[:] = 0.0
-        derivs_Iz[:] = 0.0
-        derivs_J[:] = 0.0
-        derivs_L[:] = 0.0
-
-        for i in range(2):
-            for j in range(2):
-                derivs_A[:, 0 + i, 0 + j] = E / L * coeffs_2[i, j]
-                derivs_L[:, 0 + i, 0 + j] = -E * A / L**2 * coeffs_2[i, j]
-
-                derivs_J[:, 2 + i, 2 + j] = G / L * coeffs_2[i, j]
-                derivs_L[:, 2 + i, 2 + j] = -G * J / L**2 * coeffs_2[i, j]
-
-        for i in range(4):
-            for j in range(4):
-                derivs_Iy[:, 4 + i, 4 + j] = E / L**3 * coeffs_y[i, j]
-                derivs_L[:, 4 + i, 4 + j] = -3 * E * Iy / L**4 * coeffs_y[i, j]
-
-                derivs_Iz[:, 8 + i, 8 + j] = E / L**3 * coeffs_z[i, j]
-                derivs_L[:, 8 + i, 8 + j] = -3 * E * Iz / L**4 * coeffs_z[i, j]
-
-        for i in [1, 3]:
-            for j in range(4):
-                derivs_Iy[:, 4 + i, 4 + j] = E / L**2 * coeffs_y[i, j]
-                derivs_L[:, 4 + i, 4 + j] = -2 * E * Iy / L**3 * coeffs_y[i, j]
-
-                derivs_Iz[:, 8 + i, 8 + j] = E / L**2 * coeffs_z[i, j]
-                derivs_L[:, 8 + i, 8 + j] = -2 * E * Iz / L**3 * coeffs_z[i, j]
-        for i in range(4):
-            for j in [1, 3]:
-                derivs_Iy[:, 4 + i, 4 + j] = E / L**2 * coeffs_y[i, j]
-                derivs_L[:, 4 + i, 4 + j] = -2 * E * Iy / L**3 * coeffs_y[i, j]
-
-                derivs_Iz[:, 8 + i, 8 + j] = E / L**2 * coeffs_z[i, j]
-                derivs_L[:, 8 + i, 8 + j] = -2 * E * Iz / L**3 * coeffs_z[i, j]
-
-        for i in [1, 3]:
-            for j in [1, 3]:
-                derivs_Iy[:, 4 + i, 4 + j] = E / L * coeffs_y[i, j]
-                derivs_L[:, 4 + i, 4 + j] = -E * Iy / L**2 * coeffs_y[i, j]
-
-                derivs_Iz[:, 8 + i, 8 + j] = E / L * coeffs_z[i, j]
-                derivs_L[:, 8 + i, 8 + j] = -E * Iz / L**2 * coeffs_z[i, j]
+        props, inv_L_powers = self._get_props_and_inv_L(inputs)
+
+        # Each property only multiplies its coefficients and inverse powers of L
+        for name in prop_names:
+            entries = self.entries[name]
+            partials["local_stiff", name] = (
+                self.coeffs[entries] * inv_L_powers[:, inv_powers_local_stiff[entries]]
+            ).flatten()
+
+        entries = self.entries["element_lengths"]
+        inv_powers = inv_powers_local_stiff[entries]
+        partials["local_stiff", "element_lengths"] = (
+            -inv_powers * self.coeffs[entries] * props[:, props_local_stiff[entries]] * inv_L_powers[:, inv_powers + 1]
+        ).flatten()
@@ -2,8 +2,52 @@ import numpy as np
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+def _get_transform_entries():
+    """
+    List the entries (r, s) of the rotation each entry (p, q) of a transformed 3x3 block depends on.
+    The derivative of (R^T K R)[p, q] wrt R[r, s] is only nonzero for s == p or s == q.
+    """
+    entries = [(p, q, r, s) for p in range(3) for q in range(3) for r in range(3) for s in range(3) if s in (p, q)]
+    p, q, r, s = np.array(entries).T
+
+    return p, q, r, s
+
+
+# Entries of each transformed block, and of the rotation they depend on
+p_transform, q_transform, r_transform, s_transform = _get_transform_entries()
+
+
+@cached_sparsity_pattern
+def _get_jac_pattern(ny):
+    elem_indices = 144 * np.arange(ny - 1)[:, np.newaxis, np.newaxis, np.newaxis]
+    block_indices = 36 * np.arange(4)[:, np.newaxis, np.newaxis] + 3 * np.arange(4)[:, np.newaxis]
+
+    # Each block of the output depends on the same block of local_stiff_permuted, in the order
+    # [elem, row block, col block, row, col, k_row, k_col]
+    row, col, k_row, k_col = np.unravel_index(np.arange(81), (3, 3, 3, 3))
+    stiff_rows = (elem_indices + block_indices + 12 * row + col).flatten()
+    stiff_cols = (elem_indices + block_indices + 12 * k_row + k_col).flatten()
+
+    # and on the entries of the leading 3x3 rotation of the transform, in the order
+    # [elem, row block, col block, entry]
+    transform_rows = (elem_indices + block_indices + 12 * p_transform + q_transform).flatten()
+    transform_cols = np.broadcast_to(elem_indices + 12 * r_transform + s_transform, (ny - 1, 4, 4, len(p_transform)))
+
+    return stiff_rows, stiff_cols, transform_rows, transform_cols.flatten()
+
 
 class LocalStiffTransformed(om.ExplicitComponent):
+    """
+    Transform the local stiffness matrices to the global frame, as T^T K T.
+
+    The transform of each element is block diagonal, with four copies of the same 3x3 rotation R,
+    as computed by Transform, so each 3x3 block of the stiffness matrix is rotated as R^T K R and
+    only the leading rotation of the transform is used.
+    """
+
     def initialize(self):
         self.options.declare("surface", types=dict)
 
@@ -16,26 +60,38 @@ class LocalStiffTransformed(om.ExplicitComponent):
         self.add_input("local_stiff_permuted", shape=(ny - 1, 12, 12))
         self.add_output("local_stiff_transformed", shape=(ny - 1, 12, 12))
 
-        indices = np.arange(144 * (ny - 1)).reshape((ny - 1, 12, 12))
-        ones = np.ones((12, 12), int)
+        stiff_rows, stiff_cols, transform_rows, transform_cols = _get_jac_pattern(ny)
+
+        self.declare_partials("local_stiff_transformed", "transform", rows=transform_rows, cols=transform_cols)
+        self.declare_partials("local_stiff_transformed", "local_stiff_permuted", rows=stiff_rows, cols=stiff_cols)
 
-        rows = np.einsum("ijk,lm->ijklm", indices, ones).flatten()
-        cols = np.einsum("ilm,jk->ijklm", indices, ones).flatten()
+    def _get_blocks(self, inputs):
+        # Rotation of each element and the [row block, col block] 3x3 blocks of its stiffness matrix
+        R = inputs["transform"][:, np.newaxis, np.newaxis, :3, :3]
+        K = inputs["local_stiff_permuted"].reshape((-1, 4, 3, 4, 3)).transpose((0, 1, 3, 2, 4))
 
-        self.declare_partials("local_stiff_transformed", "transform", rows=rows, cols=cols)
-        self.declare_partials("local_stiff_transformed", "local_stiff_permuted", rows=rows, cols=cols)
+        return R, K
 
     def compute(self, inputs, outputs):
-        outputs["local_stiff_transformed"] = np.einsum(
-            "ilj,ilm,imk->ijk", inputs["transform"], inputs["local_stiff_permuted"], inputs["transform"]
-        )
+        R, K = self._get_blocks(inputs)
+
+        transformed = R.swapaxes(-1, -2) @ K @ R
+        outputs["local_stiff_transformed"] = transformed.transpose((0, 1, 3, 2, 4)).reshape((-1, 12, 12))
 
     def compute_partials(self, inputs, partials):
-        partials["local_stiff_transformed", "local_stiff_permuted"] = np.einsum(
-            "ilj,imk->ijklm", inputs["transform"], inputs["transform"]
+        R, K = self._get_blocks(inputs)
+        num_elems = self.ny - 1
+
+        # d (R^T K R)[p, q] / d K[l, m] = R[l, p] R[m, q], the same for all the blocks
+        derivs = np.einsum("ilp,imq->ipqlm", R[:, 0, 0], R[:, 0, 0])
+        partials["local_stiff_transformed", "local_stiff_permuted"] = np.broadcast_to(
+            derivs.reshape((num_elems, 1, 1, 81)), (num_elems, 4, 4, 81)
         ).flatten()
 
+        # d (R^T K R)[p, q] / d R[r, s] = (s == p) (K R)[r, q] + (s == q) (R^T K)[p, r]
+        KR = K @ R
+        RtK = R.swapaxes(-1, -2) @ K
         partials["local_stiff_transformed", "transform"] = (
-            np.einsum("ilj,ilp,kq->ijkpq", inputs["transform"], inputs["local_stiff_permuted"], np.eye(12))
-            + np.einsum("jq,ipm,imk->ijkpq", np.eye(12), inputs["local_stiff_permuted"], inputs["transform"])
+            (s_transform == p_transform) * KR[..., r_transform, q_transform]
+            + (s_transform == q_transform) * RtK[..., p_transform, r_transform]
         ).flatten()
@@ -2,6 +2,61 @@ import numpy as np
 
 import openmdao.api as om
 
+from openaerostruct.utils.sparsity_cache import cached_sparsity_pattern
+
+
+@cached_sparsity_pattern
+def _get_jac_pattern(nx, ny):
+    # First, the direct loads wrt sec_forces terms.
+    base_row = np.array([0, 1, 2, 6, 7, 8])
+    base_col = np.array([0, 1, 2, 0, 1, 2])
+    row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
+    col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
+    rows1 = np.tile(row, nx - 1)
+    cols1 = np.tile(col, nx - 1) + np.repeat(3 * (ny - 1) * np.arange(nx - 1), 6 * (ny - 1))
+
+    # Then, the term from the cross product.
+    base_row = np.array([3, 3, 4, 4, 5, 5])
+    base_col = np.array([1, 2, 0, 2, 0, 1])
+    row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
+    col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
+    row1 = np.tile(row, nx - 1)
+    col1 = np.tile(col, nx - 1) + np.repeat(3 * (ny - 1) * np.arange(nx - 1), 6 * (ny - 1))
+    rows2 = np.tile(row1, 2) + np.repeat(np.array([0, 6]), 6 * (nx - 1) * (ny - 1))
+    cols2 = np.tile(col1, 2)
+
+    sec_forces_rows = np.concatenate([rows1, rows2])
+    sec_forces_cols = np.concatenate([cols1, cols2])
+
+    # Top diagonal is forward-most mesh point.
+    base_row = np.array([3, 3, 4, 4, 5, 5])
+    base_col = np.array([4, 5, 3, 5, 3, 4])
+    row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
+    col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
+    rows1 = np.tile(row, nx)
+    cols1 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * (ny - 1))
+
+    # Bottom diagonal is backward-most mesh point.
+    base_row = np.array([9, 9, 10, 10, 11, 11])
+    base_col = np.array([1, 2, 0, 2, 0, 1])
+    row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
+    col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
+    rows2 = np.tile(row, nx)
+    cols2 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * (ny - 1))
+
+    # Central Diagonal blocks
+    base_row = np.array([3, 3, 4, 4, 5, 5])
+    base_col = np.array([1, 2, 0, 2, 0, 1])
+    row = np.tile(base_row, ny) + np.repeat(6 * np.arange(ny), 6)
+    col = np.tile(base_col, ny) + np.repeat(3 * np.arange(ny), 6)
+    rows3 = np.tile(row, nx)
+    cols3 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * ny)
+
+    def_mesh_rows = np.concatenate([rows1, rows2, rows3])
+    def_mesh_cols = np.concatenate([cols1, cols2, cols3])
+
+    return sec_forces_rows, sec_forces_cols, def_mesh_rows, def_mesh_cols
+
 
 class LoadTransfer(om.ExplicitComponent):
     """
@@ -58,59 +113,11 @@ class LoadTransfer(om.ExplicitComponent):
         # Well, technically the units of this load array are mixed.
         # The first 3 indices are N and the last 3 are N*m.
 
-        # Derivatives
-
-        # First, the direct loads wrt sec_forces terms.
-        base_row = np.array([0, 1, 2, 6, 7, 8])
-        base_col = np.array([0, 1, 2, 0, 1, 2])
-        row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
-        col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
-        rows1 = np.tile(row, nx - 1)
-        cols1 = np.tile(col, nx - 1) + np.repeat(3 * (ny - 1) * np.arange(nx - 1), 6 * (ny - 1))
-
-        # Then, the term from the cross product.
-        base_row = np.array([3, 3, 4, 4, 5, 5])
-        base_col = np.array([1, 2, 0, 2, 0, 1])
-        row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
-        col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
-        row1 = np.tile(row, nx - 1)
-        col1 = np.tile(col, nx - 1) + np.repeat(3 * (ny - 1) * np.arange(nx - 1), 6 * (ny - 1))
-        rows2 = np.tile(row1, 2) + np.repeat(np.array([0, 6]), 6 * (nx - 1) * (ny - 1))
-        cols2 = np.tile(col1, 2)
-
-        rows = np.concatenate([rows1, rows2])
-        cols = np.concatenate([cols1, cols2])
-
-        self.declare_partials(of="loads", wrt="sec_forces", rows=rows, cols=cols)
-
-        # Top diagonal is forward-most mesh point.
-        base_row = np.array([3, 3, 4, 4, 5, 5])
-        base_col = np.array([4, 5, 3, 5, 3, 4])
-        row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
-        col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
-        rows1 = np.tile(row, nx)
-        cols1 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * (ny - 1))
-
-        # Bottom diagonal is backward-most mesh point.
-        base_row = np.array([9, 9, 10, 10, 11, 11])
-        base_col = np.array([1, 2, 0, 2, 0, 1])
-        row = np.tile(base_row, ny - 1) + np.repeat(6 * np.arange(ny - 1), 6)
-        col = np.tile(base_col, ny - 1) + np.repeat(3 * np.arange(ny - 1), 6)
-        rows2 = np.tile(row, nx)
-        cols2 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * (ny - 1))
-
-        # Central Diagonal blocks
-        base_row = np.array([3, 3, 4, 4, 5, 5])
-        base_col = np.array([1, 2, 0, 2, 0, 1])
-        row = np.tile(base_row, ny) + np.repeat(6 * np.arange(ny), 6)
-        col = np.tile(base_col, ny) + np.repeat(3 * np.arange(ny), 6)
-        rows3 = np.tile(row, nx)
-        cols3 = np.tile(col, nx) + np.repeat(3 * ny * np.arange(nx), 6 * ny)
-
-        rows = np.concatenate([rows1, rows2, rows3])
-        cols = np.concatenate([cols1, cols2, cols3])
-
-        self.declare_partials(of="loads", wrt="def_mesh", rows=rows, cols=cols)
+        # Derivatives. The patterns are shared by all the instances with the
+        # same mesh size.
+        sec_forces_rows, sec_forces_cols, def_mesh_rows, def_mesh_cols = _get_jac_pattern(nx, ny)
+        self.declare_partials(of="loads", wrt="sec_forces", rows=sec_forces_rows, cols=sec_forces_cols)
+        self.declare_partials(of="loads", wrt="def_mesh", rows=def_mesh_rows, cols=def_mesh_cols)
 
         # -------------------------------- Check Partial Options-------------------------------------
         self.set_check_partial_options("*", method="cs", step=1e-40)
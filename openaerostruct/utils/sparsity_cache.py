@@ -0,0 +1,91 @@
+"""
+Cache of the sparsity patterns declared by the components.
+
+Many components declare the rows and cols of their sparse partials from
+index arrays that only depend on the shape of a surface and on a few of its
+options, so all the instances of a component in a multipoint problem would
+otherwise build the same arrays again in their setup. The functions that
+build these patterns are decorated with cached_sparsity_pattern, which keeps
+the returned arrays in a module-level cache shared by all instances. The
+arrays are made read-only, since several components may hold them at once.
+"""
+
+import functools
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Default memory budget, in bytes, for all the index arrays kept in the
+# cache. The least recently used patterns are dropped beyond it.
+SPARSITY_CACHE_BUDGET = 2**28
+
+_cache = OrderedDict()
+_cache_info = {"budget": SPARSITY_CACHE_BUDGET, "nbytes": 0}
+
+
+def _get_nbytes(pattern):
+    if isinstance(pattern, np.ndarray):
+        return pattern.nbytes
+    return sum(_get_nbytes(item) for item in pattern)
+
+
+def _set_read_only(pattern):
+    if isinstance(pattern, np.ndarray):
+        pattern.flags.writeable = False
+    else:
+        for item in pattern:
+            _set_read_only(item)
+
+
+def cached_sparsity_pattern(func):
+    """
+    Decorate a function that builds index arrays from hashable arguments,
+    such as numbers of mesh points and surface options, so that its results
+    are shared through the module-level cache.
+
+    The function must return a numpy array or a tuple of numpy arrays,
+    which are made read-only.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        key = (func.__module__, func.__qualname__) + args
+
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+        pattern = func(*args)
+        _set_read_only(pattern)
+
+        nbytes = _get_nbytes(pattern)
+        if nbytes <= _cache_info["budget"]:
+            _cache[key] = pattern
+            _cache_info["nbytes"] += nbytes
+
+            # Drop the least recently used patterns beyond the budget
+            while _cache_info["nbytes"] > _cache_info["budget"]:
+                _, dropped = _cache.popitem(last=False)
+                _cache_info["nbytes"] -= _get_nbytes(dropped)
+
+        return pattern
+
+    return wrapper
+
+
+def set_sparsity_cache_budget(budget):
+    """
+    Set the memory budget of the sparsity pattern cache in bytes, dropping
+    all the cached patterns. A budget of 0 turns the cache off.
+    """
+    clear_sparsity_cache()
+    _cache_info["budget"] = budget
+
+
+def clear_sparsity_cache():
+    """
+    Drop all the cached sparsity patterns.
+    """
+    _cache.clear()
+    _cache_info["nbytes"] = 0
@@ -0,0 +1,85 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.aic_block import AICBlock
+from openaerostruct.aerodynamics.vortex_influence import VortexInfluence
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def run_blocks(surfaces):
+    system_size = sum((surface["mesh"].shape[0] - 1) * (surface["mesh"].shape[1] - 1) for surface in surfaces)
+
+    prob = om.Problem(reports=False)
+    for target in surfaces:
+        for source in surfaces:
+            prob.model.add_subsystem(
+                "aic_{}_{}".format(target["name"], source["name"]),
+                AICBlock(surfaces=surfaces, source=source["name"], target=target["name"]),
+                promotes=["*"],
+            )
+    prob.model.add_subsystem(
+        "vortex_influence",
+        VortexInfluence(surfaces=surfaces, num_eval_points=system_size, eval_name="coll_pts"),
+        promotes=["*"],
+    )
+    prob.setup(force_alloc_complex=True)
+
+    rng = np.random.RandomState(42)
+    prob.set_val("alpha", 3.0)
+    prob.set_val("coll_pts", rng.random_sample((system_size, 3)) * 5.0)
+    for surface in surfaces:
+        for var_name in ["{}_vortex_mesh", "{}_normals"]:
+            var_name = var_name.format(surface["name"])
+            prob.set_val(var_name, rng.random_sample(prob.get_val(var_name).shape) * 5.0)
+
+    prob.run_model()
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def check_blocks(self, surfaces):
+        prob = run_blocks(surfaces)
+
+        # Each block matches the rows and columns of the full AIC matrix
+        ind_1 = 0
+        for target in surfaces:
+            normals = prob.get_val("{}_normals".format(target["name"])).reshape((-1, 3))
+            ind_2 = ind_1 + normals.shape[0]
+            for source in surfaces:
+                vel_mtx = prob.get_val("{}_coll_pts_vel_mtx".format(source["name"]))
+                vel_mtx = vel_mtx.reshape((vel_mtx.shape[0], -1, 3))[ind_1:ind_2]
+                assert_near_equal(
+                    prob.get_val("{}_{}_aic".format(target["name"], source["name"])),
+                    np.einsum("ijk,ik->ij", vel_mtx, normals),
+                    1e-12,
+                )
+            ind_1 = ind_2
+
+        data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40, includes=["*aic_*"])
+        assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+    def test(self):
+        self.check_blocks(get_default_surfaces())
+
+    def test_ground_effect(self):
+        self.check_blocks(get_ground_effect_surfaces())
+
+    def test_unchanged_inputs(self):
+        surfaces = get_default_surfaces()
+        prob = run_blocks(surfaces)
+
+        # A block whose inputs did not change restores its last value
+        comp = prob.model.aic_wing_wing
+        aic = prob.get_val("wing_wing_aic").copy()
+        comp._outputs["wing_wing_aic"] = 0.0
+        prob.set_val("tail_vortex_mesh", prob.get_val("tail_vortex_mesh") + 1.0)
+        prob.run_model()
+        assert_near_equal(prob.get_val("wing_wing_aic"), aic, 1e-15)
+
+
+if __name__ == "__main__":
+    unittest.main()
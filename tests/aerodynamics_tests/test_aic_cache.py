@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from openaerostruct.aerodynamics.aic_cache import AICCache
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_key(self):
+        cache = AICCache(self.tmp_dir.name)
+
+        rng = np.random.RandomState(314)
+        mtx = rng.random_sample((4, 3))
+
+        key = cache.get_key(("tag",), [mtx])
+        self.assertEqual(key, cache.get_key(("tag",), [mtx.copy()]))
+        self.assertEqual(key, cache.get_key(("tag",), [np.asfortranarray(mtx)]))
+
+        # The values, the shapes, the data types and the tags are all part of the key
+        perturbed = mtx.copy()
+        perturbed[1, 2] += 1e-15
+        self.assertNotEqual(key, cache.get_key(("tag",), [perturbed]))
+        self.assertNotEqual(key, cache.get_key(("tag",), [mtx.reshape((3, 4))]))
+        self.assertNotEqual(key, cache.get_key(("tag",), [mtx.astype(np.float32)]))
+        self.assertNotEqual(key, cache.get_key(("other tag",), [mtx]))
+
+    def test_save_load(self):
+        cache = AICCache(self.tmp_dir.name)
+
+        rng = np.random.RandomState(314)
+        arrays = {"lu": rng.random_sample((5, 5)), "piv": np.arange(5, dtype=np.int32)}
+
+        key = cache.get_key(("tag",), [arrays["lu"]])
+        self.assertIsNone(cache.load(key))
+
+        cache.save(key, arrays)
+
+        # A second cache on the same directory sees the entry
+        cached = AICCache(self.tmp_dir.name).load(key)
+        self.assertEqual(set(cached), {"lu", "piv"})
+        for name, array in arrays.items():
+            self.assertIsInstance(cached[name], np.memmap)
+            self.assertEqual(cached[name].dtype, array.dtype)
+            np.testing.assert_array_equal(cached[name], array)
+
+        cache.clear()
+        self.assertIsNone(cache.load(key))
+
+    def test_eviction(self):
+        array = np.zeros(1000)
+
+        # Room for two entries, including the headers of the .npy files
+        cache = AICCache(self.tmp_dir.name, max_bytes=int(2.5 * array.nbytes))
+
+        keys = [cache.get_key((index,), []) for index in range(4)]
+
+        cache.save(keys[0], {"array": array})
+        cache.save(keys[1], {"array": array})
+
+        # Use the first entry so that the second one is the least recently used
+        os.utime(os.path.join(cache.directory, keys[1]), (0, 0))
+        self.assertIsNotNone(cache.load(keys[0]))
+
+        cache.save(keys[2], {"array": array})
+        self.assertIsNotNone(cache.load(keys[0]))
+        self.assertIsNone(cache.load(keys[1]))
+        self.assertIsNotNone(cache.load(keys[2]))
+
+        # Entries larger than the whole cache are not stored
+        cache.save(keys[3], {"array": np.zeros(1000000)})
+        self.assertIsNone(cache.load(keys[3]))
+        self.assertIsNotNone(cache.load(keys[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.batched_eval_velocities import BatchedEvalVelocities
+from openaerostruct.aerodynamics.biot_savart import compute_system_vel_mtx
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def set_ground_plane_images(prob, surface):
+    """Give each flight condition the same surface but its own ground plane image."""
+    if surface.get("groundplane", False):
+        nx = surface["mesh"].shape[0]
+        vortex_mesh = prob.get_val("comp.{}_vortex_mesh".format(surface["name"]))
+        vortex_mesh[:, :nx] = vortex_mesh[0, :nx]
+        prob.set_val("comp.{}_vortex_mesh".format(surface["name"]), vortex_mesh)
+
+
+def get_vortex_meshes(prob, surfaces, index):
+    """Get the vortex meshes of a single flight condition."""
+    vortex_meshes = []
+    for surface in surfaces:
+        vortex_mesh = prob.get_val("comp.{}_vortex_mesh".format(surface["name"]))
+        if surface.get("groundplane", False):
+            vortex_mesh = vortex_mesh[index]
+        vortex_meshes.append(vortex_mesh)
+    return vortex_meshes
+
+
+def check_partials(test_obj, surfaces):
+    """Check the partials at random, non-coincident mesh and evaluation points."""
+    system_size = sum((surface["mesh"].shape[0] - 1) * (surface["mesh"].shape[1] - 1) for surface in surfaces)
+    num_eval_points = system_size
+
+    # Two of the flight conditions share the same wake direction
+    alpha = np.array([3.0, -2.0, 3.0])
+    vec_size = len(alpha)
+
+    comp = BatchedEvalVelocities(
+        surfaces=surfaces, num_eval_points=num_eval_points, eval_name="test_name", vec_size=vec_size
+    )
+
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("comp", comp)
+    prob.setup(force_alloc_complex=True)
+
+    rng = np.random.RandomState(42)
+    prob.set_val("comp.alpha", alpha)
+    prob.set_val("comp.test_name", rng.random_sample((num_eval_points, 3)) * 5.0)
+    prob.set_val("comp.circulations", rng.random_sample((vec_size, system_size)))
+    prob.set_val("comp.freestream_velocities", rng.random_sample((vec_size, system_size, 3)))
+    for surface in surfaces:
+        vortex_mesh_name = "comp.{}_vortex_mesh".format(surface["name"])
+        prob.set_val(vortex_mesh_name, rng.random_sample(prob.get_val(vortex_mesh_name).shape) * 5.0)
+        set_ground_plane_images(prob, surface)
+
+    prob.run_model()
+
+    for i in range(vec_size):
+        vortex_meshes = get_vortex_meshes(prob, surfaces, i)
+        vel_mtx = compute_system_vel_mtx(surfaces, vortex_meshes, prob.get_val("comp.test_name"), alpha[i])
+        velocities = prob.get_val("comp.freestream_velocities")[i] + np.einsum(
+            "ijk,j->ik", vel_mtx, prob.get_val("comp.circulations")[i]
+        )
+        assert_near_equal(prob.get_val("comp.test_name_velocities")[i], velocities, 1e-12)
+
+    data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
+    assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        check_partials(self, get_default_surfaces())
+
+    def test_ground_effect(self):
+        check_partials(self, get_ground_effect_surfaces())
+
+    def test_right_wing(self):
+        surfaces = get_default_surfaces()
+
+        # flip each surface to lie on right
+        for surface in surfaces:
+            surface["mesh"] = surface["mesh"][:, ::-1, :]
+            surface["mesh"][:, :, 1] *= -1.0
+
+        check_partials(self, surfaces)
+
+
+if __name__ == "__main__":
+    unittest.main()
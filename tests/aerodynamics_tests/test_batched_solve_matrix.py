@@ -0,0 +1,96 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.batched_solve_matrix import BatchedSolveMatrix
+from openaerostruct.aerodynamics.biot_savart import compute_system_vel_mtx
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def set_ground_plane_images(prob, surface):
+    """Give each flight condition the same surface but its own ground plane image."""
+    if surface.get("groundplane", False):
+        nx = surface["mesh"].shape[0]
+        vortex_mesh = prob.get_val("comp.{}_vortex_mesh".format(surface["name"]))
+        vortex_mesh[:, :nx] = vortex_mesh[0, :nx]
+        prob.set_val("comp.{}_vortex_mesh".format(surface["name"]), vortex_mesh)
+
+
+def get_vortex_meshes(prob, surfaces, index):
+    """Get the vortex meshes of a single flight condition."""
+    vortex_meshes = []
+    for surface in surfaces:
+        vortex_mesh = prob.get_val("comp.{}_vortex_mesh".format(surface["name"]))
+        if surface.get("groundplane", False):
+            vortex_mesh = vortex_mesh[index]
+        vortex_meshes.append(vortex_mesh)
+    return vortex_meshes
+
+
+def check_partials(test_obj, surfaces):
+    """Check the partials at random, non-coincident mesh and collocation points."""
+    system_size = sum((surface["mesh"].shape[0] - 1) * (surface["mesh"].shape[1] - 1) for surface in surfaces)
+
+    # Two of the flight conditions share the same wake direction
+    alpha = np.array([3.0, -2.0, 3.0])
+    vec_size = len(alpha)
+
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("comp", BatchedSolveMatrix(surfaces=surfaces, vec_size=vec_size))
+    prob.setup(force_alloc_complex=True)
+
+    rng = np.random.RandomState(42)
+    prob.set_val("comp.alpha", alpha)
+    prob.set_val("comp.coll_pts", rng.random_sample((system_size, 3)) * 5.0)
+    prob.set_val("comp.freestream_velocities", rng.random_sample((vec_size, system_size, 3)))
+    for surface in surfaces:
+        for var_name in ["comp.{}_vortex_mesh", "comp.{}_normals"]:
+            var_name = var_name.format(surface["name"])
+            prob.set_val(var_name, rng.random_sample(prob.get_val(var_name).shape) * 5.0)
+        set_ground_plane_images(prob, surface)
+
+    prob.run_model()
+
+    # The flight conditions with ground effect have their own images
+    if any(surface.get("groundplane", False) for surface in surfaces):
+        test_obj.assertEqual(len(prob.model.comp.lu), vec_size)
+    else:
+        test_obj.assertEqual(len(prob.model.comp.lu), 2)
+
+    # Each flight condition satisfies its own AIC linear system
+    normals = np.concatenate(
+        [prob.get_val("comp.{}_normals".format(surface["name"])).reshape((-1, 3)) for surface in surfaces]
+    )
+    for i in range(vec_size):
+        vortex_meshes = get_vortex_meshes(prob, surfaces, i)
+        vel_mtx = compute_system_vel_mtx(surfaces, vortex_meshes, prob.get_val("comp.coll_pts"), alpha[i])
+        mtx = np.einsum("ijk,ik->ij", vel_mtx, normals)
+        rhs = -np.einsum("ij,ij->i", prob.get_val("comp.freestream_velocities")[i], normals)
+        assert_near_equal(prob.get_val("comp.circulations")[i], np.linalg.solve(mtx, rhs), 1e-10)
+
+    data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
+    assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        check_partials(self, get_default_surfaces())
+
+    def test_ground_effect(self):
+        check_partials(self, get_ground_effect_surfaces())
+
+    def test_right_wing(self):
+        surfaces = get_default_surfaces()
+
+        # flip each surface to lie on right
+        for surface in surfaces:
+            surface["mesh"] = surface["mesh"][:, ::-1, :]
+            surface["mesh"][:, :, 1] *= -1.0
+
+        check_partials(self, surfaces)
+
+
+if __name__ == "__main__":
+    unittest.main()
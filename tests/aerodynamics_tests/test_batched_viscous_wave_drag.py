@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.batched_viscous_wave_drag import BatchedViscousWaveDrag
+from openaerostruct.aerodynamics.viscous_drag import ViscousDrag
+from openaerostruct.aerodynamics.wave_drag import WaveDrag
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+def get_surfaces():
+    surfaces = get_default_surfaces()
+    surfaces[0]["with_wave"] = True
+    surfaces[1].update({"with_viscous": True, "with_wave": True, "k_lam": 0.0, "c_max_t": 0.3})
+
+    # A fully laminar surface and one without viscous or wave drag
+    fin = dict(surfaces[0], name="fin", k_lam=1.0, with_wave=False, symmetry=False)
+    canard = dict(surfaces[0], name="canard", with_viscous=False, with_wave=False)
+
+    return surfaces + [fin, canard]
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.surfaces = get_surfaces()
+        self.Mach_number = np.array([0.85, 0.95, 0.7])
+        self.re = np.array([1.0e6, 5.0e6, 2.0e7])
+        vec_size = len(self.Mach_number)
+
+        rng = np.random.default_rng(0)
+        self.geometry = {}
+        for surface in self.surfaces:
+            ny = surface["mesh"].shape[1]
+            self.geometry[surface["name"]] = {
+                "S_ref": rng.uniform(5.0, 10.0),
+                "widths": rng.uniform(1.0, 2.0, ny - 1),
+                "lengths_spanwise": rng.uniform(2.0, 3.0, ny - 1),
+                "lengths": rng.uniform(1.0, 3.0, ny),
+                "chords": rng.uniform(1.0, 3.0, ny),
+                "t_over_c": rng.uniform(0.05, 0.2, ny - 1),
+                "CL": rng.uniform(0.3, 0.9, vec_size),
+            }
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", BatchedViscousWaveDrag(surfaces=self.surfaces, vec_size=vec_size))
+        prob.setup(force_alloc_complex=True)
+
+        prob["comp.Mach_number"] = self.Mach_number
+        prob["comp.re"] = self.re
+        for name, geometry in self.geometry.items():
+            for var, val in geometry.items():
+                prob["comp." + name + "_" + var] = val
+        prob.run_model()
+
+        self.prob = prob
+
+    def test_per_surface(self):
+        # Each surface and flight condition matches its own ViscousDrag and
+        # WaveDrag
+        for surface in self.surfaces:
+            name = surface["name"]
+            geometry = self.geometry[name]
+
+            for i, (M, re) in enumerate(zip(self.Mach_number, self.re)):
+                prob = om.Problem(reports=False)
+                prob.model.add_subsystem("viscous", ViscousDrag(surface=surface))
+                prob.model.add_subsystem("wave", WaveDrag(surface=surface))
+                prob.setup()
+
+                for var in ["S_ref", "widths", "lengths_spanwise", "lengths", "t_over_c"]:
+                    prob["viscous." + var] = geometry[var]
+                for var in ["widths", "lengths_spanwise", "chords", "t_over_c"]:
+                    prob["wave." + var] = geometry[var]
+                prob["wave.CL"] = geometry["CL"][i]
+                prob["viscous.Mach_number"] = M
+                prob["wave.Mach_number"] = M
+                prob["viscous.re"] = re
+
+                with np.errstate(divide="ignore"):
+                    prob.run_model()
+
+                assert_near_equal(self.prob["comp." + name + "_CDv"][i], prob["viscous.CDv"][0], 1e-12)
+                assert_near_equal(self.prob["comp." + name + "_CDw"][i], prob["wave.CDw"][0], 1e-12)
+
+        # The wave drag is active in some of the flight conditions
+        self.assertTrue(np.any(self.prob["comp.wing_CDw"] > 0.0))
+        self.assertTrue(np.all(self.prob["comp.canard_CDv"] == 0.0))
+
+    def test_partials(self):
+        data = self.prob.check_partials(compact_print=True, method="cs", step=1e-40, out_stream=None)
+        assert_check_partials(data, atol=1e-10, rtol=1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
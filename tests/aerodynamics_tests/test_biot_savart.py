@@ -0,0 +1,193 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.aerodynamics.biot_savart import (
+    assemble_vel_mtx_partials,
+    compute_vel_mtx,
+    compute_vel_mtx_deriv_tile,
+    compute_vel_mtx_tile,
+    get_vel_mtx_jac_pattern,
+)
+from openaerostruct.aerodynamics.eval_mtx import EvalVelMtx
+from openaerostruct.aerodynamics.get_vectors import GetVectors
+from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def run_vectors_pipeline(surfaces, eval_points, alpha=3.0):
+    """Compute the AIC matrices with the GetVectors + EvalVelMtx pipeline."""
+    num_eval_points = eval_points.shape[0]
+
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes=["*"])
+    prob.model.add_subsystem(
+        "get_vectors",
+        GetVectors(surfaces=surfaces, num_eval_points=num_eval_points, eval_name="pts"),
+        promotes=["*"],
+    )
+    prob.model.add_subsystem(
+        "mtx_assy",
+        EvalVelMtx(surfaces=surfaces, num_eval_points=num_eval_points, eval_name="pts"),
+        promotes=["*"],
+    )
+    prob.model.set_input_defaults("alpha", val=alpha, units="deg")
+    prob.setup()
+
+    for surface in surfaces:
+        prob.set_val(surface["name"] + "_def_mesh", surface["mesh"])
+    prob.set_val("pts", eval_points)
+    if any(surface.get("groundplane", False) for surface in surfaces):
+        prob.set_val("height_agl", 10.0)
+
+    prob.run_model()
+
+    return prob
+
+
+def compute_segment_velocity(points, x1, x2):
+    """
+    Compute the velocity induced at the points by a straight vortex segment
+    with a unit circulation going from x1 to x2, with the closed form
+    (r1 x r2) / |r1 x r2|^2 * r0 . (r1 / |r1| - r2 / |r2|) / (4 pi).
+    """
+    r0 = x2 - x1
+    r1 = points - x1
+    r2 = points - x2
+
+    r1_x_r2 = np.cross(r1, r2)
+    r1_unit = r1 / np.linalg.norm(r1, axis=-1)[:, np.newaxis]
+    r2_unit = r2 / np.linalg.norm(r2, axis=-1)[:, np.newaxis]
+    scale = (r1_unit - r2_unit).dot(r0) / np.sum(r1_x_r2**2, axis=-1) / (4 * np.pi)
+
+    return r1_x_r2 * scale[:, np.newaxis]
+
+
+class Test(unittest.TestCase):
+    def check_surfaces(self, surfaces, alpha=3.0):
+        eval_points = np.random.RandomState(314).random_sample((7, 3)) * 5.0
+        prob = run_vectors_pipeline(surfaces, eval_points, alpha)
+
+        for surface in surfaces:
+            name = surface["name"]
+            right_wing = abs(surface["mesh"][0, 0, 1]) < abs(surface["mesh"][0, -1, 1])
+            vortex_mesh = prob.get_val(name + "_vortex_mesh")
+            vel_mtx = prob.get_val(name + "_pts_vel_mtx")
+
+            # Check both a single tile and one evaluation point per tile
+            for mem_budget in [1e9, 1.0]:
+                direct = compute_vel_mtx(
+                    vortex_mesh,
+                    eval_points,
+                    alpha,
+                    symmetry=surface["symmetry"],
+                    ground_effect=surface.get("groundplane", False),
+                    right_wing=right_wing,
+                    mem_budget=mem_budget,
+                )
+                assert_near_equal(direct, vel_mtx, 1e-12)
+
+    def test_default(self):
+        self.check_surfaces(get_default_surfaces())
+
+    def test_ground_effect(self):
+        self.check_surfaces(get_ground_effect_surfaces())
+
+    def test_right_wing(self):
+        surfaces = get_default_surfaces()
+
+        # flip each surface to lie on right
+        for surface in surfaces:
+            surface["mesh"] = surface["mesh"][:, ::-1, :]
+            surface["mesh"][:, :, 1] *= -1.0
+
+        self.check_surfaces(surfaces)
+
+    def test_dtype(self):
+        # Without an output array, the kernels and the result are both in the requested precision
+        rng = np.random.RandomState(314)
+        vortex_mesh = rng.random_sample((3, 4, 3))
+        eval_points = 3.0 * rng.random_sample((5, 3))
+
+        double = compute_vel_mtx(vortex_mesh, eval_points, 3.0)
+        single = compute_vel_mtx(vortex_mesh, eval_points, 3.0, dtype=np.float32)
+        self.assertEqual(double.dtype, np.float64)
+        self.assertEqual(single.dtype, np.float32)
+        assert_near_equal(single, double, 1e-5)
+
+        # An output array keeps its own type
+        out = np.zeros(double.shape)
+        self.assertIs(compute_vel_mtx(vortex_mesh, eval_points, 3.0, out=out, dtype=np.float32), out)
+        self.assertEqual(out.dtype, np.float64)
+        assert_near_equal(out, double, 1e-5)
+
+    def test_closed_form(self):
+        # A ring followed by a horseshoe, compared with the velocities of
+        # their straight segments. The trailing legs are long enough to be
+        # considered semi-infinite.
+        rng = np.random.RandomState(314)
+        alpha = 3.0
+
+        vortex_mesh = np.zeros((3, 2, 3))
+        vortex_mesh[:, :, 0] = np.arange(3)[:, np.newaxis]
+        vortex_mesh[:, :, 1] = np.arange(2)
+        vortex_mesh += 0.1 * rng.random_sample(vortex_mesh.shape)
+        eval_points = 3.0 * rng.random_sample((5, 3)) - 0.5
+
+        alpha_rad = alpha * np.pi / 180.0
+        trailing = 1e6 * np.array([np.cos(alpha_rad), 0.0, np.sin(alpha_rad)])
+
+        expected = np.zeros((5, 2, 1, 3))
+        for i in range(2):
+            A, B, C, D = vortex_mesh[i, 1], vortex_mesh[i, 0], vortex_mesh[i + 1, 0], vortex_mesh[i + 1, 1]
+            if i == 0:
+                vertices = [A, B, C, D, A]
+            else:
+                vertices = [A, B, C, C + trailing, D + trailing, D, A]
+
+            for x1, x2 in zip(vertices[:-1], vertices[1:]):
+                expected[:, i, 0] += compute_segment_velocity(eval_points, x1, x2)
+
+        assert_near_equal(compute_vel_mtx(vortex_mesh, eval_points, alpha), expected, 1e-10)
+
+    def test_jac_pattern(self):
+        rng = np.random.RandomState(314)
+        nx, ny = 3, 4
+
+        for symmetry in [False, True]:
+            for ground_effect in [False, True]:
+                for right_wing in [False, True]:
+                    rows, cols = get_vel_mtx_jac_pattern(nx, ny, symmetry, ground_effect, right_wing)
+
+                    nx_actual = 2 * nx if ground_effect else nx
+                    ny_actual = 2 * ny - 1 if symmetry else ny
+
+                    # The entries shared by the real and ghost rings at the
+                    # symmetry plane only appear once
+                    num_vectors = nx_actual * ny_actual * 3
+                    self.assertEqual(len(np.unique(rows * num_vectors + cols)), len(rows))
+
+                    vectors = rng.random_sample((2, nx_actual, ny_actual, 3)) - 0.5
+                    derivs_list = compute_vel_mtx_deriv_tile(vectors, 3.0, nx, ground_effect)
+                    data = assemble_vel_mtx_partials(derivs_list, ny, symmetry)
+                    self.assertEqual(data.shape, (2, len(rows)))
+
+                    # Compare against the derivatives of a perturbed AIC matrix
+                    step = 1e-7
+                    d_vectors = rng.random_sample(vectors.shape)
+                    jvp = np.zeros((2, (nx - 1) * (ny - 1) * 3))
+                    for i in range(2):
+                        np.add.at(jvp[i], rows, data[i] * d_vectors[i].flatten()[cols])
+
+                    args = (nx, symmetry, ground_effect, right_wing)
+                    fd = (
+                        compute_vel_mtx_tile(vectors + step * d_vectors, 3.0, *args)
+                        - compute_vel_mtx_tile(vectors - step * d_vectors, 3.0, *args)
+                    ) / (2 * step)
+                    assert_near_equal(jvp, fd.reshape((2, -1)), 1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.block_solve_matrix import BlockSolveMatrix
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        surfaces = get_default_surfaces()
+        surfaces.append(dict(surfaces[1], name="fin"))
+        self.surfaces = surfaces
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", BlockSolveMatrix(surfaces=surfaces), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        self.prob = prob
+
+        sizes = [(surface["mesh"].shape[0] - 1) * (surface["mesh"].shape[1] - 1) for surface in surfaces]
+        self.offsets = np.cumsum([0] + sizes)
+        system_size = self.offsets[-1]
+
+        rng = np.random.RandomState(42)
+        self.mtx = rng.random_sample((system_size, system_size)) + system_size * np.eye(system_size)
+        self.set_mtx()
+
+        for surface in surfaces:
+            normals_name = "{}_normals".format(surface["name"])
+            prob.set_val(normals_name, rng.random_sample(prob.get_val(normals_name).shape))
+        prob.set_val("freestream_velocities", rng.random_sample((system_size, 3)))
+
+    def set_mtx(self):
+        offsets = self.offsets
+        for i, target in enumerate(self.surfaces):
+            for j, source in enumerate(self.surfaces):
+                self.prob.set_val(
+                    "{}_{}_aic".format(target["name"], source["name"]),
+                    self.mtx[offsets[i] : offsets[i + 1], offsets[j] : offsets[j + 1]],
+                )
+
+    def check_solution(self):
+        prob = self.prob
+        normals = np.concatenate(
+            [prob.get_val("{}_normals".format(surface["name"])).reshape((-1, 3)) for surface in self.surfaces]
+        )
+        rhs = -np.einsum("ij,ij->i", prob.get_val("freestream_velocities"), normals)
+        assert_near_equal(prob.get_val("circulations"), np.linalg.solve(self.mtx, rhs), 1e-12)
+
+    def test(self):
+        self.prob.run_model()
+        self.check_solution()
+
+        data = self.prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
+        assert_check_partials(data, atol=1e-6, rtol=1e-6)
+
+    def test_update(self):
+        comp = self.prob.model.comp
+        self.prob.run_model()
+        lu_blocks = list(comp.lu_blocks)
+
+        # Changing the blocks of the last surface only factors its diagonal
+        # block of U again
+        self.mtx[self.offsets[2] :, :] += 1.0
+        self.mtx[:, self.offsets[2] :] += 0.5
+        self.set_mtx()
+        self.prob.run_model()
+        self.check_solution()
+
+        self.assertIs(comp.lu_blocks[0], lu_blocks[0])
+        self.assertIs(comp.lu_blocks[1], lu_blocks[1])
+        self.assertIsNot(comp.lu_blocks[2], lu_blocks[2])
+
+        # Changing the blocks of the first surface factors everything again
+        self.mtx[: self.offsets[1], : self.offsets[1]] += 0.1
+        self.set_mtx()
+        self.prob.run_model()
+        self.check_solution()
+
+        self.assertIsNot(comp.lu_blocks[1], lu_blocks[1])
+
+    def test_linear_solve(self):
+        prob = self.prob
+        prob.run_model()
+
+        system_size = self.offsets[-1]
+        rng = np.random.RandomState(0)
+        rhs = rng.random_sample(system_size)
+
+        comp = prob.model.comp
+        for trans in [0, 1]:
+            sol = comp._solve(comp.lu_blocks, comp.factor_blocks, rhs, trans)
+            mtx = self.mtx.T if trans else self.mtx
+            assert_near_equal(sol, np.linalg.solve(mtx, rhs), 1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,7 @@ import unittest
 import numpy as np
 
 import openmdao.api as om
-from openmdao.utils.assert_utils import assert_check_partials
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
 
 from openaerostruct.aerodynamics.convert_velocity import ConvertVelocity
 from openaerostruct.utils.testing import run_test, get_default_surfaces
@@ -35,6 +35,38 @@ class Test(unittest.TestCase):
 
         assert_check_partials(check)
 
+    def test_vec_size(self):
+        surfaces = get_default_surfaces()
+
+        comp = ConvertVelocity(surfaces=surfaces, rotational=True, vec_size=3)
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", comp)
+        prob.setup(force_alloc_complex=True)
+
+        rng = np.random.default_rng(0)
+        prob["comp.rotational_velocities"] = rng.random(prob["comp.rotational_velocities"].shape)
+        prob["comp.alpha"] = [-2.0, 3.0, 8.0]
+        prob["comp.beta"] = [0.0, 5.0, 15.0]
+        prob["comp.v"] = 10.0
+        prob.run_model()
+
+        # Each flight condition matches the scalar analysis
+        scalar_prob = om.Problem()
+        scalar_prob.model.add_subsystem("comp", ConvertVelocity(surfaces=surfaces, rotational=True))
+        scalar_prob.setup()
+        scalar_prob["comp.v"] = 10.0
+        for i in range(3):
+            scalar_prob["comp.rotational_velocities"] = prob["comp.rotational_velocities"][i]
+            scalar_prob["comp.alpha"] = prob["comp.alpha"][i]
+            scalar_prob["comp.beta"] = prob["comp.beta"][i]
+            scalar_prob.run_model()
+            assert_near_equal(prob["comp.freestream_velocities"][i], scalar_prob["comp.freestream_velocities"], 1e-14)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
 
 if __name__ == "__main__":
     unittest.main()
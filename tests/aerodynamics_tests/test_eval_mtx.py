@@ -32,6 +32,14 @@ class Test(unittest.TestCase):
         data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
         assert_check_partials(data, atol=1e20, rtol=1e-6)
 
+    def test_tiled(self):
+        surfaces = get_default_surfaces()
+
+        # A tiny memory budget forces one evaluation point per tile
+        comp = EvalVelMtx(surfaces=surfaces, num_eval_points=3, eval_name="test_name", mem_budget=1.0)
+
+        run_test(self, comp, complex_flag=True)
+
 
 class GroundEffectTest(unittest.TestCase):
     def test(self):
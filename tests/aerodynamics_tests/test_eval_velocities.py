@@ -11,6 +11,15 @@ class Test(unittest.TestCase):
         comp = EvalVelocities(surfaces=surfaces, eval_name="TestEval", num_eval_points=11)
 
         run_test(self, comp)
+        self.assertFalse(comp.matrix_free)
+
+    def test_matrix_free(self):
+        surfaces = get_default_surfaces()
+
+        comp = EvalVelocities(surfaces=surfaces, eval_name="TestEval", num_eval_points=11, matrix_free=True)
+
+        run_test(self, comp)
+        self.assertTrue(comp.matrix_free)
 
 
 if __name__ == "__main__":
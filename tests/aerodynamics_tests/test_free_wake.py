@@ -0,0 +1,113 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.free_wake import WakeLines, compute_wake_influence, get_wake_direction
+from openaerostruct.aerodynamics.states import VLMStates
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def get_surfaces(ground_effect=False):
+    if ground_effect:
+        surfaces = get_ground_effect_surfaces()
+    else:
+        surfaces = get_default_surfaces()
+
+    # Move the tail behind and above the wing, so that the wake of the wing
+    # does not cross it
+    surfaces[1]["mesh"] = surfaces[1]["mesh"] + np.array([60.0, 0.0, 5.0])
+
+    return surfaces
+
+
+def get_normals(mesh):
+    normals = np.cross(mesh[:-1, 1:] - mesh[1:, :-1], mesh[:-1, :-1] - mesh[1:, 1:], axis=2)
+    return normals / np.linalg.norm(normals, axis=2)[:, :, np.newaxis]
+
+
+def run_states(surfaces, free_wake):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("states", VLMStates(surfaces=surfaces, free_wake=free_wake), promotes=["*"])
+    prob.model.set_input_defaults("alpha", 5.0, units="deg")
+    prob.model.set_input_defaults("beta", 0.0, units="deg")
+    prob.model.set_input_defaults("v", 50.0, units="m/s")
+    prob.setup(force_alloc_complex=True)
+
+    prob.set_val("rho", 1.2, units="kg/m**3")
+    for surface in surfaces:
+        prob.set_val(surface["name"] + "_def_mesh", surface["mesh"])
+        prob.set_val(surface["name"] + "_normals", get_normals(surface["mesh"]))
+    if any(surface.get("groundplane", False) for surface in surfaces):
+        prob.set_val("height_agl", 20.0)
+
+    prob.run_model()
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def test_straight_wake(self):
+        # Wake lines aligned with alpha carry no correction to the straight
+        # trailing legs
+        surfaces = get_default_surfaces()
+        alpha = 3.0
+        num_wake_panels = 4
+
+        vortex_meshes = []
+        wake_meshes = []
+        for surface in surfaces:
+            vortex_mesh = surface["mesh"]
+            if surface["symmetry"]:
+                vortex_mesh = np.concatenate([vortex_mesh, vortex_mesh[:, -2::-1] * np.array([1.0, -1.0, 1.0])], axis=1)
+            vortex_meshes.append(vortex_mesh)
+
+            steps = 0.7 * np.arange(1, num_wake_panels + 1)
+            wake_meshes.append(vortex_mesh[-1] + steps[:, np.newaxis, np.newaxis] * get_wake_direction(alpha))
+
+        lines = WakeLines(surfaces, num_wake_panels)
+        polylines = lines.get_polylines(vortex_meshes, wake_meshes, alpha)
+
+        rng = np.random.RandomState(42)
+        eval_points = rng.random_sample((20, 3)) * 10.0 - 5.0
+
+        wake_vel_mtx = compute_wake_influence(polylines, eval_points, get_wake_direction(alpha))
+        assert_near_equal(wake_vel_mtx, np.zeros_like(wake_vel_mtx), 1e-12)
+
+    def test_close_to_fixed_wake(self):
+        surfaces = get_surfaces()
+
+        circulations = run_states(surfaces, False).get_val("circulations")
+        free_wake_circulations = run_states(surfaces, True).get_val("circulations")
+
+        # The relaxed wake barely changes the loads of a lightly loaded wing
+        assert_near_equal(free_wake_circulations, circulations, 5e-2)
+
+    def check_partials(self, surfaces):
+        prob = run_states(surfaces, True)
+
+        # The wake should have converged
+        comp = prob.model.states.solve_matrix
+        comp.run_apply_nonlinear()
+        for name, residual in comp._residuals.items():
+            self.assertLess(np.max(np.abs(residual)), 1e-8)
+
+        data = prob.check_partials(
+            compact_print=True,
+            out_stream=None,
+            method="cs",
+            step=1e-40,
+            includes=["*solve_matrix*", "*eval_velocities*"],
+        )
+        assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+    def test_partials(self):
+        self.check_partials(get_surfaces())
+
+    def test_ground_effect_partials(self):
+        self.check_partials(get_surfaces(ground_effect=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
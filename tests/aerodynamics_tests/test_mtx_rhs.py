@@ -11,6 +11,15 @@ class Test(unittest.TestCase):
         comp = VLMMtxRHSComp(surfaces=surfaces)
 
         run_test(self, comp)
+        self.assertFalse(comp.matrix_free)
+
+    def test_matrix_free(self):
+        surfaces = get_default_surfaces()
+
+        comp = VLMMtxRHSComp(surfaces=surfaces, matrix_free=True)
+
+        run_test(self, comp)
+        self.assertTrue(comp.matrix_free)
 
 
 if __name__ == "__main__":
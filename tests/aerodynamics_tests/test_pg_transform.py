@@ -3,8 +3,10 @@ import unittest
 import numpy as np
 
 import openmdao.api as om
-from openmdao.utils.assert_utils import assert_check_partials
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
 
+from openaerostruct.aerodynamics.pg_fused_transform import FusedInversePGTransform, FusedPGTransform
+from openaerostruct.aerodynamics.pg_transform import InversePGTransform, PGTransform
 from openaerostruct.aerodynamics.pg_scale import ScaleFromPrandtlGlauert, ScaleToPrandtlGlauert
 from openaerostruct.aerodynamics.pg_wind_rotation import RotateFromWindFrame, RotateToWindFrame
 from openaerostruct.utils.testing import get_default_surfaces
@@ -103,6 +105,61 @@ class Test(unittest.TestCase):
 
         assert_check_partials(check, atol=1e-5, rtol=1e-5)
 
+    def test_fused_to_pg(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", FusedPGTransform(surfaces=surfaces, rotational=True))
+        prob.model.add_subsystem("group", PGTransform(surfaces=surfaces, rotational=True))
+        prob.setup(force_alloc_complex=True)
+
+        in_names = ["alpha", "beta", "Mach_number", "coll_pts", "force_pts", "bound_vecs", "rotational_velocities"]
+        for surface in surfaces:
+            in_names += [surface["name"] + "_def_mesh", surface["name"] + "_normals"]
+
+        for name in in_names:
+            val = self.rng.random(prob["comp." + name].shape)
+            prob["comp." + name] = val
+            prob["group." + name] = val
+
+        prob.run_model()
+
+        # The fused transform matches the rotation followed by the scaling
+        for name in in_names[3:]:
+            assert_near_equal(prob["comp.{}_pg".format(name)], prob["group.{}_pg".format(name)], 1e-14)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40, includes=["comp"])
+
+        assert_check_partials(check, atol=1e-5, rtol=1e-5)
+
+    def test_fused_from_pg(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", FusedInversePGTransform(surfaces=surfaces))
+        prob.model.add_subsystem("group", InversePGTransform(surfaces=surfaces))
+        prob.setup(force_alloc_complex=True)
+
+        in_names = ["alpha", "beta", "Mach_number"]
+        for surface in surfaces:
+            in_names.append(surface["name"] + "_sec_forces_pg")
+
+        for name in in_names:
+            val = self.rng.random(prob["comp." + name].shape)
+            prob["comp." + name] = val
+            prob["group." + name] = val
+
+        prob.run_model()
+
+        # The fused transform matches the scaling followed by the rotation
+        for surface in surfaces:
+            name = surface["name"] + "_sec_forces"
+            assert_near_equal(prob["comp." + name], prob["group." + name], 1e-14)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40, includes=["comp"])
+
+        assert_check_partials(check, atol=1e-5, rtol=1e-5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -3,7 +3,7 @@ import unittest
 import numpy as np
 
 import openmdao.api as om
-from openmdao.utils.assert_utils import assert_check_partials
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
 
 from openaerostruct.aerodynamics.rotational_velocity import RotationalVelocity
 from openaerostruct.utils.testing import run_test, get_default_surfaces
@@ -36,6 +36,36 @@ class Test(unittest.TestCase):
 
         assert_check_partials(check)
 
+    def test_vec_size(self):
+        surfaces = get_default_surfaces()
+
+        comp = RotationalVelocity(surfaces=surfaces, vec_size=3)
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", comp)
+        prob.setup(force_alloc_complex=True)
+
+        prob["comp.omega"] = np.array([[0.3, 0.4, -0.1], [0.0, 0.0, 0.0], [-0.2, 0.1, 0.5]])
+        prob["comp.cg"] = np.array([0.1, 0.6, 0.4])
+        rng = np.random.default_rng(0)
+        prob["comp.coll_pts"] = rng.random(prob["comp.coll_pts"].shape)
+        prob.run_model()
+
+        # Each flight condition matches the scalar analysis
+        scalar_prob = om.Problem()
+        scalar_prob.model.add_subsystem("comp", RotationalVelocity(surfaces=surfaces))
+        scalar_prob.setup()
+        scalar_prob["comp.cg"] = prob["comp.cg"]
+        scalar_prob["comp.coll_pts"] = prob["comp.coll_pts"]
+        for i in range(3):
+            scalar_prob["comp.omega"] = prob["comp.omega"][i]
+            scalar_prob.run_model()
+            assert_near_equal(prob["comp.rotational_velocities"][i], scalar_prob["comp.rotational_velocities"], 1e-14)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,13 @@
 import unittest
+from unittest import mock
+
 import numpy as np
+from scipy.sparse.linalg import gmres
 
 import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
 
-from openaerostruct.aerodynamics.solve_matrix import SolveMatrix
+from openaerostruct.aerodynamics.solve_matrix import SolveMatrix, solve_gmres
 from openaerostruct.utils.testing import run_test, get_default_surfaces
 
 
@@ -29,6 +33,131 @@ class Test(unittest.TestCase):
         group.add_subsystem("solve_matrix", comp, promotes=["*"])
 
         run_test(self, group)
+        self.assertFalse(comp.matrix_free)
+
+    def test_gmres(self):
+        surfaces = get_default_surfaces()
+
+        system_size = 0
+        for surface in surfaces:
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+        # Diagonally dominant, like the AIC matrix
+        rng = np.random.RandomState(314)
+        mtx = rng.random_sample((system_size, system_size)) + system_size * np.identity(system_size)
+        rhs = rng.random_sample(system_size)
+
+        for preconditioner in ["surface", "strip"]:
+            group = om.Group()
+            comp = SolveMatrix(surfaces=surfaces, solver="gmres", preconditioner=preconditioner)
+
+            indep_var_comp = om.IndepVarComp()
+            indep_var_comp.add_output("rhs", val=rhs, units="m/s")
+            indep_var_comp.add_output("mtx", val=mtx, units="1/m")
+
+            group.add_subsystem("indep_var_comp", indep_var_comp, promotes=["*"])
+            group.add_subsystem("solve_matrix", comp, promotes=["*"])
+
+            prob = run_test(self, group)
+
+            assert_near_equal(prob["comp.circulations"], np.linalg.solve(mtx, rhs), 1e-10)
+
+            # Warm-started from the converged circulations, a slightly
+            # perturbed system reuses the preconditioner
+            precon_factors = comp.precon_factors
+            prob["comp.mtx"] = mtx + 1e-3 * rng.random_sample((system_size, system_size))
+            prob.run_model()
+
+            self.assertIs(comp.precon_factors, precon_factors)
+            assert_near_equal(prob["comp.circulations"], np.linalg.solve(prob["comp.mtx"], rhs), 1e-10)
+
+    def test_gmres_tol(self):
+        # Before scipy 1.12, the relative tolerance of GMRES is called tol
+        rng = np.random.RandomState(314)
+        mtx = rng.random_sample((10, 10)) + 10.0 * np.identity(10)
+        rhs = rng.random_sample(10)
+
+        calls = []
+
+        def old_gmres(mtx, rhs, tol=1e-5, **kwargs):
+            calls.append(tol)
+            return gmres(mtx, rhs, rtol=tol, **kwargs)
+
+        with mock.patch("openaerostruct.aerodynamics.solve_matrix.gmres", old_gmres):
+            sol, info = solve_gmres(mtx, rhs, 1e-12, atol=0.0)
+
+        self.assertEqual(calls, [1e-12])
+        self.assertEqual(info, 0)
+        assert_near_equal(sol, np.linalg.solve(mtx, rhs), 1e-10)
+
+    def test_matrix_free(self):
+        surfaces = get_default_surfaces()
+
+        system_size = 0
+        for surface in surfaces:
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+        rng = np.random.RandomState(314)
+        mtx = rng.random_sample((system_size, system_size)) + system_size * np.identity(system_size)
+
+        group = om.Group()
+        comp = SolveMatrix(surfaces=surfaces, matrix_free=True)
+
+        indep_var_comp = om.IndepVarComp()
+        indep_var_comp.add_output("rhs", val=rng.random_sample(system_size), units="m/s")
+        indep_var_comp.add_output("mtx", val=mtx, units="1/m")
+
+        group.add_subsystem("indep_var_comp", indep_var_comp, promotes=["*"])
+        group.add_subsystem("solve_matrix", comp, promotes=["*"])
+
+        prob = run_test(self, group)
+        self.assertTrue(comp.matrix_free)
+
+        # The factorization from the solve is reused when linearizing
+        prob.run_model()
+        lu = comp.lu
+        prob.model.run_linearize()
+        self.assertIs(comp.lu, lu)
+
+        totals = prob.compute_totals(of=["comp.circulations"], wrt=["comp.rhs"])
+        assert_near_equal(totals["comp.circulations", "comp.rhs"], np.linalg.inv(mtx), 1e-10)
+
+    def test_mixed_precision(self):
+        surfaces = get_default_surfaces()
+
+        system_size = 0
+        for surface in surfaces:
+            nx = surface["mesh"].shape[0]
+            ny = surface["mesh"].shape[1]
+            system_size += (nx - 1) * (ny - 1)
+
+        rng = np.random.RandomState(314)
+        mtx = rng.random_sample((system_size, system_size)) + system_size * np.identity(system_size)
+        rhs = rng.random_sample(system_size)
+
+        group = om.Group()
+        comp = SolveMatrix(surfaces=surfaces, precision="mixed")
+
+        indep_var_comp = om.IndepVarComp()
+        indep_var_comp.add_output("rhs", val=rhs, units="m/s")
+        indep_var_comp.add_output("mtx", val=mtx, units="1/m")
+
+        group.add_subsystem("indep_var_comp", indep_var_comp, promotes=["*"])
+        group.add_subsystem("solve_matrix", comp, promotes=["*"])
+
+        prob = run_test(self, group)
+
+        # The single precision factors are refined to a double precision solution
+        prob.run_model()
+        self.assertEqual(comp.lu[0].dtype, np.float32)
+        assert_near_equal(prob["comp.circulations"], np.linalg.solve(mtx, rhs), 1e-10)
+
+        totals = prob.compute_totals(of=["comp.circulations"], wrt=["comp.rhs"])
+        assert_near_equal(totals["comp.circulations", "comp.rhs"], np.linalg.inv(mtx), 1e-10)
 
 
 if __name__ == "__main__":
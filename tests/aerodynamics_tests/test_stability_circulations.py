@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.solve_matrix import SolveMatrix
+from openaerostruct.aerodynamics.stability_circulations import StabilityCirculations
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+def set_inputs(prob, rng):
+    comp = prob.model.comp
+    prob["comp.mtx"] = rng.random(prob["comp.mtx"].shape) + 10.0 * np.eye(comp.system_size)
+    prob["comp.freestream_velocity_derivs"] = rng.random(prob["comp.freestream_velocity_derivs"].shape)
+    prob["comp.coll_pts_alpha_velocities"] = rng.random(prob["comp.coll_pts_alpha_velocities"].shape)
+    for surface in comp.options["surfaces"]:
+        name = "comp.{}_normals".format(surface["name"])
+        prob[name] = rng.random(prob[name].shape)
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", StabilityCirculations(surfaces=surfaces))
+        prob.setup(force_alloc_complex=True)
+
+        set_inputs(prob, np.random.default_rng(0))
+        prob.run_model()
+
+        # The residuals vanish at the solution
+        prob.model.run_apply_nonlinear()
+        assert_near_equal(prob.model.comp._residuals["circulation_derivs"], np.zeros((5, 11)), 1e-12)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
+    def test_solve_matrix(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        solve_matrix = prob.model.add_subsystem("solve_matrix", SolveMatrix(surfaces=surfaces))
+        prob.model.add_subsystem("comp", StabilityCirculations(surfaces=surfaces, solve_matrix=solve_matrix))
+        prob.setup()
+
+        rng = np.random.default_rng(0)
+        set_inputs(prob, rng)
+        prob["solve_matrix.mtx"] = prob["comp.mtx"]
+        prob.run_model()
+
+        # The factorization of the SolveMatrix component is reused
+        self.assertIsNone(prob.model.comp.lu)
+        prob.model.run_apply_nonlinear()
+        assert_near_equal(prob.model.comp._residuals["circulation_derivs"], np.zeros((5, 11)), 1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openaerostruct.aerodynamics.stability_coefficients import StabilityCoefficients
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+        surfaces[0]["with_wave"] = True
+        surfaces[1]["with_wave"] = False
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", StabilityCoefficients(surfaces=surfaces))
+        prob.setup(force_alloc_complex=True)
+
+        rng = np.random.default_rng(0)
+        for name in prob.model.comp._var_rel_names["input"]:
+            prob["comp." + name] = rng.random(prob["comp." + name].shape) + 0.5
+        prob["comp.alpha"] = 4.0
+        prob["comp.beta"] = 3.0
+        prob.run_model()
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+import unittest
+
+from openaerostruct.aerodynamics.stability_eval_velocities import StabilityEvalVelocities
+from openaerostruct.utils.testing import run_test, get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        comp = StabilityEvalVelocities(surfaces=surfaces)
+
+        run_test(self, comp, complex_flag=True, method="cs")
+
+
+if __name__ == "__main__":
+    unittest.main()
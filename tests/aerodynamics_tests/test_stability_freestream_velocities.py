@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.stability_freestream_velocities import StabilityFreestreamVelocities
+from openaerostruct.utils.testing import run_test, get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        comp = StabilityFreestreamVelocities(surfaces=surfaces)
+
+        run_test(self, comp, complex_flag=True, method="cs")
+
+    def test_derivatives(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", StabilityFreestreamVelocities(surfaces=surfaces))
+        prob.setup(force_alloc_complex=True)
+
+        prob["comp.alpha"] = 4.0
+        prob["comp.beta"] = -3.0
+        prob["comp.v"] = 50.0
+        prob["comp.cg"] = np.array([0.1, 0.6, 0.4])
+        rng = np.random.default_rng(0)
+        prob["comp.coll_pts"] = rng.random(prob["comp.coll_pts"].shape)
+        prob.run_model()
+
+        # The angle rows are the complex step of the freestream velocity
+        # vector, and the rate rows the velocity of a unit rotation
+        def get_velocity(alpha, beta):
+            alpha = alpha * np.pi / 180.0
+            beta = beta * np.pi / 180.0
+            return 50.0 * np.array(
+                [np.cos(alpha) * np.cos(beta), -np.sin(beta), np.sin(alpha) * np.cos(beta)], dtype=complex
+            )
+
+        derivs = prob["comp.freestream_velocity_derivs"]
+        assert_near_equal(derivs[0, 0], get_velocity(4.0 + 1e-40j, -3.0).imag / 1e-40, 1e-12)
+        assert_near_equal(derivs[1, 0], get_velocity(4.0, -3.0 + 1e-40j).imag / 1e-40, 1e-12)
+        assert_near_equal(derivs[3], np.cross([0.0, 1.0, 0.0], prob["comp.coll_pts"] - prob["comp.cg"]), 1e-12)
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openaerostruct.aerodynamics.stability_panel_forces import StabilityPanelForces
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", StabilityPanelForces(surfaces=surfaces))
+        prob.setup(force_alloc_complex=True)
+
+        rng = np.random.default_rng(0)
+        for name in ["rho", "circulations", "circulation_derivs", "force_pts_velocities", "bound_vecs"]:
+            prob["comp." + name] = rng.random(prob["comp." + name].shape)
+        prob["comp.force_pts_velocity_derivs"] = rng.random(prob["comp.force_pts_velocity_derivs"].shape)
+        prob.run_model()
+
+        check = prob.check_partials(compact_print=True, method="cs", step=1e-40)
+
+        assert_check_partials(check)
+
+
+if __name__ == "__main__":
+    unittest.main()
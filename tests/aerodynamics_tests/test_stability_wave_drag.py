@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.stability_wave_drag import StabilityWaveDrag
+from openaerostruct.aerodynamics.wave_drag import WaveDrag
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surface = get_default_surfaces()[0]
+        surface["with_wave"] = True
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", StabilityWaveDrag(surface=surface), promotes=["*"])
+        prob.model.add_subsystem("wave_drag", WaveDrag(surface=surface), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+
+        prob["Mach_number"] = 0.95
+        prob["CL"] = 0.7
+        prob["t_over_c"] = np.array([0.15, 0.12, 0.1])
+        prob["lengths_spanwise"] = np.array([12.14757848, 11.91832712, 11.43730892])
+        prob["widths"] = np.array([10.01555924, 9.80832351, 9.79003729])
+        prob["chords"] = np.array([2.72835132, 5.12528179, 7.88916016, 13.6189974])
+        prob.run_model()
+
+        # The output is the derivative of the wave drag with respect to CL
+        totals = prob.compute_totals("CDw", "CL")
+        assert_near_equal(prob["CDw_CL"], totals["CDw", "CL"][0], 1e-10)
+
+        check = prob.check_partials(compact_print=True, includes=["comp"])
+
+        assert_check_partials(check, atol=1e-5, rtol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
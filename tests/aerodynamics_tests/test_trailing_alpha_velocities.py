@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openaerostruct.aerodynamics.trailing_alpha_velocities import TrailingAlphaVelocities
+from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes=["*"])
+        prob.model.add_subsystem("comp", TrailingAlphaVelocities(surfaces=surfaces), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+
+        for surface in surfaces:
+            prob[surface["name"] + "_def_mesh"] = surface["mesh"]
+
+        rng = np.random.default_rng(0)
+        prob["alpha"] = 3.0
+        prob["coll_pts"] = rng.random(prob["coll_pts"].shape) * 10.0 + np.array([0.0, 0.0, 2.0])
+        prob["force_pts"] = rng.random(prob["force_pts"].shape) * 10.0 + np.array([0.0, 0.0, 2.0])
+        prob["circulations"] = rng.random(prob["circulations"].shape)
+        prob.run_model()
+
+        check = prob.check_partials(compact_print=True, includes=["comp"])
+
+        assert_check_partials(check, atol=1e-5, rtol=1e-4)
+
+    def test_ground_effect(self):
+        surfaces = get_ground_effect_surfaces()
+
+        prob = om.Problem()
+        prob.model.add_subsystem("comp", TrailingAlphaVelocities(surfaces=surfaces))
+
+        with self.assertRaises(ValueError):
+            prob.setup()
+
+
+if __name__ == "__main__":
+    unittest.main()
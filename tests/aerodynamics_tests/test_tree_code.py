@@ -0,0 +1,125 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.aerodynamics.biot_savart import compute_vel_mtx, get_surface_options
+from openaerostruct.aerodynamics.tree_code import (
+    InducedVelocityOperator,
+    compute_trailing_influence,
+    compute_trailing_influence_alpha_deriv,
+)
+from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def get_vortex_meshes(surfaces):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes=["*"])
+    prob.setup()
+
+    for surface in surfaces:
+        prob.set_val(surface["name"] + "_def_mesh", surface["mesh"])
+    if any(surface.get("groundplane", False) for surface in surfaces):
+        prob.set_val("height_agl", 10.0)
+
+    prob.run_model()
+
+    return [prob.get_val(surface["name"] + "_vortex_mesh") for surface in surfaces]
+
+
+def get_dense_vel_mtx(surfaces, vortex_meshes, eval_points, alpha):
+    vel_mtx = []
+    for surface, vortex_mesh in zip(surfaces, vortex_meshes):
+        right_wing = abs(surface["mesh"][0, 0, 1]) < abs(surface["mesh"][0, -1, 1])
+        surface_vel_mtx = compute_vel_mtx(
+            vortex_mesh,
+            eval_points,
+            alpha,
+            surface["symmetry"],
+            surface.get("groundplane", False),
+            right_wing,
+        )
+        vel_mtx.append(surface_vel_mtx.reshape((eval_points.shape[0], -1, 3)))
+    return np.concatenate(vel_mtx, axis=1)
+
+
+class Test(unittest.TestCase):
+    def check_exact(self, surfaces):
+        alpha = 3.0
+        rng = np.random.RandomState(314)
+        eval_points = rng.random_sample((20, 3)) * 8.0 - 4.0
+
+        vortex_meshes = get_vortex_meshes(surfaces)
+        vel_mtx = get_dense_vel_mtx(surfaces, vortex_meshes, eval_points, alpha)
+
+        # With an opening angle of zero, every ring is evaluated exactly
+        operator = InducedVelocityOperator(surfaces, vortex_meshes, eval_points, alpha, theta=0.0, leaf_size=4)
+
+        circulations = rng.random_sample(vel_mtx.shape[1])
+        assert_near_equal(operator.matvec(circulations), np.einsum("ijk,j->ik", vel_mtx, circulations), 1e-12)
+
+        velocities = rng.random_sample((20, 3))
+        assert_near_equal(operator.rmatvec(velocities), np.einsum("ijk,ik->j", vel_mtx, velocities), 1e-12)
+
+    def test_exact(self):
+        self.check_exact(get_default_surfaces())
+
+    def test_exact_ground_effect(self):
+        self.check_exact(get_ground_effect_surfaces())
+
+    def test_exact_right_wing(self):
+        surfaces = get_default_surfaces()
+
+        # flip each surface to lie on right
+        for surface in surfaces:
+            surface["mesh"] = surface["mesh"][:, ::-1, :]
+            surface["mesh"][:, :, 1] *= -1.0
+
+        self.check_exact(surfaces)
+
+    def test_trailing_alpha_deriv(self):
+        surfaces = get_default_surfaces()
+        rng = np.random.RandomState(314)
+        eval_points = rng.random_sample((20, 3)) * 8.0 - 4.0
+
+        # The analytic derivatives match the complex step of the influence
+        for surface, vortex_mesh in zip(surfaces, get_vortex_meshes(surfaces)):
+            nx, _, symmetry, ground_effect, right_wing = get_surface_options(surface)
+            options = (nx, symmetry, ground_effect, right_wing)
+
+            vel_mtx = compute_trailing_influence(vortex_mesh, eval_points, 3.0 + 1e-40j, *options)
+            vel_mtx_alpha = compute_trailing_influence_alpha_deriv(vortex_mesh, eval_points, 3.0, *options)
+            assert_near_equal(vel_mtx_alpha, vel_mtx.imag / 1e-40, 1e-12)
+
+    def test_accuracy(self):
+        mesh_dict = {"num_y": 61, "num_x": 7, "wing_type": "rect", "symmetry": True, "span": 10.0, "root_chord": 1.0}
+        surfaces = [{"name": "wing", "symmetry": True, "mesh": generate_mesh(mesh_dict)}]
+        mesh = surfaces[0]["mesh"]
+
+        alpha = 3.0
+        eval_points = 0.25 * (mesh[:-1, :-1] + mesh[1:, :-1] + mesh[:-1, 1:] + mesh[1:, 1:]).reshape((-1, 3))
+        eval_points[:, 0] += 0.01
+
+        vortex_meshes = get_vortex_meshes(surfaces)
+        vel_mtx = get_dense_vel_mtx(surfaces, vortex_meshes, eval_points, alpha)
+
+        circulations = np.random.RandomState(314).random_sample(vel_mtx.shape[1])
+        velocities = np.einsum("ijk,j->ik", vel_mtx, circulations)
+
+        # The error should drop quickly with the opening angle
+        errors = []
+        for theta in [0.5, 0.2, 0.1]:
+            operator = InducedVelocityOperator(surfaces, vortex_meshes, eval_points, alpha, theta=theta, leaf_size=8)
+            self.assertGreater(operator.far_mtx.nnz, 0)
+            errors.append(np.max(np.abs(operator.matvec(circulations) - velocities)) / np.max(np.abs(velocities)))
+
+        self.assertLess(errors[0], 1e-2)
+        self.assertLess(errors[1], 1e-3)
+        self.assertLess(errors[2], 1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openaerostruct.aerodynamics.tree_solve_matrix import TreeSolveMatrix
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def check_partials(test_obj, surfaces):
+    """Check the partials at random, non-coincident mesh and collocation points."""
+    system_size = sum((surface["mesh"].shape[0] - 1) * (surface["mesh"].shape[1] - 1) for surface in surfaces)
+
+    # With an opening angle of zero the analysis is exact, so it is
+    # consistent with the derivatives computed from the exact kernels.
+    comp = TreeSolveMatrix(surfaces=surfaces, theta=0.0, leaf_size=4)
+
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("comp", comp)
+    prob.setup(force_alloc_complex=True)
+
+    rng = np.random.RandomState(42)
+    prob.set_val("comp.alpha", 3.0)
+    prob.set_val("comp.coll_pts", rng.random_sample((system_size, 3)) * 5.0)
+    prob.set_val("comp.freestream_velocities", rng.random_sample((system_size, 3)))
+    for surface in surfaces:
+        for var_name in ["comp.{}_vortex_mesh", "comp.{}_normals"]:
+            var_name = var_name.format(surface["name"])
+            prob.set_val(var_name, rng.random_sample(prob.get_val(var_name).shape) * 5.0)
+
+    prob.run_model()
+
+    # The circulations should satisfy the AIC linear system
+    residuals = prob.model.comp._residuals
+    prob.model.comp.run_apply_nonlinear()
+    test_obj.assertLess(np.max(np.abs(residuals["circulations"])), 1e-10)
+
+    data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
+    assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        check_partials(self, get_default_surfaces())
+
+    def test_ground_effect(self):
+        check_partials(self, get_ground_effect_surfaces())
+
+    def test_right_wing(self):
+        surfaces = get_default_surfaces()
+
+        # flip each surface to lie on right
+        for surface in surfaces:
+            surface["mesh"] = surface["mesh"][:, ::-1, :]
+            surface["mesh"][:, :, 1] *= -1.0
+
+        check_partials(self, surfaces)
+
+
+if __name__ == "__main__":
+    unittest.main()
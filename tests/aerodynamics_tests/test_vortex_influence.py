@@ -0,0 +1,135 @@
+import unittest
+
+import numpy as np
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.aerodynamics.eval_mtx import EvalVelMtx
+from openaerostruct.aerodynamics.get_vectors import GetVectors
+from openaerostruct.aerodynamics.vortex_influence import VortexInfluence
+from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
+from openaerostruct.utils.testing import get_default_surfaces, get_ground_effect_surfaces
+
+
+def get_right_wing_surfaces():
+    surfaces = get_default_surfaces()
+
+    # flip each surface to lie on right
+    for surface in surfaces:
+        surface["mesh"] = surface["mesh"][:, ::-1, :]
+        surface["mesh"][:, :, 1] *= -1.0
+
+    return surfaces
+
+
+def check_partials(test_obj, comp):
+    """Check the partials at random, non-coincident mesh and evaluation points."""
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem("comp", comp)
+    prob.setup(force_alloc_complex=True)
+
+    rng = np.random.RandomState(42)
+    eval_name = comp.options["eval_name"]
+    prob.set_val("comp.alpha", 3.0)
+    prob.set_val("comp." + eval_name, rng.random_sample((comp.options["num_eval_points"], 3)) * 5.0)
+    for surface in comp.options["surfaces"]:
+        vortex_mesh_name = "comp.{}_vortex_mesh".format(surface["name"])
+        prob.set_val(vortex_mesh_name, rng.random_sample(prob.get_val(vortex_mesh_name).shape) * 5.0)
+
+    prob.run_model()
+
+    data = prob.check_partials(compact_print=True, out_stream=None, method="cs", step=1e-40)
+    assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surfaces = get_default_surfaces()
+
+        comp = VortexInfluence(surfaces=surfaces, num_eval_points=2, eval_name="test_name")
+
+        check_partials(self, comp)
+
+    def test_tiled(self):
+        surfaces = get_default_surfaces()
+
+        # A tiny memory budget forces one evaluation point per tile
+        comp = VortexInfluence(surfaces=surfaces, num_eval_points=3, eval_name="test_name", mem_budget=1.0)
+
+        check_partials(self, comp)
+
+    def test_ground_effect(self):
+        surfaces = get_ground_effect_surfaces()
+
+        comp = VortexInfluence(surfaces=surfaces, num_eval_points=2, eval_name="test_name")
+
+        check_partials(self, comp)
+
+    def test_right_wing(self):
+        surfaces = get_right_wing_surfaces()
+
+        comp = VortexInfluence(surfaces=surfaces, num_eval_points=2, eval_name="test_name")
+
+        check_partials(self, comp)
+
+    def check_matches_vectors_pipeline(self, surfaces):
+        num_eval_points = 7
+        eval_points = np.random.RandomState(314).random_sample((num_eval_points, 3)) * 5.0
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("vortex_mesh", VortexMesh(surfaces=surfaces), promotes=["*"])
+        prob.model.add_subsystem(
+            "get_vectors",
+            GetVectors(surfaces=surfaces, num_eval_points=num_eval_points, eval_name="pts"),
+            promotes_inputs=["*"],
+        )
+        prob.model.add_subsystem(
+            "mtx_assy",
+            EvalVelMtx(surfaces=surfaces, num_eval_points=num_eval_points, eval_name="pts"),
+            promotes_inputs=["alpha"],
+        )
+        prob.model.add_subsystem(
+            "fused",
+            VortexInfluence(surfaces=surfaces, num_eval_points=num_eval_points, eval_name="pts"),
+            promotes_inputs=["*"],
+        )
+        for surface in surfaces:
+            vectors_name = "{}_pts_vectors".format(surface["name"])
+            prob.model.connect("get_vectors." + vectors_name, "mtx_assy." + vectors_name)
+        prob.model.set_input_defaults("alpha", val=3.0, units="deg")
+        prob.setup()
+
+        for surface in surfaces:
+            prob.set_val(surface["name"] + "_def_mesh", surface["mesh"])
+        prob.set_val("pts", eval_points)
+        if any(surface.get("groundplane", False) for surface in surfaces):
+            prob.set_val("height_agl", 10.0)
+
+        prob.run_model()
+
+        for surface in surfaces:
+            vel_mtx_name = "{}_pts_vel_mtx".format(surface["name"])
+            assert_near_equal(prob.get_val("fused." + vel_mtx_name), prob.get_val("mtx_assy." + vel_mtx_name), 1e-12)
+
+        # The total derivatives through both paths should agree as well
+        of = ["fused.{}_pts_vel_mtx".format(surface["name"]) for surface in surfaces]
+        of += ["mtx_assy.{}_pts_vel_mtx".format(surface["name"]) for surface in surfaces]
+        wrt = ["pts"] + ["{}_def_mesh".format(surface["name"]) for surface in surfaces]
+        totals = prob.compute_totals(of=of, wrt=wrt)
+        for surface in surfaces:
+            vel_mtx_name = "{}_pts_vel_mtx".format(surface["name"])
+            for var in wrt:
+                assert_near_equal(totals["fused." + vel_mtx_name, var], totals["mtx_assy." + vel_mtx_name, var], 1e-10)
+
+    def test_matches_vectors_pipeline(self):
+        self.check_matches_vectors_pipeline(get_default_surfaces())
+
+    def test_matches_vectors_pipeline_ground_effect(self):
+        self.check_matches_vectors_pipeline(get_ground_effect_surfaces())
+
+    def test_matches_vectors_pipeline_right_wing(self):
+        self.check_matches_vectors_pipeline(get_right_wing_surfaces())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 import unittest
 
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
 from openaerostruct.aerodynamics.vortex_mesh import VortexMesh
 from openaerostruct.utils.testing import run_test, get_default_surfaces, get_ground_effect_surfaces
 
@@ -23,6 +26,38 @@ class Test(unittest.TestCase):
 
         run_test(self, comp, atol=1e6)
 
+    def test_groundplane_vec_size(self):
+        surfaces = get_ground_effect_surfaces()
+        alpha = np.array([0.05, 0.05, 0.1])
+        height_agl = np.array([2.0, 10.0, 10.0])
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", VortexMesh(surfaces=surfaces, vec_size=3))
+        prob.setup(force_alloc_complex=True)
+        prob.set_val("comp.alpha", alpha)
+        prob.set_val("comp.height_agl", height_agl)
+        for surface in surfaces:
+            prob.set_val("comp.{}_def_mesh".format(surface["name"]), surface["mesh"])
+        prob.run_model()
+
+        # Each flight condition matches the vortex mesh of a single one
+        for i in range(3):
+            reference = om.Problem(reports=False)
+            reference.model.add_subsystem("comp", VortexMesh(surfaces=surfaces))
+            reference.setup()
+            reference.set_val("comp.alpha", alpha[i])
+            reference.set_val("comp.height_agl", height_agl[i])
+            for surface in surfaces:
+                reference.set_val("comp.{}_def_mesh".format(surface["name"]), surface["mesh"])
+            reference.run_model()
+
+            for surface in surfaces:
+                vortex_mesh_name = "comp.{}_vortex_mesh".format(surface["name"])
+                assert_near_equal(prob.get_val(vortex_mesh_name)[i], reference.get_val(vortex_mesh_name), 1e-14)
+
+        data = prob.check_partials(compact_print=True, out_stream=None, method="cs")
+        assert_check_partials(data, atol=1e-6, rtol=1e-6)
+
     def test_right_wing(self):
         surfaces = get_default_surfaces()
 
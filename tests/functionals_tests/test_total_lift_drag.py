@@ -17,6 +17,13 @@ class Test(unittest.TestCase):
 
         run_test(self, comp)
 
+    def test_vec_size(self):
+        surfaces = get_default_surfaces()
+
+        comp = TotalLiftDrag(surfaces=surfaces, vec_size=3)
+
+        run_test(self, comp, complex_flag=True, method="cs")
+
     # This is known to have some issues for sufficiently small values of S_ref_total
     # There is probably a derivative bug somewhere in the moment_coefficient.py calcs
     def test2(self):
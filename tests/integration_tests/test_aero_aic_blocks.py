@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.geometry.geometry_group import Geometry
+from openaerostruct.aerodynamics.aero_groups import AeroPoint
+from openaerostruct.meshing.mesh_generator import generate_mesh
+
+
+def build_problem(aic_blocks):
+    surfaces = []
+    for name, span, offset in [("wing", 10.0, 0.0), ("tail", 3.0, 6.0)]:
+        mesh_dict = {"num_y": 5, "num_x": 2, "wing_type": "rect", "symmetry": True, "span": span}
+        mesh = generate_mesh(mesh_dict)
+        mesh[:, :, 0] += offset
+
+        surfaces.append(
+            {
+                "name": name,
+                "symmetry": True,
+                "S_ref_type": "wetted",
+                "twist_cp": np.zeros(2),
+                "mesh": mesh,
+                "CL0": 0.0,
+                "CD0": 0.015,
+                "k_lam": 0.05,
+                "t_over_c_cp": np.array([0.15]),
+                "c_max_t": 0.303,
+                "with_viscous": True,
+                "with_wave": False,
+            }
+        )
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=5.0, units="deg")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("cg", val=np.zeros((3)), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+
+    point_name = "aero_point_0"
+    for surface in surfaces:
+        prob.model.add_subsystem(surface["name"], Geometry(surface=surface))
+
+    prob.model.add_subsystem(point_name, AeroPoint(surfaces=surfaces, aic_blocks=aic_blocks))
+
+    prob.model.connect("v", point_name + ".v")
+    prob.model.connect("alpha", point_name + ".alpha")
+    prob.model.connect("Mach_number", point_name + ".Mach_number")
+    prob.model.connect("re", point_name + ".re")
+    prob.model.connect("rho", point_name + ".rho")
+    prob.model.connect("cg", point_name + ".cg")
+
+    for surface in surfaces:
+        name = surface["name"]
+        prob.model.connect(name + ".mesh", point_name + "." + name + ".def_mesh")
+        prob.model.connect(name + ".mesh", point_name + ".aero_states." + name + "_def_mesh")
+        prob.model.connect(name + ".t_over_c", point_name + "." + name + "_perf.t_over_c")
+
+    prob.setup()
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        of = ["aero_point_0.CL", "aero_point_0.CD", "aero_point_0.CM"]
+        wrt = ["alpha", "wing.twist_cp", "tail.twist_cp"]
+
+        reference = build_problem(aic_blocks=False)
+        prob = build_problem(aic_blocks=True)
+
+        # Change the incidence of the tail only, as in a trim study, so that
+        # the blocks of the wing are reused
+        for twist in [0.0, 2.0, -1.0]:
+            for problem in [reference, prob]:
+                problem.set_val("tail.twist_cp", twist)
+                problem.run_model()
+
+            reference_totals = reference.compute_totals(of=of, wrt=wrt)
+            totals = prob.compute_totals(of=of, wrt=wrt)
+
+            for name in of:
+                assert_near_equal(prob[name], reference[name], 1e-10)
+
+            for key, val in totals.items():
+                assert_near_equal(val, reference_totals[key], 1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
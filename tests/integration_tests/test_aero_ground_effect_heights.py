@@ -0,0 +1,129 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.geometry.geometry_group import Geometry
+from openaerostruct.aerodynamics.aero_groups import AeroPoint
+
+
+alphas = np.array([3.0, 3.0, 3.0, 6.0])
+betas = np.array([0.0, 0.0, 4.0, 0.0])
+heights = np.array([2.0, 5.0, 5.0, 5.0])
+
+
+def get_surfaces():
+    surfaces = []
+    for name, offset in [("wing", 0.0), ("tail", 8.0)]:
+        mesh_dict = {"num_y": 5, "num_x": 3, "wing_type": "rect", "symmetry": True, "offset": np.array([offset, 0, 0])}
+
+        surfaces.append(
+            {
+                "name": name,
+                "symmetry": True,
+                "groundplane": True,
+                "S_ref_type": "wetted",
+                "twist_cp": np.array([1.0, 0.0]),
+                "mesh": generate_mesh(mesh_dict),
+                "CL0": 0.0,
+                "CD0": 0.015,
+                "k_lam": 0.05,
+                "t_over_c_cp": np.array([0.15]),
+                "c_max_t": 0.303,
+                "with_viscous": True,
+                "with_wave": False,
+            }
+        )
+    return surfaces
+
+
+def build_problem(vec_size):
+    surfaces = get_surfaces()
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=np.zeros(vec_size), units="deg")
+    indep_var_comp.add_output("beta", val=np.zeros(vec_size), units="deg")
+    indep_var_comp.add_output("height_agl", val=8000.0 * np.ones(vec_size), units="m")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("cg", val=np.array([1.0, 0.0, 0.0]), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+
+    for surface in surfaces:
+        prob.model.add_subsystem(surface["name"], Geometry(surface=surface))
+
+    point_name = "aero_point_0"
+    prob.model.add_subsystem(
+        point_name,
+        AeroPoint(surfaces=surfaces, vec_size=vec_size),
+        promotes_inputs=["v", "alpha", "beta", "height_agl", "Mach_number", "re", "rho", "cg"],
+    )
+
+    for surface in surfaces:
+        name = surface["name"]
+
+        prob.model.connect(name + ".mesh", point_name + "." + name + ".def_mesh")
+        prob.model.connect(name + ".mesh", point_name + ".aero_states." + name + "_def_mesh")
+        if vec_size > 1:
+            prob.model.connect(name + ".t_over_c", point_name + "." + name + "_t_over_c")
+        else:
+            prob.model.connect(name + ".t_over_c", point_name + "." + name + "_perf.t_over_c")
+
+    prob.setup()
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        prob = build_problem(len(alphas))
+        prob["alpha"] = alphas
+        prob["beta"] = betas
+        prob["height_agl"] = heights
+        prob.run_model()
+
+        of = ["aero_point_0.CL", "aero_point_0.CD", "aero_point_0.CM"]
+        wrt = ["alpha", "beta", "height_agl", "v", "wing.twist_cp", "tail.twist_cp"]
+        totals = prob.compute_totals(of=of, wrt=wrt)
+
+        # The factorization is shared by the flight conditions with the same
+        # alpha and height
+        self.assertEqual(len(prob.model.aero_point_0.aero_states.solve_matrix.lu), 3)
+
+        # The ground effect increases the lift as the height decreases
+        self.assertGreater(prob["aero_point_0.CL"][0], prob["aero_point_0.CL"][1])
+
+        reference = build_problem(1)
+        for i, (alpha, beta, height) in enumerate(zip(alphas, betas, heights)):
+            reference["alpha"] = alpha
+            reference["beta"] = beta
+            reference["height_agl"] = height
+            reference.run_model()
+            reference_totals = reference.compute_totals(of=of, wrt=wrt)
+
+            for name in of:
+                assert_near_equal(prob[name][i], reference[name], 1e-10)
+
+            for (of_name, wrt_name), val in reference_totals.items():
+                if wrt_name in ["alpha", "beta", "height_agl"]:
+                    # Each flight condition only depends on its own angles and height
+                    expected = np.zeros((val.shape[0], len(alphas)))
+                    expected[:, i] = val[:, 0]
+                else:
+                    expected = val
+                size = val.shape[0]
+                np.testing.assert_allclose(
+                    totals[of_name, wrt_name][i * size : (i + 1) * size], expected, rtol=1e-8, atol=1e-12
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
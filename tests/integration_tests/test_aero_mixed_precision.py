@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.geometry.geometry_group import Geometry
+from openaerostruct.aerodynamics.aero_groups import AeroPoint
+
+
+def build_problem(compressible=False, **aero_options):
+    mesh_dict = {"num_y": 11, "num_x": 3, "wing_type": "CRM", "symmetry": True, "num_twist_cp": 3}
+
+    mesh, twist_cp = generate_mesh(mesh_dict)
+
+    surface = {
+        "name": "wing",
+        "symmetry": True,
+        "S_ref_type": "wetted",
+        "twist_cp": twist_cp,
+        "mesh": mesh,
+        "CL0": 0.0,
+        "CD0": 0.015,
+        "k_lam": 0.05,
+        "t_over_c_cp": np.array([0.15]),
+        "c_max_t": 0.303,
+        "with_viscous": True,
+        "with_wave": False,
+    }
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=5.0, units="deg")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("cg", val=np.zeros((3)), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+    prob.model.add_subsystem("wing", Geometry(surface=surface))
+
+    point_name = "aero_point_0"
+    prob.model.add_subsystem(point_name, AeroPoint(surfaces=[surface], compressible=compressible, **aero_options))
+
+    prob.model.connect("v", point_name + ".v")
+    prob.model.connect("alpha", point_name + ".alpha")
+    prob.model.connect("Mach_number", point_name + ".Mach_number")
+    prob.model.connect("re", point_name + ".re")
+    prob.model.connect("rho", point_name + ".rho")
+    prob.model.connect("cg", point_name + ".cg")
+    prob.model.connect("wing.mesh", point_name + ".wing.def_mesh")
+    prob.model.connect("wing.mesh", point_name + ".aero_states.wing_def_mesh")
+    prob.model.connect("wing.t_over_c", point_name + ".wing_perf.t_over_c")
+
+    prob.setup()
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def check_against_double(self, compressible, **aero_options):
+        of = ["aero_point_0.wing_perf.CL", "aero_point_0.wing_perf.CDi", "aero_point_0.CM"]
+        wrt = ["alpha", "wing.twist_cp"]
+
+        reference = build_problem(compressible=compressible, **aero_options)
+        reference.run_model()
+        reference_totals = reference.compute_totals(of=of, wrt=wrt)
+
+        prob = build_problem(compressible=compressible, aic_precision="mixed", **aero_options)
+        prob.run_model()
+        totals = prob.compute_totals(of=of, wrt=wrt)
+
+        # The circulations solve the single precision AIC system to double
+        # precision, so only the assembly error remains
+        self.assertEqual(prob.model.aero_point_0.aero_states.solve_matrix.lu[0].dtype, np.float32)
+
+        for name in of:
+            assert_near_equal(prob[name], reference[name], 1e-6)
+
+        for key, val in totals.items():
+            assert_near_equal(val, reference_totals[key], 1e-6)
+
+    def test(self):
+        self.check_against_double(compressible=False)
+
+    def test_fused_aic(self):
+        self.check_against_double(compressible=False, fused_aic=True)
+
+    def test_compressible(self):
+        self.check_against_double(compressible=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
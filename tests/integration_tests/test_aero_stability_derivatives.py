@@ -0,0 +1,147 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_totals, assert_near_equal
+
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.geometry.geometry_group import Geometry
+from openaerostruct.aerodynamics.aero_groups import AeroPoint, StabilityDerivatives
+
+
+def get_surfaces(with_wave=False):
+    surfaces = []
+    for name, offset in [("wing", 0.0), ("tail", 8.0)]:
+        mesh_dict = {"num_y": 5, "num_x": 3, "wing_type": "rect", "symmetry": True, "offset": np.array([offset, 0, 0])}
+
+        surfaces.append(
+            {
+                "name": name,
+                "symmetry": True,
+                "S_ref_type": "wetted",
+                "twist_cp": np.array([1.0, 0.0]),
+                "mesh": generate_mesh(mesh_dict),
+                "CL0": 0.0,
+                "CD0": 0.015,
+                "k_lam": 0.05,
+                "t_over_c_cp": np.array([0.15]),
+                "c_max_t": 0.303,
+                "with_viscous": True,
+                "with_wave": with_wave,
+            }
+        )
+    return surfaces
+
+
+def build_problem(stability, with_wave=False):
+    surfaces = get_surfaces(with_wave)
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=4.0, units="deg")
+    indep_var_comp.add_output("beta", val=2.0, units="deg")
+    indep_var_comp.add_output("omega", val=np.array([0.05, 0.0, 0.0]), units="rad/s")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("cg", val=np.array([1.0, 0.0, 0.0]), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+
+    for surface in surfaces:
+        prob.model.add_subsystem(surface["name"], Geometry(surface=surface))
+
+    promotes_inputs = ["v", "alpha", "beta", "omega", "Mach_number", "re", "rho", "cg"]
+    if stability:
+        prob.model.add_subsystem("stability", StabilityDerivatives(surfaces=surfaces), promotes_inputs=promotes_inputs)
+        point_name = "stability.aero_point"
+    else:
+        prob.model.add_subsystem(
+            "stability", AeroPoint(surfaces=surfaces, rotational=True), promotes_inputs=promotes_inputs
+        )
+        point_name = "stability"
+
+    for surface in surfaces:
+        name = surface["name"]
+
+        prob.model.connect(name + ".mesh", point_name + "." + name + ".def_mesh")
+        prob.model.connect(name + ".mesh", point_name + ".aero_states." + name + "_def_mesh")
+        if stability:
+            prob.model.connect(name + ".t_over_c", "stability." + name + "_t_over_c")
+        else:
+            prob.model.connect(name + ".t_over_c", point_name + "." + name + "_perf.t_over_c")
+
+    prob.setup(force_alloc_complex=True)
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        self._check_derivs(False)
+
+    def test_wave_drag(self):
+        self._check_derivs(True)
+
+    def _check_derivs(self, with_wave):
+        prob = build_problem(True, with_wave)
+        prob.run_model()
+
+        # The derivatives of the circulations are solved with the
+        # factorization of the aero point instead of one of their own
+        self.assertIsNone(prob.model.stability.circulation_derivs.lu)
+
+        reference = build_problem(False, with_wave)
+        reference.run_model()
+
+        of = ["CL", "CD", "CM"]
+        for name in of:
+            assert_near_equal(prob["stability." + name], reference["stability." + name], 1e-10)
+
+        # The stability derivatives match the derivatives of the aero point
+        totals = reference.compute_totals(of=["stability." + name for name in of], wrt=["alpha", "beta", "omega"])
+        for name in of:
+            derivs = totals["stability." + name, "alpha"][:, 0]
+            np.testing.assert_allclose(prob["stability.{}_alpha".format(name)], derivs, rtol=1e-8, atol=1e-10)
+            derivs = totals["stability." + name, "beta"][:, 0]
+            np.testing.assert_allclose(prob["stability.{}_beta".format(name)], derivs, rtol=1e-8, atol=1e-10)
+            for ind, state in enumerate(["p", "q", "r"]):
+                derivs = totals["stability." + name, "omega"][:, ind]
+                np.testing.assert_allclose(prob["stability.{}_{}".format(name, state)], derivs, rtol=1e-8, atol=1e-10)
+
+    def test_totals(self):
+        prob = build_problem(True)
+        prob.run_model()
+
+        data = prob.check_totals(
+            of=["stability.CL_alpha", "stability.CM_alpha", "stability.CM_p"],
+            wrt=["wing.twist_cp", "tail.twist_cp", "alpha", "v"],
+            method="cs",
+            out_stream=None,
+        )
+        assert_check_totals(data, atol=1e-6, rtol=1e-5)
+
+    def test_totals_wave_drag(self):
+        prob = build_problem(True, with_wave=True)
+        prob.run_model()
+
+        data = prob.check_totals(
+            of=["stability.CD_alpha", "stability.CD_beta", "stability.CL_q", "stability.CM_r"],
+            wrt=["wing.twist_cp", "beta", "omega", "Mach_number", "cg"],
+            method="cs",
+            out_stream=None,
+        )
+        assert_check_totals(data, atol=1e-6, rtol=1e-5)
+
+    def test_ground_effect(self):
+        surfaces = get_surfaces()
+        surfaces[0]["groundplane"] = True
+        with self.assertRaises(ValueError):
+            om.Problem(StabilityDerivatives(surfaces=surfaces), reports=False).setup()
+
+
+if __name__ == "__main__":
+    unittest.main()
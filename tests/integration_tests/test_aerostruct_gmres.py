@@ -0,0 +1,113 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_near_equal
+
+from openaerostruct.meshing.mesh_generator import generate_mesh
+from openaerostruct.integration.aerostruct_groups import AerostructGeometry, AerostructPoint
+from openaerostruct.utils.constants import grav_constant
+
+
+def build_problem(**point_options):
+    mesh_dict = {"num_y": 9, "num_x": 3, "wing_type": "rect", "symmetry": True, "span": 40.0, "root_chord": 4.0}
+
+    mesh = generate_mesh(mesh_dict)
+
+    surface = {
+        "name": "wing",
+        "symmetry": True,
+        "S_ref_type": "wetted",
+        "fem_model_type": "tube",
+        "thickness_cp": np.ones((2)) * 0.1,
+        "twist_cp": np.array([0.0, 2.0]),
+        "mesh": mesh,
+        "CL0": 0.0,
+        "CD0": 0.015,
+        "k_lam": 0.05,
+        "t_over_c_cp": np.array([0.15]),
+        "c_max_t": 0.303,
+        "with_viscous": True,
+        "with_wave": False,
+        "E": 70.0e9,
+        "G": 30.0e9,
+        "yield": 500.0e6,
+        "safety_factor": 2.5,
+        "mrho": 3.0e3,
+        "fem_origin": 0.35,
+        "wing_weight_ratio": 2.0,
+        "struct_weight_relief": False,
+        "distributed_fuel_weight": False,
+        "exact_failure_constraint": False,
+    }
+
+    prob = om.Problem(reports=False)
+
+    indep_var_comp = om.IndepVarComp()
+    indep_var_comp.add_output("v", val=248.136, units="m/s")
+    indep_var_comp.add_output("alpha", val=9.0, units="deg")
+    indep_var_comp.add_output("Mach_number", val=0.84)
+    indep_var_comp.add_output("re", val=1.0e6, units="1/m")
+    indep_var_comp.add_output("rho", val=0.38, units="kg/m**3")
+    indep_var_comp.add_output("CT", val=grav_constant * 17.0e-6, units="1/s")
+    indep_var_comp.add_output("R", val=11.165e6, units="m")
+    indep_var_comp.add_output("W0", val=0.4 * 3e5, units="kg")
+    indep_var_comp.add_output("speed_of_sound", val=295.4, units="m/s")
+    indep_var_comp.add_output("load_factor", val=1.0)
+    indep_var_comp.add_output("empty_cg", val=np.zeros((3)), units="m")
+
+    prob.model.add_subsystem("prob_vars", indep_var_comp, promotes=["*"])
+    prob.model.add_subsystem("wing", AerostructGeometry(surface=surface))
+
+    point_name = "AS_point_0"
+    prob.model.add_subsystem(point_name, AerostructPoint(surfaces=[surface], **point_options))
+
+    for name in ["v", "alpha", "Mach_number", "re", "rho", "CT", "R", "W0", "speed_of_sound", "empty_cg"]:
+        prob.model.connect(name, point_name + "." + name)
+    prob.model.connect("load_factor", point_name + ".load_factor")
+
+    com_name = point_name + ".wing_perf"
+    prob.model.connect("wing.local_stiff_transformed", point_name + ".coupled.wing.local_stiff_transformed")
+    prob.model.connect("wing.nodes", point_name + ".coupled.wing.nodes")
+    prob.model.connect("wing.mesh", point_name + ".coupled.wing.mesh")
+    prob.model.connect("wing.radius", com_name + ".radius")
+    prob.model.connect("wing.thickness", com_name + ".thickness")
+    prob.model.connect("wing.nodes", com_name + ".nodes")
+    prob.model.connect("wing.cg_location", point_name + ".total_perf.wing_cg_location")
+    prob.model.connect("wing.structural_mass", point_name + ".total_perf.wing_structural_mass")
+    prob.model.connect("wing.t_over_c", com_name + ".t_over_c")
+
+    prob.setup()
+    prob.model.AS_point_0.coupled.nonlinear_solver.options["iprint"] = 0
+
+    return prob
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        of = ["AS_point_0.fuelburn", "AS_point_0.CL", "AS_point_0.CD", "AS_point_0.wing_perf.failure"]
+        wrt = ["alpha", "wing.twist_cp", "wing.thickness_cp"]
+
+        reference = build_problem()
+        reference.run_model()
+        reference_totals = reference.compute_totals(of=of, wrt=wrt)
+
+        for preconditioner in ["surface", "strip"]:
+            prob = build_problem(aic_solver="gmres", aic_preconditioner=preconditioner)
+            prob.run_model()
+
+            # The preconditioner is built once and reused through the coupling
+            # iterations
+            self.assertIsNotNone(prob.model.AS_point_0.coupled.aero_states.solve_matrix.precon_factors)
+
+            for name in of:
+                assert_near_equal(prob[name], reference[name], 1e-9)
+
+            totals = prob.compute_totals(of=of, wrt=wrt)
+            for key, val in totals.items():
+                assert_near_equal(val, reference_totals[key], 1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,10 @@
 import unittest
 
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_check_totals, assert_near_equal
+
 from openaerostruct.structures.fem import FEM
 from openaerostruct.utils.testing import run_test, get_default_surfaces
 
@@ -12,6 +17,121 @@ class Test(unittest.TestCase):
 
         run_test(self, comp)
 
+    def test_solvers(self):
+        # The banded and the sparse LU solvers agree for symmetric and full wings, where the
+        # boundary condition is at the tip and at the middle of the nodes
+        for surface in get_default_surfaces():
+            ny = surface["mesh"].shape[1]
+
+            rng = np.random.RandomState(314)
+            local_stiff = rng.random_sample((ny - 1, 12, 12))
+            local_stiff = local_stiff + local_stiff.transpose((0, 2, 1)) + 24.0 * np.eye(12)
+            forces = rng.random_sample(6 * ny + 6)
+
+            disp_aug = {}
+            for solver in ["banded", "splu"]:
+                prob = om.Problem(reports=False)
+                prob.model.add_subsystem("comp", FEM(surface=surface, solver=solver), promotes=["*"])
+                prob.setup(force_alloc_complex=True)
+                prob["local_stiff_transformed"] = local_stiff
+                prob["forces"] = forces
+                prob.run_model()
+
+                disp_aug[solver] = prob["disp_aug"].copy()
+
+                data = prob.check_partials(compact_print=True, method="cs", out_stream=None)
+                assert_check_partials(data, atol=1e-6, rtol=1e-8)
+
+            assert_near_equal(disp_aug["banded"], disp_aug["splu"], 1e-12)
+
+    def test_reuse(self):
+        surface = get_default_surfaces()[0]
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", FEM(surface=surface), promotes=["*"])
+        prob.setup()
+        prob.run_model()
+
+        comp = prob.model.comp
+        K = comp.assemble_CSC_K(comp._inputs)
+        lup = comp._lup
+
+        # The matrix and its factorization are kept while local_stiff_transformed is unchanged
+        prob["forces"] = 2.0
+        prob.run_model()
+        self.assertIs(comp.assemble_CSC_K(comp._inputs), K)
+        self.assertIs(comp._lup, lup)
+        assert_near_equal(K.dot(prob["disp_aug"]), prob["forces"], 1e-10)
+
+        prob["local_stiff_transformed"] = 2.0 * prob["local_stiff_transformed"]
+        prob.run_model()
+        self.assertIsNot(comp.assemble_CSC_K(comp._inputs), K)
+        self.assertIsNot(comp._lup, lup)
+        assert_near_equal(comp.assemble_CSC_K(comp._inputs).dot(prob["disp_aug"]), prob["forces"], 1e-10)
+
+    def test_apply_then_solve_linear(self):
+        # Residual evaluations at new inputs drop the factorization, which linearize rebuilds
+        # before solve_linear uses it
+        surface = get_default_surfaces()[0]
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", FEM(surface=surface), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        prob.run_model()
+
+        prob.check_partials(compact_print=True, method="cs", out_stream=None)
+        totals = prob.compute_totals(of=["disp_aug"], wrt=["forces"])
+        self.assertTrue(np.all(np.isfinite(totals["disp_aug", "forces"])))
+
+        prob["local_stiff_transformed"] = 2.0 * prob["local_stiff_transformed"]
+        prob.model.run_apply_nonlinear()
+        data = prob.check_totals(of=["disp_aug"], wrt=["forces"], method="cs", out_stream=None)
+        assert_check_totals(data, atol=1e-8, rtol=1e-6)
+
+    def test_vec_size(self):
+        surface = get_default_surfaces()[0]
+        ny = surface["mesh"].shape[1]
+        size = 6 * ny + 6
+        vec_size = 3
+
+        rng = np.random.RandomState(314)
+        local_stiff = rng.random_sample((ny - 1, 12, 12))
+        local_stiff = local_stiff + local_stiff.transpose((0, 2, 1)) + 24.0 * np.eye(12)
+        forces = rng.random_sample((vec_size, size))
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", FEM(surface=surface, vec_size=vec_size), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        prob["local_stiff_transformed"] = local_stiff
+        prob["forces"] = forces
+        prob.run_model()
+
+        # Each load case matches the solution of its own linear system
+        disp_aug = prob["disp_aug"].copy()
+        for j in range(vec_size):
+            single = om.Problem(reports=False)
+            single.model.add_subsystem("comp", FEM(surface=surface), promotes=["*"])
+            single.setup()
+            single["local_stiff_transformed"] = local_stiff
+            single["forces"] = forces[j]
+            single.run_model()
+
+            assert_near_equal(disp_aug[j], single["disp_aug"], 1e-10)
+
+        data = prob.check_partials(compact_print=True, method="cs", out_stream=None)
+        assert_check_partials(data, atol=1e-6, rtol=1e-8)
+
+        for mode in ["fwd", "rev"]:
+            prob.setup(mode=mode, force_alloc_complex=True)
+            prob["local_stiff_transformed"] = local_stiff
+            prob["forces"] = forces
+            prob.run_model()
+
+            data = prob.check_totals(
+                of=["disp_aug"], wrt=["forces", "local_stiff_transformed"], method="cs", out_stream=None
+            )
+            assert_check_totals(data, atol=1e-8, rtol=1e-6)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.structures.local_stiff import LocalStiff
+from openaerostruct.utils.testing import run_test, get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surface = get_default_surfaces()[0]
+        surface["E"] = 70.0e9
+        surface["G"] = 30.0e9
+
+        comp = LocalStiff(surface=surface)
+
+        run_test(self, comp, complex_flag=True, method="cs")
+
+    def test_values(self):
+        surface = get_default_surfaces()[0]
+        surface["E"] = E = 70.0e9
+        surface["G"] = G = 30.0e9
+        ny = surface["mesh"].shape[1]
+
+        rng = np.random.RandomState(314)
+        values = {name: rng.random_sample(ny - 1) + 0.5 for name in ["A", "J", "Iy", "Iz", "element_lengths"]}
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", LocalStiff(surface=surface), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        for name, value in values.items():
+            prob[name] = value
+        prob.run_model()
+
+        # Compare with the Euler-Bernoulli beam element stiffness matrix
+        A, J, Iy, Iz, L = [values[name] for name in ["A", "J", "Iy", "Iz", "element_lengths"]]
+        local_stiff = prob["local_stiff"]
+
+        assert_near_equal(local_stiff[:, 0, 0], E * A / L, 1e-12)
+        assert_near_equal(local_stiff[:, 0, 1], -E * A / L, 1e-12)
+        assert_near_equal(local_stiff[:, 3, 3], G * J / L, 1e-12)
+        assert_near_equal(local_stiff[:, 4, 4], 12 * E * Iy / L**3, 1e-12)
+        assert_near_equal(local_stiff[:, 4, 5], -6 * E * Iy / L**2, 1e-12)
+        assert_near_equal(local_stiff[:, 5, 5], 4 * E * Iy / L, 1e-12)
+        assert_near_equal(local_stiff[:, 5, 7], 2 * E * Iy / L, 1e-12)
+        assert_near_equal(local_stiff[:, 8, 11], 6 * E * Iz / L**2, 1e-12)
+        assert_near_equal(local_stiff[:, 10, 10], 12 * E * Iz / L**3, 1e-12)
+        assert_near_equal(local_stiff[:, 0, 4], np.zeros(ny - 1), 1e-12)
+        assert_near_equal(local_stiff, local_stiff.transpose((0, 2, 1)), 1e-12)
+
+        data = prob.check_partials(compact_print=True, method="cs", out_stream=None)
+        assert_check_partials(data, atol=1e-6, rtol=1e-10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+from scipy.linalg import block_diag
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials, assert_near_equal
+
+from openaerostruct.structures.local_stiff_transformed import LocalStiffTransformed
+from openaerostruct.utils.testing import run_test, get_default_surfaces
+
+
+class Test(unittest.TestCase):
+    def test(self):
+        surface = get_default_surfaces()[0]
+
+        comp = LocalStiffTransformed(surface=surface)
+
+        run_test(self, comp, complex_flag=True, method="cs")
+
+    def test_values(self):
+        surface = get_default_surfaces()[0]
+        ny = surface["mesh"].shape[1]
+
+        # Block diagonal transforms with four copies of a random rotation, as computed by Transform
+        rng = np.random.RandomState(314)
+        transform = np.zeros((ny - 1, 12, 12))
+        for ind in range(ny - 1):
+            rotation = np.linalg.qr(rng.random_sample((3, 3)))[0]
+            transform[ind] = block_diag(rotation, rotation, rotation, rotation)
+        local_stiff_permuted = rng.random_sample((ny - 1, 12, 12))
+
+        prob = om.Problem(reports=False)
+        prob.model.add_subsystem("comp", LocalStiffTransformed(surface=surface), promotes=["*"])
+        prob.setup(force_alloc_complex=True)
+        prob["transform"] = transform
+        prob["local_stiff_permuted"] = local_stiff_permuted
+        prob.run_model()
+
+        assert_near_equal(
+            prob["local_stiff_transformed"],
+            np.einsum("ilj,ilm,imk->ijk", transform, local_stiff_permuted, transform),
+            1e-12,
+        )
+
+        data = prob.check_partials(compact_print=True, method="cs", out_stream=None)
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+
+if __name__ == "__main__":
+    unittest.main()
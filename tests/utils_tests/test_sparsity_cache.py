@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_check_partials
+
+from openaerostruct.aerodynamics.eval_mtx import EvalVelMtx
+from openaerostruct.utils.sparsity_cache import (
+    cached_sparsity_pattern,
+    clear_sparsity_cache,
+    set_sparsity_cache_budget,
+    SPARSITY_CACHE_BUDGET,
+)
+from openaerostruct.utils.testing import get_default_surfaces
+
+
+@cached_sparsity_pattern
+def get_pattern(size):
+    return np.arange(size), np.zeros(size, int)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        clear_sparsity_cache()
+        self.addCleanup(set_sparsity_cache_budget, SPARSITY_CACHE_BUDGET)
+
+    def test_shared(self):
+        rows, cols = get_pattern(5)
+        self.assertIs(get_pattern(5)[0], rows)
+        self.assertIsNot(get_pattern(6)[0], rows)
+
+        # Several components may hold the arrays, so they can't be changed
+        self.assertFalse(rows.flags.writeable)
+        self.assertFalse(cols.flags.writeable)
+        with self.assertRaises(ValueError):
+            rows[0] = 1
+
+    def test_budget(self):
+        # Room for the patterns of two of the sizes only
+        nbytes = sum(array.nbytes for array in get_pattern.__wrapped__(10))
+        set_sparsity_cache_budget(2.5 * nbytes)
+
+        rows_10 = get_pattern(10)[0]
+        rows_11 = get_pattern(11)[0]
+        self.assertIs(get_pattern(10)[0], rows_10)
+
+        # The size 10 pattern is used more recently, so 11 is dropped first
+        get_pattern(12)
+        self.assertIs(get_pattern(10)[0], rows_10)
+        self.assertIsNot(get_pattern(11)[0], rows_11)
+
+        # Patterns larger than the budget are not kept
+        self.assertIsNot(get_pattern(1000)[0], get_pattern(1000)[0])
+
+    def test_disabled(self):
+        set_sparsity_cache_budget(0)
+        self.assertIsNot(get_pattern(5)[0], get_pattern(5)[0])
+
+    def test_components(self):
+        # Identical components share their patterns and still give the right partials
+        surfaces = get_default_surfaces()
+
+        prob = om.Problem(reports=False)
+        for name in ["point_0", "point_1"]:
+            prob.model.add_subsystem(name, EvalVelMtx(surfaces=surfaces, num_eval_points=2, eval_name="test_name"))
+        prob.setup(force_alloc_complex=True)
+
+        rng = np.random.RandomState(314)
+        for name in ["point_0", "point_1"]:
+            for surface in surfaces:
+                vectors_name = "{}.{}_test_name_vectors".format(name, surface["name"])
+                prob[vectors_name] = rng.random_sample(prob[vectors_name].shape)
+        prob.run_model()
+
+        data = prob.check_partials(compact_print=True, method="cs", out_stream=None)
+        assert_check_partials(data, atol=1e-5, rtol=1e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()